@@ -0,0 +1,265 @@
+"""
+Cache das respostas do motor de IA — endereçado pelo CONTEÚDO do pedido
+=======================================================================
+Reabrir o projeto da semana passada e rodar o pré-voo de novo perguntava TUDO
+ao modelo outra vez: a revisora relia a mesma página, o juiz reavaliava os
+mesmos candidatos, o enriquecimento renomeava os mesmos itens — segundos de
+CPU/GPU por chamada, na máquina da loja. Aqui a resposta fica num SQLite ao
+lado do banco (``banco/respostas_ia.db``), pela chave::
+
+    sha256(rota + JSON canônico do payload)
+
+O payload já leva o id do modelo, as mensagens, a temperatura, o teto de
+tokens — e, na visão, a imagem inteira (data URI): mudou um pixel, mudou a
+chave. Nada de chave por nome de arquivo.
+
+* **limites**: teto de bytes (despeja quem foi usado há mais tempo) e validade
+  em dias (resposta velha conta como falta e é apagada);
+* **fora do cache**: quem PRECISA de resposta nova (a prévia que testa o
+  modelo, as sugestões criativas que o dono pede "outra", o OCR — que tem
+  cache próprio, só de leituras válidas) roda dentro de
+  ``ponto_de_chamada(..., cache=False)``;
+* **por origem**: cada resposta guarda o rótulo de quem perguntou —
+  ``limpar("ocr")`` esquece só as daquele ponto;
+* **placar por ponto de chamada**: ``ponto_de_chamada("juiz")`` rotula os
+  pedidos; ``estatisticas()`` devolve acertos/faltas de cada rótulo.
+
+Falha do cache (disco cheio, arquivo travado) NUNCA derruba a chamada: vira
+falta e o modelo responde como sempre (I2).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+NOME_ARQUIVO = "respostas_ia.db"
+
+_ORIGEM_PADRAO = "outros"
+
+# (rótulo, usa_cache) do pedido em curso — contextvar: cada worker tem o seu
+_ponto: contextvars.ContextVar[tuple[str, bool]] = contextvars.ContextVar(
+    "ponto_de_chamada_ia", default=(_ORIGEM_PADRAO, True))
+
+_trava_placar = threading.Lock()
+_placar: dict[str, dict[str, int]] = {}
+
+
+@contextmanager
+def ponto_de_chamada(nome: str, *, cache: bool = True):
+    """Rotula os pedidos ao motor feitos aqui dentro (o placar do cache
+    conta pelo rótulo mais interno). ``cache=False``: o pedido vai SEMPRE
+    ao modelo e a resposta não é guardada — e vale para tudo aqui dentro
+    (um rótulo interno não religa o cache). Serve de decorador também."""
+    token = _ponto.set((nome, cache and _ponto.get()[1]))
+    try:
+        yield
+    finally:
+        _ponto.reset(token)
+
+
+def ponto_atual() -> tuple[str, bool]:
+    return _ponto.get()
+
+
+def _contar(origem: str, campo: str) -> None:
+    with _trava_placar:
+        p = _placar.setdefault(origem, {"acertos": 0, "faltas": 0,
+                                        "fora": 0})
+        p[campo] += 1
+
+
+def estatisticas() -> dict[str, dict]:
+    """Por ponto de chamada: acertos, faltas, pedidos fora do cache e a
+    taxa de acerto (acertos / (acertos + faltas))."""
+    with _trava_placar:
+        saida = {}
+        for origem, p in _placar.items():
+            consultas = p["acertos"] + p["faltas"]
+            saida[origem] = dict(p, taxa=(p["acertos"] / consultas
+                                          if consultas else 0.0))
+        return saida
+
+
+def zerar_estatisticas() -> None:
+    with _trava_placar:
+        _placar.clear()
+
+
+def chave_do_pedido(rota: str, payload: dict) -> str:
+    """O endereço da resposta: o pedido INTEIRO, canonizado."""
+    corpo = json.dumps(payload, sort_keys=True, ensure_ascii=False,
+                       separators=(",", ":"))
+    return hashlib.sha256(f"{rota}\n{corpo}".encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """O SQLite das respostas. Uma conexão por cache, serializada por trava
+    (as chamadas ao modelo duram segundos; a consulta, microssegundos)."""
+
+    def __init__(self, caminho: Path | str, *, max_bytes: int = 64 << 20,
+                 validade_s: float = 30 * 86400.0):
+        self.caminho = Path(caminho)
+        self.max_bytes = max_bytes
+        self.validade_s = validade_s
+        self._trava = threading.Lock()
+        self._con: sqlite3.Connection | None = None
+        self._morto = False           # falhou ao abrir: vira no-op (I2)
+
+    def _conexao(self) -> sqlite3.Connection | None:
+        if self._con is None and not self._morto:
+            try:
+                self.caminho.parent.mkdir(parents=True, exist_ok=True)
+                con = sqlite3.connect(self.caminho, check_same_thread=False,
+                                      timeout=5.0)
+                con.execute("PRAGMA journal_mode=WAL")
+                colunas = {c[1] for c in con.execute(
+                    "PRAGMA table_info(respostas)")}
+                if colunas and "origem" not in colunas:
+                    # o arquivo de antes não sabe de quem é cada resposta
+                    # (nem o OCR, que não devia estar ali): começa do zero
+                    con.execute("DROP TABLE respostas")
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS respostas ("
+                    " chave TEXT PRIMARY KEY, resposta TEXT NOT NULL,"
+                    " bytes INTEGER NOT NULL, criado REAL NOT NULL,"
+                    " usado REAL NOT NULL, origem TEXT NOT NULL)")
+                con.execute("CREATE INDEX IF NOT EXISTS ix_respostas_usado"
+                            " ON respostas (usado)")
+                con.commit()
+                self._con = con
+            except (sqlite3.Error, OSError):
+                self._morto = True
+        return self._con
+
+    def obter(self, chave: str) -> str | None:
+        with self._trava:
+            con = self._conexao()
+            if con is None:
+                return None
+            try:
+                linha = con.execute(
+                    "SELECT resposta, criado FROM respostas WHERE chave = ?",
+                    (chave,)).fetchone()
+                if linha is None:
+                    return None
+                agora = time.time()
+                if agora - linha[1] > self.validade_s:
+                    con.execute("DELETE FROM respostas WHERE chave = ?",
+                                (chave,))
+                    con.commit()
+                    return None
+                con.execute("UPDATE respostas SET usado = ? WHERE chave = ?",
+                            (agora, chave))
+                con.commit()
+                return linha[0]
+            except sqlite3.Error:
+                return None
+
+    def gravar(self, chave: str, resposta: str,
+               origem: str = _ORIGEM_PADRAO) -> None:
+        tamanho = len(resposta.encode("utf-8"))
+        if tamanho > self.max_bytes:
+            return
+        with self._trava:
+            con = self._conexao()
+            if con is None:
+                return
+            try:
+                agora = time.time()
+                con.execute(
+                    "INSERT OR REPLACE INTO respostas "
+                    "(chave, resposta, bytes, criado, usado, origem) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (chave, resposta, tamanho, agora, agora, origem))
+                self._aparar(con, agora)
+                con.commit()
+            except sqlite3.Error:
+                pass
+
+    def _aparar(self, con: sqlite3.Connection, agora: float) -> None:
+        """Apaga as vencidas e, acima do teto, as usadas há mais tempo."""
+        con.execute("DELETE FROM respostas WHERE criado < ?",
+                    (agora - self.validade_s,))
+        total = con.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excesso = total - self.max_bytes
+        vitimas, soma = [], 0
+        for chave, n in con.execute(
+                "SELECT chave, bytes FROM respostas ORDER BY usado"):
+            vitimas.append((chave,))
+            soma += n
+            if soma >= excesso:
+                break
+        con.executemany("DELETE FROM respostas WHERE chave = ?", vitimas)
+
+    def limpar(self, origem: str | None = None) -> int:
+        """Esquece as respostas (só as do ponto ``origem``, se dado).
+        Devolve quantas eram."""
+        with self._trava:
+            con = self._conexao()
+            if con is None:
+                return 0
+            try:
+                if origem is None:
+                    cur = con.execute("DELETE FROM respostas")
+                else:
+                    cur = con.execute("DELETE FROM respostas WHERE origem = ?",
+                                      (origem,))
+                con.commit()
+                return cur.rowcount
+            except sqlite3.Error:
+                return 0
+
+    def fechar(self) -> None:
+        with self._trava:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def responder(self, rota: str, payload: dict, perguntar) -> str:
+        """A resposta do cache ou, na falta, a de ``perguntar()`` (que fica
+        guardada). Conta no placar do ponto de chamada em curso."""
+        origem, usar = ponto_atual()
+        if not usar:
+            _contar(origem, "fora")
+            return perguntar()
+        chave = chave_do_pedido(rota, payload)
+        guardada = self.obter(chave)
+        if guardada is not None:
+            _contar(origem, "acertos")
+            return guardada
+        _contar(origem, "faltas")
+        resposta = perguntar()
+        self.gravar(chave, resposta, origem)
+        return resposta
+
+    def responder_em_fluxo(self, rota: str, payload: dict, perguntar):
+        """O ``responder`` de quem lê a resposta AOS PEDAÇOS: o acerto sai
+        num pedaço só; na falta, os pedaços de ``perguntar()`` passam direto
+        e a resposta inteira é guardada quando o fluxo termina."""
+        origem, usar = ponto_atual()
+        if not usar:
+            _contar(origem, "fora")
+            yield from perguntar()
+            return
+        chave = chave_do_pedido(rota, payload)
+        guardada = self.obter(chave)
+        if guardada is not None:
+            _contar(origem, "acertos")
+            yield guardada
+            return
+        _contar(origem, "faltas")
+        partes = []
+        for pedaco in perguntar():
+            partes.append(pedaco)
+            yield pedaco
+        self.gravar(chave, "".join(partes), origem)
@@ -8,12 +8,20 @@ outros usam a mesma API).
 Degradação elegante: se o servidor não responder, ``disponivel()`` devolve False
 e as chamadas levantam ``IAIndisponivel`` — as camadas de cima caem no modo
 determinístico, sem quebrar o app.
+
+Conexões: cada motor guarda UM ``httpx.Client`` com pool keep-alive (era um
+cliente novo — handshake TCP novo — a cada OCR/juiz/embedding), e a sonda de
+vida (``disponivel``) vale por alguns segundos, caindo no primeiro erro de
+conexão. ``motor_compartilhado`` dá o mesmo motor a todo o processo — com o
+cache de respostas (``app/ai/cache_respostas.py``) ligado.
 """
 
 from __future__ import annotations
 
 import base64
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import astuple, dataclass
 from pathlib import Path
 from typing import Protocol, runtime_checkable
 
@@ -22,6 +30,24 @@ class IAIndisponivel(RuntimeError):
     """O servidor de IA não está acessível (ou falhou na chamada)."""
 
 
+class IARecusou(IAIndisponivel):
+    """O servidor respondeu, mas RECUSOU o pedido (HTTP 400/413/422) — o
+    pedido é que não serve (ex.: lista de textos onde ele só aceita um)."""
+
+
+# os 4xx que dizem "ESTE pedido não serve" (formato, tamanho, conteúdo)
+RECUSAS_HTTP = frozenset({400, 413, 422})
+
+
+def _texto_do_erro(resposta) -> str:
+    """A mensagem do servidor num erro HTTP (curta; vazia se ilegível)."""
+    try:
+        resposta.read()
+        return resposta.text.strip()[:300]
+    except Exception:
+        return ""
+
+
 @dataclass
 class ConfigIA:
     """Endereço e modelos do servidor local (editável na tabela Config).
@@ -41,6 +67,21 @@ class ConfigIA:
     modelo_embeddings: str = "text-embedding-qwen3-embedding-0.6b"
     modelo_reserva: str = "google/gemma-4-e4b"
     timeout: float = 300.0
+    # textos por POST de embeddings: a tabela inteira vai em poucos
+    # pedidos (no LM Studio local o custo fixo de cada POST pesa mais
+    # que a inferência de uma linha curta)
+    lote_embeddings: int = 64
+    # perguntas por pedido no juiz da conciliação (1 = um pedido por
+    # linha): o prefixo do prompt é pago uma vez por lote
+    lote_juiz: int = 10
+    # conexões keep-alive no pool do motor = pedidos em voo ao mesmo
+    # tempo (o HTTP/1.1 do httpx é um pedido por conexão, sem pipelining);
+    # o LM Studio atende ~4 slots paralelos por padrão
+    conexoes: int = 4
+    # cache das respostas de chat/visão do motor compartilhado: teto em MB
+    # e validade em dias (0 MB = sem cache)
+    cache_mb: int = 64
+    cache_dias: int = 30
     # FASE 3 (passo 46): o interruptor MESTRE da aba IA — False desliga a
     # IA inteira (conciliação cai para o determinístico, OCR/enriquecer
     # indisponíveis) COM aviso nas telas, nunca em silêncio (I2).
@@ -101,57 +142,131 @@ class MotorIA(Protocol):
 
     def visao(self, imagem: str | Path, prompt: str, *, max_tokens: int = 2048) -> str: ...
 
-    def embeddings(self, textos: list[str]) -> list[list[float]]: ...
+    def embeddings(self, textos: list[str]) -> list[list[float]]:
+        """Um vetor por texto, na ordem — a lista inteira de uma vez (o
+        motor fatia em pedidos de ``lote_embeddings``)."""
+        ...
 
 
 class ClienteOpenAICompat:
     """Cliente real (httpx). Import de httpx é preguiçoso para não travar os testes."""
 
-    def __init__(self, config: ConfigIA | None = None):
+    # a sonda de vida vale por este tempo: viva, ninguém paga o GET /models
+    # de novo a cada item; morta, a volta do servidor aparece logo
+    VIDA_TTL_S = 30.0
+    MORTE_TTL_S = 5.0
+    SONDA_TIMEOUT_S = 3.0
+    # conexão ociosa no pool fecha depois disto (o LM Studio derruba antes
+    # de um minuto; reabrir é melhor que tropeçar num socket morto)
+    KEEPALIVE_S = 30.0
+
+    def __init__(self, config: ConfigIA | None = None, *, cache=None):
         # sem config explícita, vale a da tabela Config (tela Configurações)
         self.config = config or ConfigIA.da_config()
+        # ``CacheRespostas`` (ou None): chat e visão respondem de lá quando
+        # o MESMO pedido já foi feito
+        self.cache = cache
+        # o servidor já recusou embeddings em LISTA: daqui em diante, um
+        # texto por POST (sem pagar a recusa de novo a cada lote)
+        self._embeddings_um_a_um = False
+        self._trava = threading.Lock()
+        self._http = None             # o pool (criado no 1º pedido)
+        self._vida: tuple[bool, float] | None = None   # (viva?, vale até)
 
     def _client(self):
-        import httpx  # import preguiçoso
-
-        return httpx.Client(
-            base_url=self.config.base_url,
-            headers={"Authorization": f"Bearer {self.config.api_key}"},
-            timeout=self.config.timeout,
-        )
+        """O ``httpx.Client`` do motor — UM por motor, thread-safe, com
+        pool keep-alive; as rotas passam timeout próprio quando precisam."""
+        with self._trava:
+            if self._http is None:
+                import httpx  # import preguiçoso
+
+                n = max(1, self.config.conexoes)
+                self._http = httpx.Client(
+                    base_url=self.config.base_url,
+                    headers={"Authorization": f"Bearer {self.config.api_key}"},
+                    timeout=self.config.timeout,
+                    limits=httpx.Limits(max_connections=n,
+                                        max_keepalive_connections=n,
+                                        keepalive_expiry=self.KEEPALIVE_S),
+                )
+            return self._http
+
+    def fechar(self) -> None:
+        """Fecha o pool (o próximo pedido abre outro)."""
+        with self._trava:
+            http, self._http = self._http, None
+            self._vida = None
+        if http is not None:
+            http.close()
+
+    def _marcar_vida(self, viva: bool | None) -> None:
+        """None = a sonda volta a valer só depois de perguntar de novo."""
+        with self._trava:
+            if viva is None:
+                self._vida = None
+            else:
+                ttl = self.VIDA_TTL_S if viva else self.MORTE_TTL_S
+                self._vida = (viva, time.monotonic() + ttl)
 
     def disponivel(self) -> bool:
         if not self.config.usar:      # passo 46: o interruptor mestre manda
             return False
+        with self._trava:
+            vida = self._vida
+        if vida is not None and time.monotonic() < vida[1]:
+            return vida[0]
         try:
-            import httpx
-
-            with httpx.Client(base_url=self.config.base_url, timeout=3.0) as c:
-                r = c.get("/models")
-                return r.status_code == 200
+            r = self._client().get("/models", timeout=self.SONDA_TIMEOUT_S)
+            viva = r.status_code == 200
         except Exception:
-            return False
+            viva = False
+        self._marcar_vida(viva)
+        return viva
 
     def listar_modelos(self) -> list[str]:
         """IDs dos modelos carregados no servidor (para conferir/ajustar o ConfigIA)."""
         try:
-            import httpx
-
-            with httpx.Client(base_url=self.config.base_url, timeout=5.0) as c:
-                r = c.get("/models")
-                r.raise_for_status()
-                return [m["id"] for m in r.json().get("data", [])]
+            r = self._client().get("/models", timeout=5.0)
+            r.raise_for_status()
+            return [m["id"] for m in r.json().get("data", [])]
         except Exception:
             return []
 
+    def _erro(self, exc: Exception) -> IAIndisponivel:
+        """A exceção de uma chamada que falhou. Só os 4xx de
+        ``RECUSAS_HTTP`` são RECUSA do pedido (quem chama tenta outro
+        formato); 401/403 (chave), 404 (modelo ou rota errados) e os
+        demais 4xx são configuração — indisponível, com o que o servidor
+        disse, e sem derrubar a sonda (o servidor está de pé)."""
+        resposta = getattr(exc, "response", None)
+        status = getattr(resposta, "status_code", None)
+        if status is not None and 400 <= status < 500:
+            if status in RECUSAS_HTTP:
+                return IARecusou(str(exc))
+            return IAIndisponivel(f"{exc} — {_texto_do_erro(resposta)}")
+        # o servidor caiu (ou engasgou): a sonda em cache não vale mais
+        self._marcar_vida(None)
+        return IAIndisponivel(str(exc))
+
     def _post(self, rota: str, payload: dict) -> dict:
         try:
-            with self._client() as c:
-                r = c.post(rota, json=payload)
-                r.raise_for_status()
-                return r.json()
+            r = self._client().post(rota, json=payload)
+            r.raise_for_status()
+            dados = r.json()
         except Exception as exc:  # rede, timeout, HTTP...
-            raise IAIndisponivel(str(exc)) from exc
+            raise self._erro(exc) from exc
+        self._marcar_vida(True)       # resposta é prova de vida
+        return dados
+
+    def _conteudo(self, payload: dict) -> str:
+        """O texto da resposta de ``/chat/completions`` — do cache quando
+        o mesmo pedido já foi respondido."""
+        def perguntar() -> str:
+            dados = self._post("/chat/completions", payload)
+            return dados["choices"][0]["message"]["content"]
+        if self.cache is None:
+            return perguntar()
+        return self.cache.responder("/chat/completions", payload, perguntar)
 
     def chat(self, mensagens, *, temperatura=0.2, max_tokens=1024, formato_json=False) -> str:
         # Obs.: não enviamos response_format — servidores divergem (LM Studio exige
@@ -162,10 +277,9 @@ class ClienteOpenAICompat:
             "temperature": temperatura,
             "max_tokens": max_tokens,
         }
-        dados = self._post("/chat/completions", payload)
-        return dados["choices"][0]["message"]["content"]
+        return self._conteudo(payload)
 
-    def visao(self, imagem, prompt, *, max_tokens=2048) -> str:
+    def _payload_visao(self, imagem, prompt, max_tokens: int) -> dict:
         dados_uri = _imagem_para_data_uri(Path(imagem))
         mensagens = [
             {
@@ -176,19 +290,117 @@ class ClienteOpenAICompat:
                 ],
             }
         ]
-        payload = {
+        return {
             "model": self.config.modelo_visao,
             "messages": mensagens,
             "temperature": 0.0,
             "max_tokens": max_tokens,
         }
-        dados = self._post("/chat/completions", payload)
-        return dados["choices"][0]["message"]["content"]
+
+    def visao(self, imagem, prompt, *, max_tokens=2048) -> str:
+        return self._conteudo(self._payload_visao(imagem, prompt, max_tokens))
+
+    def visao_em_fluxo(self, imagem, prompt, *, max_tokens=2048):
+        """A ``visao`` lida AOS PEDAÇOS (SSE, ``"stream": true``): gera o
+        texto conforme o modelo escreve — o OCR entrega a 1ª linha da
+        tabela sem esperar a última. Mesmo cache e mesmos erros da
+        ``visao``; concatenados, os pedaços são a resposta inteira."""
+        payload = self._payload_visao(imagem, prompt, max_tokens)
+        if self.cache is None:
+            yield from self._fluxo("/chat/completions", payload)
+        else:
+            yield from self.cache.responder_em_fluxo(
+                "/chat/completions", payload,
+                lambda: self._fluxo("/chat/completions", payload))
+
+    def _fluxo(self, rota: str, payload: dict):
+        import json
+        try:
+            with self._client().stream(
+                    "POST", rota, json=dict(payload, stream=True)) as r:
+                if r.is_error:
+                    r.read()              # a mensagem do servidor, p/ o erro
+                r.raise_for_status()
+                self._marcar_vida(True)
+                if "text/event-stream" not in r.headers.get(
+                        "content-type", "text/event-stream"):
+                    # servidor que ignora o "stream": a resposta inteira
+                    r.read()
+                    yield r.json()["choices"][0]["message"]["content"]
+                    return
+                for linha in r.iter_lines():
+                    if not linha.startswith("data:"):
+                        continue          # comentário/keep-alive do SSE
+                    dado = linha[5:].strip()
+                    if dado == "[DONE]":
+                        break
+                    escolha = (json.loads(dado).get("choices") or [{}])[0]
+                    pedaco = (escolha.get("delta") or {}).get("content")
+                    if pedaco:
+                        yield pedaco
+        except Exception as exc:  # rede, timeout, HTTP, SSE truncado...
+            raise self._erro(exc) from exc
 
     def embeddings(self, textos: list[str]) -> list[list[float]]:
-        payload = {"model": self.config.modelo_embeddings, "input": textos}
+        """Em pedidos de até ``lote_embeddings`` textos. Servidor que
+        recusa a lista (400/413/422) ou devolve vetores faltando cai para
+        um texto por POST — e fica assim enquanto o cliente viver. Chave
+        ou modelo errados (401/404…) sobem como ``IAIndisponivel``."""
+        passo = max(1, self.config.lote_embeddings)
+        saida: list[list[float]] = []
+        for i in range(0, len(textos), passo):
+            fatia = textos[i:i + passo]
+            if len(fatia) > 1 and not self._embeddings_um_a_um:
+                try:
+                    vecs = self._post_embeddings(fatia)
+                    if len(vecs) == len(fatia):
+                        saida.extend(vecs)
+                        continue
+                except IARecusou:
+                    pass
+                self._embeddings_um_a_um = True
+            for texto in fatia:
+                saida.extend(self._post_embeddings([texto]))
+        return saida
+
+    def _post_embeddings(self, textos: list[str]) -> list[list[float]]:
+        # input de UM texto vai como string: o formato que todo servidor
+        # compatível aceita, inclusive os que recusam a lista
+        entrada: str | list[str] = textos[0] if len(textos) == 1 else textos
+        payload = {"model": self.config.modelo_embeddings, "input": entrada}
         dados = self._post("/embeddings", payload)
-        return [item["embedding"] for item in dados["data"]]
+        # a API numera cada vetor (``index``): é ele que devolve a ordem
+        itens = sorted(enumerate(dados["data"]),
+                       key=lambda kv: kv[1].get("index", kv[0]))
+        return [item["embedding"] for _i, item in itens]
+
+
+_motores: dict[tuple, ClienteOpenAICompat] = {}
+_motores_trava = threading.Lock()
+
+
+def motor_compartilhado(config: ConfigIA | None = None) -> ClienteOpenAICompat:
+    """O motor do PROCESSO para esta config (a da tabela Config sem
+    argumento) — o pool e a sonda de vida sobrevivem entre importações,
+    enriquecimentos e revisões; mudar URL/modelo na tela dá outro motor."""
+    config = config or ConfigIA.da_config()
+    chave = astuple(config)
+    with _motores_trava:
+        motor = _motores.get(chave)
+        if motor is None:
+            motor = _motores[chave] = ClienteOpenAICompat(
+                config, cache=_cache_da_config(config))
+        return motor
+
+
+def _cache_da_config(config: ConfigIA):
+    if config.cache_mb <= 0:
+        return None
+    from app.ai.cache_respostas import NOME_ARQUIVO, CacheRespostas
+    from app.core.paths import SystemRoot
+    return CacheRespostas(SystemRoot().banco / NOME_ARQUIVO,
+                          max_bytes=config.cache_mb << 20,
+                          validade_s=config.cache_dias * 86400.0)
 
 
 def _imagem_para_data_uri(caminho: Path) -> str:
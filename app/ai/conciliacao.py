@@ -23,7 +23,7 @@ from __future__ import annotations
 import json
 import math
 import re
-import unicodedata
+import struct
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -31,7 +31,11 @@ from rapidfuzz import fuzz
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.ai.client import IAIndisponivel, MotorIA
+from app.ai.cache_respostas import ponto_de_chamada
+from app.ai.client import ConfigIA, IAIndisponivel, IARecusou, MotorIA
+from app.core.chaves_conciliacao import (PESO_RE, chave_comparacao, chave_do_alias,
+                                         chave_do_nome, sincronizar_chaves,
+                                         sinonimos_da_config)
 from app.core.models import Produto, ProdutoAlias
 from app.core.repositories import ProdutoRepositorio
 from app.core.sanitize import REGRAS_PADRAO, RegrasSanitizacao, sanitizar
@@ -43,15 +47,9 @@ class Semaforo(str, Enum):
     VERMELHO = "VERMELHO"  # novo
 
 
-# Peso normalizado (ex.: "1,5L", "380g") — removido antes de comparar, pois a
-# unidade compartilhada infla o score e casa produtos diferentes.
-# Rodada JM (B1.1): a tabela real do dono escreve "5 Kgs", "1 LT",
-# "5 LTS" — os PLURAIS/grafias cruas casam também (longas antes das
-# curtas: "kgs" antes de "kg", senão o \b final barra o plural).
-_PESO_RE = re.compile(
-    r"\b\d+(?:[.,]\d+)?\s*"
-    r"(?:kgs?|kilos?|quilos?|mgs?|mls?|grs?|lts?|litros?|g|l)\b",
-    re.IGNORECASE)
+# O peso normalizado ("1,5L", "380g", "5 Kgs") e a chave de comparação
+# moram em `app/core/chaves_conciliacao.py` — a chave é GRAVADA no banco.
+_PESO_RE = PESO_RE
 
 # fator para a base canônica (g / ml) — o desempate de irmãos compara
 # grandezas na mesma régua ("1 kg" == "1000 g")
@@ -114,6 +112,11 @@ _GENERICOS = frozenset({
 })
 
 
+# letras do prefixo que identifica a palavra no bloco da conciliação —
+# abreviação ("refri", "deterg") e erro no fim ("nutela") caem juntos
+PREFIXO_BLOCO = 4
+
+
 def _tokens_significativos(chave: str) -> set[str]:
     """Tokens que carregam identidade (marca, tipo) numa chave de comparação."""
     return {t for t in chave.split()
@@ -149,16 +152,7 @@ def _divergencia(entrada_chave: str, candidato_chave: str) -> set[str]:
     return sobra
 
 
-def _chave_comparacao(texto: str) -> str:
-    """Normaliza para o fuzzy: remove peso, acentos e pontuação; minúsculo.
-
-    Casar deve ser insensível a acento e à medida — o que importa é o
-    tipo+marca. Ex.: 'CAFE PILAO 500G' e 'Café Pilão ... 500g' viram a mesma base.
-    """
-    t = _PESO_RE.sub(" ", texto)
-    t = "".join(c for c in unicodedata.normalize("NFKD", t) if not unicodedata.combining(c))
-    t = re.sub(r"[^a-z0-9 ]", " ", t.lower())
-    return re.sub(r"\s+", " ", t).strip()
+_chave_comparacao = chave_comparacao
 
 
 def _cosseno(a: list[float], b: list[float]) -> float:
@@ -174,6 +168,19 @@ class Candidato:
     score: float           # 0..100
 
 
+@dataclass
+class _MatrizFuzzy:
+    """O corpus do fuzzy em forma de matriz: as chaves (colunas do
+    ``cdist``), os produtos na ordem do corpus e, ordenados por produto,
+    os pares produto→chave que o ``reduceat`` agrupa."""
+
+    chaves: list[str]
+    pids: list[int]
+    coluna: dict[int, int]          # pid -> posição em ``pids``
+    chave_do_par: object            # numpy int64: a chave de cada par
+    inicios: object                 # numpy int64: 1º par de cada produto
+
+
 @dataclass
 class LimiaresConciliacao:
     verde: float = 88.0    # score >= verde  -> VERDE
@@ -239,6 +246,10 @@ class Conciliador:
         self.session = session
         self.repo = ProdutoRepositorio(session)
         self.motor = motor            # None => sem "juiz" IA (só exato/fuzzy)
+        # perguntas por pedido do juiz em lote (``ConfigIA.lote_juiz``;
+        # motor sem config — o fake — fica com o padrão)
+        self.lote_juiz = max(1, int(getattr(
+            getattr(motor, "config", None), "lote_juiz", ConfigIA.lote_juiz)))
         self.embedder = embedder      # None => sem camada de significado (só fuzzy)
         self.peso_sem = peso_semantico
         # sem limiares explícitos, valem os da Config (ajustáveis na tela —
@@ -246,32 +257,53 @@ class Conciliador:
         self.limiares = limiares or limiares_de_config(session)
         self.regras = regras
         self._corpus_cache: dict[str, int] | None = None   # 1× por lote (F12)
+        self._matriz_cache: _MatrizFuzzy | None = None     # idem, p/ o cdist
+        self._blocos_cache = None     # (token -> produtos, coluna de cada id)
+        self._textos_corpus: list[tuple[int, str, str, str | None]] = []
+        self._colunas_sem = None      # índice de significado -> colunas
+        # os candidatos que o ``conciliar_lote`` já calculou em matriz
+        self._candidatos_prontos: dict[str, list[Candidato]] = {}
+        self._exatos_prontos: dict[str, Produto | None] = {}
+        # os produtos já carregados (``carregar_em_lote``, com categoria
+        # e aliases) — o desempate e o veredito leem daqui, sem 1 SELECT
+        # por candidato
+        self._produtos: dict[int, Produto] = {}
         # Rodada JM (B1.6): a VIDA do motor é checada 1× por lote — era
         # 1 GET (timeout 3 s) por item ambíguo; em 42 itens do Jornal,
         # minutos só perguntando se o LM Studio está de pé
         self._motor_vivo: bool | None = None
         self._status = status_cb or (lambda _m: None)
-        # o índice em memória: (ids, matriz numpy L2-normalizada) ou None
-        self._indice_cache: tuple[list[int], object] | None = None
+        # o índice de significado (``_indice``) ou None
+        self._indice_cache = None
         self._indice_pronto = False
         self.avisos: list[str] = []   # I2: degradação NUNCA é muda
         self._embedder_morto = False  # 1ª falha desliga o lote inteiro
         # OS F11.5 #47/#81 (R-086): os sinônimos regionais (padrão + os do
         # dono na Config) entram na chave de comparação — "macaxeira" casa
         # "mandioca" no fuzzy. Falha de leitura degrada para o padrão (I2).
-        try:
-            from app.core.aprendizado import grupos_com_extras
-            from app.core.repositories import ConfigRepositorio
-            extras = ConfigRepositorio(session).get("sinonimos.regionais", [])
-            self._sinonimos = grupos_com_extras(extras)
-        except Exception:
-            from app.core.aprendizado import SINONIMOS_REGIONAIS_PADRAO
-            self._sinonimos = SINONIMOS_REGIONAIS_PADRAO
+        self._sinonimos = sinonimos_da_config(session)
+        # as chaves do acervo vêm GRAVADAS do banco (só com as regras
+        # padrão — as que o repositório usa ao gravar); None = a decidir
+        self._chaves_gravadas: bool | None = None
 
     def _chave(self, texto: str) -> str:
         """A chave de comparação já CANONIZADA pelos sinônimos regionais."""
-        from app.core.aprendizado import canonizar_sinonimos
-        return _chave_comparacao(canonizar_sinonimos(texto, self._sinonimos))
+        return chave_do_nome(texto, self._sinonimos)
+
+    def _usar_chaves_gravadas(self) -> bool:
+        """Põe as chaves gravadas em dia (1× por lote; a 1ª depois de
+        mudar regra/sinônimo refaz todas) e diz se dá para lê-las."""
+        if self._chaves_gravadas is None:
+            self._chaves_gravadas = (
+                self.regras == REGRAS_PADRAO
+                and sincronizar_chaves(self.session, self._sinonimos))
+        return self._chaves_gravadas
+
+    def _chave_do_produto(self, p: Produto) -> str:
+        """A chave do cadastro: a gravada quando vale, senão calculada."""
+        if p.chave_conciliacao and self._usar_chaves_gravadas():
+            return p.chave_conciliacao
+        return self._chave(p.nome_sanitizado or "")
 
     # --- a guarda da marca (VICESIMUS-QUARTUS §2.2) ------------------------------
 
@@ -356,21 +388,32 @@ class Conciliador:
             corpus: dict[str, list[int]] = {}
             # F13/E5 (CI-01): a conciliação não enxergava a LIXEIRA —
             # produto excluído (soft-delete) voltava VERDE, calado
-            for pid, nome in self.session.execute(
-                select(Produto.id, Produto.nome_sanitizado)
+            textos: list[tuple[int, str, str, str | None]] = []
+            # as chaves GRAVADAS (leitura pura); linha sem chave (gravada
+            # agora por outro processo) ou regras fora do padrão: calcula
+            gravadas = self._usar_chaves_gravadas()
+            for pid, nome, marca, chave in self.session.execute(
+                select(Produto.id, Produto.nome_sanitizado, Produto.marca,
+                       Produto.chave_conciliacao)
                 .where(Produto.excluido_em.is_(None))
             ).all():
-                grupo = corpus.setdefault(self._chave(nome), [])
+                if not gravadas or chave is None:
+                    chave = self._chave(nome)
+                textos.append((pid, chave, nome or "", marca))
+                grupo = corpus.setdefault(chave, [])
                 if pid not in grupo:
                     grupo.append(pid)
-            for pid, alias in self.session.execute(
-                select(ProdutoAlias.produto_id, ProdutoAlias.alias_raw)
+            for pid, alias, chave in self.session.execute(
+                select(ProdutoAlias.produto_id, ProdutoAlias.alias_raw,
+                       ProdutoAlias.chave_conciliacao)
             ).all():
-                chave = self._chave(
-                    sanitizar(alias, self.regras).nome_sanitizado)
+                if not gravadas or chave is None:
+                    chave = chave_do_alias(alias, self._sinonimos, self.regras)
+                textos.append((pid, chave, alias, None))
                 grupo = corpus.setdefault(chave, [])
                 if pid not in grupo:
                     grupo.append(pid)
+            self._textos_corpus = textos          # p/ o índice de blocos
             self._corpus_cache = corpus
         return self._corpus_cache
 
@@ -402,34 +445,105 @@ class Conciliador:
         if aviso not in self.avisos:
             self.avisos.append(aviso)
 
-    def _indice(self) -> tuple[list[int], object] | None:
-        """O índice de significado do acervo: (ids, matriz numpy float32
-        L2-normalizada, uma linha por produto), vindo da tabela
-        ``produto_embeddings``. Embeda SÓ o que falta/mudou (por CHAVE), em
-        lotes, UMA vez — depois é leitura + matemática local. Falha do
-        embedder → None + aviso (I2), e o fuzzy segura o lote sozinho."""
+    def _carimbo_indice(self, modelo: str) -> dict | None:
+        """O que decide se o arquivo do índice ainda vale: o modelo, a
+        versão das chaves e o acervo (quantos produtos, o
+        ``atualizado_em`` mais novo). None = chaves em memória (regras
+        fora do padrão): o arquivo não se aplica."""
+        if not self._usar_chaves_gravadas():
+            return None
+        from sqlalchemy import func
+
+        from app.core.chaves_conciliacao import versao_das_chaves
+        n, recente = self.session.execute(
+            select(func.count(Produto.id), func.max(Produto.atualizado_em))
+        ).one()
+        return {"modelo": modelo,
+                "chaves": versao_das_chaves(self._sinonimos),
+                "produtos": int(n or 0),
+                "atualizado_em": str(recente) if recente is not None else None}
+
+    def _carimbo_blocos(self) -> dict | None:
+        """O carimbo do arquivo de blocos: o do acervo (``_carimbo_indice``,
+        sem modelo) + os aliases (também viram tokens), o vocabulário de
+        marcas (decide os ``m:``) e o prefixo do bloco."""
+        carimbo = self._carimbo_indice("")
+        if carimbo is None:
+            return None
+        import hashlib
+
+        from sqlalchemy import func
+        del carimbo["modelo"]
+        n, ultimo = self.session.execute(
+            select(func.count(ProdutoAlias.id), func.max(ProdutoAlias.id))
+        ).one()
+        marcas = "\n".join(sorted(self._vocab_marcas()))
+        carimbo.update(
+            aliases=[int(n or 0), int(ultimo or 0)],
+            marcas=hashlib.sha1(marcas.encode("utf-8")).hexdigest(),
+            prefixo=PREFIXO_BLOCO)
+        return carimbo
+
+    def _pasta_indice(self):
+        from app.ai.indice_significado import pasta_do_banco
+        try:
+            return pasta_do_banco(self.session.get_bind().url.database)
+        except Exception:
+            return None
+
+    def _pasta_blocos(self):
+        from app.ai.indice_blocos import pasta_do_banco
+        try:
+            return pasta_do_banco(self.session.get_bind().url.database)
+        except Exception:
+            return None
+
+    def _indice(self):
+        """O índice de significado do acervo: um ``IndiceSignificado``
+        (ids + matriz float32 L2-normalizada, uma linha por produto) —
+        ou, sem numpy, ``{pid: vetor}``. Vem do ARQUIVO ao lado do banco,
+        mapeado, enquanto o carimbo bate (milissegundos); senão, da
+        tabela ``produto_embeddings``, embedando SÓ o que falta/mudou
+        (por CHAVE), em lotes, e o arquivo é refeito. Falha do embedder
+        → None + aviso (I2), e o fuzzy segura o lote sozinho."""
         if self._indice_pronto:
             return self._indice_cache
         self._indice_pronto = True
         self._indice_cache = None
         if self.embedder is None or self._embedder_morto:
             return None
-        import struct
+        try:
+            from app.ai import indice_significado
+        except ImportError:
+            indice_significado = None
 
         from app.core.models import EmbeddingProduto
         modelo = self._modelo_embed()
+        carimbo = pasta = None
+        if indice_significado is not None:
+            carimbo = self._carimbo_indice(modelo)
+            pasta = self._pasta_indice() if carimbo is not None else None
+            pronto = indice_significado.carregar(pasta, carimbo)
+            if pronto is not None:
+                self._indice_cache = pronto if len(pronto) else None
+                return self._indice_cache
         chaves: dict[int, str] = {}
-        for pid, nome in self.session.execute(
-                select(Produto.id, Produto.nome_sanitizado)).all():
-            chaves[pid] = self._chave(nome or "")
+        gravadas = self._usar_chaves_gravadas()
+        for pid, nome, chave in self.session.execute(
+                select(Produto.id, Produto.nome_sanitizado,
+                       Produto.chave_conciliacao)).all():
+            chaves[pid] = (chave if gravadas and chave is not None
+                           else self._chave(nome or ""))
         if not chaves:
             return None
-        prontos: dict[int, list[float]] = {}
-        for row in self.session.execute(select(EmbeddingProduto)).scalars():
-            if (row.modelo == modelo and chaves.get(row.produto_id)
-                    == row.chave and row.dim):
-                prontos[row.produto_id] = list(struct.unpack(
-                    f"<{row.dim}f", row.vetor))
+        # o blob cru de cada vetor; o numpy lê sem desempacotar (abaixo)
+        prontos: dict[int, bytes | list[float]] = {}
+        for pid, mod, chave, dim, vetor in self.session.execute(
+                select(EmbeddingProduto.produto_id, EmbeddingProduto.modelo,
+                       EmbeddingProduto.chave, EmbeddingProduto.dim,
+                       EmbeddingProduto.vetor)).all():
+            if mod == modelo and chaves.get(pid) == chave and dim:
+                prontos[pid] = vetor
         faltam = [pid for pid in chaves if pid not in prontos]
         try:
             for i in range(0, len(faltam), self.LOTE_EMBED):
@@ -454,32 +568,109 @@ class Conciliador:
         except Exception as exc:
             self._embedder_falhou(exc)
             return None
-        try:
-            import numpy as np
-            ids = list(prontos)
-            m = np.asarray([prontos[p] for p in ids], dtype=np.float32)
-            normas = np.linalg.norm(m, axis=1, keepdims=True)
-            normas[normas == 0] = 1.0
-            self._indice_cache = (ids, m / normas)
-        except ImportError:
-            self._indice_cache = (list(prontos), prontos)  # fallback puro
+        if indice_significado is None:             # fallback puro
+            self._indice_cache = {
+                pid: (list(struct.unpack(f"<{len(v) // 4}f", v))
+                      if isinstance(v, bytes) else v)
+                for pid, v in prontos.items()}
+            return self._indice_cache
+        if not prontos:
+            return None
+        import numpy as np
+        ids = list(prontos)
+        primeiro = prontos[ids[0]]
+        dim = (len(primeiro) // 4 if isinstance(primeiro, bytes)
+               else len(primeiro))
+        m = np.empty((len(ids), dim), dtype=np.float32)
+        for i, pid in enumerate(ids):
+            v = prontos[pid]
+            m[i] = (np.frombuffer(v, dtype="<f4") if isinstance(v, bytes)
+                    else v)
+        indice = indice_significado.montar(ids, m)
+        indice_significado.gravar(pasta, carimbo, indice)
+        self._indice_cache = indice
         return self._indice_cache
 
-    def _candidatos(self, nome_bruto: str) -> list[Candidato]:
-        q = self._chave(sanitizar(nome_bruto, self.regras).nome_sanitizado)
-        corpus = self._corpus()
-        if not corpus:
-            return []
-
-        # Camada FUZZY (sempre real, local): melhor score por produto
-        # (nomes E aliases entram no corpus; irmãos da mesma chave
-        # entram TODOS — adendo 30/07)
+    # linhas da tabela por passada do ``cdist`` — 64 linhas × 50k chaves em
+    # float64 são ~25 MB por scorer; o lote inteiro de uma vez estouraria
+    LOTE_FUZZY = 64
+    # threads do rapidfuzz no ``cdist`` (-1 = todos os núcleos)
+    WORKERS_FUZZY = -1
+    # abaixo disto (produtos no corpus) a varredura completa já é barata —
+    # o bloco por token só entra no acervo grande
+    BLOCO_MINIMO_CORPUS = 2000
+    # token em mais produtos que isto não é "raro": não abre bloco sozinho
+    BLOCO_TETO_TOKEN = 1500
+
+    def _matriz_fuzzy(self) -> _MatrizFuzzy | None:
+        """O corpus em forma de MATRIZ para o ``cdist`` (1× por lote, junto
+        do ``_corpus``). None sem numpy — o laço puro segura sozinho."""
+        if self._matriz_cache is None:
+            try:
+                import numpy as np
+            except ImportError:
+                return None
+            corpus = self._corpus()
+            coluna: dict[int, int] = {}
+            pares: list[tuple[int, int]] = []      # (coluna do pid, chave)
+            for k, pids in enumerate(corpus.values()):
+                for pid in pids:
+                    pares.append((coluna.setdefault(pid, len(coluna)), k))
+            # ordenado por produto: o ``reduceat`` tira o máximo das chaves
+            # de cada pid (nome + aliases) numa passada só
+            pares.sort()
+            col = np.fromiter((c for c, _k in pares), dtype=np.int64,
+                              count=len(pares))
+            inicios = np.flatnonzero(np.r_[True, col[1:] != col[:-1]])
+            self._matriz_cache = _MatrizFuzzy(
+                chaves=list(corpus), pids=list(coluna), coluna=coluna,
+                chave_do_par=np.fromiter((k for _c, k in pares),
+                                         dtype=np.int64, count=len(pares)),
+                inicios=inicios)
+        return self._matriz_cache
+
+    def _vetor_consulta(self, q: str):
+        """O vetor da consulta e o índice de significado — ou None quando
+        a camada está fora (sem embedder, índice vazio, falha: esta
+        desliga o lote, I2)."""
+        return self._vetores_consulta([q])[0]
+
+    def _vetores_consulta(self, qs: list[str]) -> list:
+        """``_vetor_consulta`` das linhas ainda sem resposta, num pedido
+        SÓ ao embedder (o motor fatia em POSTs de ``lote_embeddings``) —
+        era um POST por linha, e no servidor local o custo fixo de cada
+        um pesava mais que a inferência. Chave repetida vai uma vez."""
+        indice = self._indice()
+        if indice is None or self._embedder_morto or not qs:
+            return [None] * len(qs)
+        unicas = list(dict.fromkeys(qs))
+        try:
+            vecs = self.embedder.embeddings(unicas)
+            if len(vecs) != len(unicas):
+                raise IAIndisponivel(
+                    f"{len(vecs)} vetores para {len(unicas)} textos")
+        except Exception as exc:
+            self._embedder_falhou(exc)
+            return [None] * len(qs)
+        por_chave = dict(zip(unicas, vecs))
+        return [(por_chave[q], indice) for q in qs]
+
+    def _fuzzy_escalar(self, q: str) -> dict[int, float]:
+        """Camada FUZZY pelo laço puro (sem numpy): melhor score por
+        produto (nomes E aliases entram no corpus; irmãos da mesma chave
+        entram TODOS — adendo 30/07)."""
         fuzzy_pid: dict[int, float] = {}
-        for chave, pids in corpus.items():
+        for chave, pids in self._corpus().items():
             s = self._pontuar(q, chave)
             for pid in pids:
                 if s > fuzzy_pid.get(pid, -1.0):
                     fuzzy_pid[pid] = s
+        return fuzzy_pid
+
+    def _topo_escalar(self, q: str) -> list[tuple[int, float]]:
+        """O ranking (pid, score) do caminho puro, na ordem do corpus —
+        a referência que o vetorial reproduz número a número."""
+        fuzzy_pid = self._fuzzy_escalar(q)
 
         # Camada de SIGNIFICADO sobre o ACERVO INTEIRO, via índice
         # persistido (frota F12): cosseno local contra os vetores prontos —
@@ -487,24 +678,16 @@ class Conciliador:
         # O corte top-K anterior deixava o par certo de fora ("mamão
         # papaya"×"papaia formosa") e misturava DUAS escalas no ranking.
         sem_pid: dict[int, float] = {}
-        indice = self._indice()
-        if indice is not None and not self._embedder_morto:
-            try:
-                qv = self.embedder.embeddings([q])[0]
-                ids, matriz = indice
-                if isinstance(matriz, dict):        # fallback sem numpy
-                    for pid in ids:
-                        sem_pid[pid] = _cosseno(qv, matriz[pid]) * 100.0
-                else:
-                    import numpy as np
-                    v = np.asarray(qv, dtype=np.float32)
-                    n = float(np.linalg.norm(v)) or 1.0
-                    cos = matriz @ (v / n)
-                    for pid, c in zip(ids, cos):
-                        sem_pid[pid] = float(c) * 100.0
-            except Exception as exc:
-                self._embedder_falhou(exc)
-                sem_pid = {}
+        consulta = self._vetor_consulta(q)
+        if consulta is not None:
+            qv, indice = consulta
+            if isinstance(indice, dict):        # fallback sem numpy
+                for pid, vec in indice.items():
+                    sem_pid[pid] = _cosseno(qv, vec) * 100.0
+            else:
+                for pid, c in zip(indice.ids.tolist(),
+                                  indice.cossenos(qv).tolist()):
+                    sem_pid[pid] = c * 100.0
 
         # Combina numa escala SÓ: com significado ligado, TODO produto leva
         # a média ponderada (produto sem vetor conta sem=0 — se quase nada
@@ -517,17 +700,254 @@ class Conciliador:
                     + self.peso_sem * sem_pid.get(pid, 0.0)
             else:
                 final[pid] = fz
+        return sorted(final.items(),
+                      key=lambda kv: -kv[1])[: self.limiares.top_k * 2]
+
+    def _topos_vetoriais(self, qs: list[str], m: _MatrizFuzzy,
+                         consultas: list) -> list[list[tuple[int, float]]]:
+        """O MESMO ranking de ``_topo_escalar`` para um bloco de linhas:
+        os dois scorers do ``_pontuar`` saem do ``cdist`` do rapidfuzz
+        (C++, multi-thread) numa matriz linhas × chaves, em float64 — a
+        média 0,5/0,5 dá o mesmo número, bit a bit, que o laço. O máximo
+        por produto e o corte top-K também são numpy; a ordem dos empates
+        é a do corpus, como no ``sorted`` estável do laço."""
+        import numpy as np
+        from rapidfuzz import process
+
+        notas = {}
+        for scorer in (fuzz.token_set_ratio, fuzz.token_sort_ratio):
+            notas[scorer] = process.cdist(
+                qs, m.chaves, scorer=scorer, dtype=np.float64,
+                workers=self.WORKERS_FUZZY)
+        s = 0.5 * notas[fuzz.token_set_ratio] \
+            + 0.5 * notas[fuzz.token_sort_ratio]
+        del notas
+        fuzzy = np.maximum.reduceat(s[:, m.chave_do_par], m.inicios, axis=1)
+        del s
+        topos: list[list[tuple[int, float]]] = []
+        for i, consulta in enumerate(consultas):
+            final = fuzzy[i]
+            if consulta is not None and len(consulta[1]):
+                final = (1 - self.peso_sem) * final \
+                    + self.peso_sem * self._significado_por_coluna(
+                        consulta, m)
+            topos.append(self._corte_topo(final, m.pids))
+        return topos
+
+    def _corte_topo(self, final, pids) -> list[tuple[int, float]]:
+        """Os ``top_k × 2`` maiores de ``final`` (numpy, um por produto
+        de ``pids``) — empate na ordem de ``pids``, como o ``sorted``
+        estável do laço."""
+        import numpy as np
+        kk = self.limiares.top_k * 2
+        if final.size > kk:
+            corte = np.partition(final, final.size - kk)[final.size - kk]
+            idx = np.flatnonzero(final >= corte)
+        else:
+            idx = np.arange(final.size)
+        idx = idx[np.argsort(-final[idx], kind="stable")][:kk]
+        return [(pids[j], float(final[j])) for j in idx]
+
+    # --- blocos por token (o fuzzy só onde há chance) ---------------------------
+
+    def _tokens_bloco(self, chave: str, texto: str) -> set[str]:
+        """As chaves de BLOCO de um texto: cada palavra significativa da
+        chave de comparação, inteira e pelo prefixo ("refri" e
+        "refrigerante" caem no mesmo bloco; "nutela" e "nutella" também
+        — a inteira separa o que o prefixo junta demais), as marcas
+        conhecidas (``marcas_no_nome``) e o peso canônico ("500g")."""
+        tokens: set[str] = set()
+        for t in _tokens_significativos(chave):
+            tokens.add("t:" + t)
+            tokens.add("w:" + t[:PREFIXO_BLOCO])
+        tokens.update("m:" + m for m in self._marcas_de(texto))
+        peso = _peso_canonico(texto)
+        if peso is not None:
+            tokens.add(f"p:{peso[0]:g}{peso[1]}")
+        return tokens
+
+    def _indice_blocos(self, m: _MatrizFuzzy):
+        """Índice invertido token de bloco -> produtos (``indice_blocos``)
+        dos que o têm no nome, num alias ou no campo ``marca``. Vem do
+        ARQUIVO ao lado do banco, mapeado, enquanto o carimbo bate; senão
+        é montado do corpus (o laço por produto) e o arquivo, refeito.
+        Junto, a coluna da matriz de cada id (1× por lote, em numpy)."""
+        if self._blocos_cache is None:
+            import numpy as np
 
+            from app.ai import indice_blocos
+            carimbo = self._carimbo_blocos()
+            pasta = self._pasta_blocos() if carimbo is not None else None
+            postagens = indice_blocos.carregar(pasta, carimbo)
+            if postagens is None:
+                postagens = indice_blocos.montar(self._postagens_do_corpus())
+                if carimbo is not None:
+                    indice_blocos.gravar(pasta, carimbo, postagens)
+            pids = np.asarray(m.pids, dtype=np.int64)
+            teto = max(int(pids.max()) if pids.size else 0,
+                       int(postagens.pids.max()) if len(postagens.pids) else 0)
+            coluna_do_pid = np.full(teto + 1, -1, dtype=np.int64)
+            coluna_do_pid[pids] = np.arange(pids.size, dtype=np.int64)
+            self._blocos_cache = (postagens, coluna_do_pid, {})
+        return self._blocos_cache
+
+    def _postagens_do_corpus(self) -> dict[str, set[int]]:
+        """Os tokens de cada texto do corpus (nome, alias, ``marca``)."""
+        from app.core.marcas import _chave as chave_marca
+        self._corpus()
+        postagens: dict[str, set[int]] = {}
+        for pid, chave, texto, marca in self._textos_corpus:
+            tokens = self._tokens_bloco(chave, texto)
+            if marca and chave_marca(marca):
+                tokens.add("m:" + chave_marca(marca))
+            for t in tokens:
+                postagens.setdefault(t, set()).add(pid)
+        return postagens
+
+    def _colunas_do_token(self, token: str, m: _MatrizFuzzy):
+        """As colunas (ordenadas) dos produtos do ``token`` que estão na
+        matriz deste lote — a lixeira e o que sumiu ficam de fora. None
+        para token que nenhum produto tem."""
+        postagens, coluna_do_pid, memo = self._indice_blocos(m)
+        if token not in memo:
+            pids = postagens.get(token)
+            if pids is None:
+                memo[token] = None
+            else:
+                cols = coluna_do_pid[pids]
+                memo[token] = cols[cols >= 0]
+        return memo[token]
+
+    def _bloco(self, nome_bruto: str, q: str, m: _MatrizFuzzy, vizinhos):
+        """As colunas que valem a pena pontuar para a linha: a união dos
+        produtos que dividem com ela algum token RARO (até
+        ``BLOCO_TETO_TOKEN`` produtos — "arroz" num acervo de mercado
+        não separa nada) + os mais próximos no significado
+        (``vizinhos``, colunas). None = bloco vazio (o chamador varre o
+        corpus inteiro)."""
+        import numpy as np
+        postagens = []
+        for t in self._tokens_bloco(q, nome_bruto):
+            cols = self._colunas_do_token(t, m)
+            if cols is not None and cols.size <= self.BLOCO_TETO_TOKEN:
+                postagens.append(cols)
+        if vizinhos is not None and vizinhos.size:
+            postagens.append(vizinhos)
+        if not postagens:
+            return None
+        return np.unique(np.concatenate(postagens))
+
+    def _topo_no_bloco(self, q: str, cols, m: _MatrizFuzzy,
+                       sem) -> tuple[list[tuple[int, float]], float]:
+        """O ranking de ``_topos_vetoriais`` restrito às colunas ``cols``
+        (as chaves de cada produto do bloco, máximo por produto) + o
+        melhor fuzzy PURO do bloco. ``sem``: o significado de cada
+        coluna do bloco (ou None)."""
+        import numpy as np
+        from rapidfuzz import process
+
+        fins = np.r_[m.inicios[1:], len(m.chave_do_par)]
+        tamanhos = fins[cols] - m.inicios[cols]
+        locais = np.r_[0, np.cumsum(tamanhos)[:-1]]
+        pares = np.repeat(m.inicios[cols] - locais, tamanhos) \
+            + np.arange(int(tamanhos.sum()))
+        chaves = [m.chaves[k] for k in m.chave_do_par[pares]]
+        notas = [process.cdist([q], chaves, scorer=scorer, dtype=np.float64,
+                               workers=self.WORKERS_FUZZY)[0]
+                 for scorer in (fuzz.token_set_ratio, fuzz.token_sort_ratio)]
+        fuzzy = np.maximum.reduceat(0.5 * notas[0] + 0.5 * notas[1], locais)
+        final = fuzzy
+        if sem is not None:
+            final = (1 - self.peso_sem) * fuzzy + self.peso_sem * sem
+        return (self._corte_topo(final, [m.pids[j] for j in cols]),
+                float(fuzzy.max()))
+
+    def _topos_em_blocos(self, nomes, qs, m: _MatrizFuzzy,
+                         consultas) -> list[list[tuple[int, float]] | None]:
+        """O ranking de cada linha só contra o seu bloco. None onde o
+        bloco não serve — vazio, ou sem NENHUM texto que chegue ao
+        amarelo no fuzzy puro (a linha é nova, ou só o significado a
+        aproximou de alguém: a varredura completa confirma, e o recall
+        nunca cai por causa do bloco). O significado entra pelos
+        vizinhos do índice e pelo cosseno SÓ das colunas do bloco."""
+        topos: list[list[tuple[int, float]] | None] = []
+        for nome, q, consulta in zip(nomes, qs, consultas):
+            com_sem = consulta is not None and len(consulta[1])
+            vizinhos = self._vizinhos_por_coluna(consulta, m) if com_sem \
+                else None
+            cols = self._bloco(nome, q, m, vizinhos)
+            if cols is not None:
+                sem = (self._significado_nas_colunas(consulta, m, cols)
+                       if com_sem else None)
+                topo, melhor_fuzzy = self._topo_no_bloco(q, cols, m, sem)
+                if melhor_fuzzy >= self.limiares.amarelo:
+                    topos.append(topo)
+                    continue
+            topos.append(None)
+        return topos
+
+    def _colunas_do_indice(self, indice, m: _MatrizFuzzy):
+        """Linha do índice ↔ coluna da matriz do fuzzy (o índice tem os
+        excluídos; a matriz, não): (linhas, colunas) dos pares, e a linha
+        de cada coluna / a coluna de cada linha (-1 = sem par). 1× por
+        índice."""
+        import numpy as np
+        if self._colunas_sem is None or self._colunas_sem[0] is not indice:
+            pares = [(k, m.coluna[pid])
+                     for k, pid in enumerate(indice.ids.tolist())
+                     if pid in m.coluna]
+            linhas = np.asarray([k for k, _j in pares], dtype=np.int64)
+            colunas = np.asarray([j for _k, j in pares], dtype=np.int64)
+            linha_da_coluna = np.full(len(m.pids), -1, dtype=np.int64)
+            linha_da_coluna[colunas] = linhas
+            coluna_da_linha = np.full(len(indice), -1, dtype=np.int64)
+            coluna_da_linha[linhas] = colunas
+            self._colunas_sem = (indice, linhas, colunas, linha_da_coluna,
+                                 coluna_da_linha)
+        return self._colunas_sem[1:]
+
+    def _significado_por_coluna(self, consulta, m: _MatrizFuzzy):
+        """O cosseno × 100 de cada produto da matriz (0 para quem não tem
+        vetor) — a conta do ``_topo_escalar``, por coluna: UM produto
+        matriz×vetor."""
+        import numpy as np
+        qv, indice = consulta
+        linhas, colunas, _lc, _cl = self._colunas_do_indice(indice, m)
+        sem = np.zeros(len(m.pids), dtype=np.float64)
+        sem[colunas] = indice.cossenos(qv)[linhas].astype(np.float64) * 100.0
+        return sem
+
+    def _significado_nas_colunas(self, consulta, m: _MatrizFuzzy, cols):
+        """``_significado_por_coluna`` só das colunas ``cols``."""
+        import numpy as np
+        qv, indice = consulta
+        _l, _c, linha_da_coluna, _cl = self._colunas_do_indice(indice, m)
+        linhas = linha_da_coluna[cols]
+        tem = linhas >= 0
+        sem = np.zeros(len(cols), dtype=np.float64)
+        if tem.any():
+            sem[tem] = indice.cossenos_em(qv, linhas[tem]).astype(
+                np.float64) * 100.0
+        return sem
+
+    def _vizinhos_por_coluna(self, consulta, m: _MatrizFuzzy):
+        """As colunas dos ``top_k × 2`` vizinhos de significado da
+        consulta (pelo IVF do índice, quando o acervo é grande)."""
+        qv, indice = consulta
+        *_resto, coluna_da_linha = self._colunas_do_indice(indice, m)
+        cols = coluna_da_linha[indice.vizinhos(qv, self.limiares.top_k * 2)]
+        return cols[cols >= 0]
+
+    def _com_desempate(self, nome_bruto: str,
+                       topo: list[tuple[int, float]]) -> list[Candidato]:
         # ADENDO 30/07: o PESO da oferta desempata os irmãos de chave —
         # "PAO DE QUEIJO 1KG" prefere o cadastro de 1 kg ao de 500 g
         # (bônus/pena pequenos, só no topo do ranking: reordenam gêmeos
         # sem atropelar diferenças reais de texto)
-        topo = sorted(final.items(),
-                      key=lambda kv: -kv[1])[: self.limiares.top_k * 2]
         peso_q = _peso_canonico(nome_bruto)
         ajustado: list[tuple[int, float]] = []
         for pid, score in topo:
-            produto = self.session.get(Produto, pid)
+            produto = self._produto(pid)
             if produto is None:
                 continue
             if peso_q is not None:
@@ -539,11 +959,58 @@ class Conciliador:
                           key=lambda kv: -kv[1])[: self.limiares.top_k]
         cands: list[Candidato] = []
         for pid, score in ordenado:
-            produto = self.session.get(Produto, pid)
-            if produto is not None:
-                cands.append(Candidato(produto, float(min(100.0, score))))
+            cands.append(Candidato(self._produtos[pid],
+                                   float(min(100.0, score))))
         return cands
 
+    def _carregar_produtos(self, pids) -> None:
+        """Os produtos que faltam no mapa, num ``IN`` só (por fatia)."""
+        faltam = [pid for pid in dict.fromkeys(pids)
+                  if pid not in self._produtos]
+        if faltam:
+            self._produtos.update(self.repo.carregar_em_lote(faltam))
+
+    def _produto(self, pid: int) -> Produto | None:
+        if pid not in self._produtos:
+            self._carregar_produtos([pid])
+        return self._produtos.get(pid)
+
+    def _candidatos_lote(self, nomes: list[str]) -> list[list[Candidato]]:
+        """Os candidatos de VÁRIAS linhas: a tabela inteira contra o corpus
+        em passadas de matriz (``LOTE_FUZZY`` linhas cada) — era um laço
+        Python chamando os dois scorers por chave, por linha (300 linhas ×
+        20k produtos = milhões de chamadas). Sem numpy, o laço de sempre."""
+        if not self._corpus():
+            return [[] for _ in nomes]
+        qs = [self._chave(sanitizar(n, self.regras).nome_sanitizado)
+              for n in nomes]
+        m = self._matriz_fuzzy()
+        if m is None:
+            topos = [self._topo_escalar(q) for q in qs]
+        else:
+            consultas = self._vetores_consulta(qs)
+            if len(m.pids) >= self.BLOCO_MINIMO_CORPUS:
+                topos = self._topos_em_blocos(nomes, qs, m, consultas)
+            else:
+                topos = [None] * len(qs)
+            # quem ficou sem bloco: o corpus inteiro, em passadas de matriz
+            cheios = [i for i, t in enumerate(topos) if t is None]
+            for a in range(0, len(cheios), self.LOTE_FUZZY):
+                idx = cheios[a:a + self.LOTE_FUZZY]
+                for i, topo in zip(idx, self._topos_vetoriais(
+                        [qs[i] for i in idx], m, [consultas[i] for i in idx])):
+                    topos[i] = topo
+        # os candidatos da tabela INTEIRA num carregamento só
+        self._carregar_produtos(pid for topo in topos for pid, _s in topo)
+        return [self._com_desempate(nome, topo)
+                for nome, topo in zip(nomes, topos)]
+
+    def _candidatos(self, nome_bruto: str) -> list[Candidato]:
+        pronto = self._candidatos_prontos.get(nome_bruto)
+        if pronto is not None:                  # veio do ``conciliar_lote``
+            return list(pronto)
+        return self._candidatos_lote([nome_bruto])[0]
+
     def categoria_do_vizinho(self, nome_bruto: str,
                              piso: float | None = None):
         """F13/D4 (VC-051): a categoria do VIZINHO mais parecido — a linha
@@ -558,6 +1025,15 @@ class Conciliador:
         piso = self.limiares.amarelo if piso is None else piso
         return categoria_dos_candidatos(self._candidatos(nome_bruto), piso)
 
+    def categorias_dos_vizinhos(self, nomes: list[str],
+                                piso: float | None = None) -> dict:
+        """``categoria_do_vizinho`` de VÁRIAS linhas numa passada só do
+        ``_candidatos_lote`` (nome -> (categoria | None, score))."""
+        piso = self.limiares.amarelo if piso is None else piso
+        nomes = list(dict.fromkeys(nomes))
+        return {n: categoria_dos_candidatos(cands, piso)
+                for n, cands in zip(nomes, self._candidatos_lote(nomes))}
+
     def _motor_ok(self) -> bool:
         """Rodada JM (B1.6): o GET de vida do motor vale para o LOTE
         inteiro (a vida do cache é a vida do Conciliador — um por
@@ -573,6 +1049,14 @@ class Conciliador:
 
     def _juiz(self, nome_bruto: str, candidatos: list[Candidato]) -> Veredito | None:
         opcoes = [c.produto.nome_sanitizado for c in candidatos]
+        return self._decidir_juiz(nome_bruto, candidatos,
+                                  self.perguntar_ao_juiz(nome_bruto, opcoes))
+
+    def perguntar_ao_juiz(self, nome_bruto: str,
+                          opcoes: list[str]) -> dict | None:
+        """Só a conversa com o modelo (nomes entram, JSON sai) — não toca a
+        sessão, então roda em thread de trabalho (o estágio do juiz do
+        ``processar_tabela``). None = sem resposta aproveitável."""
         sistema = (
             "Você concilia um item de oferta com o cadastro. Dada a descrição bruta "
             "e uma lista curta de candidatos, responda SÓ um JSON: "
@@ -583,15 +1067,85 @@ class Conciliador:
             {"descricao": nome_bruto, "candidatos": opcoes}, ensure_ascii=False
         )
         try:
+            with ponto_de_chamada("juiz"):
+                resposta = self.motor.chat(
+                    [{"role": "system", "content": sistema},
+                     {"role": "user", "content": usuario}],
+                    formato_json=True,
+                )
+            return json.loads(resposta[resposta.find("{"): resposta.rfind("}") + 1])
+        except (IAIndisponivel, ValueError, json.JSONDecodeError, KeyError):
+            return None
+
+    def perguntar_ao_juiz_em_lote(
+            self, perguntas: list[tuple[str, list[str]]]) -> list[dict | None]:
+        """``perguntar_ao_juiz`` de VÁRIAS linhas, ``lote_juiz`` por pedido:
+        o prefixo do prompt (instrução + formato) é pago uma vez por lote,
+        não por linha. Cada resposta é validada contra os candidatos DELA;
+        só a que vier faltando ou torta é refeita sozinha. Mesma regra de
+        threads do avulso (não toca a sessão)."""
+        perguntas = list(perguntas)
+        saida: list[dict | None] = [None] * len(perguntas)
+        passo = self.lote_juiz
+        for ini in range(0, len(perguntas), passo):
+            bloco = perguntas[ini:ini + passo]
+            if len(bloco) == 1:
+                saida[ini] = self.perguntar_ao_juiz(*bloco[0])
+                continue
+            try:
+                respostas = self._juiz_em_bloco(bloco)
+            except IARecusou:
+                # o servidor recusou o PEDIDO (4xx — ex.: o lote passou da
+                # janela de contexto): cada pergunta vai sozinha
+                respostas = {}
+            except IAIndisponivel:
+                continue                 # motor caiu: o lote degrada (I2)
+            for j, (nome, opcoes) in enumerate(bloco):
+                dados = respostas.get(j)
+                if not _resposta_do_juiz_valida(dados, len(opcoes)):
+                    dados = self.perguntar_ao_juiz(nome, opcoes)
+                saida[ini + j] = dados
+        return saida
+
+    def _juiz_em_bloco(self, bloco: list[tuple[str, list[str]]]) -> dict[int, dict]:
+        """Um pedido com várias perguntas; devolve item -> resposta crua
+        (o que não deu para ler fica de fora — o chamador refaz)."""
+        sistema = (
+            "Você concilia itens de oferta com o cadastro. Para CADA item da "
+            "lista (descrição bruta + candidatos curtos), diga qual candidato é "
+            "o MESMO produto. Responda SÓ um JSON, um objeto por item, na ordem: "
+            '[{"item": <n do item>, "indice": <int do candidato, ou null se for '
+            'novo>, "confianca": <0..1>}, ...].'
+        )
+        usuario = json.dumps(
+            [{"item": j, "descricao": nome, "candidatos": opcoes}
+             for j, (nome, opcoes) in enumerate(bloco)], ensure_ascii=False)
+        with ponto_de_chamada("juiz_lote"):
             resposta = self.motor.chat(
                 [{"role": "system", "content": sistema},
                  {"role": "user", "content": usuario}],
+                max_tokens=64 * len(bloco) + 64,
                 formato_json=True,
             )
-            dados = json.loads(resposta[resposta.find("{"): resposta.rfind("}") + 1])
-        except (IAIndisponivel, ValueError, json.JSONDecodeError, KeyError):
+        try:
+            lista = json.loads(resposta[resposta.find("["): resposta.rfind("]") + 1])
+        except (ValueError, json.JSONDecodeError):
+            return {}
+        if not isinstance(lista, list):
+            return {}
+        por_item: dict[int, dict] = {}
+        for pos, dados in enumerate(lista):
+            if not isinstance(dados, dict):
+                continue
+            item = dados.get("item", pos)
+            if isinstance(item, int) and 0 <= item < len(bloco):
+                por_item.setdefault(item, dados)
+        return por_item
+
+    def _decidir_juiz(self, nome_bruto: str, candidatos: list[Candidato],
+                      dados: dict | None) -> Veredito | None:
+        if not isinstance(dados, dict):
             return None
-
         indice = dados.get("indice")
         conf = float(dados.get("confianca", 0.0))
         piso = self.limiares.juiz_confianca
@@ -622,10 +1176,102 @@ class Conciliador:
 
     # --- API -------------------------------------------------------------------
 
-    def conciliar(self, nome_bruto: str) -> Veredito:
-        exato = self.repo.buscar_por_nome_bruto(nome_bruto) or self.repo.buscar_por_alias(
+    def conciliar_lote(self, nomes: list[str]) -> list[Veredito]:
+        """``conciliar`` de cada linha, com o fuzzy da TABELA INTEIRA numa
+        passada de matriz antes (``_candidatos_lote``) — o semáforo de cada
+        linha é o mesmo do ``conciliar`` avulso."""
+        nomes = list(nomes)
+        pre = self.pre_vereditos_lote(nomes)
+        # os ambíguos da tabela inteira vão ao juiz em lote (``lote_juiz``)
+        ambiguos = [i for i, (_v, pede_juiz) in enumerate(pre) if pede_juiz]
+        if ambiguos:
+            self._status(f"Consultando o juiz sobre {len(ambiguos)} linhas…")
+        respostas = dict(zip(ambiguos, self.perguntar_ao_juiz_em_lote(
+            [(nomes[i], [c.produto.nome_sanitizado for c in pre[i][0].candidatos])
+             for i in ambiguos])))
+        vereditos = []
+        for i, (v, pede_juiz) in enumerate(pre):
+            self._status(f"Conciliando {i + 1}/{len(nomes)}…")
+            vereditos.append(self.julgar(v, respostas[i]) if pede_juiz else v)
+        return vereditos
+
+    def pre_vereditos_lote(self, nomes: list[str]) -> list[tuple[Veredito, bool]]:
+        """``pre_veredito`` de cada linha com o exato e o fuzzy em lote — a
+        parte do ``conciliar_lote`` que mexe na sessão (o juiz fica de fora,
+        para quem quiser mandá-lo a outra thread)."""
+        nomes = list(nomes)
+        # o match exato não passa pelo fuzzy (nem pelo POST de embedding);
+        # nome cru e alias da tabela inteira em poucas consultas ``IN``
+        self._exatos_prontos = self.repo.buscar_exatos_em_lote(nomes)
+        self._produtos.update((p.id, p) for p in self._exatos_prontos.values()
+                              if p is not None)
+        pendentes = [n for n, p in self._exatos_prontos.items() if p is None]
+        if pendentes:
+            self._status(f"Comparando {len(pendentes)} linhas com o acervo…")
+        self._candidatos_prontos = dict(
+            zip(pendentes, self._candidatos_lote(pendentes)))
+        try:
+            return [self.pre_veredito(nome) for nome in nomes]
+        finally:
+            self._candidatos_prontos = {}
+            self._exatos_prontos = {}
+
+    def _exato(self, nome_bruto: str) -> Produto | None:
+        if nome_bruto in self._exatos_prontos:     # já visto no lote
+            return self._exatos_prontos[nome_bruto]
+        return self.repo.buscar_por_nome_bruto(nome_bruto) or self.repo.buscar_por_alias(
             nome_bruto
         )
+
+    def conciliar(self, nome_bruto: str) -> Veredito:
+        v, pede_juiz = self.pre_veredito(nome_bruto)
+        if not pede_juiz:
+            return v
+        return self.julgar(v, self.perguntar_ao_juiz(
+            nome_bruto, [c.produto.nome_sanitizado for c in v.candidatos]))
+
+    def julgar(self, provavel: Veredito, dados: dict | None) -> Veredito:
+        """Aplica a resposta do juiz (``perguntar_ao_juiz``) ao amarelo
+        provável do ``pre_veredito`` — com as guardas do verde. Sem
+        resposta aproveitável, o amarelo fica (I2)."""
+        veredito = self._decidir_juiz(provavel.entrada, provavel.candidatos,
+                                      dados)
+        if veredito is None:
+            return provavel
+        return self._guardas_do_verde(veredito, provavel.entrada)
+
+    def _guardas_do_verde(self, veredito: Veredito,
+                          nome_bruto: str) -> Veredito:
+        """§2.2 (marca conhecida diferente → VERMELHO) + S1
+        (divergência de termos) + J10 (peso/volume) — as guardas que
+        impedem um verde calado errado. A da marca roda PRIMEIRO:
+        marca trocada não é "conferir", é outro produto."""
+        veredito = self._vermelho_se_marca_troca(veredito, nome_bruto)
+        return _rebaixar_se_qualificador_perdido(
+            _rebaixar_se_peso_diverge(
+                self._rebaixar_se_divergente(veredito, nome_bruto),
+                nome_bruto),
+            nome_bruto)
+
+    def _rebaixar_se_divergente(self, veredito: Veredito,
+                                nome_bruto: str) -> Veredito:
+        """S1: verde não-exato com termos do cadastro ausentes da oferta
+        desce para AMARELO — marca diferente jamais passa sem humano."""
+        if veredito.semaforo != Semaforo.VERDE or veredito.produto is None:
+            return veredito
+        q_chave = self._chave(sanitizar(nome_bruto, self.regras).nome_sanitizado)
+        div = _divergencia(q_chave, self._chave_do_produto(veredito.produto))
+        if div:
+            veredito.semaforo = Semaforo.AMARELO
+            veredito.motivo = ("cadastro tem termos ausentes na oferta "
+                               f"({', '.join(sorted(div))}) — confira a marca")
+        return veredito
+
+    def pre_veredito(self, nome_bruto: str) -> tuple[Veredito, bool]:
+        """O ``conciliar`` até a porta do juiz: exato, fuzzy/embedding e as
+        guardas. ``True`` = o ambíguo que o juiz deve ver (o veredito é o
+        amarelo que vale se ele não responder) — ``julgar`` termina."""
+        exato = self._exato(nome_bruto)
         if exato is not None:
             v = Veredito(nome_bruto, Semaforo.VERDE, exato,
                          [Candidato(exato, 100.0)], 1.0,
@@ -643,55 +1289,43 @@ class Conciliador:
                             f"(a linha diz “{' / '.join(sorted(da_linha))}”; "
                             f"o cadastro é “{exato.nome_sanitizado}”) — "
                             "confirme, ou desfaça o vínculo")
-            return v
+            return v, False
 
         cands = self._candidatos(nome_bruto)
         if not cands:
             return Veredito(nome_bruto, Semaforo.VERMELHO, None, [], 0.0,
-                            "sem candidatos no banco", "novo")
-
-        q_chave = self._chave(sanitizar(nome_bruto, self.regras).nome_sanitizado)
-
-        def _rebaixar_se_divergente(veredito: Veredito) -> Veredito:
-            """S1: verde não-exato com termos do cadastro ausentes da oferta
-            desce para AMARELO — marca diferente jamais passa sem humano."""
-            if veredito.semaforo != Semaforo.VERDE or veredito.produto is None:
-                return veredito
-            div = _divergencia(
-                q_chave, self._chave(veredito.produto.nome_sanitizado))
-            if div:
-                veredito.semaforo = Semaforo.AMARELO
-                veredito.motivo = ("cadastro tem termos ausentes na oferta "
-                                   f"({', '.join(sorted(div))}) — confira a marca")
-            return veredito
-
-        def _guardas_do_verde(veredito: Veredito) -> Veredito:
-            """§2.2 (marca conhecida diferente → VERMELHO) + S1
-            (divergência de termos) + J10 (peso/volume) — as guardas que
-            impedem um verde calado errado. A da marca roda PRIMEIRO:
-            marca trocada não é "conferir", é outro produto."""
-            veredito = self._vermelho_se_marca_troca(veredito, nome_bruto)
-            return _rebaixar_se_qualificador_perdido(
-                _rebaixar_se_peso_diverge(
-                    _rebaixar_se_divergente(veredito), nome_bruto),
-                nome_bruto)
+                            "sem candidatos no banco", "novo"), False
 
         melhor = cands[0]
         if melhor.score >= self.limiares.verde:
-            return _guardas_do_verde(
+            return self._guardas_do_verde(
                 Veredito(nome_bruto, Semaforo.VERDE, melhor.produto, cands,
-                         melhor.score / 100, "similaridade alta", "fuzzy"))
+                         melhor.score / 100, "similaridade alta", "fuzzy"),
+                nome_bruto), False
 
         if melhor.score >= self.limiares.amarelo:
-            if self._motor_ok():
-                veredito = self._juiz(nome_bruto, cands)
-                if veredito is not None:
-                    return _guardas_do_verde(veredito)
             return Veredito(nome_bruto, Semaforo.AMARELO, melhor.produto, cands,
-                            melhor.score / 100, "provável — conferência humana", "fuzzy")
+                            melhor.score / 100, "provável — conferência humana",
+                            "fuzzy"), self._motor_ok()
 
         return Veredito(nome_bruto, Semaforo.VERMELHO, None, cands,
-                        melhor.score / 100, "abaixo do limiar — provável novo", "novo")
+                        melhor.score / 100, "abaixo do limiar — provável novo",
+                        "novo"), False
+
+
+def _resposta_do_juiz_valida(dados, n_candidatos: int) -> bool:
+    """A resposta do juiz que o ``_decidir_juiz`` sabe aplicar: índice
+    dentro da lista (ou null = novo) e confiança numérica."""
+    if not isinstance(dados, dict):
+        return False
+    indice = dados.get("indice")
+    if indice is not None and not (isinstance(indice, int)
+                                   and 0 <= indice < n_candidatos):
+        return False
+    try:
+        return 0.0 <= float(dados.get("confianca", 0.0)) <= 1.0
+    except (TypeError, ValueError):
+        return False
 
 
 # VICESIMUS-QUARTUS §2.3 (o Toscana que sumiu): qualificadores QUE
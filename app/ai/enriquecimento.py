@@ -20,6 +20,7 @@ import json
 from dataclasses import dataclass, field
 from decimal import Decimal
 
+from app.ai.cache_respostas import ponto_de_chamada
 from app.ai.client import IAIndisponivel, MotorIA
 from app.core.sanitize import REGRAS_PADRAO, RegrasSanitizacao, formatar_nome, sanitizar
 
@@ -366,6 +367,7 @@ def _montar(nome_bruto: str, dados: dict, base, regras: RegrasSanitizacao) -> Pr
 # Sugestão de variantes (F7.1, C1 do Bloco E)
 # ==============================================================================
 
+@ponto_de_chamada("variantes", cache=False)
 def sugerir_variantes(nome: str, motor: MotorIA | None) -> list[str]:
     """A IA sugere TERMOS de busca (sabores/fragrâncias prováveis) — SÓ termos.
 
@@ -468,6 +470,7 @@ ESTILOS_DICA: dict[str, str] = {
 }
 
 
+@ponto_de_chamada("dica", cache=False)
 def gerar_dica(nomes: list[str], limite_chars: int,
                motor: MotorIA | None, *, estilo: str | None = None,
                evitar: list[str] | None = None,
@@ -527,6 +530,7 @@ _MANCHETES_PADRAO = [
 ]
 
 
+@ponto_de_chamada("manchetes", cache=False)
 def sugerir_manchetes(evento: str | None, motor: MotorIA | None, *,
                       limite_chars: int | None = None) -> list[str]:
     """R-074: sugere CHAMADAS para o evento (o dono escolhe/edita — nunca
@@ -563,6 +567,7 @@ def sugerir_manchetes(evento: str | None, motor: MotorIA | None, *,
 # ==============================================================================
 
 
+@ponto_de_chamada("enriquecer")
 def enriquecer(
     nome_bruto: str,
     motor: MotorIA,
@@ -21,13 +21,26 @@ class MotorIAFake:
         respostas_visao: dict[str, str] | None = None,
         disponivel: bool = True,
         dim_embeddings: int = 64,
+        lote_embeddings: int = 64,
+        aceita_lista_embeddings: bool = True,
+        visao_por_imagem=None,
     ):
         # mapeia "trecho que aparece no prompt" -> resposta a devolver
         self._chat = respostas_chat or {}
         self._visao = respostas_visao or {}
+        # ``visao_por_imagem(caminho, prompt) -> str``: responde OLHANDO a
+        # imagem (o OCR em faixas manda um recorte por chamada)
+        self._visao_por_imagem = visao_por_imagem
         self._disp = disponivel
         self._dim = dim_embeddings
         self.chamadas: list[str] = []  # log para asserção nos testes
+        self.pedaco_fluxo = 16         # caracteres por pedaço do fluxo
+        # a MESMA fatia do cliente real (``ConfigIA.lote_embeddings``) e,
+        # por "POST" simulado, quantos textos foram — o teste conta pedidos
+        self.lote_embeddings = lote_embeddings
+        self._aceita_lista = aceita_lista_embeddings
+        self._um_a_um = False
+        self.pedidos_embeddings: list[int] = []
 
     def disponivel(self) -> bool:
         return self._disp
@@ -47,14 +60,44 @@ class MotorIAFake:
 
     def visao(self, imagem, prompt, *, max_tokens=2048) -> str:
         self.chamadas.append(prompt)
+        if self._visao_por_imagem is not None:
+            return self._visao_por_imagem(Path(imagem), prompt)
         return self._casar(prompt, self._visao)
 
+    def visao_em_fluxo(self, imagem, prompt, *, max_tokens=2048):
+        """A MESMA resposta da ``visao``, entregue em pedaços de
+        ``pedaco_fluxo`` caracteres (como o SSE do servidor real)."""
+        resposta = self.visao(imagem, prompt, max_tokens=max_tokens)
+        passo = max(1, self.pedaco_fluxo)
+        for i in range(0, len(resposta), passo):
+            yield resposta[i:i + passo]
+
     def embeddings(self, textos: list[str]) -> list[list[float]]:
+        # o fatiamento do ``ClienteOpenAICompat.embeddings``: lista recusada
+        # (``aceita_lista_embeddings=False``) vira um texto por pedido
+        passo = max(1, self.lote_embeddings)
+        saida = []
+        for i in range(0, len(textos), passo):
+            fatia = textos[i:i + passo]
+            if len(fatia) > 1 and not self._um_a_um:
+                self.pedidos_embeddings.append(len(fatia))
+                if self._aceita_lista:
+                    saida.extend(self._vetores(fatia))
+                    continue
+                self._um_a_um = True
+            for t in fatia:
+                self.pedidos_embeddings.append(1)
+                saida.extend(self._vetores([t]))
+        return saida
+
+    def _vetores(self, textos: list[str]) -> list[list[float]]:
         # vetor pseudo-determinístico a partir do hash (só para o encanamento;
         # NÃO tem significado semântico — a camada real usa o modelo de embeddings).
         saida = []
         for t in textos:
             h = hashlib.sha256(t.encode("utf-8")).digest()
+            while len(h) < self._dim * 2:   # o padrão (64) pede 128 bytes
+                h += hashlib.sha256(h).digest()
             vec = [
                 struct.unpack("<H", h[i : i + 2])[0] / 65535.0
                 for i in range(0, self._dim * 2, 2)
@@ -0,0 +1,182 @@
+"""
+Fila de IA concorrente — N pedidos em voo por motor, com prioridade viva
+=======================================================================
+O LM Studio (e os outros servidores compatíveis-OpenAI) atendem VÁRIOS slots
+em paralelo; a fila de antes mandava um pedido por vez e deixava os outros
+parados. ``FilaConcorrente`` roda ``fn(valor)`` para cada ``(chave, valor)``
+com até ``em_voo`` chamadas ao mesmo tempo (o pool do motor —
+``ConfigIA.conexoes`` — é o teto natural), sem perder o que a fila sequencial
+garantia:
+
+* **prioridade viva**: ``focar(chave)`` põe o item que o dono olha na frente
+  (vale para o PRÓXIMO slot livre; os em voo terminam);
+* **identidade por chave** (I1): o resultado volta com a chave, nunca por
+  posição; ``ao_comecar`` e ``ao_terminar``/``ao_falhar`` de UM item saem da
+  MESMA thread, nessa ordem;
+* **superação**: ``adicionar`` de uma chave que já espera troca o valor no
+  lugar; de uma chave em voo, o resultado antigo é DESCARTADO e o novo roda;
+* **cancelar** para entre itens (os em voo terminam; os que esperam ficam
+  visíveis em ``pendentes()``);
+* **contrapressão**: com ``teto_pendentes``, quem ``adicionar`` espera vaga
+  (só chame assim de thread de trabalho — nunca da UI).
+
+Sem Qt: a ``FilaIA`` (``app/qt/workers.py``) liga os retornos em sinais, e o
+``processar_tabela`` monta os estágios do juiz e do enriquecimento com ela.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import traceback
+from typing import Callable
+
+
+class FilaConcorrente:
+    def __init__(self, fn: Callable[[object], object], *, em_voo: int = 1,
+                 teto_pendentes: int | None = None,
+                 ao_comecar: Callable[[str], None] | None = None,
+                 ao_terminar: Callable[[str, object], None] | None = None,
+                 ao_falhar: Callable[[str, Exception], None] | None = None):
+        self._fn = fn
+        self.em_voo = max(1, int(em_voo))
+        self.teto_pendentes = teto_pendentes
+        self._ao_comecar = ao_comecar or (lambda _c: None)
+        self._ao_terminar = ao_terminar or (lambda _c, _r: None)
+        self._ao_falhar = ao_falhar or (lambda _c, _e: None)
+        self._cond = threading.Condition()
+        self._pendentes: list[tuple[str, object]] = []
+        self._geracao: dict[str, int] = {}
+        self._voando: dict[str, int] = {}      # chave -> geração em voo
+        self._foco: str | None = None
+        self._cancelada = False
+        self._fechada = False
+        # o contexto de quem criou a fila (o ``ponto_de_chamada`` em curso —
+        # rótulo e cache ligado/desligado) vale dentro de cada ``fn``
+        self._contexto = contextvars.copy_context()
+
+    # --- quem submete ----------------------------------------------------------
+
+    def adicionar(self, pares, *, bloquear: bool = True) -> None:
+        for chave, valor in pares:
+            with self._cond:
+                while (bloquear and self.teto_pendentes is not None
+                       and len(self._pendentes) >= self.teto_pendentes
+                       and not self._cancelada):
+                    self._cond.wait()
+                self._geracao[chave] = self._geracao.get(chave, 0) + 1
+                for i, (c, _v) in enumerate(self._pendentes):
+                    if c == chave:                 # superada: troca no lugar
+                        self._pendentes[i] = (chave, valor)
+                        break
+                else:
+                    self._pendentes.append((chave, valor))
+                self._cond.notify_all()
+
+    def fechar(self) -> None:
+        """Nada mais entra: ``rodar`` volta quando a fila esvaziar."""
+        with self._cond:
+            self._fechada = True
+            self._cond.notify_all()
+
+    def focar(self, chave: str | None) -> None:
+        with self._cond:
+            self._foco = chave
+
+    def cancelar(self) -> None:
+        with self._cond:
+            self._cancelada = True
+            self._cond.notify_all()
+
+    def descartar(self, chave: str) -> None:
+        """Tira a chave da fila (e ignora o resultado se ela já voa)."""
+        with self._cond:
+            self._pendentes = [p for p in self._pendentes if p[0] != chave]
+            self._geracao[chave] = self._geracao.get(chave, 0) + 1
+            self._cond.notify_all()
+
+    def pendentes(self) -> list[str]:
+        with self._cond:
+            return [c for c, _v in self._pendentes]
+
+    def em_curso(self) -> list[str]:
+        with self._cond:
+            return list(self._voando)
+
+    # --- quem executa -------------------------------------------------------------
+
+    def _proximo(self) -> tuple[str, object, int] | None:
+        with self._cond:
+            while True:
+                if self._cancelada:
+                    return None
+                if self._pendentes:
+                    idx = next((i for i, (c, _v) in enumerate(self._pendentes)
+                                if c == self._foco), 0)
+                    chave, valor = self._pendentes.pop(idx)
+                    ger = self._geracao.get(chave, 0)
+                    self._voando[chave] = ger
+                    self._cond.notify_all()        # vaga para quem espera
+                    return chave, valor, ger
+                if self._fechada:
+                    return None
+                self._cond.wait()
+
+    def _vigente(self, chave: str, ger: int) -> bool:
+        with self._cond:
+            if self._voando.get(chave) == ger:
+                del self._voando[chave]
+            self._cond.notify_all()
+            return self._geracao.get(chave, 0) == ger
+
+    def _trabalhar(self) -> None:
+        while (item := self._proximo()) is not None:
+            chave, valor, ger = item
+            self._ao_comecar(chave)
+            try:
+                resultado = self._contexto.copy().run(self._fn, valor)
+            except Exception as exc:
+                traceback.print_exc()
+                if self._vigente(chave, ger):
+                    self._ao_falhar(chave, exc)
+            else:
+                if self._vigente(chave, ger):
+                    self._ao_terminar(chave, resultado)
+
+    def rodar(self) -> None:
+        """Roda até a fila esvaziar depois de ``fechar`` (ou até cancelar),
+        com ``em_voo`` threads. Bloqueia quem chama."""
+        extras = [threading.Thread(target=self._trabalhar, daemon=True)
+                  for _ in range(self.em_voo - 1)]
+        for t in extras:
+            t.start()
+        self._trabalhar()
+        for t in extras:
+            t.join()
+
+    def mapear(self, valores: list) -> list:
+        """``fn`` de cada valor, com ``em_voo`` em paralelo, na ORDEM de
+        entrada; a exceção de um item sobe depois que todos terminarem."""
+        valores = list(valores)
+        saida: list = [None] * len(valores)
+        erros: list[Exception] = []
+        terminar, falhar = self._ao_terminar, self._ao_falhar
+
+        def _ok(chave, resultado):
+            saida[int(chave)] = resultado
+            terminar(chave, resultado)
+
+        def _erro(chave, exc):
+            erros.append(exc)
+            falhar(chave, exc)
+        self._ao_terminar, self._ao_falhar = _ok, _erro
+        try:
+            self.adicionar(((str(i), v) for i, v in enumerate(valores)),
+                           bloquear=False)
+            self.fechar()
+            self.rodar()
+        finally:
+            self._ao_terminar, self._ao_falhar = terminar, falhar
+        if erros:
+            raise erros[0]
+        return saida
@@ -0,0 +1,111 @@
+"""
+Índice de blocos do acervo — token -> produtos, gravado ao lado do banco
+========================================================================
+O bloco por token do ``Conciliador`` (só os produtos que dividem com a
+linha algum token RARO vão ao fuzzy) precisa saber, para cada token, quais
+produtos o têm. Tirar os tokens de cada nome e alias do acervo (chave de
+comparação, marcas conhecidas, peso canônico) é um laço Python por
+produto — montado a cada lote, custava O(acervo) antes da primeira linha.
+
+Agora as postagens moram em ``banco/indice_blocos/`` e abrem com
+``mmap``, como o ``indice_significado``:
+
+* ``tokens.npy`` — os tokens, ORDENADOS (a busca é binária, sem dict);
+* ``pids.npy`` / ``inicios.npy`` — os produtos de cada token,
+  ``pids[inicios[k]:inicios[k + 1]]`` (ids, não colunas: a coluna da
+  matriz do fuzzy é do lote, o id não muda).
+
+O arquivo vale enquanto o CARIMBO bate: a versão das chaves, o acervo
+(produtos, ``atualizado_em``, aliases) e o vocabulário de marcas. Disco
+sem escrita: o índice fica em memória, como antes (I2).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+PASTA = "indice_blocos"
+
+_ARRAYS = ("tokens", "pids", "inicios")
+
+
+class PostagensBloco:
+    """Token de bloco -> ids dos produtos que o têm (int64, ordenados)."""
+
+    def __init__(self, tokens: np.ndarray, pids: np.ndarray,
+                 inicios: np.ndarray):
+        self.tokens = tokens
+        self.pids = pids
+        self.inicios = inicios
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def get(self, token: str) -> np.ndarray | None:
+        k = int(np.searchsorted(self.tokens, token))
+        if k >= len(self.tokens) or self.tokens[k] != token:
+            return None
+        return self.pids[self.inicios[k]:self.inicios[k + 1]]
+
+
+def montar(postagens: dict[str, set[int]]) -> PostagensBloco:
+    """O índice em memória a partir de ``{token: {pid, …}}``."""
+    tokens = sorted(postagens)
+    listas = [sorted(postagens[t]) for t in tokens]
+    inicios = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(ls) for ls in listas], out=inicios[1:])
+    pids = np.fromiter((p for ls in listas for p in ls), dtype=np.int64,
+                       count=int(inicios[-1]))
+    return PostagensBloco(np.asarray(tokens, dtype=str), pids, inicios)
+
+
+def pasta_do_banco(caminho_banco: str | os.PathLike | None) -> Path | None:
+    """A pasta do índice ao lado do arquivo do banco; None para banco em
+    memória (nada a persistir)."""
+    if not caminho_banco or str(caminho_banco) == ":memory:":
+        return None
+    return Path(caminho_banco).parent / PASTA
+
+
+def carregar(pasta: Path | None, carimbo: dict) -> PostagensBloco | None:
+    """O índice do disco, MAPEADO (sem cópia) — ou None quando não há
+    arquivo, o carimbo não bate ou algo está ilegível."""
+    if pasta is None:
+        return None
+    try:
+        gravado = json.loads((pasta / "carimbo.json").read_text(encoding="utf-8"))
+        if gravado != carimbo:
+            return None
+        arr = {nome: np.load(pasta / f"{nome}.npy", mmap_mode="r")
+               for nome in _ARRAYS}
+        if len(arr["inicios"]) != len(arr["tokens"]) + 1:
+            return None
+        return PostagensBloco(arr["tokens"], arr["pids"], arr["inicios"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def gravar(pasta: Path | None, carimbo: dict, indice: PostagensBloco) -> bool:
+    """Grava o índice com o carimbo (que sai PRIMEIRO e entra por último,
+    como no ``indice_significado``). False = não deu para gravar."""
+    if pasta is None:
+        return False
+    arrays = {"tokens": indice.tokens, "pids": indice.pids,
+              "inicios": indice.inicios}
+    try:
+        pasta.mkdir(parents=True, exist_ok=True)
+        (pasta / "carimbo.json").unlink(missing_ok=True)
+        for nome, valor in arrays.items():
+            tmp = pasta / f"{nome}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(valor))
+            os.replace(tmp, pasta / f"{nome}.npy")
+        tmp = pasta / "carimbo.tmp.json"
+        tmp.write_text(json.dumps(carimbo), encoding="utf-8")
+        os.replace(tmp, pasta / "carimbo.json")
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,209 @@
+"""
+Índice de significado do acervo — matriz float32 mapeada do disco
+=================================================================
+O ``Conciliador`` compara a linha da tabela com o vetor de CADA produto
+(cosseno local, ver ``EmbeddingProduto``). Montar essa matriz a partir do
+banco — ler cada blob, desempacotar num ``list`` do Python, empilhar — era
+o aquecimento da camada de significado a cada lote.
+
+Agora a matriz JÁ normalizada mora num arquivo ``.npy`` ao lado do banco
+(``banco/indice_significado/``) e abre com ``mmap``: nada é copiado, o
+SO pagina só o que a conta tocar. O arquivo vale enquanto o CARIMBO bate:
+
+* o modelo de embeddings e a versão das chaves de conciliação;
+* quantos produtos há e o ``atualizado_em`` mais novo entre eles — renomear,
+  criar, excluir (lixeira) ou restaurar produto muda o carimbo, e o próximo
+  lote refaz o arquivo a partir da tabela ``produto_embeddings``.
+
+Consulta = UM produto matriz×vetor (``cossenos``). Acima de
+``IVF_MINIMO`` produtos o arquivo leva também um índice IVF (k-means
+esférico em numpy): os ``vizinhos`` de uma consulta saem só das listas
+dos centróides mais próximos — o que o bloco por token usa para trazer
+os parentes de significado sem varrer o acervo inteiro.
+
+Disco sem escrita, arquivo travado por outro processo (Windows não troca
+arquivo mapeado): o índice fica em memória, como antes — nada quebra por
+não poder gravar (I2).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+PASTA = "indice_significado"
+
+# a partir daqui (produtos com vetor) o arquivo leva o IVF
+IVF_MINIMO = 50_000
+# centróides visitados por consulta (de ~sqrt(n) listas)
+IVF_SONDAS = 16
+# rodadas do k-means e linhas da amostra de treino por centróide
+IVF_RODADAS = 8
+IVF_AMOSTRA_POR_LISTA = 40
+
+
+@dataclass
+class _IVF:
+    """Listas invertidas: ``listas[inicios[c]:inicios[c + 1]]`` são as
+    linhas da matriz cujo centróide mais próximo é ``c``."""
+
+    centroides: np.ndarray          # float32 (nlist, dim), L2-normalizados
+    listas: np.ndarray              # int64 (n,): linhas agrupadas por lista
+    inicios: np.ndarray             # int64 (nlist + 1,)
+
+
+class IndiceSignificado:
+    """Os vetores do acervo: ``ids[i]`` é o produto da linha ``i`` de
+    ``matriz`` (float32, L2-normalizada; mapeada do disco quando veio
+    do arquivo)."""
+
+    def __init__(self, ids: np.ndarray, matriz: np.ndarray,
+                 ivf: _IVF | None = None):
+        self.ids = ids
+        self.matriz = matriz
+        self.ivf = ivf
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _unitario(v) -> np.ndarray:
+        v = np.asarray(v, dtype=np.float32)
+        n = float(np.linalg.norm(v)) or 1.0
+        return v / n
+
+    def cossenos(self, v) -> np.ndarray:
+        """O cosseno da consulta com CADA linha — um produto matriz×vetor."""
+        return self.matriz @ self._unitario(v)
+
+    def cossenos_em(self, v, linhas: np.ndarray) -> np.ndarray:
+        """O cosseno só com as ``linhas`` pedidas."""
+        return self.matriz[linhas] @ self._unitario(v)
+
+    def vizinhos(self, v, k: int) -> np.ndarray:
+        """As (até) ``k`` linhas de maior cosseno. Sem IVF, exato (a
+        matriz inteira); com IVF, só as listas das ``IVF_SONDAS``
+        centróides mais próximas da consulta."""
+        u = self._unitario(v)
+        if self.ivf is None:
+            cos, linhas = self.matriz @ u, None
+        else:
+            ivf = self.ivf
+            sondas = min(IVF_SONDAS, len(ivf.centroides))
+            perto = np.argpartition(ivf.centroides @ u,
+                                    len(ivf.centroides) - sondas)[-sondas:]
+            linhas = np.concatenate([ivf.listas[ivf.inicios[c]:ivf.inicios[c + 1]]
+                                     for c in perto])
+            cos = self.matriz[linhas] @ u
+        k = min(k, cos.size)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        topo = np.argpartition(cos, cos.size - k)[cos.size - k:]
+        return topo if linhas is None else linhas[topo]
+
+
+def montar(ids, vetores, *, ivf: bool | None = None) -> IndiceSignificado:
+    """O índice em memória a partir dos vetores crus (uma linha por id)."""
+    ids = np.asarray(ids, dtype=np.int64)
+    m = np.asarray(vetores, dtype=np.float32)
+    if m.ndim != 2:
+        m = m.reshape(len(ids), -1)
+    normas = np.linalg.norm(m, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    m = np.ascontiguousarray(m / normas, dtype=np.float32)
+    if ivf is None:
+        ivf = len(ids) >= IVF_MINIMO
+    return IndiceSignificado(ids, m, _treinar_ivf(m) if ivf and len(ids) else None)
+
+
+def _treinar_ivf(m: np.ndarray, nlist: int | None = None) -> _IVF:
+    """k-means esférico (cosseno) numa amostra, semente fixa — o mesmo
+    acervo dá o mesmo índice; depois, cada linha vai para a lista do
+    centróide mais próximo."""
+    n = len(m)
+    nlist = max(1, min(n, nlist or int(round(np.sqrt(n)))))
+    rng = np.random.default_rng(0)
+    amostra = m[rng.choice(n, size=min(n, nlist * IVF_AMOSTRA_POR_LISTA),
+                           replace=False)]
+    centroides = amostra[rng.choice(len(amostra), size=nlist, replace=False)]
+    for _ in range(IVF_RODADAS):
+        dono = np.argmax(amostra @ centroides.T, axis=1)
+        soma = np.zeros_like(centroides)
+        np.add.at(soma, dono, amostra)
+        vazios = ~soma.any(axis=1)
+        soma[vazios] = centroides[vazios]      # lista sem ninguém: fica onde está
+        normas = np.linalg.norm(soma, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        centroides = (soma / normas).astype(np.float32)
+    dono = np.empty(n, dtype=np.int64)
+    for a in range(0, n, 8192):                # (n × nlist) em fatias
+        dono[a:a + 8192] = np.argmax(m[a:a + 8192] @ centroides.T, axis=1)
+    listas = np.argsort(dono, kind="stable")
+    inicios = np.searchsorted(dono[listas], np.arange(nlist + 1))
+    return _IVF(centroides, listas.astype(np.int64), inicios.astype(np.int64))
+
+
+# --- o arquivo ao lado do banco -------------------------------------------------
+
+_ARRAYS = ("ids", "vetores", "centroides", "listas", "inicios")
+
+
+def pasta_do_banco(caminho_banco: str | os.PathLike | None) -> Path | None:
+    """A pasta do índice ao lado do arquivo do banco; None para banco em
+    memória (nada a persistir)."""
+    if not caminho_banco or str(caminho_banco) == ":memory:":
+        return None
+    return Path(caminho_banco).parent / PASTA
+
+
+def carregar(pasta: Path | None, carimbo: dict) -> IndiceSignificado | None:
+    """O índice do disco, MAPEADO (sem cópia) — ou None quando não há
+    arquivo, o carimbo não bate ou algo está ilegível."""
+    if pasta is None:
+        return None
+    try:
+        gravado = json.loads((pasta / "carimbo.json").read_text(encoding="utf-8"))
+        com_ivf = gravado.pop("ivf", False)
+        if gravado != carimbo:
+            return None
+        arr = {nome: np.load(pasta / f"{nome}.npy", mmap_mode="r")
+               for nome in _ARRAYS if (pasta / f"{nome}.npy").exists()}
+        ids, m = arr["ids"], arr["vetores"]
+        if m.ndim != 2 or len(ids) != len(m):
+            return None
+        ivf = None
+        if com_ivf:
+            ivf = _IVF(arr["centroides"], arr["listas"], arr["inicios"])
+        return IndiceSignificado(ids, m, ivf)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def gravar(pasta: Path | None, carimbo: dict, indice: IndiceSignificado) -> bool:
+    """Grava o índice com o carimbo. O carimbo sai PRIMEIRO e entra por
+    último: queda no meio deixa a pasta sem carimbo, e o próximo lote
+    refaz. False = não deu para gravar (o índice segue em memória)."""
+    if pasta is None:
+        return False
+    arrays = {"ids": indice.ids, "vetores": indice.matriz}
+    if indice.ivf is not None:
+        arrays.update(centroides=indice.ivf.centroides,
+                      listas=indice.ivf.listas, inicios=indice.ivf.inicios)
+    try:
+        pasta.mkdir(parents=True, exist_ok=True)
+        (pasta / "carimbo.json").unlink(missing_ok=True)
+        for nome, valor in arrays.items():
+            tmp = pasta / f"{nome}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(valor))
+            os.replace(tmp, pasta / f"{nome}.npy")
+        tmp = pasta / "carimbo.tmp.json"
+        tmp.write_text(json.dumps(dict(carimbo, ivf=indice.ivf is not None)),
+                       encoding="utf-8")
+        os.replace(tmp, pasta / "carimbo.json")
+        return True
+    except OSError:
+        return False
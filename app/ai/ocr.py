@@ -18,6 +18,7 @@ import tempfile
 from dataclasses import dataclass, field
 from pathlib import Path
 
+from app.ai.cache_respostas import ponto_de_chamada
 from app.ai.client import IAIndisponivel, MotorIA
 
 PROMPT_OCR = (
@@ -115,14 +116,198 @@ def _extrair_json_obj(texto: str) -> dict:
     return dados if isinstance(dados, dict) else {}
 
 
+# --- faixas (ladrilhos) para foto grande -------------------------------------------
+#
+# Foto de celular de 4000 px ou página de PDF escaneada ia INTEIRA num único
+# data URI: lenta para codificar, lenta para o modelo local e, com centenas de
+# linhas, cortada pelo teto de contexto. Acima de ``ALTURA_FAIXA × 1,5`` a
+# foto é fatiada em faixas horizontais, cortadas onde a tabela "respira" (o
+# perfil de projeção das linhas: entrelinha em branco ou régua da grade têm
+# textura quase nula), cada faixa com ``SOBRA_FAIXA`` px de sobreposição —
+# a linha da emenda sai INTEIRA em pelo menos uma faixa. As faixas vão ao
+# motor juntas (a ``FilaConcorrente``) e a costura tira as linhas repetidas
+# da sobreposição.
+
+ALTURA_FAIXA = 1600
+SOBRA_FAIXA = 96
+
+PROMPT_FAIXA = (
+    "Esta imagem é UMA FAIXA horizontal ({i} de {n}) de uma tabela maior. "
+    "Transcreva só as linhas que aparecem INTEIRAS nela (linha cortada na "
+    "borda é lida na faixa vizinha); se o rodapé com a validade não "
+    "estiver nesta faixa, use null. "
+)
+
+
+def _cortes_da_tabela(img, altura: int = ALTURA_FAIXA,
+                      sobra: int = SOBRA_FAIXA) -> list[tuple[int, int]]:
+    """As faixas (topo, base) da imagem — uma só se ela é baixa. O corte
+    cai na linha de menor textura (desvio dos tons ao longo da linha) da
+    janela final de cada faixa."""
+    import numpy as np
+
+    h = img.height
+    if h <= altura * 1.5:
+        return [(0, h)]
+    cinza = np.asarray(img.convert("L"), dtype=np.float32)
+    textura = cinza.std(axis=1)
+    faixas, topo = [], 0
+    while h - topo > altura * 1.5:
+        ini, fim = topo + int(altura * 0.6), topo + altura
+        janela = textura[ini:fim]
+        # empate (várias entrelinhas lisas): a mais perto do fim da janela
+        corte = ini + int(len(janela) - 1 - np.argmin(janela[::-1]))
+        faixas.append((max(0, topo - sobra), min(h, corte + sobra)))
+        topo = corte
+    faixas.append((max(0, topo - sobra), h))
+    return faixas
+
+
+def _chave_linha(ln: LinhaOferta) -> tuple:
+    return (" ".join(ln.descricao.upper().split()),
+            (ln.preco or "").replace(" ", ""))
+
+
+def _costurar(partes: list[list[LinhaOferta]],
+              max_repetidas: int = 6) -> list[LinhaOferta]:
+    """Junta as linhas das faixas na ordem; o fim de uma faixa que repete o
+    começo da próxima (a sobreposição) entra uma vez só."""
+    saida: list[LinhaOferta] = []
+    for linhas in partes:
+        k = min(max_repetidas, len(saida), len(linhas))
+        while k and ([_chave_linha(x) for x in saida[-k:]]
+                     != [_chave_linha(x) for x in linhas[:k]]):
+            k -= 1
+        saida.extend(linhas[k:])
+    return saida
+
+
+def _linhas_da_resposta(resposta: str) -> tuple[list[LinhaOferta], str | None]:
+    dados = _extrair_json_obj(resposta)
+    linhas = []
+    for d in dados.get("linhas", []):
+        desc = (d.get("descricao") or "").strip()
+        if desc:
+            preco = d.get("preco")
+            linhas.append(LinhaOferta(desc, str(preco).strip() if preco else None,
+                                      riscada=bool(d.get("riscada"))))
+    validade = dados.get("validade_oferta")
+    validade = validade.strip() if isinstance(validade, str) and validade.strip() else None
+    return linhas, validade
+
+
+class _LeitorDeLinhas:
+    """Acha as linhas COMPLETAS num JSON que ainda está chegando: cada
+    objeto ``{...}`` dentro do array ``"linhas"`` sai assim que fecha."""
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._prof = 0
+        self._na_string = False
+        self._escape = False
+        self._ini = -1
+
+    def alimentar(self, pedaco: str) -> list[LinhaOferta]:
+        self._buf += pedaco
+        saida = []
+        for i in range(self._pos, len(self._buf)):
+            c = self._buf[i]
+            if self._na_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._na_string = False
+            elif c == '"':
+                self._na_string = True
+            elif c in "{[":
+                self._prof += 1
+                if c == "{" and self._prof == 3:     # {"linhas": [ {  <-
+                    self._ini = i
+            elif c in "}]":
+                if c == "}" and self._prof == 3 and self._ini >= 0:
+                    linhas, _v = _linhas_da_resposta(
+                        '{"linhas": [' + self._buf[self._ini:i + 1] + "]}")
+                    saida.extend(linhas)
+                    self._ini = -1
+                self._prof -= 1
+        self._pos = len(self._buf)
+        return saida
+
+    @property
+    def texto(self) -> str:
+        return self._buf
+
+
+def _ler_em_fluxo(caminho: Path, motor: MotorIA, ao_ler_linha, _st
+                  ) -> tuple[list[LinhaOferta], str | None]:
+    """Lê a resposta do OCR conforme o modelo escreve: cada linha que fecha
+    vai para ``ao_ler_linha`` na hora. O resultado final é o parse da
+    resposta INTEIRA (o mesmo do tiro único)."""
+    leitor = _LeitorDeLinhas()
+    n = 0
+    for pedaco in motor.visao_em_fluxo(caminho, PROMPT_OCR, max_tokens=4096):
+        for linha in leitor.alimentar(pedaco):
+            n += 1
+            ao_ler_linha(linha)
+            _st(f"Lendo a foto com a IA — {n} produtos lidos até agora…")
+    return _linhas_da_resposta(leitor.texto)
+
+
+def _ler_em_faixas(caminho: Path, motor: MotorIA,
+                   faixas: list[tuple[int, int]],
+                   em_voo: int) -> tuple[list[LinhaOferta], str | None]:
+    from PIL import Image
+
+    from app.ai.fila import FilaConcorrente
+    pasta = Path(tempfile.mkdtemp(prefix="ocr_faixas_"))
+    try:
+        with Image.open(caminho) as img:
+            img = img.convert("RGB")
+            arquivos = []
+            for i, (topo, base) in enumerate(faixas):
+                destino = pasta / f"faixa_{i:03d}.png"
+                img.crop((0, topo, img.width, base)).save(destino)
+                arquivos.append(destino)
+        n = len(arquivos)
+
+        def _ler(i: int) -> str:
+            prompt = PROMPT_FAIXA.format(i=i + 1, n=n) + PROMPT_OCR
+            return motor.visao(arquivos[i], prompt, max_tokens=4096)
+        respostas = FilaConcorrente(_ler, em_voo=em_voo).mapear(range(n))
+    finally:
+        import shutil
+        shutil.rmtree(pasta, ignore_errors=True)
+    partes, validade = [], None
+    for resposta in respostas:
+        linhas, v = _linhas_da_resposta(resposta)
+        partes.append(linhas)
+        validade = validade or v
+    return _costurar(partes), validade
+
+
+# o OCR tem cache PRÓPRIO (``cache_consultar``: só leituras com linhas, e o
+# botão das Configurações esquece) — o de respostas não pode replicá-lo
+@ponto_de_chamada("ocr", cache=False)
 def ler_tabela(imagem: str | Path, motor: MotorIA, *, min_lado: int = 1024,
-               status_cb=None) -> TabelaOCR:
+               status_cb=None, em_voo: int | None = None,
+               ao_ler_linha=None) -> TabelaOCR:
     """Lê a foto e devolve linhas + validade da oferta. Sem IA, devolve vazio (degrada).
 
     ``status_cb`` (opcional) recebe as FASES honestas da leitura. Como a
     chamada de visão é ÚNICA (a resposta chega inteira no fim), progresso
     por linha durante a geração não existe de verdade — o texto diz isso em
     vez de fingir porcentagem (RG-04).
+
+    Foto alta é lida em faixas (ver ``_cortes_da_tabela``), ``em_voo`` por
+    vez (padrão: as conexões do motor); o resultado tem a MESMA forma.
+
+    ``ao_ler_linha(LinhaOferta)`` (opcional) recebe cada linha assim que
+    ela é lida: com motor que fala em fluxo (``visao_em_fluxo``), AQUI o
+    progresso por linha existe de verdade — a conciliação começa enquanto
+    o modelo ainda escreve. Nas faixas, as linhas saem na costura.
     """
     def _st(msg: str) -> None:
         if callable(status_cb):
@@ -132,52 +317,93 @@ def ler_tabela(imagem: str | Path, motor: MotorIA, *, min_lado: int = 1024,
         return TabelaOCR()
     _st("Preparando a imagem…")
     caminho = _preparar_imagem(Path(imagem), min_lado)
-    _st("Lendo a foto com a IA — a tabela inteira é lida de uma vez; "
-        "pode levar alguns minutos…")
+    from PIL import Image
+    with Image.open(caminho) as img:
+        faixas = _cortes_da_tabela(img)
     try:
-        resposta = motor.visao(caminho, PROMPT_OCR, max_tokens=4096)
+        if len(faixas) == 1 and ao_ler_linha is not None and hasattr(
+                motor, "visao_em_fluxo"):
+            _st("Lendo a foto com a IA — as linhas aparecem conforme o "
+                "modelo lê; pode levar alguns minutos…")
+            return _tabela_lida(*_ler_em_fluxo(caminho, motor, ao_ler_linha,
+                                               _st), _st)
+        if len(faixas) == 1:
+            _st("Lendo a foto com a IA — a tabela inteira é lida de uma vez; "
+                "pode levar alguns minutos…")
+            linhas, validade = _linhas_da_resposta(
+                motor.visao(caminho, PROMPT_OCR, max_tokens=4096))
+        else:
+            _st(f"Lendo a foto com a IA em {len(faixas)} faixas — "
+                "pode levar alguns minutos…")
+            if em_voo is None:
+                em_voo = getattr(getattr(motor, "config", None),
+                                 "conexoes", 1)
+            linhas, validade = _ler_em_faixas(caminho, motor, faixas, em_voo)
     except IAIndisponivel:
         return TabelaOCR()
+    if ao_ler_linha is not None:
+        for linha in linhas:
+            ao_ler_linha(linha)
+    return _tabela_lida(linhas, validade, _st)
 
-    dados = _extrair_json_obj(resposta)
-    linhas = []
-    for d in dados.get("linhas", []):
-        desc = (d.get("descricao") or "").strip()
-        if desc:
-            preco = d.get("preco")
-            linhas.append(LinhaOferta(desc, str(preco).strip() if preco else None,
-                                      riscada=bool(d.get("riscada"))))
 
-    validade = dados.get("validade_oferta")
-    validade = validade.strip() if isinstance(validade, str) and validade.strip() else None
+def _tabela_lida(linhas, validade, _st) -> TabelaOCR:
     _st(f"Foto lida: {len(linhas)} produtos encontrados")
     return TabelaOCR(linhas=linhas, validade_oferta=validade)
 
 
 # --- cache de leitura (RG-04): reimportar a MESMA foto não re-roda o OCR ----------
-
-_CACHE_VERSAO = 1
-_CACHE_MAX = 30
+#
+# SQLite em ``config/ocr_cache.db`` (o JSON de antes guardava 30 leituras e se
+# reescrevia INTEIRO a cada gravação). Duas tabelas:
+#
+# * ``leituras``: (conteúdo, modelo, versão do prompt) -> linhas — a chave
+#   cobre o modelo E o prompt: trocar qualquer um relê de verdade;
+# * ``arquivos``: (caminho, tamanho, mtime) -> hash do conteúdo — a MESMA foto
+#   no mesmo lugar, intocada, não é relida nem hasheada de novo. O caminho
+#   entra só como sha256 (I3: nada de caminho de máquina no disco).
+#
+# Teto de ``cache_max()`` leituras (config ``ocr.cache_max``, padrão
+# ``CACHE_MAX``); acima dele sai a usada há mais tempo (LRU).
+
+_CACHE_VERSAO = 2
+CHAVE_CACHE_MAX = "ocr.cache_max"
+CACHE_MAX = 2000
+_BLOCO_HASH = 1 << 20               # o hash lê a foto em blocos de 1 MB
 
 
 def _cache_path() -> Path:
     from app.core.paths import SystemRoot
-    return SystemRoot().config / "ocr_cache.json"
+    return SystemRoot().config / "ocr_cache.db"
 
 
-def _hash_arquivo(caminho: str | Path) -> str:
-    import hashlib
-    return hashlib.sha256(Path(caminho).read_bytes()).hexdigest()
+def cache_max() -> int:
+    """Config ``ocr.cache_max``: quantas leituras o cache guarda (ausente
+    ou ilegível = ``CACHE_MAX``; mínimo 1)."""
+    try:
+        from app.core.database import Database
+        from app.core.repositories import ConfigRepositorio
+        db = Database().init()
+        try:
+            with db.Session() as s:
+                v = ConfigRepositorio(s).get(CHAVE_CACHE_MAX)
+        finally:
+            db.engine.dispose()
+        n = CACHE_MAX if v is None else int(v)
+    except Exception:
+        n = CACHE_MAX
+    return max(1, n)
 
 
-def _cache_carregar() -> dict:
-    try:
-        dados = json.loads(_cache_path().read_text(encoding="utf-8"))
-        if dados.get("versao") == _CACHE_VERSAO:
-            return dados.get("entradas", {})
-    except (OSError, ValueError, AttributeError):
-        pass
-    return {}
+def _hash_arquivo(caminho: str | Path) -> str:
+    """sha256 do CONTEÚDO, lido em blocos (um PDF de 40 MB não vai inteiro
+    para a memória)."""
+    import hashlib
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while bloco := f.read(_BLOCO_HASH):
+            h.update(bloco)
+    return h.hexdigest()
 
 
 def _versao_prompt() -> str:
@@ -188,23 +414,108 @@ def _versao_prompt() -> str:
     return hashlib.sha1(PROMPT_OCR.encode("utf-8")).hexdigest()[:10]
 
 
+def _cache_abrir():
+    """Conexão com o cache (None se o disco recusar — cache é conforto,
+    nunca requisito). Na primeira vez, importa o ``ocr_cache.json`` antigo."""
+    import sqlite3
+    destino = _cache_path()
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(destino, timeout=5.0)
+        con.executescript(
+            "CREATE TABLE IF NOT EXISTS leituras ("
+            " conteudo TEXT NOT NULL, modelo TEXT NOT NULL,"
+            " prompt TEXT NOT NULL, linhas TEXT NOT NULL,"
+            " validade_oferta TEXT, arquivo TEXT, quando TEXT,"
+            " usado REAL NOT NULL,"
+            " PRIMARY KEY (conteudo, modelo, prompt));"
+            "CREATE INDEX IF NOT EXISTS ix_leituras_usado ON leituras (usado);"
+            "CREATE TABLE IF NOT EXISTS arquivos ("
+            " caminho TEXT PRIMARY KEY, tamanho INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL, conteudo TEXT NOT NULL);")
+        if con.execute("PRAGMA user_version").fetchone()[0] < _CACHE_VERSAO:
+            _importar_json_antigo(con, destino.with_name("ocr_cache.json"))
+            con.execute(f"PRAGMA user_version = {_CACHE_VERSAO}")
+            con.commit()
+        return con
+    except (sqlite3.Error, OSError):
+        return None
+
+
+def _importar_json_antigo(con, antigo: Path) -> None:
+    """As leituras do ``ocr_cache.json`` (versão 1) viram linhas do banco —
+    a foto do mês passado continua sendo acerto depois da atualização."""
+    import time
+    try:
+        dados = json.loads(antigo.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    entradas = dados.get("entradas", {}) if isinstance(dados, dict) else {}
+    agora = time.time()
+    for conteudo, e in entradas.items():
+        if isinstance(e, dict) and e.get("linhas"):
+            con.execute(
+                "INSERT OR IGNORE INTO leituras VALUES (?,?,?,?,?,?,?,?)",
+                (conteudo, e.get("modelo") or "", e.get("prompt") or "",
+                 json.dumps(e["linhas"], ensure_ascii=False),
+                 e.get("validade_oferta"), e.get("arquivo"),
+                 e.get("quando"), agora))
+    antigo.unlink(missing_ok=True)
+
+
+def _hash_com_atalho(con, caminho: str | Path) -> str:
+    """O hash do conteúdo — sem ler a foto quando (caminho, tamanho, mtime)
+    batem com a última vez."""
+    import hashlib
+    p = Path(caminho)
+    st = p.stat()
+    chave = hashlib.sha256(str(p.resolve()).encode("utf-8")).hexdigest()
+    if con is not None:
+        linha = con.execute(
+            "SELECT conteudo FROM arquivos WHERE caminho = ? AND tamanho = ?"
+            " AND mtime_ns = ?", (chave, st.st_size, st.st_mtime_ns)).fetchone()
+        if linha:
+            return linha[0]
+    conteudo = _hash_arquivo(p)
+    if con is not None:
+        con.execute("INSERT OR REPLACE INTO arquivos VALUES (?,?,?,?)",
+                    (chave, st.st_size, st.st_mtime_ns, conteudo))
+    return conteudo
+
+
 def cache_consultar(caminho: str | Path, modelo_visao: str) -> TabelaOCR | None:
     """Leitura anterior da MESMA foto (mesmo conteúdo, mesmo modelo e mesmo
     PROMPT) — ou None."""
-    entrada = _cache_carregar().get(_hash_arquivo(caminho))
-    if not entrada or entrada.get("modelo") != modelo_visao:
+    import sqlite3
+    import time
+    con = _cache_abrir()
+    if con is None:
         return None
-    if entrada.get("prompt") != _versao_prompt():
-        return None                      # prompt evoluiu: reler de verdade
+    try:
+        with con:
+            conteudo = _hash_com_atalho(con, caminho)
+            linha = con.execute(
+                "SELECT linhas, validade_oferta FROM leituras WHERE"
+                " conteudo = ? AND modelo = ? AND prompt = ?",
+                (conteudo, modelo_visao, _versao_prompt())).fetchone()
+            if linha is None:
+                return None                  # prompt/modelo novo: reler
+            con.execute(
+                "UPDATE leituras SET usado = ? WHERE conteudo = ? AND"
+                " modelo = ? AND prompt = ?",
+                (time.time(), conteudo, modelo_visao, _versao_prompt()))
+    except (sqlite3.Error, OSError, ValueError):
+        return None
+    finally:
+        con.close()
     # §2.1: entrada antiga é o par [desc, preco]; a nova é o trio com
     # "riscada" — o leitor aceita as duas (cache velho não envenena)
     linhas = [LinhaOferta(ln[0], ln[1],
                           riscada=bool(ln[2]) if len(ln) > 2 else False)
-              for ln in entrada.get("linhas", []) if ln and ln[0]]
+              for ln in json.loads(linha[0]) if ln and ln[0]]
     if not linhas:
         return None
-    return TabelaOCR(linhas=linhas,
-                     validade_oferta=entrada.get("validade_oferta"))
+    return TabelaOCR(linhas=linhas, validade_oferta=linha[1])
 
 
 def cache_limpar() -> int:
@@ -214,42 +525,69 @@ def cache_limpar() -> int:
     uma foto mal lida ficaria presa no cache sem isto (revisão da Onda 1).
     Devolve quantas leituras havia.
     """
-    entradas = _cache_carregar()
+    import sqlite3
+    con = _cache_abrir()
+    if con is None:
+        return 0
+    try:
+        with con:
+            n = con.execute("SELECT COUNT(*) FROM leituras").fetchone()[0]
+            con.execute("DELETE FROM leituras")
+            con.execute("DELETE FROM arquivos")
+    except sqlite3.Error:
+        n = 0
+    finally:
+        con.close()
+    _limpar_respostas_do_ocr()
+    return n
+
+
+def _limpar_respostas_do_ocr() -> None:
+    """A leitura de foto que o cache de RESPOSTAS ainda guarde (a de antes
+    do OCR sair dele) também vai embora — "reler" é reler de verdade."""
+    from app.ai.cache_respostas import NOME_ARQUIVO, CacheRespostas
+    from app.core.paths import SystemRoot
+    arquivo = SystemRoot().banco / NOME_ARQUIVO
+    if not arquivo.exists():
+        return
+    cache = CacheRespostas(arquivo)
     try:
-        _cache_path().unlink(missing_ok=True)
-    except OSError:
-        pass
-    return len(entradas)
+        cache.limpar("ocr")
+    finally:
+        cache.fechar()
 
 
 def cache_guardar(caminho: str | Path, modelo_visao: str,
                   tabela: TabelaOCR) -> None:
     """Grava a leitura (só com linhas — falha não envenena o cache; I3: só o
-    NOME do arquivo, nunca caminho de máquina). Escrita atômica; teto de
-    entradas descarta a mais antiga."""
+    NOME do arquivo, nunca caminho de máquina). Acima de ``cache_max()``
+    leituras, sai a usada há mais tempo."""
     if not tabela.linhas:
         return
+    import sqlite3
+    import time
     from datetime import datetime
-    entradas = _cache_carregar()
-    entradas[_hash_arquivo(caminho)] = {
-        "linhas": [[ln.descricao, ln.preco, ln.riscada]
-                   for ln in tabela.linhas],
-        "validade_oferta": tabela.validade_oferta,
-        "modelo": modelo_visao,
-        "prompt": _versao_prompt(),
-        "arquivo": Path(caminho).name,
-        "quando": datetime.now().isoformat(timespec="seconds"),
-    }
-    while len(entradas) > _CACHE_MAX:
-        mais_velha = min(entradas, key=lambda h: entradas[h].get("quando", ""))
-        del entradas[mais_velha]
+    teto = cache_max()
+    con = _cache_abrir()
+    if con is None:
+        return
     try:
-        destino = _cache_path()
-        destino.parent.mkdir(parents=True, exist_ok=True)
-        tmp = destino.with_suffix(".json.tmp")
-        tmp.write_text(json.dumps({"versao": _CACHE_VERSAO,
-                                   "entradas": entradas},
-                                  ensure_ascii=False), encoding="utf-8")
-        tmp.replace(destino)
-    except OSError:
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO leituras VALUES (?,?,?,?,?,?,?,?)",
+                (_hash_com_atalho(con, caminho), modelo_visao,
+                 _versao_prompt(),
+                 json.dumps([[ln.descricao, ln.preco, ln.riscada]
+                             for ln in tabela.linhas], ensure_ascii=False),
+                 tabela.validade_oferta, Path(caminho).name,
+                 datetime.now().isoformat(timespec="seconds"), time.time()))
+            con.execute(
+                "DELETE FROM leituras WHERE rowid IN (SELECT rowid FROM"
+                " leituras ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+                (teto,))
+            con.execute("DELETE FROM arquivos WHERE conteudo NOT IN"
+                        " (SELECT conteudo FROM leituras)")
+    except (sqlite3.Error, OSError):
         pass                          # cache é conforto, nunca requisito
+    finally:
+        con.close()
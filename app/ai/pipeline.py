@@ -7,13 +7,19 @@ os itens NOVOS (vermelho) passam pelo enriquecimento para virar produto.
 
 from __future__ import annotations
 
+import contextvars
+import copy
+import queue
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 
 from app.ai.client import MotorIA
 from app.ai.conciliacao import Conciliador, Semaforo, Veredito
 from app.ai.enriquecimento import ProdutoEnriquecido, enriquecer
-from app.ai.ocr import LinhaOferta, ler_tabela
+from app.ai.fila import FilaConcorrente
+from app.ai.ocr import LinhaOferta, TabelaOCR, ler_tabela
 
 
 @dataclass
@@ -35,21 +41,217 @@ class ResultadoImportacao:
     validade_oferta: str | None = None
 
 
+class _Esteira:
+    """Os estágios do ``processar_tabela``, ligados por filas com teto.
+
+    O OCR lê numa thread própria e solta cada linha na caixa do dono; o
+    sanitizar/fuzzy roda na thread do dono (a sessão do ``Conciliador``
+    não é thread-safe), em lotes de até ``LOTE_LINHAS`` — o lote sai cheio
+    ou quando o fluxo fica ``OCIOSO_S`` sem linha nova (um POST de
+    embedding por lote, não por linha). O juiz e o enriquecimento são
+    ``FilaConcorrente`` próprias, cada uma com seu ``em_voo`` e
+    ``teto_pendentes`` (quem enche a fila espera vaga). Os resultados
+    voltam pela MESMA ``queue.Queue`` e o dono aplica — o ORM nunca sai da
+    thread dele."""
+
+    LOTE_LINHAS = 16
+    OCIOSO_S = 0.15
+
+    def __init__(self, conciliador: Conciliador, motor: MotorIA, *,
+                 em_voo_juiz: int, em_voo: int, teto: int,
+                 ao_resultado: Callable[[ResultadoLinha], None] | None):
+        self.conc = conciliador
+        self.ao_resultado = ao_resultado or (lambda _r: None)
+        self.vereditos: dict[str, Veredito] = {}
+        self.enriquecidos: dict[str, ProdutoEnriquecido] = {}
+        self._linhas: dict[str, LinhaOferta] = {}
+        self._provaveis: dict[str, Veredito] = {}    # esperando o juiz
+        self._para_juiz: list[tuple[str, list[str]]] = []   # o lote enchendo
+        self._lotes: dict[str, list[str]] = {}       # chave do lote -> linhas
+        self._enriquecendo: set[str] = set()
+        self._erros: list[Exception] = []
+        self._caixa: queue.Queue = queue.Queue()
+        self._juiz = FilaConcorrente(
+            conciliador.perguntar_ao_juiz_em_lote,
+            em_voo=em_voo_juiz, teto_pendentes=teto,
+            ao_terminar=lambda c, r: self._caixa.put(("juiz", c, r)),
+            ao_falhar=lambda c, _e: self._caixa.put(("juiz", c, None)))
+        self._enriquecer = FilaConcorrente(
+            lambda desc: enriquecer(desc, motor),
+            em_voo=em_voo, teto_pendentes=teto,
+            ao_terminar=lambda c, r: self._caixa.put(("enr", c, r)),
+            ao_falhar=lambda c, e: self._caixa.put(("erro", c, e)))
+        self._threads = [threading.Thread(target=f.rodar, daemon=True)
+                         for f in (self._juiz, self._enriquecer)]
+        for t in self._threads:
+            t.start()
+
+    def ler(self, imagem: str | Path, motor_ocr: MotorIA) -> TabelaOCR:
+        """O OCR em fluxo numa thread; o dono junta as linhas em lotes e
+        aplica juiz/enriquecimento enquanto espera. Devolve a tabela lida."""
+        saida: dict[str, object] = {}
+
+        def _ler() -> None:
+            try:
+                saida["tabela"] = ler_tabela(
+                    imagem, motor_ocr,
+                    ao_ler_linha=lambda ln: self._caixa.put(("linha", None, ln)))
+            except BaseException as exc:
+                saida["erro"] = exc
+            finally:
+                self._caixa.put(("fim", None, None))
+        leitor = threading.Thread(
+            target=contextvars.copy_context().run, args=(_ler,), daemon=True)
+        leitor.start()
+        lote: list[LinhaOferta] = []
+        while True:
+            try:
+                evento = self._caixa.get(timeout=self.OCIOSO_S)
+            except queue.Empty:
+                if lote:                   # o fluxo parou um pouco: vai
+                    self.entrar(lote)
+                    lote = []
+                self._mandar_ao_juiz()
+                continue
+            if evento[0] == "fim":
+                break
+            if evento[0] == "linha":
+                lote.append(evento[2])
+                if len(lote) >= self.LOTE_LINHAS:
+                    self.entrar(lote)
+                    lote = []
+            else:
+                self._aplicar(evento)
+                self._mandar_ao_juiz()     # o juiz pode ter ficado livre
+        leitor.join()
+        if lote:
+            self.entrar(lote)
+        if "erro" in saida:
+            raise saida["erro"]
+        return saida["tabela"]
+
+    def entrar(self, linhas: list[LinhaOferta]) -> None:
+        """Estágio 1 (na thread do dono): exato/fuzzy das linhas novas; o
+        ambíguo vai ao juiz, o vermelho ao enriquecimento."""
+        novas: dict[str, LinhaOferta] = {}
+        for ln in linhas:
+            if ln.descricao not in self._linhas:
+                novas.setdefault(ln.descricao, ln)
+        if not novas:
+            return
+        self._linhas.update(novas)
+        for desc, (v, pede_juiz) in zip(
+                novas, self.conc.pre_vereditos_lote(list(novas))):
+            if pede_juiz:
+                self._provaveis[desc] = v
+                self._para_juiz.append(
+                    (desc, [c.produto.nome_sanitizado for c in v.candidatos]))
+            else:
+                self._decidido(desc, v)
+        self._mandar_ao_juiz()
+
+    def _mandar_ao_juiz(self, *, tudo: bool = False) -> None:
+        """O juiz vai em lotes de até ``lote_juiz`` perguntas (um pedido
+        cada). Lote cheio sai sempre; o parcial sai quando há slot do juiz
+        parado (o ambíguo nunca espera à toa) ou no fim (``tudo``) — o lote
+        só enche enquanto o juiz está ocupado."""
+        passo = self.conc.lote_juiz
+        while self._para_juiz and (len(self._para_juiz) >= passo or tudo
+                                   or self._juiz_com_vaga()):
+            bloco, self._para_juiz = (self._para_juiz[:passo],
+                                      self._para_juiz[passo:])
+            chave = f"lote{len(self._lotes)}"
+            self._lotes[chave] = [desc for desc, _o in bloco]
+            self._juiz.adicionar([(chave, bloco)])
+
+    def _juiz_com_vaga(self) -> bool:
+        return (not self._juiz.pendentes()
+                and len(self._juiz.em_curso()) < self._juiz.em_voo)
+
+    def _decidido(self, desc: str, v: Veredito) -> None:
+        self.vereditos[desc] = v
+        if v.semaforo == Semaforo.VERMELHO:
+            self._enriquecendo.add(desc)
+            self._enriquecer.adicionar([(desc, desc)])
+        else:
+            self._emitir(desc)
+
+    def _emitir(self, desc: str) -> None:
+        self.ao_resultado(ResultadoLinha(
+            self._linhas[desc], copy.copy(self.vereditos[desc]),
+            copy.copy(self.enriquecidos.get(desc))))
+
+    def _aplicar(self, evento: tuple) -> None:
+        tipo, desc, valor = evento
+        if tipo == "juiz":                 # ``desc`` é a chave do lote
+            linhas = self._lotes.pop(desc)
+            for linha, dados in zip(linhas, valor or [None] * len(linhas)):
+                self._decidido(linha, self.conc.julgar(
+                    self._provaveis.pop(linha), dados))
+            return
+        self._enriquecendo.discard(desc)
+        if tipo == "erro":
+            self._erros.append(valor)
+            return
+        self.enriquecidos[desc] = valor
+        self._emitir(desc)
+
+    def terminar(self) -> None:
+        """Espera o juiz e o enriquecimento do que entrou; a 1ª exceção de
+        enriquecimento sobe no fim (como o ``mapear`` de antes)."""
+        self._mandar_ao_juiz(tudo=True)
+        while self._provaveis or self._enriquecendo:
+            self._aplicar(self._caixa.get())
+        self.parar()
+        if self._erros:
+            raise self._erros[0]
+
+    def parar(self) -> None:
+        for fila in (self._juiz, self._enriquecer):
+            fila.fechar()
+            fila.cancelar()
+        for t in self._threads:
+            t.join()
+
+
 def processar_tabela(
     imagem: str | Path,
     motor_ocr: MotorIA,
     conciliador: Conciliador,
     *,
     motor_enriquecimento: MotorIA | None = None,
+    em_voo: int = 1,
+    em_voo_juiz: int | None = None,
+    teto_fila: int | None = None,
+    ao_resultado: Callable[[ResultadoLinha], None] | None = None,
 ) -> ResultadoImportacao:
-    """Lê a foto e processa cada linha (conciliar; enriquecer os novos)."""
-    motor_enriquecimento = motor_enriquecimento or motor_ocr
-    tabela = ler_tabela(imagem, motor_ocr)
-    resultados: list[ResultadoLinha] = []
-    for linha in tabela.linhas:
-        veredito = conciliador.conciliar(linha.descricao)
-        enriquecido = None
-        if veredito.semaforo == Semaforo.VERMELHO:
-            enriquecido = enriquecer(linha.descricao, motor_enriquecimento)
-        resultados.append(ResultadoLinha(linha, veredito, enriquecido))
+    """Lê a foto e processa cada linha (conciliar; enriquecer os novos).
+
+    É uma esteira (``_Esteira``): cada linha que o OCR termina de escrever
+    já passa pelo exato/fuzzy, e o juiz e o enriquecimento correm em
+    paralelo com a leitura e entre si — o lote leva perto do estágio mais
+    lento, não a soma. ``ao_resultado`` recebe cada linha assim que ela
+    fica pronta (por descrição, na ordem em que terminam); o retorno é o
+    mesmo do processamento em série, na ordem da tabela.
+
+    ``em_voo``: quantos enriquecimentos vão ao motor juntos; ``em_voo_juiz``
+    o mesmo para o juiz (padrão: ``em_voo``; o teto natural de ambos é
+    ``ConfigIA.conexoes``). ``teto_fila``: itens esperando em cada estágio
+    antes de o anterior parar (padrão: 4 × o ``em_voo`` do maior)."""
+    motor = motor_enriquecimento or motor_ocr
+    em_voo_juiz = em_voo_juiz or em_voo
+    esteira = _Esteira(conciliador, motor, em_voo_juiz=em_voo_juiz,
+                       em_voo=em_voo,
+                       teto=teto_fila or 4 * max(em_voo, em_voo_juiz),
+                       ao_resultado=ao_resultado)
+    try:
+        tabela = esteira.ler(imagem, motor_ocr)
+        # a leitura final manda: linha que o fluxo não viu igual entra aqui
+        esteira.entrar(tabela.linhas)
+        esteira.terminar()
+    finally:
+        esteira.parar()
+    resultados = [ResultadoLinha(ln, copy.copy(esteira.vereditos[ln.descricao]),
+                                 copy.copy(esteira.enriquecidos.get(ln.descricao)))
+                  for ln in tabela.linhas]
     return ResultadoImportacao(linhas=resultados, validade_oferta=tabela.validade_oferta)
@@ -193,7 +193,9 @@ def _revisao_por_visao(png_path, dados_por_slot, motor) -> list[str]:
     esperados = {_fmt_preco(d.preco_por) for d in dados_por_slot.values()
                  if d.preco_por is not None}
     esperados.discard(None)
-    resp = motor.visao(str(png_path), _PROMPT, max_tokens=1024)
+    from app.ai.cache_respostas import ponto_de_chamada
+    with ponto_de_chamada("revisora"):
+        resp = motor.visao(str(png_path), _PROMPT, max_tokens=1024)
     obj = _extrair_json_obj(resp)
     avisos: list[str] = []
 
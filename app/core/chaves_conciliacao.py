@@ -0,0 +1,196 @@
+"""
+Chaves de comparação da conciliação — persistidas no banco
+==========================================================
+O ``Conciliador`` compara a linha da tabela com a CHAVE de cada produto e
+de cada alias (sem peso, sem acento, sinônimos regionais canonizados).
+Refazer a chave do acervo inteiro a cada lote (sanitizar cada alias,
+canonizar cada nome) era o aquecimento da 1ª linha de toda conciliação —
+~1,5 s em 50k produtos antes de comparar qualquer coisa.
+
+Agora a chave mora na própria linha (``produtos.chave_conciliacao`` e
+``produto_aliases.chave_conciliacao``):
+
+* quem grava produto/alias grava a chave junto (``ProdutoRepositorio``,
+  ``excel_acervo``); nome mudado por outro caminho do ORM ZERA a chave
+  (o listener em ``models``) e a próxima leitura refaz só aquela linha;
+* a VERSÃO das chaves (a receita daqui + as regras do sanitizador + os
+  sinônimos do dono) fica na Config ``conciliacao.versao_chaves`` —
+  mudou qualquer uma, a 1ª conciliação refaz TODAS, uma vez só;
+* banco que não aceita a escrita (travado por outro processo, sem
+  permissão no disco): as chaves saem em memória, como antes — nada
+  quebra por não poder gravar (I2).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+from dataclasses import fields
+
+from sqlalchemy import bindparam, inspect, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.models import Produto, ProdutoAlias
+from app.core.sanitize import (REGRAS_PADRAO, VERSAO_REGRAS, RegrasSanitizacao,
+                               sanitizar)
+
+CHAVE_CONFIG = "conciliacao.versao_chaves"
+
+# suba ao mudar ``chave_comparacao``/``chave_do_nome`` — as chaves
+# gravadas se refazem na próxima conciliação
+VERSAO_RECEITA = 1
+
+# Peso normalizado (ex.: "1,5L", "380g") — removido antes de comparar, pois a
+# unidade compartilhada infla o score e casa produtos diferentes.
+# Rodada JM (B1.1): a tabela real do dono escreve "5 Kgs", "1 LT",
+# "5 LTS" — os PLURAIS/grafias cruas casam também (longas antes das
+# curtas: "kgs" antes de "kg", senão o \b final barra o plural).
+PESO_RE = re.compile(
+    r"\b\d+(?:[.,]\d+)?\s*"
+    r"(?:kgs?|kilos?|quilos?|mgs?|mls?|grs?|lts?|litros?|g|l)\b",
+    re.IGNORECASE)
+
+
+def chave_comparacao(texto: str) -> str:
+    """Normaliza para o fuzzy: remove peso, acentos e pontuação; minúsculo.
+
+    Casar deve ser insensível a acento e à medida — o que importa é o
+    tipo+marca. Ex.: 'CAFE PILAO 500G' e 'Café Pilão ... 500g' viram a mesma base.
+    """
+    t = PESO_RE.sub(" ", texto)
+    t = "".join(c for c in unicodedata.normalize("NFKD", t) if not unicodedata.combining(c))
+    t = re.sub(r"[^a-z0-9 ]", " ", t.lower())
+    return re.sub(r"\s+", " ", t).strip()
+
+
+def sinonimos_da_config(session: Session) -> list[list[str]]:
+    """OS F11.5 #47/#81 (R-086): os sinônimos regionais (padrão + os do
+    dono na Config). Falha de leitura degrada para o padrão (I2)."""
+    from app.core.aprendizado import SINONIMOS_REGIONAIS_PADRAO, grupos_com_extras
+    try:
+        from app.core.repositories import ConfigRepositorio
+        extras = ConfigRepositorio(session).get("sinonimos.regionais", [])
+        return grupos_com_extras(extras)
+    except Exception:
+        return SINONIMOS_REGIONAIS_PADRAO
+
+
+def chave_do_nome(nome: str | None, sinonimos) -> str:
+    """A chave de um nome JÁ sanitizado (o ``nome_sanitizado`` do cadastro)."""
+    from app.core.aprendizado import canonizar_sinonimos
+    return chave_comparacao(canonizar_sinonimos(nome or "", sinonimos))
+
+
+def chave_do_alias(alias_raw: str, sinonimos,
+                   regras: RegrasSanitizacao = REGRAS_PADRAO) -> str:
+    """A chave de um alias (cru como a loja escreveu: sanitiza antes)."""
+    return chave_do_nome(sanitizar(alias_raw, regras).nome_sanitizado, sinonimos)
+
+
+def _impressao_regras(regras: RegrasSanitizacao) -> list:
+    """As regras em forma ESTÁVEL (frozenset ordenado — o ``repr`` muda de
+    ordem a cada processo e refaria as chaves à toa)."""
+    saida = []
+    for f in fields(regras):
+        v = getattr(regras, f.name)
+        if isinstance(v, frozenset):
+            v = sorted(v)
+        elif isinstance(v, tuple):
+            v = [list(x) if isinstance(x, tuple) else x for x in v]
+        saida.append([f.name, v])
+    return saida
+
+
+def versao_das_chaves(sinonimos,
+                      regras: RegrasSanitizacao = REGRAS_PADRAO) -> str:
+    """A impressão digital do que decide a chave: receita, regras do
+    sanitizador (a versão do código + os parâmetros) e sinônimos."""
+    corpo = json.dumps([VERSAO_RECEITA, VERSAO_REGRAS, _impressao_regras(regras),
+                        [list(g) for g in sinonimos]],
+                       ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(corpo.encode("utf-8")).hexdigest()[:16]
+
+
+def sincronizar_chaves(session: Session, sinonimos) -> bool:
+    """Deixa as chaves gravadas em dia: versão diferente (ou ausente) →
+    refaz TODAS; versão igual → só as linhas sem chave (novas por um
+    caminho que não a gravou, nome editado). False = não deu para gravar
+    (somente leitura, banco travado): o chamador calcula em memória.
+
+    Roda numa sessão PRÓPRIA (outra conexão do mesmo engine), com commit
+    dela: a unidade de trabalho de quem chamou — um caminho de LEITURA —
+    não é commitada antes da hora nem tem nada expirado. Os objetos que
+    ela já carregou recebem a chave nova como valor do banco, sem SELECT
+    (``_refrescar_carregados``). Quem chamou segurando escrita aberta
+    (no SQLite, o banco fica travado para as outras conexões) não espera
+    o ``timeout``: False na hora."""
+    from app.core.repositories import ConfigRepositorio
+    versao = versao_das_chaves(sinonimos)
+    try:
+        with Session(bind=session.get_bind()) as propria:
+            cfg = ConfigRepositorio(propria)
+            tudo = cfg.get(CHAVE_CONFIG) != versao
+            prods = select(Produto.id, Produto.nome_sanitizado)
+            aliases = select(ProdutoAlias.id, ProdutoAlias.alias_raw)
+            if not tudo:
+                prods = prods.where(Produto.chave_conciliacao.is_(None))
+                aliases = aliases.where(ProdutoAlias.chave_conciliacao.is_(None))
+            novos_p = [{"b_id": pid, "b_chave": chave_do_nome(nome, sinonimos)}
+                       for pid, nome in propria.execute(prods)]
+            novos_a = [{"b_id": aid, "b_chave": chave_do_alias(raw, sinonimos)}
+                       for aid, raw in propria.execute(aliases)]
+            if not (novos_p or novos_a or tudo):
+                return True
+            if _escrevendo(session):
+                return False
+            for tabela, linhas in ((Produto.__table__, novos_p),
+                                   (ProdutoAlias.__table__, novos_a)):
+                if not linhas:
+                    continue
+                stmt = (update(tabela).where(tabela.c.id == bindparam("b_id"))
+                        .values(chave_conciliacao=bindparam("b_chave")))
+                if "atualizado_em" in tabela.c:
+                    # a chave não é edição do produto: o carimbo fica como está
+                    stmt = stmt.values(atualizado_em=tabela.c.atualizado_em)
+                propria.connection().execute(stmt, linhas)
+            if tudo:
+                cfg.set(CHAVE_CONFIG, versao)
+            propria.commit()
+    except SQLAlchemyError:
+        return False
+    _refrescar_carregados(session, {Produto: novos_p, ProdutoAlias: novos_a})
+    return True
+
+
+def _escrevendo(session: Session) -> bool:
+    """A sessão tem escrita aberta no banco (um flush sem commit)?"""
+    if not session.in_transaction():
+        return False
+    try:
+        dbapi = session.connection().connection.dbapi_connection
+        return bool(getattr(dbapi, "in_transaction", False))
+    except SQLAlchemyError:
+        return False
+
+
+def _refrescar_carregados(session: Session, gravadas: dict) -> None:
+    """A chave recém-gravada nos objetos que a ``session`` já tem, como
+    valor do banco (sem SELECT, sem marcar nada como alterado). Objeto
+    com a chave mexida e não gravada fica com a dele."""
+    chaves = {cls: {d["b_id"]: d["b_chave"] for d in linhas}
+              for cls, linhas in gravadas.items() if linhas}
+    if not chaves:
+        return
+    for obj in list(session.identity_map.values()):
+        da_classe = chaves.get(type(obj))
+        if not da_classe:
+            continue
+        estado = inspect(obj)
+        chave = da_classe.get(estado.identity[0]) if estado.identity else None
+        if chave is None or estado.attrs.chave_conciliacao.history.has_changes():
+            continue
+        set_committed_value(obj, "chave_conciliacao", chave)
@@ -76,7 +76,10 @@ _COLUNAS_NOVAS: dict[str, dict[str, str]] = {
                  "ean": "VARCHAR(14)",                 # RG-41
                  "imagens_json": "TEXT",               # RG-28
                  "excluido_em": "DATETIME",            # F2 passo 81
-                 "familia_id": "INTEGER"},             # Rodada JM (B4)
+                 "familia_id": "INTEGER",              # Rodada JM (B4)
+                 "chave_conciliacao": "VARCHAR(255)"},  # chaves gravadas
+    "produto_aliases": {"chave_conciliacao": "VARCHAR(255)",
+                        "alias_limpo": "VARCHAR(255)"},   # busca indexada
     # FASE 2: evento vira entidade (o TEXTO `evento` fica por compat — a
     # verdade é o id); FK "solta" de propósito: SQLite não adiciona FK via
     # ALTER — a integridade é do serviço de eventos
@@ -91,7 +94,7 @@ _COLUNAS_NOVAS: dict[str, dict[str, str]] = {
 # F13/E7 (D-11): a VERSÃO do schema — suba ao mexer em _COLUNAS_NOVAS ou
 # _INDICES_NOVOS. 0 = banco pré-versão (legado); o init de um banco
 # existente com versão menor tira backup ANTES de migrar.
-VERSAO_SCHEMA = 3                       # Rodada JM (B4): famílias de sabores
+VERSAO_SCHEMA = 5                       # alias limpo indexado
 
 # F13/E9 (D-10): create_all com checkfirst PULA tabela existente — índice
 # novo declarado no modelo nunca chegava a banco antigo. O migrador
@@ -102,6 +105,7 @@ _INDICES_NOVOS: tuple = (
     ("layouts", "ix_layouts_excluido_em", "excluido_em"),
     ("layouts", "ix_layouts_nome", "nome"),
     ("projetos_salvos", "ix_projetos_salvos_excluido_em", "excluido_em"),
+    ("produto_aliases", "ix_produto_aliases_alias_limpo", "alias_limpo"),
 )
 
 
@@ -166,10 +170,31 @@ def _migrar_schema(engine: Engine) -> None:
                     "podem ser ignorados.")
             except Exception:
                 pass
-        if not alters and not cria_indices and uv >= VERSAO_SCHEMA:
+        # v5: o alias limpo sai do Python (``limpar_alias``) — o backfill
+        # pega a coluna recém-criada e alias gravado por fora do ORM
+        tem_aliases = bool(conn.exec_driver_sql(
+            "PRAGMA table_info(produto_aliases)").first())
+        if (not alters and not cria_indices and uv >= VERSAO_SCHEMA
+                and not (tem_aliases and conn.exec_driver_sql(
+                    "SELECT 1 FROM produto_aliases WHERE alias_limpo IS NULL"
+                    " LIMIT 1").first())):
             return                              # nada a fazer: ZERO write
         for sql in alters + cria_indices:
             conn.exec_driver_sql(sql)
+        if tem_aliases:
+            _preencher_alias_limpo(conn)
         if uv < VERSAO_SCHEMA:
             conn.exec_driver_sql(f"PRAGMA user_version = {VERSAO_SCHEMA}")
         conn.commit()
+
+
+def _preencher_alias_limpo(conn) -> None:
+    """Grava ``alias_limpo`` nas linhas que não o têm (v4→v5)."""
+    from app.core.models import limpar_alias
+    linhas = conn.exec_driver_sql(
+        "SELECT id, alias_raw FROM produto_aliases "
+        "WHERE alias_limpo IS NULL").all()
+    if linhas:
+        conn.exec_driver_sql(
+            "UPDATE produto_aliases SET alias_limpo = ? WHERE id = ?",
+            [(limpar_alias(raw), aid) for aid, raw in linhas])
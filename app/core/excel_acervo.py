@@ -417,6 +417,10 @@ def aplicar_importacao_planilha(analise: AnalisePlanilha,
             locais = {chave_natural(p.nome_sanitizado, p.marca): p
                       for p in s.execute(select(Produto).where(
                           Produto.excluido_em.is_(None))).scalars()}
+            # a chave de conciliação nasce gravada (a 1ª conciliação depois
+            # da planilha não refaz o acervo inteiro)
+            from app.core.chaves_conciliacao import chave_do_nome, sinonimos_da_config
+            sinonimos = sinonimos_da_config(s)
 
             def _aplicar_campos(prod: Produto, plano: dict) -> None:
                 prod.categoria_id = _categoria_id(plano["categoria"])
@@ -438,7 +442,8 @@ def aplicar_importacao_planilha(analise: AnalisePlanilha,
                         "mudou desde a análise)")
                     continue
                 prod = Produto(nome_bruto=plano["nome"],
-                               nome_sanitizado=plano["nome"], marca=plano["marca"] or None)
+                               nome_sanitizado=plano["nome"], marca=plano["marca"] or None,
+                               chave_conciliacao=chave_do_nome(plano["nome"], sinonimos))
                 _aplicar_campos(prod, plano)
                 s.add(prod)
                 s.flush()
@@ -465,10 +470,11 @@ def aplicar_importacao_planilha(analise: AnalisePlanilha,
                     _aplicar_campos(prod, c.plano)
                 elif decisao is Decisao.MANTER_AMBOS:
                     plano = c.plano
+                    nome_v = _nome_variante(s, plano["nome"], plano["marca"])
                     variante = Produto(
-                        nome_bruto=plano["nome"],
-                        nome_sanitizado=_nome_variante(s, plano["nome"], plano["marca"]),
-                        marca=plano["marca"] or None)
+                        nome_bruto=plano["nome"], nome_sanitizado=nome_v,
+                        marca=plano["marca"] or None,
+                        chave_conciliacao=chave_do_nome(nome_v, sinonimos))
                     _aplicar_campos(variante, plano)
                     s.add(variante)
                     s.flush()
@@ -3,7 +3,7 @@ Manutenção — os botões de "consertar sozinho" (FASE 3, Bloco H)
 ===============================================================
 R-134 verificar instalação · R-135 compactar banco · R-129 integridade do
 acervo com QUARENTENA (nunca apagar) · R-133 contador de erros por função ·
-R-132 perfil de máquina fraca (liga 4 chaves de uma vez).
+R-132 perfil de máquina fraca (liga as chaves de uma vez).
 """
 
 from __future__ import annotations
@@ -211,19 +211,28 @@ CHAVES_MAQUINA_FRACA = {
     "aparencia.transparencias": "reduzidas",
     "ia.usar": False,
     "imagem.upscale_auto": False,
+    # o cache de fotos decodificadas (``rendering.cache_imagens``) cabe
+    # na RAM curta: 64 MB ainda seguram a página inteira na prévia
+    "imagem.cache_mb": 64,
+    # export em UM processo (``rendering.paralelo``): sem disputar a RAM
+    # com N cópias do compositor
+    "exportar.processos": 1,
 }
 
 
 def ativar_perfil_maquina_fraca(ligar: bool, raiz=None) -> None:
-    """Liga (ou desfaz) as 4 chaves DE UMA VEZ — o PC do mercado.
+    """Liga (ou desfaz) as chaves DE UMA VEZ — o PC do mercado.
     Desligar devolve os padrões (animações ligadas, IA ligada, upscale
-    ligado, transparências normais)."""
+    ligado, transparências normais, cache de imagens de 256 MB, export em
+    todos os núcleos)."""
     from app.core.database import Database
     from app.core.repositories import ConfigRepositorio
     padroes = {"aparencia.animacoes": "ligadas",
                "aparencia.transparencias": "normais",
                "ia.usar": True,
-               "imagem.upscale_auto": True}
+               "imagem.upscale_auto": True,
+               "imagem.cache_mb": 256,
+               "exportar.processos": 0}
     db = (Database(SystemRoot(raiz)) if raiz is not None
           else Database()).init()
     try:
@@ -241,3 +250,8 @@ def ativar_perfil_maquina_fraca(ligar: bool, raiz=None) -> None:
         recarregar_config()
     except Exception:
         pass
+    try:
+        from app.rendering import cache_imagens
+        cache_imagens.recarregar_config()
+    except Exception:
+        pass
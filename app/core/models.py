@@ -31,9 +31,11 @@ from sqlalchemy import (
     Numeric,
     String,
     Text,
+    event,
     func,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.orm.attributes import NEVER_SET, NO_VALUE
 
 
 class Base(DeclarativeBase):
@@ -159,11 +161,18 @@ class Produto(Base):
     # Imagem tratada em disco (o banco guarda só o caminho).
     caminho_imagem: Mapped[str | None] = mapped_column(String(500))
 
+    # A chave de comparação da conciliação, gravada (a receita e a versão
+    # em `app/core/chaves_conciliacao.py`). None = a refazer.
+    chave_conciliacao: Mapped[str | None] = mapped_column(String(255))
+
     criado_em: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now, server_default=func.now()
     )
+    # onupdate no Python (microssegundos): o CURRENT_TIMESTAMP do SQLite
+    # tem resolução de segundo, e o carimbo do índice de significado
+    # (`app/ai/indice_significado.py`) não veria duas edições no mesmo
     atualizado_em: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.now, server_default=func.now(), onupdate=func.now()
+        DateTime, default=datetime.now, server_default=func.now(), onupdate=datetime.now
     )
 
     categoria: Mapped["Categoria | None"] = relationship(back_populates="produtos")
@@ -200,6 +209,11 @@ class ProdutoAlias(Base):
     overrides_json: Mapped[str] = mapped_column(Text, default="{}")
     usos: Mapped[int] = mapped_column(default=0)
     confirmado_em: Mapped[datetime | None] = mapped_column(DateTime)
+    # a chave de comparação do alias, gravada (como a do Produto)
+    chave_conciliacao: Mapped[str | None] = mapped_column(String(255))
+    # o alias sem os marcadores de lista do OCR (``limpar_alias``) — o
+    # match exato do ``buscar_por_alias`` é uma consulta só, indexada
+    alias_limpo: Mapped[str | None] = mapped_column(String(255), index=True)
     criado_em: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.now, server_default=func.now()
     )
@@ -219,6 +233,37 @@ class ProdutoAlias(Base):
         return f"<Alias {self.alias_raw!r} -> produto={self.produto_id}>"
 
 
+def _zerar_chave_conciliacao(alvo, valor, antigo, _iniciador):
+    """O texto de onde a chave de conciliação sai mudou (Almoxarifado,
+    reformatação do acervo, pacote...): a chave gravada ficou velha —
+    zera, e a próxima conciliação refaz SÓ esta linha. Quem grava a chave
+    nova junto (o repositório) o faz depois de mudar o nome."""
+    if antigo not in (NO_VALUE, NEVER_SET) and valor != antigo:
+        alvo.chave_conciliacao = None
+
+
+event.listen(Produto.nome_sanitizado, "set", _zerar_chave_conciliacao,
+             active_history=True)
+event.listen(ProdutoAlias.alias_raw, "set", _zerar_chave_conciliacao,
+             active_history=True)
+
+
+def limpar_alias(texto: str | None) -> str:
+    """ADENDO 30/07: tira os marcadores de lista que o OCR/colagem
+    trazem na frente do nome ("• ", "▶ ", "> ") — enfeite não é
+    identidade; o match exato por alias compara os dois lados limpos."""
+    return (texto or "").strip().lstrip("•·▶>*–- ").strip()
+
+
+def _gravar_alias_limpo(alvo, valor, _antigo, _iniciador):
+    """A forma limpa acompanha o ``alias_raw`` em TODO caminho do ORM
+    (repositório, aprendizado, pacote importado) — ninguém a grava à mão."""
+    alvo.alias_limpo = limpar_alias(valor)
+
+
+event.listen(ProdutoAlias.alias_raw, "set", _gravar_alias_limpo)
+
+
 # ==============================================================================
 # LAYOUT
 # ==============================================================================
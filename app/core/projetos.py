@@ -79,7 +79,7 @@ def _gerar_miniatura(pasta: Path, layout: LayoutDef, itens: list[dict],
             aplicar_override,
             dados_para_desenho,
         )
-        from app.rendering.compositor import compor_pagina
+        from app.rendering.compositor import compor_miniatura
 
         def _dp(d: dict):
             it = ItemMesa.from_dict(d)
@@ -107,8 +107,10 @@ def _gerar_miniatura(pasta: Path, layout: LayoutDef, itens: list[dict],
             dados = [_dp(d) for d in itens[: len(layout.paginas[0].slots) or 1]]
         fundo = _resolver(pasta, layout.paginas[0].arquivo_fundo
                           or layout.arquivo_fundo)          # miniatura = pág. 1
-        img = compor_pagina(layout, layout.paginas[0], dados, fundo_path=fundo)
-        img.thumbnail((360, 360))
+        # composta no dpi da miniatura (não no do layout para depois
+        # reduzir) — o salvar não paga mais uma página de 300 dpi
+        img = compor_miniatura(layout, layout.paginas[0], dados, 360,
+                               fundo_path=fundo)
         pasta.mkdir(parents=True, exist_ok=True)   # projeto sem imagens/arte
         img.save(pasta / "miniatura.png")
     except Exception:
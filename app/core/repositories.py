@@ -14,17 +14,21 @@ from dataclasses import dataclass
 from decimal import Decimal
 
 from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
-from app.core.models import Categoria, Config, Produto, ProdutoAlias
+from app.core.models import Categoria, Config, Produto, ProdutoAlias, limpar_alias
 from app.core.sanitize import REGRAS_PADRAO, RegrasSanitizacao, ResultadoSanitizacao, sanitizar
 
 
-def _alias_limpo(texto: str) -> str:
-    """ADENDO 30/07: tira os marcadores de lista que o OCR/colagem
-    trazem na frente do nome ("• ", "▶ ", "> ") — enfeite não é
-    identidade; o match exato por alias compara os dois lados limpos."""
-    return (texto or "").strip().lstrip("•·▶>*–- ").strip()
+# a limpeza mora no modelo (o listener grava ``alias_limpo`` com ela)
+_alias_limpo = limpar_alias
+
+# ids por ``IN (...)``: folga larga abaixo do teto de variáveis do SQLite
+_LOTE_IN = 500
+
+
+def _fatias(valores: list) -> list[list]:
+    return [valores[i:i + _LOTE_IN] for i in range(0, len(valores), _LOTE_IN)]
 
 
 def _para_decimal(valor: Decimal | str | float | None) -> Decimal | None:
@@ -57,6 +61,15 @@ class ResultadoImport:
 class ProdutoRepositorio:
     def __init__(self, session: Session):
         self.session = session
+        self._sinonimos = None       # 1 leitura da Config por repositório
+
+    def _chave_nome(self, nome: str) -> str:
+        """A chave de conciliação gravada junto do produto/alias
+        (``app/core/chaves_conciliacao.py``)."""
+        from app.core.chaves_conciliacao import chave_do_nome, sinonimos_da_config
+        if self._sinonimos is None:
+            self._sinonimos = sinonimos_da_config(self.session)
+        return chave_do_nome(nome, self._sinonimos)
 
     # --- leitura ---------------------------------------------------------------
 
@@ -78,17 +91,76 @@ class ProdutoRepositorio:
             return achado
         # ADENDO 30/07: aliases herdados do OCR antigo carregam
         # marcadores ("• FIGADO..."), e a consulta de hoje vem limpa
-        # (ou vice-versa) — o match exato compara os DOIS lados limpos
-        limpo = _alias_limpo(alias_raw)
-        pares = self.session.execute(
-            select(ProdutoAlias.produto_id, ProdutoAlias.alias_raw)
-        ).all()
-        for pid, raw in pares:
-            if _alias_limpo(raw) == limpo:
-                p = self.session.get(Produto, pid)
-                if p is not None and p.excluido_em is None:
-                    return p
-        return None
+        # (ou vice-versa) — o match exato compara os DOIS lados limpos,
+        # pela coluna indexada ``alias_limpo`` (era o laço no Python por
+        # TODOS os aliases, uma vez por linha da tabela)
+        stmt = (
+            select(Produto)
+            .join(ProdutoAlias)
+            .where(ProdutoAlias.alias_limpo == _alias_limpo(alias_raw))
+            .where(Produto.excluido_em.is_(None))
+            .order_by(ProdutoAlias.id)
+            .limit(1)
+        )
+        return self.session.execute(stmt).scalars().first()
+
+    def carregar_em_lote(self, ids) -> dict[int, Produto]:
+        """Os produtos de ``ids`` num ``IN`` só (por fatia), com categoria
+        e aliases já carregados — a conciliação e a Mesa leem o mapa em
+        vez de um ``session.get`` (e dois lazy loads) por candidato.
+        Id sem produto simplesmente não aparece no mapa."""
+        ids = list(dict.fromkeys(i for i in ids if i is not None))
+        achados: dict[int, Produto] = {}
+        for fatia in _fatias(ids):
+            stmt = (
+                select(Produto)
+                .where(Produto.id.in_(fatia))
+                .options(selectinload(Produto.categoria),
+                         selectinload(Produto.aliases))
+            )
+            for p in self.session.execute(stmt).scalars():
+                achados[p.id] = p
+        return achados
+
+    def buscar_exatos_em_lote(self, nomes) -> dict[str, Produto | None]:
+        """``buscar_por_nome_bruto`` ou ``buscar_por_alias`` de cada nome,
+        em três consultas ``IN`` por fatia (nome cru, alias cru, alias
+        limpo) — a mesma precedência do caminho avulso, sem 2 SELECTs
+        por linha da tabela."""
+        nomes = list(dict.fromkeys(nomes))
+        achados: dict[str, Produto | None] = dict.fromkeys(nomes)
+        opcoes = (selectinload(Produto.categoria),
+                  selectinload(Produto.aliases))
+        for fatia in _fatias(nomes):
+            stmt = (select(Produto).where(Produto.nome_bruto.in_(fatia))
+                    .order_by(Produto.id).options(*opcoes))
+            for p in self.session.execute(stmt).scalars():
+                if achados.get(p.nome_bruto) is None:
+                    achados[p.nome_bruto] = p
+        faltam = [n for n in nomes if achados[n] is None]
+        for fatia in _fatias(faltam):
+            stmt = (select(ProdutoAlias.alias_raw, Produto)
+                    .join(Produto, Produto.id == ProdutoAlias.produto_id)
+                    .where(ProdutoAlias.alias_raw.in_(fatia))
+                    .order_by(ProdutoAlias.id).options(*opcoes))
+            for raw, p in self.session.execute(stmt).all():
+                if achados.get(raw) is None:
+                    achados[raw] = p
+        # o lado limpo (ADENDO 30/07), pela coluna indexada
+        por_limpo: dict[str, list[str]] = {}
+        for n in nomes:
+            if achados[n] is None:
+                por_limpo.setdefault(_alias_limpo(n), []).append(n)
+        for fatia in _fatias(list(por_limpo)):
+            stmt = (select(ProdutoAlias.alias_limpo, Produto)
+                    .join(Produto, Produto.id == ProdutoAlias.produto_id)
+                    .where(ProdutoAlias.alias_limpo.in_(fatia))
+                    .where(Produto.excluido_em.is_(None))
+                    .order_by(ProdutoAlias.id).options(*opcoes))
+            for limpo, p in self.session.execute(stmt).all():
+                for n in por_limpo.pop(limpo, ()):
+                    achados[n] = p
+        return achados
 
     def listar(self, limit: int = 100, offset: int = 0) -> list[Produto]:
         stmt = (
@@ -144,7 +216,10 @@ class ProdutoRepositorio:
             ProdutoAlias.alias_raw == alias_raw,
         )
         if self.session.execute(stmt).scalar_one_or_none() is None:
-            self.session.add(ProdutoAlias(produto_id=produto_id, alias_raw=alias_raw))
+            self.session.add(ProdutoAlias(
+                produto_id=produto_id, alias_raw=alias_raw,
+                chave_conciliacao=self._chave_nome(
+                    sanitizar(alias_raw).nome_sanitizado)))
             self.session.flush()
 
     def importar(
@@ -178,6 +253,7 @@ class ProdutoRepositorio:
             peso_unidade=res.peso_unidade,
             preco_atual=preco_dec,
             categoria=self._garantir_categoria(categoria),
+            chave_conciliacao=self._chave_nome(res.nome_sanitizado),
         )
         self.session.add(produto)
         self.session.flush()
@@ -199,6 +275,8 @@ class ProdutoRepositorio:
             campos["preco_atual"] = _para_decimal(campos["preco_atual"])
         for chave, valor in campos.items():
             setattr(produto, chave, valor)
+        if "nome_sanitizado" in campos:
+            produto.chave_conciliacao = self._chave_nome(produto.nome_sanitizado)
         self.session.flush()
         return produto
 
@@ -250,6 +328,30 @@ class FamiliaRepositorio:
                 .order_by(Produto.id))
         return list(self.session.execute(stmt).scalars())
 
+    def membros_em_lote(self, familia_ids) -> dict[int, list]:
+        """``membros`` de VÁRIAS famílias num ``IN`` só (por fatia) —
+        família sem membro vivo vem com a lista vazia."""
+        from app.core.models import Produto
+        ids = list(dict.fromkeys(familia_ids))
+        por_familia: dict[int, list] = {fid: [] for fid in ids}
+        for fatia in _fatias(ids):
+            stmt = (select(Produto)
+                    .where(Produto.familia_id.in_(fatia),
+                           Produto.excluido_em.is_(None))
+                    .order_by(Produto.id))
+            for p in self.session.execute(stmt).scalars():
+                por_familia[p.familia_id].append(p)
+        return por_familia
+
+    def nomes_em_lote(self, familia_ids) -> dict[int, str]:
+        from app.core.models import FamiliaProduto
+        nomes: dict[int, str] = {}
+        for fatia in _fatias(list(dict.fromkeys(familia_ids))):
+            stmt = select(FamiliaProduto.id, FamiliaProduto.nome).where(
+                FamiliaProduto.id.in_(fatia))
+            nomes.update(self.session.execute(stmt).all())
+        return nomes
+
     def nome_de(self, familia_id: int) -> str | None:
         from app.core.models import FamiliaProduto
         fam = self.session.get(FamiliaProduto, familia_id)
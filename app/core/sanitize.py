@@ -98,6 +98,12 @@ class RegrasSanitizacao:
 
 REGRAS_PADRAO = RegrasSanitizacao()
 
+# Versão da LÓGICA de ``sanitizar`` (os parâmetros acima já entram na
+# impressão digital sozinhos) — suba ao mudar o que as funções daqui
+# fazem: as chaves de conciliação gravadas no banco se refazem
+# (``app/core/chaves_conciliacao.py``).
+VERSAO_REGRAS = 1
+
 
 # ==============================================================================
 # RESULTADO
@@ -26,7 +26,11 @@ from PIL import Image
 
 from app.qt.design import tokens as t
 from app.qt.itens import RegiaoItem
-from app.rendering.compositor import DadosProduto, compor_pagina
+from app.rendering.compositor import (
+    ComposicaoIncremental,
+    DadosProduto,
+    compor_miniatura,
+)
 from app.rendering.model import LayoutDef
 from app.rendering.units import mm_para_px, px_para_mm
 
@@ -76,6 +80,9 @@ class CanvasView(QGraphicsView):
         self.setScene(self._scene)
         self._scene.selectionChanged.connect(self._emitir_selecao)
         self._bg: QGraphicsPixmapItem | None = None
+        # a prévia recompõe só as células que a edição sujou (as demais
+        # voltam do cache de camadas — a chave é o conteúdo da célula)
+        self._composicao = ComposicaoIncremental()
         self._itens: list[RegiaoItem] = []
         self._layout: LayoutDef | None = None
         self._dados: DadosProduto | None = None
@@ -350,9 +357,9 @@ class CanvasView(QGraphicsView):
         # arte é da própria página (pagina.arquivo_fundo, via compositor)
         fundo = self._fundo if self._pagina_atual == 0 else None
         rapida = self._layout.dpi > self.DPI_PREVIA
-        img = compor_pagina(self._layout, self._pagina(), self._dados,
-                            fundo_path=fundo,
-                            dpi=self.DPI_PREVIA if rapida else None)
+        img = self._composicao.compor(
+            self._layout, self._pagina(), self._dados, fundo_path=fundo,
+            dpi=self.DPI_PREVIA if rapida else None)
         pm = pil_para_qpixmap(img)
         if rapida:
             from app.rendering.compositor import mm_para_px
@@ -657,8 +664,8 @@ class CanvasView(QGraphicsView):
         if self._layout is None or not (0 <= i < len(self._layout.paginas)):
             return None
         fundo = self._fundo if i == 0 else None
-        img = compor_pagina(self._layout, self._layout.paginas[i],
-                            self._dados, fundo_path=fundo)
+        img = compor_miniatura(self._layout, self._layout.paginas[i],
+                               self._dados, lado, fundo_path=fundo)
         return pil_para_qpixmap(img).scaled(
             lado, lado, Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation)
@@ -672,7 +679,7 @@ class CanvasView(QGraphicsView):
             return None
         layout, _mapa, _ov = est
         pag = layout.paginas[min(self._pagina_atual, len(layout.paginas) - 1)]
-        img = compor_pagina(layout, pag, self._dados)
+        img = compor_miniatura(layout, pag, self._dados, lado)
         return pil_para_qpixmap(img).scaled(
             lado, lado, Qt.AspectRatioMode.KeepAspectRatio,
             Qt.TransformationMode.SmoothTransformation)
@@ -295,7 +295,10 @@ class ConciliacaoDialog(QDialog):
             # painel discreto diz o que a IA faz agora, com "Parar" a um clique
             rotulos = {uid: f"enriquecendo “{desc[:38]}”"
                        for uid, desc in vermelhos}
-            self._fila_enriquecer = FilaIA(vermelhos, _enriquecer_um, rotulos)
+            # N pedidos em voo = as conexões do pool do motor compartilhado
+            from app.ai.client import ConfigIA
+            self._fila_enriquecer = FilaIA(vermelhos, _enriquecer_um, rotulos,
+                                           em_voo=ConfigIA().conexoes)
             self._fila_enriquecer.item_pronto.connect(self._proposta_pronta)
             self._fila_enriquecer.comecou_item.connect(self._fila_mudou)
             self._fila_enriquecer.fila_terminou.connect(
@@ -1571,7 +1571,8 @@ class ConfiguracoesTela(QWidget):
     def _previa_dica(self) -> None:
         """A prévia REAL do passo 45: chama gerar_dica num worker com itens
         de exemplo; sem IA → aviso honesto (nunca uma prévia de mentira)."""
-        from app.ai.client import ClienteOpenAICompat
+        from app.ai.cache_respostas import ponto_de_chamada
+        from app.ai.client import motor_compartilhado
         from app.ai.enriquecimento import gerar_dica
         from app.qt.workers import Trabalhador
         self._salvar(silencioso=True)      # a prévia usa o prompt SALVO
@@ -1581,9 +1582,11 @@ class ConfiguracoesTela(QWidget):
         self.rot_previa_dica.setVisible(True)
 
         def fn(_status):
-            return gerar_dica(
-                ["Arroz Camil 5kg", "Feijão Rei 1kg", "Óleo Soya 900ml"],
-                180, ClienteOpenAICompat())
+            # a prévia TESTA o modelo: resposta guardada não provaria nada
+            with ponto_de_chamada("dica", cache=False):
+                return gerar_dica(
+                    ["Arroz Camil 5kg", "Feijão Rei 1kg", "Óleo Soya 900ml"],
+                    180, motor_compartilhado())
 
         def pronto(dica):
             self.btn_previa_dica.setEnabled(True)
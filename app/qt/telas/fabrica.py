@@ -198,6 +198,10 @@ class FabricaTela(QWidget):
         caixa_lista = QWidget()
         vl = QVBoxLayout(caixa_lista)
         vl.setContentsMargins(0, 0, 0, 0)
+        # a foto enche esta lista ENQUANTO o OCR lê (prévia; some na conferência)
+        from app.qt.telas.fila_importacao import PreviaLeituraLista
+        self._previa_leitura = PreviaLeituraLista()
+        vl.addWidget(self._previa_leitura)
         vl.addWidget(self._vazio)
         vl.addWidget(self.lista)
         self.lista.hide()
@@ -504,14 +508,26 @@ class FabricaTela(QWidget):
             "Ofertas (*.png *.jpg *.jpeg *.webp *.txt);;Todos (*.*)")
         if not caminho:
             return
-        trab = Trabalhador(lambda st, c=caminho: servico.importar_ofertas(c, st))
+        trab = Trabalhador(lambda st, c=caminho: servico.importar_ofertas(
+            c, st, linha_cb=trab.parcial.emit))
         trab.status.connect(self._overlay.mostrar)
+        trab.parcial.connect(self._linha_lida)
         trab.ok.connect(self._conciliar)
         trab.erro.connect(self._falhou)
         self._trabalhos.rodar(trab)
 
+    def _linha_lida(self, item: servico.ItemMesa) -> None:
+        """Uma linha da foto já lida: entra na prévia da lista na hora."""
+        self._vazio.hide()
+        self._previa_leitura.acrescentar(item)
+
+    def _fim_da_previa(self) -> None:
+        self._previa_leitura.limpar()
+        self._vazio.setVisible(not self._itens)
+
     def _conciliar(self, resultado: servico.ResultadoMesa) -> None:
         self._overlay.esconder()
+        self._fim_da_previa()
         if resultado.aviso:            # RG-04: o cache-hit do OCR fica visível
             mostrar_toast(self, resultado.aviso)
         dlg = ConciliacaoDialog(resultado, self)
@@ -691,6 +707,12 @@ class FabricaTela(QWidget):
     def _compor_paginas(self, st, prontos, layout, marca: bool, impor: bool):
         """Compõe as páginas dos cartazes prontos (upscale + marca d'água +
         2-em-1 opcional). Fonte ÚNICA do export e da impressão."""
+        return list(self._paginas_em_fluxo(st, prontos, layout, marca, impor))
+
+    def _paginas_em_fluxo(self, st, prontos, layout, marca: bool, impor: bool):
+        """As páginas de ``_compor_paginas``, UMA a UMA (gerador): o export
+        grava cada folha e a solta antes de compor a próxima — no 2-em-1 só
+        o par da folha fica vivo."""
         from dataclasses import replace
 
         from app.rendering.model import TipoRegiao
@@ -702,22 +724,42 @@ class FabricaTela(QWidget):
         lado_alvo = (round(mm_para_px(
             max(reg_img.rect.larg_mm, reg_img.rect.alt_mm), layout.dpi))
             if reg_img is not None else 0)
-        paginas = []
+        par = []
         for i, it in enumerate(prontos, 1):
             st(f"Compondo cartaz {i}/{len(prontos)}…")
             d = self._dados(it)
             if d.imagem_path and lado_alvo:       # RG-32: upscale no fluxo
                 d = replace(d, imagem_path=servico.upscale_para_cartaz(
                     d.imagem_path, lado_alvo, st))
-            paginas.append(compor_pagina(layout, layout.paginas[0], d))
-        if marca:                                  # R-067: marca d'água RASCUNHO
+            pagina = compor_pagina(layout, layout.paginas[0], d)
+            if marca:                              # R-067: marca d'água RASCUNHO
+                from app.rendering.marca_dagua import carimbar_rascunho
+                pagina = carimbar_rascunho(pagina)
+            if impor:
+                par.append(pagina)                 # R-106: 2-em-1 (só no cartaz)
+            else:
+                yield pagina
+            del pagina                             # não segura a que já saiu
+            if par and (len(par) == 2 or i == len(prontos)):
+                from app.rendering.imposicao import impor_2em1
+                yield from impor_2em1(par, layout.dpi, marcas_corte=True)
+                par = []
+
+    @staticmethod
+    def _fundo_do_lote(layout, marca: bool, impor: bool):
+        """A arte que TODA folha do lote tem em comum, passada pelo mesmo
+        carimbo/2-em-1 das páginas — o PDF a embute uma vez e cada cartaz
+        leva só o que difere dela (foto, nome, preço, selos)."""
+        from app.rendering.compositor import fundo_da_pagina
+        fundo = fundo_da_pagina(layout, layout.paginas[0])
+        if marca:
             from app.rendering.marca_dagua import carimbar_rascunho
-            paginas = [carimbar_rascunho(p) for p in paginas]
-        if impor and paginas:                      # R-106: 2-em-1 (só no cartaz)
-            st("Impondo dois por folha…")
+            fundo = carimbar_rascunho(fundo)
+        if impor:
             from app.rendering.imposicao import impor_2em1
-            paginas = impor_2em1(paginas, layout.dpi, marcas_corte=True)
-        return paginas
+            fundo = impor_2em1([fundo, fundo], layout.dpi,
+                               marcas_corte=True)[0]
+        return fundo
 
     def _etiquetas_lote(self) -> None:
         """R-144 (FASE 12): as etiquetas do LOTE atual (respeita o filtro de
@@ -779,13 +821,16 @@ class FabricaTela(QWidget):
         impor = self.chk_2em1.isChecked()
 
         def _trabalho(st):
-            paginas = self._compor_paginas(st, prontos, layout, marca, impor)
-            st("Gravando o PDF…")
+            paginas = self._paginas_em_fluxo(st, prontos, layout, marca, impor)
             from app.rendering.cmyk import pos_processar_export
-            from app.rendering.export import exportar_pdf_multipagina
-            # 2-em-1 sai em A4 paisagem; senão, no tamanho do layout
+            from app.rendering.export import exportar_pdf_fluxo
+            # 2-em-1 sai em A4 paisagem; senão, no tamanho do layout. Cada
+            # folha vai ao disco assim que sai da composição
             dpi = layout.dpi
-            saida = exportar_pdf_multipagina(paginas, caminho, dpi)
+            folhas = -(-len(prontos) // 2) if impor else len(prontos)
+            saida = exportar_pdf_fluxo(
+                paginas, caminho, dpi, st, folhas,
+                fundo=self._fundo_do_lote(layout, marca, impor))
             # F7.5: CMYK opcional — desligado (padrão) não toca um byte
             return pos_processar_export(saida, st)
 
@@ -882,4 +927,5 @@ class FabricaTela(QWidget):
 
     def _falhou(self, msg: str) -> None:
         self._overlay.esconder()
+        self._fim_da_previa()
         mostrar_toast(self, msg, tipo="erro")
@@ -4,16 +4,22 @@ Fila de importação multi-arquivo (OS F11.5 #2 — R-049)
 Quando o dono abre VÁRIAS tabelas de uma vez, esta janelinha mostra o estado
 de CADA arquivo — na fila · lendo · pronto · erro — em vez de um overlay
 mudo. O erro de um arquivo fica visível (I2) sem derrubar os outros.
+
+A ``PreviaLeituraLista`` é o par da foto ÚNICA: a lista que enche linha a
+linha enquanto o OCR lê (o ``parcial`` do ``Trabalhador``).
 """
 
 from __future__ import annotations
 
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Qt, Signal
 from PySide6.QtWidgets import (
+    QAbstractItemView,
     QDialog,
     QDialogButtonBox,
     QGridLayout,
     QLabel,
+    QListWidget,
+    QListWidgetItem,
     QVBoxLayout,
 )
 
@@ -82,3 +88,46 @@ class FilaImportacaoDialog(QDialog):
 
     def tudo_pronto(self) -> bool:
         return all(e == "pronto" for e in self.estados.values())
+
+
+_COR_SEMAFORO = {"VERDE": "SUCESSO", "AMARELO": "ALERTA", "VERMELHO": "PERIGO"}
+
+
+class PreviaLeituraLista(QListWidget):
+    """As linhas da foto CONFORME o OCR lê (semáforo de prévia, só fuzzy).
+
+    Só leitura e provisória: quem vale é a conciliação do fim (o diálogo);
+    ``limpar()`` esvazia e some quando ela chega (ou a leitura falha)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setToolTip("Prévia da leitura — a conferência abre quando o "
+                        "OCR terminar")
+        self.hide()
+
+    def acrescentar(self, item) -> None:
+        """Uma linha lida (``ItemMesa``); repetida não entra duas vezes."""
+        if item.descricao in self.descricoes():
+            return
+        cor = getattr(t, _COR_SEMAFORO.get(item.semaforo, "TEXTO_3"))
+        preco = f"R$ {item.preco}" if item.preco else (item.multi_preco or "")
+        li = QListWidgetItem(self)
+        li.setData(Qt.ItemDataRole.UserRole, item.descricao)
+        rotulo = QLabel(
+            f'<span style="color:{cor}">●</span> {item.descricao}  '
+            f'<span style="color:{t.TEXTO_3}">{preco}   · lendo…</span>')
+        rotulo.setContentsMargins(t.ESP_2, 2, t.ESP_2, 2)
+        li.setSizeHint(rotulo.sizeHint())
+        self.setItemWidget(li, rotulo)
+        self.scrollToItem(li)
+        self.show()
+
+    def descricoes(self) -> list[str]:
+        return [self.item(i).data(Qt.ItemDataRole.UserRole)
+                for i in range(self.count())]
+
+    def limpar(self) -> None:
+        self.clear()
+        self.hide()
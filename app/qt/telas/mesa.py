@@ -35,7 +35,7 @@ from app.qt.design.toast import mostrar_toast
 from app.qt.telas import servico
 from app.qt.telas.conciliacao_dialog import ConciliacaoDialog
 from app.qt.workers import GerenciadorTrabalhos, Trabalhador
-from app.rendering.compositor import DadosProduto, compor_pagina
+from app.rendering.compositor import DadosProduto
 
 _COR = {"VERDE": t.SUCESSO, "AMARELO": t.ALERTA, "VERMELHO": t.PERIGO}
 
@@ -392,6 +392,10 @@ class MesaTela(QWidget):
         self._vazio_filtro.hide()
         vi.addWidget(self._vazio_filtro)
         self._filtro_barra.hide()
+        # a foto enche esta lista ENQUANTO o OCR lê (prévia; some na conferência)
+        from app.qt.telas.fila_importacao import PreviaLeituraLista
+        self._previa_leitura = PreviaLeituraLista()
+        vi.addWidget(self._previa_leitura)
         vi.addWidget(self._vazio)
         vi.addWidget(self.lista)
         self.lista.hide()
@@ -1320,7 +1324,9 @@ class MesaTela(QWidget):
             return
         if len(caminhos) == 1:
             trab = Trabalhador(
-                lambda st, c=caminhos[0]: servico.importar_ofertas(c, st))
+                lambda st, c=caminhos[0]: servico.importar_ofertas(
+                    c, st, linha_cb=trab.parcial.emit))
+            trab.parcial.connect(self._linha_lida)
             trab.ok.connect(self._conciliar)
         else:
             # OS F11.5 #2: a janelinha da fila mostra CADA arquivo mudando de
@@ -1345,6 +1351,15 @@ class MesaTela(QWidget):
         trab.erro.connect(self._falhou)
         self._trabalhos.rodar(trab)
 
+    def _linha_lida(self, item: servico.ItemMesa) -> None:
+        """Uma linha da foto já lida: entra na prévia da estante na hora."""
+        self._vazio.hide()
+        self._previa_leitura.acrescentar(item)
+
+    def _fim_da_previa(self) -> None:
+        self._previa_leitura.limpar()
+        self._vazio.setVisible(not self._itens)
+
     def _conciliar_varios(self, resultado_e_erros) -> None:
         """R-049: resultado combinado da fila + avisa os arquivos com erro
         (I2, nunca em silêncio) — o resto seguiu."""
@@ -1459,6 +1474,7 @@ class MesaTela(QWidget):
 
     def _conciliar(self, resultado: servico.ResultadoMesa) -> None:
         self._overlay.esconder()
+        self._fim_da_previa()
         if resultado.aviso:            # RG-04: o cache-hit do OCR fica visível
             mostrar_toast(self, resultado.aviso)
         # Auditoria do dono (validade): a validade ESCRITA NA TABELA (o caso
@@ -3192,9 +3208,8 @@ class MesaTela(QWidget):
         if layout is None:                   # sem arte carregada: nada a compor
             return []
         dados = self._dados_por_slot()
-        return [compor_pagina(layout, pag, dados,
-                              fundo_path=fundo if i == 0 else None)
-                for i, pag in enumerate(layout.paginas)]
+        from app.rendering.paralelo import compor_paginas
+        return compor_paginas(layout, dados, fundo)
 
     def esta_aprovado(self) -> bool:
         """R-068: aprovado E sem edição pendente — editar em memória sem salvar
@@ -3273,35 +3288,45 @@ class MesaTela(QWidget):
 
         def _trabalho(st):
             # D8.5: compõe TODAS as páginas; PNG = _p1.._pN; PDF = multipágina
-            imgs = []
+            # (em paralelo nos núcleos — o progresso segue por página). As
+            # páginas CHEGAM uma a uma e saem para o disco na hora: o lote
+            # inteiro nunca fica na RAM
+            from app.rendering.paralelo import compor_em_ordem, tarefas_do_layout
             total = len(layout.paginas)
-            for i, pag in enumerate(layout.paginas):
-                st(f"Compondo página {i + 1}/{total}…")
-                imgs.append(compor_pagina(layout, pag, dados,
-                                          fundo_path=fundo if i == 0 else None))
+            imgs = compor_em_ordem(tarefas_do_layout(layout, dados, fundo), st)
             if marca:                       # R-067: marca d'água RASCUNHO
                 from app.rendering.marca_dagua import carimbar_rascunho
-                imgs = [carimbar_rascunho(im) for im in imgs]
-            st("Gravando o arquivo…")
+
+                def _carimbadas(paginas):
+                    for im in paginas:
+                        im = carimbar_rascunho(im)
+                        yield im
+                        del im
+
+                imgs = _carimbadas(imgs)
             from app.rendering.cmyk import pos_processar_export
             from app.rendering.export import (
-                exportar_pdf, exportar_pdf_multipagina, exportar_png,
+                exportar_pdf, exportar_pdf_fluxo, exportar_png,
             )
             if pdf:
                 if total > 1:
-                    saida = exportar_pdf_multipagina(imgs, caminho, layout.dpi)
+                    saida = exportar_pdf_fluxo(imgs, caminho, layout.dpi,
+                                               st, total)
                 else:
-                    saida = exportar_pdf(imgs[0], caminho, layout.dpi)
+                    saida = exportar_pdf(next(imgs), caminho, layout.dpi)
                 # F7.5: CMYK opcional — com ele desligado, nenhum byte muda
                 return pos_processar_export(saida, st)
             if total == 1:
-                return exportar_png(imgs[0], caminho, layout.dpi), None
+                return exportar_png(next(imgs), caminho, layout.dpi), None
             base = Path(caminho)
-            ultimo = None
-            for i, img in enumerate(imgs, start=1):
+            ultimo, i = None, 0
+            for img in imgs:
+                i += 1
+                st(f"Gravando página {i}/{total}…")
                 ultimo = exportar_png(
                     img, base.with_name(f"{base.stem}_p{i}{base.suffix}"),
                     layout.dpi)
+                del img
             return ultimo, None
 
         trab = Trabalhador(_trabalho)
@@ -3328,4 +3353,5 @@ class MesaTela(QWidget):
 
     def _falhou(self, msg: str) -> None:
         self._overlay.esconder()
+        self._fim_da_previa()
         mostrar_toast(self, msg, tipo="erro")
@@ -267,15 +267,13 @@ class ModoPaiTela(QWidget):
             return None
         from app.core import projetos as _proj
         from app.qt.telas import servico
-        from app.rendering.compositor import compor_pagina
+        from app.rendering.paralelo import compor_paginas
         aberto = _proj.abrir_projeto(p["id"])
         if aberto is None:
             return None
         dados, faltas = servico.dados_de_projeto_aberto(aberto)
-        paginas = [compor_pagina(aberto.layout, pag, dados,
-                                 fundo_path=aberto.layout.arquivo_fundo
-                                 if i == 0 else None)
-                   for i, pag in enumerate(aberto.layout.paginas)]
+        paginas = compor_paginas(aberto.layout, dados,
+                                 aberto.layout.arquivo_fundo)
         # F13/D8 (a trava #1): o Modo Pai imprime/envia LIMPO — a marca
         # RASCUNHO deixou de ser automática em toda porta; o botão
         # "Aprovar" daqui segue vivo como o SELO do pai
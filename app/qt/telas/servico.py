@@ -195,9 +195,11 @@ def _imagem_absoluta(caminho_rel: str | None) -> str | None:
 
 
 def _motor_se_disponivel():
-    from app.ai.client import ClienteOpenAICompat
+    from app.ai.client import motor_compartilhado
 
-    motor = ClienteOpenAICompat()
+    # o motor do processo: o pool keep-alive e a sonda de vida (TTL) valem
+    # de uma importação para a outra
+    motor = motor_compartilhado()
     return motor if motor.disponivel() else None
 
 
@@ -2400,8 +2402,45 @@ def classificar_preco_ocr(texto_preco: str | None
     return texto_preco, None, None
 
 
-def importar_ofertas(caminho: str | Path, status_cb: StatusCb) -> ResultadoMesa:
-    """Lê a fonte (foto → OCR; texto → parse) e concilia tudo com o banco."""
+class _PreviaDaLeitura:
+    """As linhas do OCR em fluxo, conciliadas UMA A UMA enquanto o modelo
+    ainda lê — só o fuzzy local (sem juiz nem embedding: a GPU está no
+    OCR). É prévia: o resultado que vale é o do ``conciliar_linhas`` no fim,
+    com as regras de lote."""
+
+    def __init__(self, linha_cb):
+        self._linha_cb = linha_cb
+        self._db = None
+        self._sessao = None
+        self._conc = None
+
+    def linha(self, ln) -> None:
+        from app.ai.conciliacao import Conciliador
+        if self._conc is None:
+            self._db = Database().init()      # conexão PRÓPRIA (worker)
+            self._sessao = self._db.Session()
+            self._conc = Conciliador(self._sessao)
+        v = self._conc.conciliar_lote([ln.descricao])[0]
+        preco, mp, _pde = classificar_preco_ocr(ln.preco)
+        self._linha_cb(ItemMesa(
+            ln.descricao, preco, v.semaforo.value,
+            v.produto.nome_sanitizado if v.produto else ln.descricao,
+            multi_preco=mp, via=v.via, score=v.confianca))
+
+    def fechar(self) -> None:
+        if self._sessao is not None:
+            self._sessao.close()
+            self._db.engine.dispose()
+
+
+def importar_ofertas(caminho: str | Path, status_cb: StatusCb,
+                     linha_cb: Callable[[ItemMesa], None] | None = None
+                     ) -> ResultadoMesa:
+    """Lê a fonte (foto → OCR; texto → parse) e concilia tudo com o banco.
+
+    Foto: o OCR vem em fluxo — o status conta as linhas conforme o modelo
+    lê, e ``linha_cb`` (opcional) recebe cada uma já com o semáforo de
+    prévia (a tabela da tela enche antes de a leitura acabar)."""
     caminho = Path(caminho)
     validade = None
     aviso_cache = None
@@ -2427,7 +2466,14 @@ def importar_ofertas(caminho: str | Path, status_cb: StatusCb) -> ResultadoMesa:
                 raise RuntimeError(
                     "A foto precisa do OCR (LM Studio), que não está acessível. "
                     "Ligue o LM Studio ou importe a tabela como arquivo de texto.")
-            tabela = ler_tabela(caminho, motor, status_cb=status_cb)
+            previa = _PreviaDaLeitura(linha_cb) if linha_cb else None
+            try:
+                tabela = ler_tabela(
+                    caminho, motor, status_cb=status_cb,
+                    ao_ler_linha=previa.linha if previa else lambda _ln: None)
+            finally:
+                if previa is not None:
+                    previa.fechar()
             cache_guardar(caminho, modelo_visao, tabela)
         # bancada dos Exemplos (semana real): "preço" que é PROMOÇÃO em
         # texto ("20% de desconto", "leve 3 pague 2") não é preço — vira
@@ -2531,13 +2577,22 @@ def conciliar_linhas(linhas, status_cb: StatusCb, *, validade=None,
                                             exclusividade_de_lote)
             from app.core.mais18 import eh_bebida_alcoolica
             from app.core.sanitize import sanitizar
-            vereditos = []
-            for i, (desc, preco, ean) in enumerate(linhas, 1):
-                status_cb(f"Conciliando {i}/{len(linhas)}…")
-                vereditos.append(conc.conciliar(desc))
+            # o fuzzy da tabela inteira sai numa passada de matriz; o
+            # "Conciliando i/N…" vem do próprio Conciliador (status_cb)
+            vereditos = conc.conciliar_lote(
+                [desc for desc, _preco, _ean in linhas])
             exclusividade_de_lote(vereditos)
             houve_categoria = False
-            cache_familias: dict[int, dict] = {}     # B4: 1 consulta/família
+            # B4: as famílias dos casados numa consulta por LOTE; e o
+            # vizinho dos exatos sem categoria numa passada de matriz só
+            cache_familias = _familias_em_lote(
+                session, [v.produto.familia_id for v in vereditos
+                          if v.produto is not None
+                          and getattr(v.produto, "familia_id", None)])
+            vizinhos = conc.categorias_dos_vizinhos(
+                [desc for (desc, _p, _e), v in zip(linhas, vereditos)
+                 if v.via == "exato" and v.produto is not None
+                 and v.produto.categoria is None])
             for i, ((desc, preco, ean), v) in enumerate(
                     zip(linhas, vereditos), 1):
                 p = v.produto
@@ -2554,7 +2609,7 @@ def conciliar_linhas(linhas, status_cb: StatusCb, *, validade=None,
                     cat, _sc = categoria_dos_candidatos(
                         v.candidatos, conc.limiares.amarelo)
                     if not cat and v.via == "exato":
-                        cat, _sc = conc.categoria_do_vizinho(desc)
+                        cat, _sc = vizinhos.get(desc) or (None, 0.0)
                     if cat:
                         try:
                             from app.core.repositories import (
@@ -2714,6 +2769,24 @@ def conciliar_linhas(linhas, status_cb: StatusCb, *, validade=None,
                          caminho_fonte=caminho_fonte)
 
 
+def _familias_em_lote(session, familia_ids) -> dict[int, dict]:
+    """B4: o dict de VÁRIAS famílias (nome + membros) em duas consultas
+    ``IN`` — o cache que o ``_familia_em_lote`` consulta item a item."""
+    from app.core.repositories import FamiliaRepositorio
+    ids = list(dict.fromkeys(familia_ids))
+    if not ids:
+        return {}
+    fam = FamiliaRepositorio(session)
+    nomes = fam.nomes_em_lote(ids)
+    return {fid: {"id": fid,
+                  "nome": nomes.get(fid) or "",
+                  "membros": [{"produto_id": m.id,
+                               "nome": m.nome_sanitizado,
+                               "imagem": _imagem_absoluta(m.caminho_imagem)}
+                              for m in membros]}
+            for fid, membros in fam.membros_em_lote(ids).items()}
+
+
 def _familia_em_lote(session, familia_id: int, cache: dict) -> dict | None:
     """B4: o dict da família DENTRO da sessão do lote (o cache evita a
     consulta repetida quando vários irmãos aparecem na mesma tabela)."""
@@ -2939,30 +3012,40 @@ def gerar_etiquetas_lote(itens: list[ItemMesa], destino,
     EXPLÍCITA que carimba. As 9 portas seguem o MESMO padrão."""
     from app.rendering.cartaz import layout_etiqueta
     from app.rendering.compositor import compor_pagina
-    from app.rendering.export import exportar_pdf_multipagina
-    from app.rendering.imposicao import impor_etiquetas
+    from app.rendering.export import exportar_pdf_fluxo
+    from app.rendering.imposicao import etiquetas_por_folha, impor_etiquetas
     from app.rendering.marca_dagua import carimbar_rascunho
     if not itens:
         raise ValueError("nenhum item selecionado para as etiquetas")
     lay = layout_etiqueta()
     sid = lay.paginas[0].slots[0].id
     avisos: list[str] = []
-    etiquetas = []
-    for i, it in enumerate(itens, 1):
-        status_cb(f"Etiqueta {i}/{len(itens)}…")
-        # F13/B6 (F-01): a receita ÚNICA — o dict local daqui não passava
-        # mais18 e a etiqueta de bebida saía SEM o selo +18, calada
-        d = dados_cartaz_de_item(it)
-        avisos.extend(f"“{it.nome}”: {a}"
-                      for a in validar_composicao(lay, {sid: d}, cartaz=True))
-        img = compor_pagina(lay, lay.paginas[0], {sid: d})
-        if rascunho:
-            img = carimbar_rascunho(img)
-        etiquetas.append(img)
-    status_cb("Impondo as etiquetas na folha…")
-    folhas = impor_etiquetas(etiquetas, lay.dpi)
-    caminho = exportar_pdf_multipagina(folhas, destino,
-                                       dpi_folha or lay.dpi)
+
+    def _folhas():
+        # em fluxo: junta as etiquetas de UMA folha, impõe, entrega ao
+        # gravador e esquece — o lote inteiro nunca fica na RAM
+        lote: list = []
+        por_folha = 0
+        for i, it in enumerate(itens, 1):
+            status_cb(f"Etiqueta {i}/{len(itens)}…")
+            # F13/B6 (F-01): a receita ÚNICA — o dict local daqui não passava
+            # mais18 e a etiqueta de bebida saía SEM o selo +18, calada
+            d = dados_cartaz_de_item(it)
+            avisos.extend(f"“{it.nome}”: {a}"
+                          for a in validar_composicao(lay, {sid: d},
+                                                      cartaz=True))
+            img = compor_pagina(lay, lay.paginas[0], {sid: d})
+            if rascunho:
+                img = carimbar_rascunho(img)
+            if not por_folha:
+                por_folha = etiquetas_por_folha(img.size, lay.dpi)
+            lote.append(img)
+            if len(lote) == por_folha or i == len(itens):
+                status_cb("Impondo as etiquetas na folha…")
+                yield from impor_etiquetas(lote, lay.dpi)
+                lote = []
+
+    caminho = exportar_pdf_fluxo(_folhas(), destino, dpi_folha or lay.dpi)
     return caminho, avisos
 
 
@@ -3567,14 +3650,15 @@ def montar_conjunto_manual(item: ItemMesa, produto_ids: list[int],
     + sabores no descritor) ou "diferentes" (2 → o composto separável
     de sempre; 3+ → vitrine com o nome que o dono deu). O item da
     estante nasce VERDE via "conjunto" — nada é recriado."""
-    from app.core.models import Produto
+    from app.core.repositories import ProdutoRepositorio
 
     membros: list[dict] = []
     db = Database().init()
     try:
         with db.Session() as s:
+            carregados = ProdutoRepositorio(s).carregar_em_lote(produto_ids)
             for pid in produto_ids:
-                p = s.get(Produto, pid)
+                p = carregados.get(pid)
                 if p is None or p.excluido_em is not None:
                     continue
                 membros.append({
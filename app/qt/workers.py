@@ -33,6 +33,9 @@ class Trabalhador(QThread):
     ok = Signal(object)      # resultado de fn
     erro = Signal(str)       # mensagem de erro amigável
     status = Signal(str)     # etapa atual ("Buscando imagem…")
+    # pedaço do resultado ANTES do fim (ex.: cada linha do OCR em fluxo) —
+    # ``fn`` publica por ``trab.parcial.emit``; chega na UI antes do ``ok``
+    parcial = Signal(object)
 
     def __init__(self, fn: Callable[[Callable[[str], None]], object], parent=None):
         super().__init__(parent)
@@ -99,43 +102,53 @@ class FilaIA(TrabalhadorFila):
     `focar(chave)` põe na frente o item que o dono está olhando (vale a partir
     do PRÓXIMO item; o em curso termina), `comecou_item` diz o que roda agora
     (o painel mostra), `pendentes()` lista o que falta, `cancelar()` para
-    entre itens. A identidade segue sendo a chave/uid (I1)."""
+    entre itens. A identidade segue sendo a chave/uid (I1).
+
+    ``em_voo``: quantos pedidos ao motor rodam juntos (o LM Studio atende
+    vários slots; o teto natural é ``ConfigIA.conexoes``). O miolo é a
+    ``FilaConcorrente`` (``app/ai/fila.py``): ``adicionar`` durante o voo
+    supera o pedido antigo da mesma chave, e ``comecou_item`` → ``item_pronto``
+    /``item_falhou`` de um item saem sempre nessa ordem."""
 
     comecou_item = Signal(str, str)     # (chave, rótulo humano)
 
-    def __init__(self, pares, fn, rotulos: dict | None = None, parent=None):
+    def __init__(self, pares, fn, rotulos: dict | None = None, parent=None,
+                 *, em_voo: int = 1):
         super().__init__(pares, fn, parent)
-        import threading
-        self._lock = threading.Lock()
-        self._foco: str | None = None
+        from app.ai.fila import FilaConcorrente
         self._rotulos = dict(rotulos or {})
         self.atual: str | None = None
+        self._fila = FilaConcorrente(
+            fn, em_voo=em_voo, ao_comecar=self._comecou,
+            ao_terminar=self.item_pronto.emit,
+            ao_falhar=lambda chave, exc: self.item_falhou.emit(
+                chave, f"{type(exc).__name__}: {exc}"))
+        self._fila.adicionar(self._pares, bloquear=False)
+        self._pares = []                # a fila de verdade é a concorrente
+        self._fila.fechar()
+
+    def _comecou(self, chave: str) -> None:
+        self.atual = chave
+        self.comecou_item.emit(chave, self._rotulos.get(chave, ""))
+
+    def adicionar(self, pares, rotulos: dict | None = None) -> None:
+        """Mais itens na fila (mesma chave = o pedido antigo é superado).
+        Só antes de a fila terminar — depois, o dono cria outra."""
+        self._rotulos.update(rotulos or {})
+        self._fila.adicionar(pares, bloquear=False)
 
     def focar(self, chave: str | None) -> None:
-        with self._lock:
-            self._foco = chave
+        self._fila.focar(chave)
+
+    def cancelar(self) -> None:
+        super().cancelar()
+        self._fila.cancelar()
 
     def pendentes(self) -> list[str]:
-        with self._lock:
-            return [c for c, _v in self._pares]
+        return self._fila.pendentes()
 
     def run(self) -> None:  # noqa: D102 (QThread)
-        from app.qt.telas.servico import ordenar_por_prioridade
-        while True:
-            with self._lock:
-                if self._cancelado or not self._pares:
-                    break
-                self._pares = ordenar_por_prioridade(self._pares, self._foco)
-                chave, valor = self._pares.pop(0)
-                self.atual = chave
-            self.comecou_item.emit(chave, self._rotulos.get(chave, ""))
-            try:
-                resultado = self._fn(valor)
-            except Exception as exc:
-                traceback.print_exc()
-                self.item_falhou.emit(chave, f"{type(exc).__name__}: {exc}")
-            else:
-                self.item_pronto.emit(chave, resultado)
+        self._fila.rodar()
         self.atual = None
         self.fila_terminou.emit()
 
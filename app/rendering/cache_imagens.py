@@ -0,0 +1,205 @@
+"""
+Cache de imagens decodificadas — o PNG do acervo abre 1× por sessão
+===================================================================
+Cada ``compor_pagina`` decodificava de novo as fotos do produto
+(``Image.open → RGBA → espelho → giro``): a prévia a cada tecla no painel
+de propriedades, cada miniatura de página, cada estado do histórico e cada
+exportação. Numa página de 16 células são 16 PNGs grandes por recomposição.
+
+Aqui a imagem PRONTA (já convertida e transformada) fica num LRU limitado
+por BYTES — não por contagem: uma foto de 3000×3000 RGBA pesa 36 MB, um
+ícone, quase nada.
+
+* a chave leva o ``mtime`` e o tamanho do arquivo: foto trocada no acervo
+  (recorte novo, upscale) entra na próxima composição sem esquecer nada;
+* a arte de FUNDO (exportação grande do Illustrator) e a camada do dono
+  também passam por aqui, já redimensionadas ao tamanho da página
+  (``fundo()``) — essas voltam em CÓPIA, porque a composição pinta nelas;
+* o orçamento vem da config ``imagem.cache_mb`` (padrão 256 MB; o perfil de
+  máquina fraca do ``core.manutencao`` baixa para 64 MB). 0 desliga;
+* ``estatisticas()`` conta acertos/faltas por tipo — a prova de que a
+  segunda composição não decodifica nada.
+
+As imagens de ``foto()`` são SÓ LEITURA para quem as recebe (o compositor
+recorta, redimensiona e cola A PARTIR delas — nunca pinta nelas).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+from PIL import Image
+
+CHAVE_CONFIG = "imagem.cache_mb"
+ORCAMENTO_PADRAO_MB = 256
+ORCAMENTO_MAQUINA_FRACA_MB = 64
+
+_trava = threading.Lock()
+_itens: OrderedDict[tuple, tuple[Any, int]] = OrderedDict()
+_bytes = 0
+_contadores: dict[str, int] = {"foto_acertos": 0, "foto_faltas": 0,
+                               "fundo_acertos": 0, "fundo_faltas": 0,
+                               "descartes": 0}
+_cache_config: dict = {}
+
+
+def orcamento_bytes() -> int:
+    """Config ``imagem.cache_mb`` em bytes — lida 1× por sessão (invalidada
+    por ``recarregar_config`` quando o perfil/tela de Config salva)."""
+    if "mb" not in _cache_config:
+        try:
+            from app.core.database import Database
+            from app.core.repositories import ConfigRepositorio
+            db = Database().init()
+            try:
+                with db.Session() as s:
+                    v = ConfigRepositorio(s).get(CHAVE_CONFIG)
+            finally:
+                db.engine.dispose()
+            mb = ORCAMENTO_PADRAO_MB if v is None else int(v)
+        except Exception:
+            mb = ORCAMENTO_PADRAO_MB
+        _cache_config["mb"] = max(0, mb)
+    return _cache_config["mb"] * 1024 * 1024
+
+
+def recarregar_config() -> None:
+    """Relê o orçamento na próxima consulta e já apara o que passou dele."""
+    _cache_config.clear()
+    limite = orcamento_bytes()
+    with _trava:
+        _aparar(limite)
+
+
+def _peso(im: Image.Image) -> int:
+    return im.width * im.height * len(im.getbands())
+
+
+def _aparar(limite: int) -> None:
+    """Descarta do menos usado até caber em ``limite`` (sob a trava)."""
+    global _bytes
+    while _itens and _bytes > limite:
+        _, (_im, peso) = _itens.popitem(last=False)
+        _bytes -= peso
+        _contar("descartes")
+
+
+def _contar(nome: str) -> None:
+    _contadores[nome] = _contadores.get(nome, 0) + 1
+
+
+def obter(chave: tuple, fabricar: Callable[[], Any],
+          pesar: Callable[[Any], int] = _peso) -> Any:
+    """LRU: o valor de ``chave`` (``chave[0]`` é o tipo, p/ as contas) ou
+    o fabrica — fora da trava, decodificar é I/O — e guarda se couber.
+    ``pesar`` dá os bytes do valor (padrão: o valor É a imagem)."""
+    global _bytes
+    tipo = chave[0]
+    with _trava:
+        item = _itens.get(chave)
+        if item is not None:
+            _itens.move_to_end(chave)
+            _contar(f"{tipo}_acertos")
+            return item[0]
+        _contar(f"{tipo}_faltas")
+    valor = fabricar()
+    peso = pesar(valor)
+    limite = orcamento_bytes()
+    if peso > limite:
+        return valor                   # maior que o cache inteiro: não guarda
+    with _trava:
+        antigo = _itens.pop(chave, None)
+        if antigo is not None:
+            _bytes -= antigo[1]
+        _itens[chave] = (valor, peso)
+        _bytes += peso
+        _aparar(limite)
+    return valor
+
+
+def assinatura(caminho: str | Path) -> tuple[str, int, int] | None:
+    """(caminho, mtime_ns, tamanho) do arquivo — None se não existe."""
+    try:
+        st = os.stat(caminho)
+    except OSError:
+        return None
+    return str(caminho), st.st_mtime_ns, st.st_size
+
+
+def foto(caminho: str | Path, flip_h: bool = False,
+         rotacao: float = 0) -> Image.Image | None:
+    """A foto do produto em RGBA, espelhada/girada como a ``ImagemSlot``
+    pede — decodificada 1× por (arquivo, mtime, tamanho, flip, giro).
+    None quando o arquivo não existe."""
+    sig = assinatura(caminho)
+    if sig is None:
+        return None
+
+    def _decodificar() -> Image.Image:
+        with Image.open(caminho) as bruta:
+            im = bruta.convert("RGBA")
+        if flip_h:
+            im = im.transpose(Image.FLIP_LEFT_RIGHT)
+        if rotacao:
+            im = im.rotate(rotacao, expand=True, resample=Image.BICUBIC)
+        return im
+
+    return obter(("foto", *sig, bool(flip_h), rotacao), _decodificar)
+
+
+def fundo(caminho: str | Path | None, w: int, h: int,
+          camada: str | Path | None = None) -> tuple[Image.Image, bool]:
+    """A BASE da página (w×h, RGB): a arte de fundo decodificada e
+    redimensionada, com a camada do dono (L9) já colada por cima.
+
+    Preparada 1× por (fundo, camada, mtime de cada, w, h) — a mesma arte
+    serve à prévia, às miniaturas e à exportação no mesmo dpi. Devolve
+    uma CÓPIA (a composição pinta na base) e se a camada entrou (arte
+    ilegível compõe sem ela, como sempre)."""
+    sig_fundo = assinatura(caminho) if caminho else None
+    sig_camada = assinatura(camada) if camada else None
+    if sig_fundo is None and sig_camada is None:
+        return Image.new("RGB", (w, h), "white"), False
+
+    def _preparar() -> tuple[Image.Image, bool]:
+        if sig_fundo is not None:
+            with Image.open(caminho) as bruta:
+                base = bruta.convert("RGB")
+            if base.size != (w, h):
+                base = base.resize((w, h))
+        else:
+            base = Image.new("RGB", (w, h), "white")
+        tem_camada = False
+        if sig_camada is not None:
+            try:
+                with Image.open(camada) as bruta:
+                    sobre = bruta.convert("RGBA")
+                if sobre.size != (w, h):
+                    sobre = sobre.resize((w, h), Image.LANCZOS)
+                base.paste(sobre, (0, 0), sobre)
+                tem_camada = True
+            except OSError:
+                pass                  # arte ilegível: compõe sem camada
+        return base, tem_camada
+
+    base, tem_camada = obter(("fundo", sig_fundo, sig_camada, w, h),
+                             _preparar, lambda v: _peso(v[0]))
+    return base.copy(), tem_camada
+
+
+def estatisticas() -> dict[str, int]:
+    """Acertos/faltas por tipo, descartes, itens vivos e bytes ocupados."""
+    with _trava:
+        return {**_contadores, "itens": len(_itens), "bytes": _bytes}
+
+
+def esquecer() -> None:
+    """Esvazia o cache (os contadores seguem)."""
+    global _bytes
+    with _trava:
+        _itens.clear()
+        _bytes = 0
@@ -8,13 +8,15 @@ no tamanho físico exato definido pelo LayoutDef.
 
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
 from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 
 from app.core.paths import SystemRoot
+from app.rendering import cache_imagens, registro_fontes
 from app.rendering.arranjo import ModoArranjo, compor_imagens
 from app.rendering.selos import Canto, Selo, desenhar_selos
 from app.rendering.model import (
@@ -28,10 +30,15 @@ from app.rendering.model import (
     PapelPreco,
     PapelTexto,
     Regiao,
+    Slot,
     SubtipoPreco,
     TipoRegiao,
 )
-from app.rendering.text_fit import ajustar_texto
+from app.rendering.text_fit import (
+    ajustar_texto,
+    dpi_das_decisoes,
+    na_escala,
+)
 from app.rendering.units import mm_para_px, pt_para_px
 
 
@@ -286,13 +293,14 @@ def _carregar_imagens(dados: DadosProduto) -> list[tuple[ImagemSlot, Image.Image
     )
     pares: list[tuple[ImagemSlot, Image.Image]] = []
     for e in especs:
-        if not e.caminho or not Path(e.caminho).exists():
+        if not e.caminho:
+            continue
+        # decodificada 1× por (arquivo, mtime, flip, giro) — a prévia
+        # recompõe a cada tecla; a imagem volta SÓ LEITURA (ninguém
+        # aqui pinta nela: recorta/redimensiona/cola a partir dela)
+        im = cache_imagens.foto(e.caminho, e.flip_h, e.rotacao)
+        if im is None:
             continue
-        im = Image.open(e.caminho).convert("RGBA")
-        if e.flip_h:
-            im = im.transpose(Image.FLIP_LEFT_RIGHT)
-        if e.rotacao:
-            im = im.rotate(e.rotacao, expand=True, resample=Image.BICUBIC)
         pares.append((e, im))
     return pares
 
@@ -623,13 +631,18 @@ def _desenhar_texto(
     if not texto:
         return
     x, y, rw, rh = _rect_px(reg.rect, dpi)
+    # miniatura: a caixa do dpi REAL (arredondada lá, como no export)
+    # decide o corpo e as linhas; aqui só se desenha na escala pequena
+    dpi_dec = dpi_das_decisoes(dpi)
+    _xd, _yd, rw_dec, rh_dec = _rect_px(reg.rect, dpi_dec)
     aj = ajustar_texto(
-        texto, fontes_dir / reg.fonte, rw, rh, reg.tamanho_max_pt, dpi,
-        reg.tamanho_min_pt, sem_hifen=reg.sem_hifen,  # F13-BIS/T5
+        texto, fontes_dir / reg.fonte, rw_dec, rh_dec, reg.tamanho_max_pt,
+        dpi_dec, reg.tamanho_min_pt, sem_hifen=reg.sem_hifen,  # F13-BIS/T5
         # L25: as marcas conhecidas viajam com o DADO e nunca se
         # partem (o vocabulário chega pronto do serviço, 1x por lote)
         atomos=getattr(base, '_atomos_marcas', frozenset()),
     )
+    aj = na_escala(aj, fontes_dir / reg.fonte, dpi_dec, dpi)
     # DUODETRICESIMUS §14 (a rede dos oito): o que foi REALMENTE
     # desenhado fica registrado na base — linhas e corpo final, por
     # região. É a fonte de prova das auditorias (recalcular por fora
@@ -1124,7 +1137,7 @@ def corpo_pela_caixa(reg: Regiao, valor, dpi: int,
         total = (f_p.getlength(prefixo) + f_g.getlength(reais)
                  + f_p.getlength("," + centavos))
         bb = f_g.getbbox(reais)
-        alt_alg = (bb[3] - bb[1]) if bb else sum(f_g.getmetrics())
+        alt_alg = (bb[3] - bb[1]) if bb else sum(registro_fontes.metricas(f_g))
         if total <= rw * 0.85 and alt_alg <= rh * 0.84:
             lo, alt_lo = mid, alt_alg
         else:
@@ -1209,15 +1222,16 @@ def _desenhar_preco(
                                 round(pt_para_px(pt, dpi)))
 
         fonte = _fonte(reg.tamanho_max_pt)
-        w, alt = fonte.getlength(texto), sum(fonte.getmetrics())
+        w, alt = fonte.getlength(texto), sum(registro_fontes.metricas(fonte))
         escala = min(1.0, rw / w if w else 1.0, rh / alt if alt else 1.0)
         if escala < 1.0:
             fonte = _fonte(reg.tamanho_max_pt * escala)
-            w, alt = fonte.getlength(texto), sum(fonte.getmetrics())
+            w, alt = fonte.getlength(texto), sum(registro_fontes.metricas(fonte))
         lx = _x_alinhado(x, rw, w, reg.alinhamento)
         ty = y + (rh - alt) / 2
         draw.text((lx, ty), texto, font=fonte, fill=reg.cor, anchor="la")
-        meio = ty + fonte.getmetrics()[0] * 0.62      # meio visual dos algarismos
+        # meio visual dos algarismos
+        meio = ty + registro_fontes.metricas(fonte)[0] * 0.62
         esp = max(2, round(alt * 0.07))
         draw.line((lx - esp, meio, lx + w + esp, meio), fill=reg.cor, width=esp)
         return
@@ -1242,25 +1256,26 @@ def _desenhar_preco(
     # DIMENSIONA PELO ELEMENTO — com ``preenche_caixa`` o corpo é
     # CALCULADO para preencher; nunca há max_pt, há teto de caixa.
     if getattr(reg, "preenche_caixa", False):
-        pt_grande, _alt = corpo_pela_caixa(reg, valor, dpi, fontes_dir)
+        pt_grande, _alt = corpo_pela_caixa(reg, valor, dpi_das_decisoes(dpi),
+                                           fontes_dir)
         pt_peq = pt_grande * ((reg.tamanho_centavos_pt or
                                reg.tamanho_max_pt * 0.5)
                               / max(reg.tamanho_max_pt, 0.001))
 
     f_g, f_p, w_prefixo, w_reais, w_cent = montar(pt_grande, pt_peq)
     total_w = w_prefixo + w_reais + w_cent
-    asc_g = f_g.getmetrics()[0]
-    alt_g = sum(f_g.getmetrics())
+    asc_g = registro_fontes.metricas(f_g)[0]
+    alt_g = sum(registro_fontes.metricas(f_g))
 
     # Só REDUZ para caber na largura e na altura.
     escala = min(1.0, rw / total_w if total_w else 1.0, rh / alt_g if alt_g else 1.0)
     if escala < 1.0 and not getattr(reg, "preenche_caixa", False):
         f_g, f_p, w_prefixo, w_reais, w_cent = montar(pt_grande * escala, pt_peq * escala)
         total_w = w_prefixo + w_reais + w_cent
-        asc_g = f_g.getmetrics()[0]
-        alt_g = sum(f_g.getmetrics())
+        asc_g = registro_fontes.metricas(f_g)[0]
+        alt_g = sum(registro_fontes.metricas(f_g))
 
-    asc_p = f_p.getmetrics()[0]
+    asc_p = registro_fontes.metricas(f_p)[0]
     cursor = _x_alinhado(x, rw, total_w, reg.alinhamento)
     x0 = cursor                                            # início (p/ o riscado)
     if getattr(reg, "preenche_caixa", False):
@@ -1270,7 +1285,8 @@ def _desenhar_preco(
         # empurrava o número para baixo do carimbo
         baseline = y + round(rh * 0.80)
     else:
-        baseline = y + (rh + alt_g) / 2 - f_g.getmetrics()[1]  # centraliza
+        baseline = (y + (rh + alt_g) / 2                      # centraliza
+                    - registro_fontes.metricas(f_g)[1])
 
     # UNDEVICESIMUS §4.4: NÚMEROS TABULARES no preço (tnum) — os
     # dígitos ganham a mesma largura e os preços alinham dígito a
@@ -1519,14 +1535,10 @@ def fonte_segura(fontes_dir: Path, nome: str, px: int):
     """Carrega a fonte com cadeia de fallback (I2: nunca derrubar a exportação).
 
     nome pedido → Roboto-Regular.ttf → fonte embutida do Pillow. O pré-voo de
-    exportação avisa quando o fallback vai ser usado.
+    exportação avisa quando o fallback vai ser usado. A fonte vem do registro
+    do processo (``registro_fontes``): cada (arquivo, px) abre do disco 1×.
     """
-    px = max(1, int(px))
-    for candidata in (nome, "Roboto-Regular.ttf"):
-        caminho = fontes_dir / candidata
-        if caminho.exists():
-            return ImageFont.truetype(str(caminho), px)
-    return ImageFont.load_default(px)
+    return registro_fontes.carregar(fontes_dir / nome, px)
 
 
 def nome_com_unidade(nome: str, unidade: str | None,
@@ -1618,6 +1630,362 @@ def _dados_do_conteudo_fixo(cf: dict) -> "DadosProduto":
         desconto_pct=cf.get("desconto_pct"))     # Q2: o 20% do Lanche
 
 
+def _secoes_da_pagina(pagina: Pagina, dados,
+                      fontes_dir: Path) -> tuple | None:
+    """F8.2: seções visuais — os argumentos do desenho (ou None quando a
+    página não desenha seção). Separado do desenho para servir também de
+    CHAVE à composição incremental (a seção atravessa células)."""
+    if not (pagina.secoes_ligadas and isinstance(dados, dict)):
+        return None
+    from app.rendering.secoes import (
+        calcular_secoes, config_secoes, estilo_secoes,
+    )
+    categorias = {sid: d.categoria for sid, d in dados.items()
+                  if d is not None}
+    secoes = calcular_secoes(pagina, categorias)
+    if not secoes:
+        return None
+    cor, esp = config_secoes()
+    estilo, por_cat = estilo_secoes()   # RG-31: o modo escolhido
+    # F13-QUATER/A4: o estilo DA PÁGINA vence o global (o
+    # Jornal em fluxo compõe JORNAL sem tocar a Config)
+    estilo = getattr(pagina, "estilo_secoes", None) or estilo
+    # RODADA-125: o estilo JORNAL no estático mede a FOLGA real
+    # acima de cada bloco — as caixas viajam POR REGIÃO visível
+    # (o bbox de slot mentia: o slot de textos do jornal
+    # atravessa a página e o subtítulo da manchete sumia da
+    # régua, que riscava o texto)
+    caixas = []
+    for _s in pagina.slots:
+        for _r in _s.regioes:
+            if not getattr(_r, "visivel", True):
+                continue
+            caixas.append((
+                _r.rect.x_mm, _r.rect.y_mm,
+                _r.rect.x_mm + _r.rect.larg_mm,
+                _r.rect.y_mm + _r.rect.alt_mm))
+    return secoes, cor, esp, estilo, por_cat, caixas
+
+
+def _atomos_da_pagina(dados) -> frozenset[str]:
+    """VICESIMUS-OCTAVUS/L25: as marcas conhecidas da PÁGINA viram
+    ÁTOMOS de hifenização — reunidas 1× (os dados já trazem as do
+    nome, extraídas na montagem oficial); o hífen nunca parte marca."""
+    import unicodedata as _ud
+    _at: set[str] = set()
+    for _d in (dados.values() if isinstance(dados, dict)
+               else (dados if isinstance(dados, (list, tuple)) else [dados])):
+        for _m in (getattr(_d, "marcas_nome", ()) or ()):
+            for _pal in str(_m).split():
+                _k = _ud.normalize("NFKD", _pal.lower())
+                _at.add("".join(c for c in _k if not _ud.combining(c)))
+    return frozenset(_at)
+
+
+def _herois_da_pagina(pagina: Pagina) -> set[str]:
+    """VICESIMUS-QUARTUS §1.3 (a L21 aplicada ao próprio herói): o gate
+    fixo de 60 mm fazia TODA célula do Quintou (67 mm) e do Sábado
+    (81 mm) virar "herói" — e o leque nunca disparava fora do Jornal.
+    "Editorial" é RELATIVO à página: herói é a zona de foto bem MAIOR
+    que a mediana (>60 mm E >1,25× a mediana), ou a página com menos
+    de 3 zonas (cartaz, destaque solo). Medido ANTES do desenho."""
+    zonas_pg = [r.rect.larg_mm for s in pagina.slots
+                for r in s.regioes
+                if r.tipo == TipoRegiao.IMAGEM and r.visivel]
+    herois: set[str] = set()
+    if zonas_pg:
+        _med_pg = sorted(zonas_pg)[len(zonas_pg) // 2]
+        for s in pagina.slots:
+            for r in s.regioes:
+                if (r.tipo == TipoRegiao.IMAGEM and r.visivel
+                        and r.rect.larg_mm > 60.0
+                        and (r.rect.larg_mm > _med_pg * 1.25
+                             or len(zonas_pg) < 3)):
+                    herois.add(r.uid)
+    return herois
+
+
+def _base_da_pagina(fundo, camada, w: int, h: int, secoes: tuple | None,
+                    dpi_ef: int, fontes_dir: Path) -> Image.Image:
+    """A página ANTES das células: fundo, camada do dono e seções."""
+    # F13-QUATER/L9: a CAMADA do dono (a arte das etiquetas de preço do
+    # Quintou) é COLADA sobre o fundo, escalada à página, com o alfa —
+    # o asset é consumido, nunca imitado. Com a camada presente, a
+    # forma ETIQUETA_LISTRADA para de desenhar o sintético (a etiqueta
+    # verdadeira já está na página) e vira só o PALCO do número.
+    # Fundo + camada saem PRONTOS do cache (1 decode+resample por arte
+    # × tamanho; a base é uma cópia — a composição pinta nela).
+    base, tem_camada = cache_imagens.fundo(fundo, w, h, camada)
+    base._tem_camada = tem_camada
+    # F13-TER/V2: as regiões ADORNO recolam o FUNDO LIMPO por cima da
+    # foto — o caminho viaja com a base (cada composição tem o seu;
+    # nenhuma assinatura interna muda)
+    base._arquivo_fundo = str(fundo) if fundo else None
+    # F8.2: seções visuais — camada DERIVADA, desenhada DEPOIS do fundo e
+    # ANTES do conteúdo (o contorno corre pela folga; o trio nunca é coberto)
+    if secoes is not None:
+        from app.rendering.secoes import desenhar_secoes
+        lista_sec, cor, esp, estilo, por_cat, caixas = secoes
+        desenhar_secoes(base, lista_sec, dpi_ef, cor=cor,
+                        espessura_mm=esp, fontes_dir=fontes_dir,
+                        estilo=estilo, cores_por_categoria=por_cat,
+                        caixas_pagina_mm=caixas)
+    return base
+
+
+def _dado_do_slot(dados, lista, i: int,
+                  slot: Slot) -> tuple[DadosProduto, bool]:
+    """O dado que a célula ``i`` desenha e se ela está SEM produto (aí o
+    dado é o ``vazio`` da página: só o texto legal e a edição vivos)."""
+    d = _dados_do_slot(dados, lista, i, slot_id=slot.id)
+    cf = getattr(slot, "conteudo_fixo", None)
+    if d is None and getattr(slot, "fixa", False) and cf:
+        # F13-TER/N1: célula FIXA com conteúdo do TEMPLATE — compõe
+        # como slot normal (foto escolhida, nome, preço) em toda
+        # porta; a fila do auto-preencher continua sem vê-la
+        d = _dados_do_conteudo_fixo(cf)
+    if d is None:
+        # F13/D7 (P-01, achado estrutural): a VALIDADE VIVA chega ao
+        # rodapé FORA de célula — o vazio herda o texto_legal da
+        # PÁGINA (o mesmo que os slots mapeados carregam); antes o
+        # rodapé típico do tabloide ficava mudo e o marco da F12
+        # contornava com texto_fixo.
+        return DadosProduto(
+            "", texto_legal=_texto_legal_da_pagina(dados),
+            edicao=_campo_vivo_da_pagina(dados, "edicao")), True
+    return d, False
+
+
+def _desenhar_slot(base: Image.Image, draw, layout: LayoutDef, slot: Slot,
+                   d: DadosProduto, sem_produto: bool, dpi_ef: int,
+                   fontes_dir: Path, w: int, h: int) -> None:
+    """Desenha UMA célula na base. O que atravessa células (heróis,
+    átomos de marca, seções) já chega pronto nos atributos da base."""
+    if sem_produto:
+        # célula sem produto fica com a arte — MAS texto fixo do layout
+        # ("Fica a Dica") desenha mesmo assim (A1 da ORDEM_F5_8);
+        # via _desenhar_regiao p/ a rotação valer também aqui (RG-12).
+        # RG-57: a decisão "tem o que desenhar?" passa pelo mesmo helper de
+        # papel (byte-idêntico ao legado, que era todo LIVRE).
+        for reg in slot.regioes:
+            if not reg.visivel:
+                continue
+            if (reg.tipo == TipoRegiao.TEXTO_LEGAL
+                    and texto_composto_legal(reg, d)) \
+                    or reg.tipo == TipoRegiao.FILETE:
+                # N2: o FILETE decorativo (fio de seção) desenha
+                # mesmo sem produto — é estrutura, não conteúdo
+                _desenhar_regiao(base, draw, reg, d,
+                                 dpi_ef, fontes_dir, False)
+        return
+
+    # F13-TER: o SUBTITULO também suprime a unidade automática no
+    # nome (quem tem linha de descritor não repete o peso no nome)
+    tem_unidade = any(r.tipo in (TipoRegiao.UNIDADE,
+                                 TipoRegiao.SUBTITULO)
+                      and r.visivel for r in slot.regioes)
+    from dataclasses import replace as _replace
+    # F13-DUODECIMUS/T5: célula com VÁRIAS zonas de foto E várias
+    # imagens — a k-ésima zona desenha a k-ésima foto (o par
+    # "Sonho + Croissant" da Terça; o arranjo F7.2, que divide UMA
+    # região, continua intocado para célula de zona única)
+    zonas_img = [r for r in slot.regioes
+                 if r.tipo == TipoRegiao.IMAGEM and r.visivel]
+    por_zona: dict[str, str] = {}
+    if len(zonas_img) > 1 and d.imagens:
+        for k, rz in enumerate(zonas_img):
+            im = d.imagens[min(k, len(d.imagens) - 1)]
+            por_zona[rz.uid] = im.caminho
+    # QUARTUSDECIMUS/Q1: a foto tem de encher a zona — o plano da
+    # célula roda ANTES da precedência do nome (a cadeia trabalha
+    # sobre a célula já replanejada). Só em célula marcada
+    # ``zona_flex`` (arte lisa), foto ÚNICA, sem máscara nem
+    # enquadramento, no ASSENTAR — o mesmo gate do caminho rápido
+    # do desenho, que é onde o defeito da ordem vivia.
+    rects_foto: dict = {}
+    regioes_cel = slot.regioes
+    if (len(zonas_img) == 1 and zonas_img[0].zona_flex
+            and zonas_img[0].mascara == Mascara.RETANGULO
+            and zonas_img[0].ajuste == Ajuste.ASSENTAR):
+        pares_q1 = _carregar_imagens(d)
+        if len(pares_q1) == 1:
+            esp_q1, img_q1 = pares_q1[0]
+            if (esp_q1.zoom == 1.0 and esp_q1.foco_x == 0.5
+                    and esp_q1.foco_y == 0.5):
+                bb = (img_q1.getchannel("A").getbbox()
+                      if img_q1.mode == "RGBA" else None)
+                iw, ih = ((bb[2] - bb[0], bb[3] - bb[1]) if bb
+                          else (img_q1.width, img_q1.height))
+                from app.rendering.foto_fit import plano_da_celula
+                plano = plano_da_celula(slot.regioes, iw, ih)
+                if plano is not None:
+                    rects_foto = plano.rects
+                    regioes_cel = [
+                        _replace(r, rect=rects_foto[r.uid])
+                        if r.uid in rects_foto else r
+                        for r in slot.regioes]
+                    # VICESIMUS-QUARTUS §1.3: onde o plano Q1 ATUOU
+                    # (o abraço do banner da Quarta — contrato do
+                    # dono), o leque CEDE: são duas estratégias de
+                    # preencher e o plano chegou primeiro; onde ele
+                    # devolve None, quem preenche é a L19
+                    if not hasattr(base, "_q1_uids"):
+                        base._q1_uids = set()
+                    base._q1_uids.add(zonas_img[0].uid)
+    # F13-NONUS/N1: a precedência do nome é CÓDIGO — a cadeia roda
+    # para toda célula, aqui, no único ponto que conhece o dado E
+    # todas as regiões antes do desenho. O dado da célula é uma
+    # CÓPIA (o mesmo DadosProduto pode servir a vários slots).
+    # F13-UNDECIMUS/U1: o piso do tipo é a RÉGUA da página, não o
+    # dado da região — o 6.0 do banco velho deixa de ser consultado
+    from app.rendering.nome_fit import precedencia_do_nome
+    from app.rendering.text_fit import piso_do_celular
+    piso_nome = piso_do_celular(layout.largura_mm)
+    aj_nome = precedencia_do_nome(d.nome, d.descritor, d.unidade,
+                                  regioes_cel, dpi_ef, fontes_dir,
+                                  piso_pt=piso_nome,
+                                  marcas=d.marcas_nome,
+                                  nome_abreviado=d.nome_abreviado)
+    rects_subst: dict = dict(rects_foto)
+    if aj_nome is not None:
+        d = _replace(d, nome=aj_nome.nome, descritor=aj_nome.descritor,
+                     unidade=None if aj_nome.descritor_saiu
+                     else d.unidade)
+        rects_subst.update(aj_nome.rects)
+    # RODADA-125 v4.1 ("quase descolado, as imagens diminuíram"):
+    # a CÉLULA DE COLUNA é ELÁSTICA — o texto mede o que realmente
+    # usa, ancora no preço e a FOTO cresce até encostar nele (a
+    # caixa de 3 linhas é reserva do caso cheio, não custo fixo).
+    # Só quando a precedência não negociou banda (passos 3/4).
+    if aj_nome is not None and not aj_nome.rects \
+            and not aj_nome.descritor_saiu:
+        from app.rendering.nome_fit import compactar_coluna
+        rects_subst.update(compactar_coluna(
+            regioes_cel, d.nome, d.descritor, d.unidade, dpi_ef,
+            fontes_dir, rects_subst, piso_pt=piso_nome))
+    # VICESIMUS-PRIMUS/P4: a identidade "coluna com mordida" (o
+    # preço sobrepõe a foto E há texto abaixo — o Jornal) liga o
+    # teto de massa do desenho da foto (uniformidade da fileira)
+    _img_slot = next((r for r in slot.regioes
+                      if r.tipo == TipoRegiao.IMAGEM
+                      and r.visivel), None)
+    if _img_slot is not None:
+        _ri = rects_subst.get(_img_slot.uid) or _img_slot.rect
+        # VICESIMUS-QUINTUS/L23: a mordida é SIGNIFICATIVA (≥3 mm
+        # de interseção vertical) — o carimbo do Quintou tocava a
+        # zona por 0,9 mm e a célula caía na identidade do Jornal
+        # por acidente (o teto P4 encolhia as fotos que no
+        # publicado são grandes)
+        _morde = any(
+            r.tipo == TipoRegiao.PRECO and r.visivel
+            and (min(r.rect.y_mm + r.rect.alt_mm,
+                     _ri.y_mm + _ri.alt_mm)
+                 - max(r.rect.y_mm, _ri.y_mm)) >= 3.0
+            and r.rect.x_mm < _ri.x_mm + _ri.larg_mm
+            and r.rect.x_mm + r.rect.larg_mm > _ri.x_mm
+            for r in slot.regioes)
+        _abaixo = any(
+            r.tipo in (TipoRegiao.NOME, TipoRegiao.SUBTITULO)
+            and r.visivel
+            and r.rect.y_mm >= _ri.y_mm + _ri.alt_mm - 1.0
+            for r in slot.regioes)
+        if _morde and _abaixo:
+            if not hasattr(base, "_p4_uids"):
+                base._p4_uids = set()
+            base._p4_uids.add(_img_slot.uid)
+    # VICESIMUS-SEXTUS §4: A HIERARQUIA NÃO INVERTE — onde o preço
+    # ENCHE um elemento de arte (L24), a razão preço÷nome nunca
+    # desce de 2,2×: o corpo do NOME ganha teto pela altura REAL
+    # do algarismo daquela célula; quem cede é o nome (abrevia e
+    # hifeniza), nunca o preço.
+    cap_nome_pt = None
+    _preco_cx = next((r for r in slot.regioes
+                      if r.tipo == TipoRegiao.PRECO and r.visivel
+                      and getattr(r, "preenche_caixa", False)), None)
+    if _preco_cx is not None and d.preco_por is not None:
+        _pt_pc, _alt_pc = corpo_pela_caixa(_preco_cx, d.preco_por,
+                                           dpi_ef, fontes_dir)
+        if _alt_pc > 0:
+            cap_nome_pt = (_alt_pc / 2.2) * 72.0 / dpi_ef
+    for reg in slot.regioes:
+        novo_rect = rects_subst.get(reg.uid)
+        campos: dict = {}
+        if novo_rect:
+            campos["rect"] = novo_rect
+        # UNDEVICESIMUS §4.1: a etiqueta que CAVALGA a foto pousa
+        # no canto MAIS VAZIO dela — ia sempre ao mesmo canto e
+        # podia cobrir o rótulo (a Nutella, a tampa do Danone).
+        # Mede a tinta JÁ PINTADA na base (a foto real, não a
+        # caixa) nas duas posições e fica com a mais limpa.
+        if (reg.tipo == TipoRegiao.PRECO and reg.visivel
+                and novo_rect is None):
+            r_alt = _canto_mais_vazio(base, reg, slot.regioes,
+                                      rects_subst, dpi_ef)
+            if r_alt is not None:
+                campos["rect"] = r_alt
+            # o pouso FINAL fica registrado (diagnóstico §4 da
+            # VICESIMUS: folga/invasão medem-se no efetivo)
+            if not hasattr(base, "_pousos"):
+                base._pousos = {}
+            base._pousos[reg.uid] = r_alt or reg.rect
+        if reg.tipo == TipoRegiao.NOME and reg.visivel \
+                and not (aj_nome is not None and aj_nome.piso_cedeu):
+            # (piso_cedeu: sem SUBTITULO o piso cede antes da
+            # tesoura — o mínimo original da região vale, Quintou)
+            min_ef = min(reg.tamanho_max_pt,
+                         max(reg.tamanho_min_pt, piso_nome))
+            if min_ef != reg.tamanho_min_pt:
+                campos["tamanho_min_pt"] = min_ef
+        if (reg.tipo == TipoRegiao.NOME and reg.visivel
+                and cap_nome_pt is not None
+                and reg.tamanho_max_pt > cap_nome_pt):
+            # SEXTUS §4: o teto do nome pela hierarquia 2,2× —
+            # nunca abaixo do mínimo da própria região (sanidade)
+            campos["tamanho_max_pt"] = max(cap_nome_pt,
+                                           reg.tamanho_min_pt)
+        reg_f = _replace(reg, **campos) if campos else reg
+        d_reg = d
+        if reg.uid in por_zona:
+            d_reg = _replace(d, imagem_path=por_zona[reg.uid],
+                             imagens=[])
+        _desenhar_regiao(base, draw, reg_f, d_reg, dpi_ef, fontes_dir,
+                         tem_unidade)
+    # selos (+18, Qualidade) por slot, ancorados na célula — nos
+    # rects EFETIVOS (o Q1 pode ter movido a zona da foto)
+    selos = _selos_do_produto(d)
+    if selos:
+        anc = _ancora_selos_slot(
+            slot, dpi_ef, w, h, rects_subst,
+            com_foto=bool(d.imagem_path or d.imagens))
+        # VICESIMUS §3.3: o selo é AVISO LEGAL — nunca sobre a
+        # tinta do produto (o +18 pousava no gargalo do Campari).
+        # Com a silhueta registrada e faixa livre ao lado, a
+        # âncora desvia para o vão à direita da tinta.
+        uid_img = next((r.uid for r in slot.regioes
+                        if r.tipo == TipoRegiao.IMAGEM
+                        and r.visivel), None)
+        sil = getattr(base, "_silhuetas", {}).get(uid_img)
+        if sil:
+            ox, oy_sil, nw, _nh = sil
+            ax, ay, aw, ah = anc
+            livre = (ax + aw) - (ox + nw)
+            if livre > mm_para_px(9, dpi_ef):
+                anc = (ox + nw, ay, livre, ah)
+            # VICESIMUS-QUARTUS §3.6 (L22 — a irmã vertical do
+            # §3.3): o selo ENCOSTA no produto — com a foto
+            # ASSENTADA no chão, o canto superior da zona é vazio
+            # e o selo BB flutuava solto entre as células do
+            # Quintou; a âncora desce até o topo da TINTA (com um
+            # respiro de 2 mm), nunca fica pendurada no nada
+            ax2, ay2, aw2, ah2 = anc
+            respiro = round(mm_para_px(2, dpi_ef))
+            if oy_sil - respiro > ay2:
+                corte = (oy_sil - respiro) - ay2
+                anc = (ax2, ay2 + corte, aw2, max(1, ah2 - corte))
+        desenhar_selos(base, anc, selos,
+                       fontes_dir / "Roboto-Bold.ttf")
+
+
 def compor_pagina(
     layout: LayoutDef,
     pagina: Pagina,
@@ -1642,340 +2010,238 @@ def compor_pagina(
 
     # D8.2: prioridade explícita > arte DA PÁGINA > arte do layout (legado)
     fundo = fundo_path or pagina.arquivo_fundo or layout.arquivo_fundo
-    if fundo and Path(fundo).exists():
-        base = Image.open(fundo).convert("RGB")
-        if base.size != (w, h):
-            base = base.resize((w, h))
-    else:
-        base = Image.new("RGB", (w, h), "white")
-    # F13-TER/V2: as regiões ADORNO recolam o FUNDO LIMPO por cima da
-    # foto — o caminho viaja com a base (cada composição tem o seu;
-    # nenhuma assinatura interna muda)
-    base._arquivo_fundo = str(fundo) if fundo else None
-
-    # F13-QUATER/L9: a CAMADA do dono (a arte das etiquetas de preço do
-    # Quintou) é COLADA sobre o fundo, escalada à página, com o alfa —
-    # o asset é consumido, nunca imitado. Com a camada presente, a
-    # forma ETIQUETA_LISTRADA para de desenhar o sintético (a etiqueta
-    # verdadeira já está na página) e vira só o PALCO do número.
-    base._tem_camada = False
-    camada = getattr(pagina, "arquivo_camada", None)
-    if camada and Path(camada).exists():
-        try:
-            sobre = Image.open(camada).convert("RGBA")
-            if sobre.size != (w, h):
-                sobre = sobre.resize((w, h), Image.LANCZOS)
-            base.paste(sobre, (0, 0), sobre)
-            base._tem_camada = True
-        except OSError:
-            pass                      # arte ilegível: compõe sem camada
+    base = _base_da_pagina(fundo, getattr(pagina, "arquivo_camada", None),
+                           w, h, _secoes_da_pagina(pagina, dados, fontes_dir),
+                           dpi_ef, fontes_dir)
+    base._atomos_marcas = _atomos_da_pagina(dados)
+    base._heroi_uids = _herois_da_pagina(pagina)
 
     lista = dados if isinstance(dados, (list, tuple)) else None
+    draw = ImageDraw.Draw(base)
+    for i, slot in enumerate(pagina.slots):
+        d, sem_produto = _dado_do_slot(dados, lista, i, slot)
+        _desenhar_slot(base, draw, layout, slot, d, sem_produto, dpi_ef,
+                       fontes_dir, w, h)
+    return base
 
-    # F8.2: seções visuais — camada DERIVADA, desenhada DEPOIS do fundo e
-    # ANTES do conteúdo (o contorno corre pela folga; o trio nunca é coberto)
-    if pagina.secoes_ligadas and isinstance(dados, dict):
-        from app.rendering.secoes import (
-            calcular_secoes, config_secoes, desenhar_secoes, estilo_secoes,
-        )
-        categorias = {sid: d.categoria for sid, d in dados.items()
-                      if d is not None}
-        secoes = calcular_secoes(pagina, categorias)
-        if secoes:
-            cor, esp = config_secoes()
-            estilo, por_cat = estilo_secoes()   # RG-31: o modo escolhido
-            # F13-QUATER/A4: o estilo DA PÁGINA vence o global (o
-            # Jornal em fluxo compõe JORNAL sem tocar a Config)
-            estilo = getattr(pagina, "estilo_secoes", None) or estilo
-            # RODADA-125: o estilo JORNAL no estático mede a FOLGA real
-            # acima de cada bloco — as caixas viajam POR REGIÃO visível
-            # (o bbox de slot mentia: o slot de textos do jornal
-            # atravessa a página e o subtítulo da manchete sumia da
-            # régua, que riscava o texto)
-            caixas = []
-            for _s in pagina.slots:
-                for _r in _s.regioes:
-                    if not getattr(_r, "visivel", True):
-                        continue
-                    caixas.append((
-                        _r.rect.x_mm, _r.rect.y_mm,
-                        _r.rect.x_mm + _r.rect.larg_mm,
-                        _r.rect.y_mm + _r.rect.alt_mm))
-            desenhar_secoes(base, secoes, dpi_ef, cor=cor,
-                            espessura_mm=esp, fontes_dir=fontes_dir,
-                            estilo=estilo, cores_por_categoria=por_cat,
-                            caixas_pagina_mm=caixas)
-
-    # VICESIMUS-QUARTUS §1.3 (a L21 aplicada ao próprio herói): o gate
-    # fixo de 60 mm fazia TODA célula do Quintou (67 mm) e do Sábado
-    # (81 mm) virar "herói" — e o leque nunca disparava fora do Jornal.
-    # "Editorial" é RELATIVO à página: herói é a zona de foto bem MAIOR
-    # que a mediana (>60 mm E >1,25× a mediana), ou a página com menos
-    # de 3 zonas (cartaz, destaque solo). Medido ANTES do desenho.
-    # VICESIMUS-OCTAVUS/L25: as marcas conhecidas da PÁGINA viram
-    # ÁTOMOS de hifenização — reunidas 1× (os dados já trazem as do
-    # nome, extraídas na montagem oficial); o hífen nunca parte marca.
-    _at: set[str] = set()
-    for _d in (dados.values() if isinstance(dados, dict)
-               else (dados if isinstance(dados, (list, tuple)) else [dados])):
-        for _m in (getattr(_d, "marcas_nome", ()) or ()):
-            for _pal in str(_m).split():
-                import unicodedata as _ud
-                _k = _ud.normalize("NFKD", _pal.lower())
-                _at.add("".join(c for c in _k if not _ud.combining(c)))
-    base._atomos_marcas = frozenset(_at)
 
-    zonas_pg = [r.rect.larg_mm for s in pagina.slots
-                for r in s.regioes
-                if r.tipo == TipoRegiao.IMAGEM and r.visivel]
-    base._heroi_uids = set()
-    if zonas_pg:
-        _med_pg = sorted(zonas_pg)[len(zonas_pg) // 2]
-        for s in pagina.slots:
-            for r in s.regioes:
-                if (r.tipo == TipoRegiao.IMAGEM and r.visivel
-                        and r.rect.larg_mm > 60.0
-                        and (r.rect.larg_mm > _med_pg * 1.25
-                             or len(zonas_pg) < 3)):
-                    base._heroi_uids.add(r.uid)
+def fundo_da_pagina(layout: LayoutDef, pagina: Pagina,
+                    fundo_path: str | Path | None = None,
+                    dpi: int | None = None) -> Image.Image:
+    """A arte da página (fundo + camada do dono) no tamanho em que
+    ``compor_pagina`` a usa — o que o lote inteiro da Fábrica tem em comum
+    (o PDF de fundo único a embute uma vez só)."""
+    dpi_ef = int(dpi) if dpi else layout.dpi
+    w = round(mm_para_px(layout.largura_mm, dpi_ef))
+    h = round(mm_para_px(layout.altura_mm, dpi_ef))
+    fundo = fundo_path or pagina.arquivo_fundo or layout.arquivo_fundo
+    base, _tem_camada = cache_imagens.fundo(
+        fundo, w, h, getattr(pagina, "arquivo_camada", None))
+    return base
 
-    draw = ImageDraw.Draw(base)
-    for i, slot in enumerate(pagina.slots):
-        d = _dados_do_slot(dados, lista, i, slot_id=slot.id)
-        cf = getattr(slot, "conteudo_fixo", None)
-        if d is None and getattr(slot, "fixa", False) and cf:
-            # F13-TER/N1: célula FIXA com conteúdo do TEMPLATE — compõe
-            # como slot normal (foto escolhida, nome, preço) em toda
-            # porta; a fila do auto-preencher continua sem vê-la
-            d = _dados_do_conteudo_fixo(cf)
-        if d is None:
-            # célula sem produto fica com a arte — MAS texto fixo do layout
-            # ("Fica a Dica") desenha mesmo assim (A1 da ORDEM_F5_8);
-            # via _desenhar_regiao p/ a rotação valer também aqui (RG-12).
-            # RG-57: a decisão "tem o que desenhar?" passa pelo mesmo helper de
-            # papel (byte-idêntico ao legado, que era todo LIVRE).
-            # F13/D7 (P-01, achado estrutural): a VALIDADE VIVA chega ao
-            # rodapé FORA de célula — o vazio herda o texto_legal da
-            # PÁGINA (o mesmo que os slots mapeados carregam); antes o
-            # rodapé típico do tabloide ficava mudo e o marco da F12
-            # contornava com texto_fixo.
-            vazio = DadosProduto(
-                "", texto_legal=_texto_legal_da_pagina(dados),
-                edicao=_campo_vivo_da_pagina(dados, "edicao"))
-            for reg in slot.regioes:
-                if not reg.visivel:
-                    continue
-                if (reg.tipo == TipoRegiao.TEXTO_LEGAL
-                        and texto_composto_legal(reg, vazio)) \
-                        or reg.tipo == TipoRegiao.FILETE:
-                    # N2: o FILETE decorativo (fio de seção) desenha
-                    # mesmo sem produto — é estrutura, não conteúdo
-                    _desenhar_regiao(base, draw, reg, vazio,
-                                     dpi_ef, fontes_dir, False)
+
+def dpi_da_miniatura(layout: LayoutDef, lado: int) -> int:
+    """O dpi em que o lado maior da página dá ``lado`` px (nunca acima do
+    dpi do layout)."""
+    maior_mm = max(layout.largura_mm, layout.altura_mm, 1.0)
+    return max(1, min(layout.dpi, math.ceil(lado * 25.4 / maior_mm)))
+
+
+def compor_miniatura(
+    layout: LayoutDef,
+    pagina: Pagina,
+    dados: "DadosProduto | list[DadosProduto]",
+    lado: int,
+    fontes_dir: str | Path | None = None,
+    fundo_path: str | Path | None = None,
+) -> Image.Image:
+    """A página em miniatura (lado maior ≤ ``lado`` px) composta JÁ no dpi
+    pequeno — não no do layout para depois reduzir. O corpo e as quebras
+    de todo texto saem do ajuste no dpi REAL (``decisoes_no_dpi``): a
+    miniatura mostra a página que o export imprime, não outra."""
+    from app.rendering.text_fit import decisoes_no_dpi
+    with decisoes_no_dpi(layout.dpi):
+        img = compor_pagina(layout, pagina, dados, fontes_dir=fontes_dir,
+                            fundo_path=fundo_path,
+                            dpi=dpi_da_miniatura(layout, lado))
+    img.thumbnail((lado, lado))
+    return img
+
+
+# ==============================================================================
+# Composição incremental (a prévia do editor)
+# ==============================================================================
+
+# o que ``_desenhar_slot`` registra na base, por uid de região — a célula
+# reaproveitada devolve as SUAS entradas (diagnóstico, selo, pouso)
+_ATRIBUTOS_DA_CELULA = ("_silhuetas", "_pousos", "_texto_desenhado",
+                        "_q1_uids", "_p4_uids")
+
+
+@dataclass
+class _CamadaCelula:
+    chave: tuple
+    caixa: tuple[int, int, int, int] | None   # pixels que a célula mudou
+    retalho: Image.Image | None               # a base NA caixa, após a célula
+    area: tuple[int, int, int, int]           # o que a célula lê ou pinta
+    atributos: dict
+
+
+def _caixa_px_do_slot(slot: Slot, dpi: int) -> tuple[int, int, int, int]:
+    x0 = y0 = float("inf")
+    x1 = y1 = float("-inf")
+    for r in slot.regioes:
+        x0, y0 = min(x0, r.rect.x_mm), min(y0, r.rect.y_mm)
+        x1 = max(x1, r.rect.x_mm + r.rect.larg_mm)
+        y1 = max(y1, r.rect.y_mm + r.rect.alt_mm)
+    if x0 == float("inf"):
+        return (0, 0, 0, 0)
+    return (math.floor(mm_para_px(x0, dpi)), math.floor(mm_para_px(y0, dpi)),
+            math.ceil(mm_para_px(x1, dpi)), math.ceil(mm_para_px(y1, dpi)))
+
+
+def _unir(a, b):
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _cruzam(a, b) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _assinaturas_das_fotos(d: DadosProduto) -> tuple:
+    caminhos = [d.imagem_path] + [e.caminho for e in d.imagens or ()]
+    return tuple(cache_imagens.assinatura(c) if c else None
+                 for c in caminhos)
+
+
+class ComposicaoIncremental:
+    """A prévia do editor recompõe SÓ as células que mudaram.
+
+    Cada célula desenhada vira uma camada guardada: a caixa dos pixels que
+    ela mudou e o retalho da base naquela caixa (a célula já misturada
+    sobre o fundo — o mesmo byte que ``compor_pagina`` pinta). A chave da
+    camada é o conteúdo da célula (regiões + ``DadosProduto`` + mtime das
+    fotos). Na recomposição, a camada de chave igual é COLADA de volta; a
+    que mudou é redesenhada por cima da base guardada.
+
+    O que atravessa células invalida por construção:
+
+    * seções (``desenhar_secoes``), medianas dos heróis (``_heroi_uids``)
+      e átomos de marca (``_atomos_marcas``) entram na chave da BASE —
+      mudou, a página inteira recompõe;
+    * célula cuja área cruza a de uma célula redesenhada antes dela
+      (a área velha OU a nova) também redesenha — a mistura depende do
+      que está embaixo.
+
+    Uma instância por tela (o canvas): o estado é da página corrente; a
+    troca de página/dpi vira outra chave de base. O resultado é
+    byte-idêntico ao de ``compor_pagina`` com os mesmos argumentos."""
+
+    def __init__(self) -> None:
+        self._chave_base: tuple | None = None
+        self._base: Image.Image | None = None
+        self._atributos_base: dict = {}
+        self._camadas: list[_CamadaCelula] = []
+        self.estatisticas = {"bases": 0, "celulas_desenhadas": 0,
+                             "celulas_reaproveitadas": 0}
+
+    def esquecer(self) -> None:
+        self._chave_base = None
+        self._base = None
+        self._camadas = []
+
+    def compor(self, layout: LayoutDef, pagina: Pagina, dados,
+               fontes_dir: str | Path | None = None,
+               fundo_path: str | Path | None = None,
+               dpi: int | None = None) -> Image.Image:
+        """Mesmos argumentos e mesma imagem de ``compor_pagina``."""
+        from PIL import ImageChops
+
+        fontes_dir = Path(fontes_dir) if fontes_dir else SystemRoot().fontes
+        dpi_ef = int(dpi) if dpi else layout.dpi
+        w = round(mm_para_px(layout.largura_mm, dpi_ef))
+        h = round(mm_para_px(layout.altura_mm, dpi_ef))
+        fundo = fundo_path or pagina.arquivo_fundo or layout.arquivo_fundo
+        camada = getattr(pagina, "arquivo_camada", None)
+        secoes = _secoes_da_pagina(pagina, dados, fontes_dir)
+        atomos = _atomos_da_pagina(dados)
+        herois = _herois_da_pagina(pagina)
+        chave_base = (
+            w, h, dpi_ef, layout.largura_mm, str(fontes_dir),
+            str(fundo) if fundo else None,
+            cache_imagens.assinatura(fundo) if fundo else None,
+            cache_imagens.assinatura(camada) if camada else None,
+            repr(secoes), atomos, frozenset(herois),
+            registro_fontes.identidade(fontes_dir / "Roboto-Regular.ttf"))
+        if chave_base != self._chave_base:
+            self._base = _base_da_pagina(fundo, camada, w, h, secoes,
+                                         dpi_ef, fontes_dir)
+            self._atributos_base = {
+                "_tem_camada": self._base._tem_camada,
+                "_arquivo_fundo": self._base._arquivo_fundo}
+            self._chave_base = chave_base
+            self._camadas = []
+            self.estatisticas["bases"] += 1
+        base = self._base.copy()
+        for nome, valor in self._atributos_base.items():
+            setattr(base, nome, valor)
+        base._atomos_marcas = atomos
+        base._heroi_uids = herois
+
+        lista = dados if isinstance(dados, (list, tuple)) else None
+        draw = ImageDraw.Draw(base)
+        redesenhadas: list[tuple[int, int, int, int]] = []
+        novas: list[_CamadaCelula] = []
+        for i, slot in enumerate(pagina.slots):
+            d, sem_produto = _dado_do_slot(dados, lista, i, slot)
+            chave = (slot.id, repr(slot.regioes), repr(d), sem_produto,
+                     _assinaturas_das_fotos(d))
+            velha = self._camadas[i] if i < len(self._camadas) else None
+            if (velha is not None and velha.chave == chave
+                    and not any(_cruzam(velha.area, a) for a in redesenhadas)):
+                if velha.retalho is not None:
+                    base.paste(velha.retalho, velha.caixa[:2])
+                _devolver_atributos(base, velha.atributos)
+                novas.append(velha)
+                self.estatisticas["celulas_reaproveitadas"] += 1
+                continue
+            antes = base.copy()
+            _desenhar_slot(base, draw, layout, slot, d, sem_produto, dpi_ef,
+                           fontes_dir, w, h)
+            caixa = ImageChops.difference(antes, base).getbbox()
+            area = _unir(_caixa_px_do_slot(slot, dpi_ef), caixa)
+            nova = _CamadaCelula(
+                chave, caixa, base.crop(caixa) if caixa else None, area,
+                _atributos_da_celula(base, slot))
+            novas.append(nova)
+            redesenhadas.append(area)
+            if velha is not None:
+                redesenhadas.append(velha.area)
+            self.estatisticas["celulas_desenhadas"] += 1
+        self._camadas = novas
+        return base
+
+
+def _atributos_da_celula(base: Image.Image, slot: Slot) -> dict:
+    uids = {r.uid for r in slot.regioes}
+    saida: dict = {}
+    for nome in _ATRIBUTOS_DA_CELULA:
+        valor = getattr(base, nome, None)
+        if isinstance(valor, dict):
+            saida[nome] = {k: v for k, v in valor.items() if k in uids}
+        elif isinstance(valor, set):
+            saida[nome] = valor & uids
+    return saida
+
+
+def _devolver_atributos(base: Image.Image, atributos: dict) -> None:
+    for nome, valor in atributos.items():
+        if not valor:
             continue
-        # F13-TER: o SUBTITULO também suprime a unidade automática no
-        # nome (quem tem linha de descritor não repete o peso no nome)
-        tem_unidade = any(r.tipo in (TipoRegiao.UNIDADE,
-                                     TipoRegiao.SUBTITULO)
-                          and r.visivel for r in slot.regioes)
-        from dataclasses import replace as _replace
-        # F13-DUODECIMUS/T5: célula com VÁRIAS zonas de foto E várias
-        # imagens — a k-ésima zona desenha a k-ésima foto (o par
-        # "Sonho + Croissant" da Terça; o arranjo F7.2, que divide UMA
-        # região, continua intocado para célula de zona única)
-        zonas_img = [r for r in slot.regioes
-                     if r.tipo == TipoRegiao.IMAGEM and r.visivel]
-        por_zona: dict[str, str] = {}
-        if len(zonas_img) > 1 and d.imagens:
-            for k, rz in enumerate(zonas_img):
-                im = d.imagens[min(k, len(d.imagens) - 1)]
-                por_zona[rz.uid] = im.caminho
-        # QUARTUSDECIMUS/Q1: a foto tem de encher a zona — o plano da
-        # célula roda ANTES da precedência do nome (a cadeia trabalha
-        # sobre a célula já replanejada). Só em célula marcada
-        # ``zona_flex`` (arte lisa), foto ÚNICA, sem máscara nem
-        # enquadramento, no ASSENTAR — o mesmo gate do caminho rápido
-        # do desenho, que é onde o defeito da ordem vivia.
-        rects_foto: dict = {}
-        regioes_cel = slot.regioes
-        if (len(zonas_img) == 1 and zonas_img[0].zona_flex
-                and zonas_img[0].mascara == Mascara.RETANGULO
-                and zonas_img[0].ajuste == Ajuste.ASSENTAR):
-            pares_q1 = _carregar_imagens(d)
-            if len(pares_q1) == 1:
-                esp_q1, img_q1 = pares_q1[0]
-                if (esp_q1.zoom == 1.0 and esp_q1.foco_x == 0.5
-                        and esp_q1.foco_y == 0.5):
-                    bb = (img_q1.getchannel("A").getbbox()
-                          if img_q1.mode == "RGBA" else None)
-                    iw, ih = ((bb[2] - bb[0], bb[3] - bb[1]) if bb
-                              else (img_q1.width, img_q1.height))
-                    from app.rendering.foto_fit import plano_da_celula
-                    plano = plano_da_celula(slot.regioes, iw, ih)
-                    if plano is not None:
-                        rects_foto = plano.rects
-                        regioes_cel = [
-                            _replace(r, rect=rects_foto[r.uid])
-                            if r.uid in rects_foto else r
-                            for r in slot.regioes]
-                        # VICESIMUS-QUARTUS §1.3: onde o plano Q1 ATUOU
-                        # (o abraço do banner da Quarta — contrato do
-                        # dono), o leque CEDE: são duas estratégias de
-                        # preencher e o plano chegou primeiro; onde ele
-                        # devolve None, quem preenche é a L19
-                        if not hasattr(base, "_q1_uids"):
-                            base._q1_uids = set()
-                        base._q1_uids.add(zonas_img[0].uid)
-        # F13-NONUS/N1: a precedência do nome é CÓDIGO — a cadeia roda
-        # para toda célula, aqui, no único ponto que conhece o dado E
-        # todas as regiões antes do desenho. O dado da célula é uma
-        # CÓPIA (o mesmo DadosProduto pode servir a vários slots).
-        # F13-UNDECIMUS/U1: o piso do tipo é a RÉGUA da página, não o
-        # dado da região — o 6.0 do banco velho deixa de ser consultado
-        from app.rendering.nome_fit import precedencia_do_nome
-        from app.rendering.text_fit import piso_do_celular
-        piso_nome = piso_do_celular(layout.largura_mm)
-        aj_nome = precedencia_do_nome(d.nome, d.descritor, d.unidade,
-                                      regioes_cel, dpi_ef, fontes_dir,
-                                      piso_pt=piso_nome,
-                                      marcas=d.marcas_nome,
-                                      nome_abreviado=d.nome_abreviado)
-        rects_subst: dict = dict(rects_foto)
-        if aj_nome is not None:
-            d = _replace(d, nome=aj_nome.nome, descritor=aj_nome.descritor,
-                         unidade=None if aj_nome.descritor_saiu
-                         else d.unidade)
-            rects_subst.update(aj_nome.rects)
-        # RODADA-125 v4.1 ("quase descolado, as imagens diminuíram"):
-        # a CÉLULA DE COLUNA é ELÁSTICA — o texto mede o que realmente
-        # usa, ancora no preço e a FOTO cresce até encostar nele (a
-        # caixa de 3 linhas é reserva do caso cheio, não custo fixo).
-        # Só quando a precedência não negociou banda (passos 3/4).
-        if aj_nome is not None and not aj_nome.rects \
-                and not aj_nome.descritor_saiu:
-            from app.rendering.nome_fit import compactar_coluna
-            rects_subst.update(compactar_coluna(
-                regioes_cel, d.nome, d.descritor, d.unidade, dpi_ef,
-                fontes_dir, rects_subst, piso_pt=piso_nome))
-        # VICESIMUS-PRIMUS/P4: a identidade "coluna com mordida" (o
-        # preço sobrepõe a foto E há texto abaixo — o Jornal) liga o
-        # teto de massa do desenho da foto (uniformidade da fileira)
-        _img_slot = next((r for r in slot.regioes
-                          if r.tipo == TipoRegiao.IMAGEM
-                          and r.visivel), None)
-        if _img_slot is not None:
-            _ri = rects_subst.get(_img_slot.uid) or _img_slot.rect
-            # VICESIMUS-QUINTUS/L23: a mordida é SIGNIFICATIVA (≥3 mm
-            # de interseção vertical) — o carimbo do Quintou tocava a
-            # zona por 0,9 mm e a célula caía na identidade do Jornal
-            # por acidente (o teto P4 encolhia as fotos que no
-            # publicado são grandes)
-            _morde = any(
-                r.tipo == TipoRegiao.PRECO and r.visivel
-                and (min(r.rect.y_mm + r.rect.alt_mm,
-                         _ri.y_mm + _ri.alt_mm)
-                     - max(r.rect.y_mm, _ri.y_mm)) >= 3.0
-                and r.rect.x_mm < _ri.x_mm + _ri.larg_mm
-                and r.rect.x_mm + r.rect.larg_mm > _ri.x_mm
-                for r in slot.regioes)
-            _abaixo = any(
-                r.tipo in (TipoRegiao.NOME, TipoRegiao.SUBTITULO)
-                and r.visivel
-                and r.rect.y_mm >= _ri.y_mm + _ri.alt_mm - 1.0
-                for r in slot.regioes)
-            if _morde and _abaixo:
-                if not hasattr(base, "_p4_uids"):
-                    base._p4_uids = set()
-                base._p4_uids.add(_img_slot.uid)
-        # VICESIMUS-SEXTUS §4: A HIERARQUIA NÃO INVERTE — onde o preço
-        # ENCHE um elemento de arte (L24), a razão preço÷nome nunca
-        # desce de 2,2×: o corpo do NOME ganha teto pela altura REAL
-        # do algarismo daquela célula; quem cede é o nome (abrevia e
-        # hifeniza), nunca o preço.
-        cap_nome_pt = None
-        _preco_cx = next((r for r in slot.regioes
-                          if r.tipo == TipoRegiao.PRECO and r.visivel
-                          and getattr(r, "preenche_caixa", False)), None)
-        if _preco_cx is not None and d.preco_por is not None:
-            _pt_pc, _alt_pc = corpo_pela_caixa(_preco_cx, d.preco_por,
-                                               dpi_ef, fontes_dir)
-            if _alt_pc > 0:
-                cap_nome_pt = (_alt_pc / 2.2) * 72.0 / dpi_ef
-        for reg in slot.regioes:
-            novo_rect = rects_subst.get(reg.uid)
-            campos: dict = {}
-            if novo_rect:
-                campos["rect"] = novo_rect
-            # UNDEVICESIMUS §4.1: a etiqueta que CAVALGA a foto pousa
-            # no canto MAIS VAZIO dela — ia sempre ao mesmo canto e
-            # podia cobrir o rótulo (a Nutella, a tampa do Danone).
-            # Mede a tinta JÁ PINTADA na base (a foto real, não a
-            # caixa) nas duas posições e fica com a mais limpa.
-            if (reg.tipo == TipoRegiao.PRECO and reg.visivel
-                    and novo_rect is None):
-                r_alt = _canto_mais_vazio(base, reg, slot.regioes,
-                                          rects_subst, dpi_ef)
-                if r_alt is not None:
-                    campos["rect"] = r_alt
-                # o pouso FINAL fica registrado (diagnóstico §4 da
-                # VICESIMUS: folga/invasão medem-se no efetivo)
-                if not hasattr(base, "_pousos"):
-                    base._pousos = {}
-                base._pousos[reg.uid] = r_alt or reg.rect
-            if reg.tipo == TipoRegiao.NOME and reg.visivel \
-                    and not (aj_nome is not None and aj_nome.piso_cedeu):
-                # (piso_cedeu: sem SUBTITULO o piso cede antes da
-                # tesoura — o mínimo original da região vale, Quintou)
-                min_ef = min(reg.tamanho_max_pt,
-                             max(reg.tamanho_min_pt, piso_nome))
-                if min_ef != reg.tamanho_min_pt:
-                    campos["tamanho_min_pt"] = min_ef
-            if (reg.tipo == TipoRegiao.NOME and reg.visivel
-                    and cap_nome_pt is not None
-                    and reg.tamanho_max_pt > cap_nome_pt):
-                # SEXTUS §4: o teto do nome pela hierarquia 2,2× —
-                # nunca abaixo do mínimo da própria região (sanidade)
-                campos["tamanho_max_pt"] = max(cap_nome_pt,
-                                               reg.tamanho_min_pt)
-            reg_f = _replace(reg, **campos) if campos else reg
-            d_reg = d
-            if reg.uid in por_zona:
-                d_reg = _replace(d, imagem_path=por_zona[reg.uid],
-                                 imagens=[])
-            _desenhar_regiao(base, draw, reg_f, d_reg, dpi_ef, fontes_dir,
-                             tem_unidade)
-        # selos (+18, Qualidade) por slot, ancorados na célula — nos
-        # rects EFETIVOS (o Q1 pode ter movido a zona da foto)
-        selos = _selos_do_produto(d)
-        if selos:
-            anc = _ancora_selos_slot(
-                slot, dpi_ef, w, h, rects_subst,
-                com_foto=bool(d.imagem_path or d.imagens))
-            # VICESIMUS §3.3: o selo é AVISO LEGAL — nunca sobre a
-            # tinta do produto (o +18 pousava no gargalo do Campari).
-            # Com a silhueta registrada e faixa livre ao lado, a
-            # âncora desvia para o vão à direita da tinta.
-            uid_img = next((r.uid for r in slot.regioes
-                            if r.tipo == TipoRegiao.IMAGEM
-                            and r.visivel), None)
-            sil = getattr(base, "_silhuetas", {}).get(uid_img)
-            if sil:
-                ox, oy_sil, nw, _nh = sil
-                ax, ay, aw, ah = anc
-                livre = (ax + aw) - (ox + nw)
-                if livre > mm_para_px(9, dpi_ef):
-                    anc = (ox + nw, ay, livre, ah)
-                # VICESIMUS-QUARTUS §3.6 (L22 — a irmã vertical do
-                # §3.3): o selo ENCOSTA no produto — com a foto
-                # ASSENTADA no chão, o canto superior da zona é vazio
-                # e o selo BB flutuava solto entre as células do
-                # Quintou; a âncora desce até o topo da TINTA (com um
-                # respiro de 2 mm), nunca fica pendurada no nada
-                ax2, ay2, aw2, ah2 = anc
-                respiro = round(mm_para_px(2, dpi_ef))
-                if oy_sil - respiro > ay2:
-                    corte = (oy_sil - respiro) - ay2
-                    anc = (ax2, ay2 + corte, aw2, max(1, ah2 - corte))
-            desenhar_selos(base, anc, selos,
-                           fontes_dir / "Roboto-Bold.ttf")
-    return base
+        atual = getattr(base, nome, None)
+        if atual is None:
+            atual = {} if isinstance(valor, dict) else set()
+            setattr(base, nome, atual)
+        atual.update(valor)
@@ -2,16 +2,49 @@
 Exportação — PNG e PDF no tamanho físico exato
 ==============================================
 O DPI vai gravado no arquivo, então o resultado imprime no tamanho certo.
+
+O PDF de várias páginas é gravado em FLUXO (``GravadorPdf``): cada página
+entra, vira JPEG dentro do arquivo e sai da memória. O ``save_all`` do
+Pillow pedia a lista inteira convertida para RGB de uma vez — 40 cartazes
+A4 em 300 dpi eram alguns GB vivos só para gravar. O Catálogo e a árvore
+de páginas (que citam TODAS as páginas) vão no fim do arquivo, depois da
+última; o leitor de PDF acha tudo pela tabela xref.
+
+Com FUNDO ÚNICO (``definir_fundo``) — o lote da Fábrica, 100 cartazes na
+mesma arte — a arte entra no PDF UMA vez, como XObject reaproveitado por
+todas as páginas; cada página leva só os RETALHOS que diferem dela (foto,
+nome, preço, selos), colados por cima. Os retalhos seguem a grade de
+blocos do JPEG (múltiplos de 16 px a partir da origem), então cada bloco
+sai com os mesmos coeficientes do JPEG da página inteira. O que mudaria é
+a suavização de croma do decodificador, que olha o bloco vizinho: por
+isso o retalho MOSTRADO vai um MCU além das células que mudaram e o JPEG
+dele, mais um, recortado por clip. No dpi de impressão o resultado é o do
+caminho de sempre, pixel a pixel (``test_fundo_unico_*``). O ganho de
+tamanho depende do peso da arte frente ao conteúdo de cada cartaz — no
+lote sintético do teste, ~2× menor, não uma ordem de grandeza.
 """
 
 from __future__ import annotations
 
+import io
+import os
+import time
 from pathlib import Path
+from typing import Callable, Iterable
 
-from PIL import Image
+from PIL import Image, ImageChops, PdfParser
 
 from app.rendering.units import px_para_mm
 
+PASSO_RETALHO_PX = 64
+"""Lado da célula da grade de retalhos (múltiplo do MCU 16×16 do JPEG)."""
+
+MCU_PX = 16
+"""Lado do MCU do JPEG do Pillow (croma 4:2:0): a unidade das margens."""
+
+TETO_RETALHOS = 0.85
+"""Retalhos cobrindo mais que isto da página: vai a página inteira."""
+
 
 def exportar_png(img: Image.Image, caminho: str | Path, dpi: int) -> Path:
     caminho = Path(caminho)
@@ -28,18 +61,218 @@ def exportar_pdf(img: Image.Image, caminho: str | Path, dpi: int) -> Path:
     return caminho
 
 
+def _retalhos(pagina: Image.Image, fundo: Image.Image,
+              passo: int = PASSO_RETALHO_PX) -> list[tuple[int, int, int, int]] | None:
+    """As caixas (x0, y0, x1, y1) da ``pagina`` que diferem do ``fundo``,
+    na grade de ``passo`` px: as células diferentes de cada faixa viram
+    corridas horizontais, e corridas iguais em faixas seguidas, uma caixa
+    só. None quando os retalhos cobrem quase tudo (página inteira é menor)."""
+    dif = ImageChops.difference(pagina, fundo)
+    w, h = pagina.size
+    caixas: list[list[int]] = []
+    abertas: dict[tuple[int, int], list[int]] = {}
+    for y0 in range(0, h, passo):
+        y1 = min(h, y0 + passo)
+        faixa = dif.crop((0, y0, w, y1))
+        limites = faixa.getbbox()
+        corridas: list[tuple[int, int]] = []
+        if limites is not None:
+            for x0 in range(limites[0] // passo * passo, limites[2], passo):
+                x1 = min(w, x0 + passo)
+                if faixa.crop((x0, 0, x1, y1 - y0)).getbbox() is None:
+                    continue
+                if corridas and corridas[-1][1] == x0:
+                    corridas[-1] = (corridas[-1][0], x1)
+                else:
+                    corridas.append((x0, x1))
+        seguem: dict[tuple[int, int], list[int]] = {}
+        for x0, x1 in corridas:
+            caixa = abertas.get((x0, x1))
+            if caixa is None:
+                caixa = [x0, y0, x1, y1]
+                caixas.append(caixa)
+            caixa[3] = y1
+            seguem[(x0, x1)] = caixa
+        abertas = seguem
+    area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in caixas)
+    if area > TETO_RETALHOS * w * h:
+        return None
+    return [tuple(c) for c in caixas]
+
+
+def _crescer(caixa: tuple[int, int, int, int], margem: int,
+             w: int, h: int) -> tuple[int, int, int, int]:
+    """A ``caixa`` com ``margem`` px a mais de cada lado, presa à página."""
+    x0, y0, x1, y1 = caixa
+    return (max(0, x0 - margem), max(0, y0 - margem),
+            min(w, x1 + margem), min(h, y1 + margem))
+
+
+class GravadorPdf:
+    """PDF multipágina gravado página a página (peak de memória ≈ 1 página).
+
+    Cada ``adicionar`` codifica a imagem (JPEG, como o driver PDF do Pillow
+    faz com RGB) direto no arquivo e não guarda referência a ela. O arquivo
+    nasce como ``<nome>.parcial`` e só troca de nome no ``fechar`` — export
+    que cai no meio não deixa PDF quebrado (nem apaga o anterior).
+    ``definir_fundo`` liga o modo fundo único (arte 1× + retalhos).
+
+    Como gerenciador de contexto: sai fechando; com exceção, descarta."""
+
+    def __init__(self, caminho: str | Path, dpi: int):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.dpi = float(dpi)
+        self.paginas = 0
+        self._parcial = self.caminho.with_name(self.caminho.name + ".parcial")
+        self._fp = open(self._parcial, "w+b")
+        pdf = self._pdf = PdfParser.PdfParser(f=self._fp, mode="w+b")
+        pdf.start_writing()
+        pdf.write_header()
+        pdf.write_comment("created by Pillow PDF driver")
+        # o Catálogo e a raiz das páginas: números reservados já, objetos
+        # gravados no fim (a lista de Kids só existe depois da última)
+        pdf.root_ref = pdf.next_object_id(0)
+        pdf.pages_ref = pdf.next_object_id(0)
+        self._fundo: Image.Image | None = None
+        self._fundo_ref = None
+
+    def __enter__(self) -> "GravadorPdf":
+        return self
+
+    def __exit__(self, tipo, _valor, _tb) -> None:
+        if tipo is None:
+            self.fechar()
+        else:
+            self.descartar()
+
+    def _gravar_jpeg(self, im: Image.Image) -> PdfParser.IndirectReference:
+        """Uma imagem RGB como XObject JPEG (o que o driver do Pillow faz)."""
+        buf = io.BytesIO()
+        im.save(buf, "JPEG")
+        return self._pdf.write_obj(
+            None, stream=buf.getvalue(),
+            Type=PdfParser.PdfName("XObject"),
+            Subtype=PdfParser.PdfName("Image"),
+            Width=im.width, Height=im.height,
+            Filter=PdfParser.PdfName("DCTDecode"),
+            BitsPerComponent=8,
+            ColorSpace=PdfParser.PdfName("DeviceRGB"))
+
+    def definir_fundo(self, fundo: Image.Image | None) -> None:
+        """A arte COMUM às próximas páginas: gravada já, uma vez só. Página
+        do mesmo tamanho passa a levar só o que difere dela. None volta ao
+        modo página inteira."""
+        if fundo is None:
+            self._fundo = self._fundo_ref = None
+            return
+        self._fundo = fundo if fundo.mode == "RGB" else fundo.convert("RGB")
+        self._fundo_ref = self._gravar_jpeg(self._fundo)
+
+    def adicionar(self, img: Image.Image) -> None:
+        """Grava ``img`` como a próxima página, no tamanho físico do dpi."""
+        pdf = self._pdf
+        rgb = img if img.mode == "RGB" else img.convert("RGB")
+        largura, altura = rgb.size
+        escala = 72.0 / self.dpi
+        w_pt, h_pt = largura * escala, altura * escala
+        fundo = self._fundo
+        retalhos = (_retalhos(rgb, fundo)
+                    if fundo is not None and fundo.size == rgb.size else None)
+        if retalhos is None:
+            xobjetos = {"image": self._gravar_jpeg(rgb)}
+            conteudo = b"q %f 0 0 %f 0 0 cm /image Do Q\n" % (w_pt, h_pt)
+        else:
+            xobjetos = {"fundo": self._fundo_ref}
+            conteudo = b"q %f 0 0 %f 0 0 cm /fundo Do Q\n" % (w_pt, h_pt)
+            for k, caixa in enumerate(retalhos):
+                nome = f"r{k}"
+                # o recorte mostrado vai 1 MCU além do retalho (o fundo ao
+                # redor decodifica como na página inteira) e o JPEG, mais 1
+                # MCU (o croma da borda mostrada tem vizinhos de verdade);
+                # o clip ``re W n`` esconde a borda de fora
+                x0, y0, x1, y1 = _crescer(caixa, MCU_PX, largura, altura)
+                e0, f0, e1, f1 = _crescer(caixa, 2 * MCU_PX, largura, altura)
+                xobjetos[nome] = self._gravar_jpeg(rgb.crop((e0, f0, e1, f1)))
+                # PDF tem a origem EMBAIXO; a imagem, em cima
+                conteudo += b"q %f %f %f %f re W n %f 0 0 %f %f %f cm /%s Do Q\n" % (
+                    x0 * escala, (altura - y1) * escala,
+                    (x1 - x0) * escala, (y1 - y0) * escala,
+                    (e1 - e0) * escala, (f1 - f0) * escala,
+                    e0 * escala, (altura - f1) * escala, nome.encode())
+        del rgb
+        conteudo_ref = pdf.write_obj(None, stream=conteudo)
+        pagina_ref = pdf.write_page(
+            None,
+            Resources=PdfParser.PdfDict(
+                ProcSet=[PdfParser.PdfName("PDF"),
+                         PdfParser.PdfName("ImageC")],
+                XObject=PdfParser.PdfDict(**xobjetos)),
+            MediaBox=[0, 0, w_pt, h_pt],
+            Contents=conteudo_ref)
+        pdf.pages.append(pagina_ref)
+        self.paginas += 1
+
+    def fechar(self) -> Path:
+        """Grava Catálogo, páginas e xref e põe o arquivo no lugar.
+        ValueError se nenhuma página entrou (e nada fica no disco)."""
+        if not self.paginas:
+            self.descartar()
+            raise ValueError("nenhuma página para exportar")
+        pdf = self._pdf
+        pdf.write_obj(pdf.root_ref, Type=PdfParser.PdfName("Catalog"),
+                      Pages=pdf.pages_ref)
+        pdf.write_obj(pdf.pages_ref, Type=PdfParser.PdfName("Pages"),
+                      Count=len(pdf.pages), Kids=pdf.pages)
+        agora = time.gmtime()
+        pdf.info["Title"] = self.caminho.stem
+        pdf.info["CreationDate"] = agora
+        pdf.info["ModDate"] = agora
+        pdf.write_xref_and_trailer()
+        self._fp.flush()
+        pdf.close()
+        self._fp.close()
+        os.replace(self._parcial, self.caminho)
+        return self.caminho
+
+    def descartar(self) -> None:
+        """Abandona o arquivo parcial (export que falhou no meio)."""
+        self._pdf.close()
+        self._fp.close()
+        self._parcial.unlink(missing_ok=True)
+
+
+def exportar_pdf_fluxo(
+    paginas: Iterable[Image.Image], caminho: str | Path, dpi: int,
+    status_cb: Callable[[str], None] | None = None,
+    total: int | None = None,
+    fundo: Image.Image | None = None,
+) -> Path:
+    """PDF multipágina a partir de um GERADOR: cada página é gravada e
+    solta antes da próxima ser pedida — quem compõe sob demanda
+    (``paralelo.compor_em_ordem``) nunca tem o lote inteiro na RAM.
+    ``status_cb`` recebe "Gravando página k/N…" (``total`` = N, se sabido).
+    ``fundo``: a arte comum a todas as páginas, embutida uma vez só."""
+    with GravadorPdf(caminho, dpi) as gravador:
+        gravador.definir_fundo(fundo)
+        # sem ``enumerate``: a tupla que ele recicla seguraria a página
+        # anterior enquanto a próxima é composta
+        for img in paginas:
+            if status_cb is not None:
+                k = gravador.paginas + 1
+                status_cb(f"Gravando página {k}/{total}…" if total
+                          else f"Gravando página {k}…")
+            gravador.adicionar(img)
+            del img
+    return gravador.caminho
+
+
 def exportar_pdf_multipagina(
-    imagens: list[Image.Image], caminho: str | Path, dpi: int
+    imagens: Iterable[Image.Image], caminho: str | Path, dpi: int
 ) -> Path:
-    """PDF com N páginas, cada uma no tamanho físico exato (1 cartaz/página)."""
-    if not imagens:
-        raise ValueError("nenhuma página para exportar")
-    caminho = Path(caminho)
-    caminho.parent.mkdir(parents=True, exist_ok=True)
-    primeira, *resto = [im.convert("RGB") for im in imagens]
-    primeira.save(str(caminho), "PDF", resolution=float(dpi),
-                  save_all=True, append_images=resto)
-    return caminho
+    """PDF com N páginas, cada uma no tamanho físico exato (1 cartaz/página).
+    Aceita lista ou gerador — a gravação é em fluxo (``GravadorPdf``)."""
+    return exportar_pdf_fluxo(imagens, caminho, dpi)
 
 
 def dimensoes_mm(img: Image.Image, dpi: int) -> tuple[float, float]:
@@ -90,6 +90,28 @@ def impor_2em1(imagens_a5: list[Image.Image], dpi: int, *,
 A4_RETRATO_MM = (210.0, 297.0)
 
 
+def _grade_etiquetas(etiqueta_px: tuple[int, int],
+                     folha_px: tuple[int, int]) -> tuple[int, int]:
+    """(colunas, linhas) da grade — RECUSA etiqueta maior que a folha."""
+    cols = folha_px[0] // etiqueta_px[0]
+    linhas = folha_px[1] // etiqueta_px[1]
+    if cols < 1 or linhas < 1:
+        raise ValueError(
+            "a etiqueta não cabe na folha — escolha um modelo menor "
+            "(a etiqueta de prateleira é 100×70 mm) ou uma folha maior")
+    return cols, linhas
+
+
+def etiquetas_por_folha(etiqueta_px: tuple[int, int], dpi: int, *,
+                        folha_mm: tuple[float, float] = A4_RETRATO_MM) -> int:
+    """Quantas etiquetas de ``etiqueta_px`` cabem numa folha — quem grava o
+    lote em fluxo junta esse tanto, impõe a folha e a solta."""
+    w = round(mm_para_px(folha_mm[0], dpi))
+    h = round(mm_para_px(folha_mm[1], dpi))
+    cols, linhas = _grade_etiquetas(etiqueta_px, (w, h))
+    return cols * linhas
+
+
 def impor_etiquetas(etiquetas: list[Image.Image], dpi: int, *,
                     folha_mm: tuple[float, float] = A4_RETRATO_MM,
                     marcas_corte: bool = True) -> list[Image.Image]:
@@ -106,12 +128,7 @@ def impor_etiquetas(etiquetas: list[Image.Image], dpi: int, *,
     h = round(mm_para_px(folha_mm[1], dpi))
     ew = max(im.width for im in etiquetas)
     eh = max(im.height for im in etiquetas)
-    cols = w // ew
-    linhas = h // eh
-    if cols < 1 or linhas < 1:
-        raise ValueError(
-            "a etiqueta não cabe na folha — escolha um modelo menor "
-            "(a etiqueta de prateleira é 100×70 mm) ou uma folha maior")
+    cols, linhas = _grade_etiquetas((ew, eh), (w, h))
     por_folha = cols * linhas
     ox0 = (w - cols * ew) // 2               # a grade centrada na folha
     oy0 = (h - linhas * eh) // 2
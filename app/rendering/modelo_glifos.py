@@ -0,0 +1,176 @@
+"""
+Modelo de avanços de glifo — medir linha sem FreeType
+=====================================================
+O ``ajustar_texto`` mede cada linha candidata com FreeType em cada passo da
+busca binária (~60 µs por ``getlength``). A largura de uma linha no layout
+BASIC do Pillow é a SOMA dos avanços dos glifos (+ o kerning da tabela
+``kern``) — aditiva, sem moldagem. Então dá para prever a largura em QUALQUER
+corpo a partir das tabelas da fonte (fontTools, lidas 1× por arquivo):
+
+    largura(px) ≈ Σ avanço(glifo) × px / unitsPerEm  (+ Σ kern × escala)
+
+A diferença para o FreeType é o arredondamento do hinting: no máximo ~½ px
+por glifo (medido nas fontes do acervo: 0,51 px no pior caso). O modelo
+carrega essa FOLGA junto: ``LarguraEstimada`` registra, a cada medida, a
+distância até os limites que o chamador compara. Se todas as comparações
+ficaram longe do limite por mais que a folga, a decisão do modelo é a MESMA
+do FreeType — e o ajuste não precisa medir nada. Perto do limite, o
+chamador mede de verdade: glifo a glifo (``LarguraExata``, cada avanço
+pedido ao FreeType 1× por corpo), ou a linha inteira quando a fonte tem
+kerning.
+
+Só vale para o layout BASIC: com Raqm (HarfBuzz) entram GPOS, ligaduras e
+moldagem, que a soma não prevê — aí ``modelo_para`` devolve None e o
+ajuste segue medindo com FreeType como sempre.
+"""
+
+from __future__ import annotations
+
+import threading
+from itertools import repeat
+from pathlib import Path
+
+from PIL import ImageFont
+
+from app.rendering import registro_fontes
+
+FOLGA_POR_GLIFO_PX = 0.6
+"""Pior diferença por glifo entre o avanço linear e o do FreeType com
+hinting (0,51 px medido em Roboto/Quicksand, 6–300 px), com margem."""
+
+FOLGA_KERN_PX = 1.0
+"""O kerning do BASIC chega ao Pillow arredondado ao pixel."""
+
+_trava = threading.Lock()
+_modelos: dict[tuple, "ModeloAvancos | None"] = {}
+_MAX_MODELOS = 64
+_MAX_CORPOS = 256
+
+
+class ModeloAvancos:
+    """Avanços (e kerning ``kern``) de UM arquivo de fonte, em unidades
+    da fonte — serve a qualquer corpo."""
+
+    def __init__(self, caminho: str):
+        from fontTools.ttLib import TTFont
+
+        tt = TTFont(caminho, lazy=True, fontNumber=0)
+        try:
+            self.upem = tt["head"].unitsPerEm
+            metricas = tt["hmtx"].metrics
+            ordem = tt.getGlyphOrder()
+            self.notdef = metricas[ordem[0]][0] if ordem else 0
+            self.avancos: dict[str, int] = {}
+            glifo_para_chars: dict[str, list[str]] = {}
+            for cp, glifo in (tt.getBestCmap() or {}).items():
+                c = chr(cp)
+                self.avancos[c] = metricas.get(glifo, (self.notdef, 0))[0]
+                glifo_para_chars.setdefault(glifo, []).append(c)
+            self.kern: dict[tuple[str, str], int] = {}
+            # o FreeType aplica a tabela ``kern`` legada no BASIC: com
+            # ela a soma glifo a glifo deixa de ser a largura exata
+            self.aditivo = "kern" not in tt
+            if not self.aditivo:
+                for sub in getattr(tt["kern"], "kernTables", []):
+                    for (g1, g2), v in getattr(sub, "kernTable", {}).items():
+                        for c1 in glifo_para_chars.get(g1, ()):
+                            for c2 in glifo_para_chars.get(g2, ()):
+                                self.kern[(c1, c2)] = v
+                if not self.kern:
+                    # subtabela que não sabemos ler: kerning fora do
+                    # modelo estouraria a folga — sem atalho
+                    raise ValueError("tabela kern ilegível")
+        finally:
+            tt.close()
+        self._por_px: dict[int, dict[str, float]] = {}
+
+    def na_medida(self, px: int, limites: tuple[float, ...]) -> "LarguraEstimada":
+        return LarguraEstimada(self, px, limites)
+
+    def exata(self, fonte, px: int) -> "LarguraExata":
+        """Largura EXATA no corpo ``px``: os avanços de cada glifo medidos
+        pelo FreeType (1× por glifo × px) e somados — a mesma conta que o
+        layout BASIC faz. Só vale com ``aditivo`` (sem tabela ``kern``)."""
+        tabela = self._por_px.get(px)
+        if tabela is None:
+            if len(self._por_px) >= _MAX_CORPOS:
+                self._por_px.clear()
+            tabela = self._por_px[px] = {}
+        return LarguraExata(fonte, tabela)
+
+
+class LarguraExata:
+    """A largura do FreeType, glifo a glifo (ver ``ModeloAvancos.exata``)."""
+
+    __slots__ = ("_fonte", "_tabela")
+
+    def __init__(self, fonte, tabela: dict[str, float]):
+        self._fonte = fonte
+        self._tabela = tabela
+
+    def getlength(self, texto: str) -> float:
+        tab = self._tabela
+        total = 0.0
+        for c in texto:
+            a = tab.get(c)
+            if a is None:
+                a = tab[c] = self._fonte.getlength(c)
+            total += a
+        return total
+
+
+class LarguraEstimada:
+    """Faz as vezes da fonte para ``_quebrar_linhas`` (só ``getlength``).
+
+    ``limites`` são as larguras contra as quais o chamador compara as
+    medidas; ``decidido()`` diz se TODA comparação feita até aqui ficou
+    fora da faixa de erro do modelo (a decisão bate com o FreeType)."""
+
+    __slots__ = ("_modelo", "_escala", "_folga_glifo", "_limites", "margem")
+
+    def __init__(self, modelo: ModeloAvancos, px: int,
+                 limites: tuple[float, ...]):
+        self._modelo = modelo
+        self._escala = px / modelo.upem
+        self._folga_glifo = FOLGA_POR_GLIFO_PX + (
+            FOLGA_KERN_PX if not modelo.aditivo else 0.0)
+        self._limites = limites
+        self.margem = float("inf")
+
+    def getlength(self, texto: str) -> float:
+        m = self._modelo
+        unidades = sum(map(m.avancos.get, texto, repeat(m.notdef)))
+        if not m.aditivo and len(texto) > 1:
+            unidades += sum(m.kern.get(par, 0) for par in zip(texto, texto[1:]))
+        largura = unidades * self._escala
+        folga = len(texto) * self._folga_glifo
+        for lim in self._limites:
+            self.margem = min(self.margem, abs(largura - lim) - folga)
+        return largura
+
+    def decidido(self) -> bool:
+        return self.margem > 0
+
+
+def modelo_para(fonte_path: str | Path) -> ModeloAvancos | None:
+    """O modelo do arquivo que ``registro_fontes.carregar`` usaria para
+    ``fonte_path`` — None quando não há atalho seguro (fonte embutida,
+    layout Raqm, tabela ilegível)."""
+    if ImageFont.core.HAVE_RAQM:
+        return None
+    resolvido, geracao = registro_fontes.identidade(fonte_path)
+    if resolvido is None:
+        return None
+    chave = (resolvido, geracao)
+    with _trava:
+        if chave in _modelos:
+            return _modelos[chave]
+    try:
+        modelo: ModeloAvancos | None = ModeloAvancos(resolvido)
+    except Exception:
+        modelo = None                  # fonte que o fontTools não lê: mede
+    with _trava:
+        if len(_modelos) >= _MAX_MODELOS:
+            _modelos.clear()
+        _modelos[chave] = modelo
+    return modelo
@@ -0,0 +1,215 @@
+"""
+Composição paralela — as páginas do export em vários núcleos
+============================================================
+O export da Mesa, ``paginas_compostas`` e o Modo Pai compunham as páginas
+uma depois da outra numa thread só (``Trabalhador``). O Pillow solta o GIL
+só em parte da composição — num Jornal de várias páginas em 300 dpi o resto
+dos núcleos ficava parado.
+
+Aqui cada página vira uma TAREFA (o ``LayoutDef`` + o mapa de
+``DadosProduto``, serializados por pickle) composta num processo à parte
+(``ProcessPoolExecutor``, início "spawn" — seguro com o Qt vivo no pai). A
+imagem volta e sai NA ORDEM das páginas; é a mesma ``compor_pagina`` do
+caminho sequencial — byte a byte igual.
+
+* o teto de processos vem da config ``exportar.processos`` (0 = automático:
+  núcleos − 1; o perfil de máquina fraca grava 1 = em sequência);
+* o pool é UM só, criado no 1º export paralelo e reaproveitado pelos
+  seguintes (``_pool``) — a subida dos processos se paga uma vez;
+* uma só página, um só processo ou pool que não sobe (ambiente sem
+  ``spawn``, congelado sem ``freeze_support``) → o caminho sequencial de
+  sempre, no mesmo processo;
+* ``status_cb`` recebe o progresso POR PÁGINA ("Compondo página 3/8…").
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from PIL import Image
+
+from app.rendering.model import LayoutDef
+
+CHAVE_CONFIG = "exportar.processos"
+
+_SEM_STATUS: Callable[[str], None] = lambda _m: None  # noqa: E731
+
+
+@dataclass
+class TarefaPagina:
+    """Uma página a compor: os argumentos de ``compor_pagina``."""
+
+    layout: LayoutDef
+    indice: int                        # a página em ``layout.paginas``
+    dados: object
+    fundo_path: str | None = None
+    dpi: int | None = None
+
+
+def max_processos(raiz=None) -> int:
+    """Config ``exportar.processos`` (0/ausente = núcleos − 1, mínimo 1)."""
+    n = 0
+    try:
+        from app.core.database import Database
+        from app.core.paths import SystemRoot
+        from app.core.repositories import ConfigRepositorio
+        db = (Database(SystemRoot(raiz)) if raiz is not None
+              else Database()).init()
+        try:
+            with db.Session() as s:
+                n = int(ConfigRepositorio(s).get(CHAVE_CONFIG) or 0)
+        finally:
+            db.engine.dispose()
+    except Exception:
+        n = 0
+    if n <= 0:
+        n = max(1, (os.cpu_count() or 2) - 1)
+    return n
+
+
+def tarefas_do_layout(layout: LayoutDef, dados,
+                      fundo_path: str | Path | None = None,
+                      dpi: int | None = None) -> list[TarefaPagina]:
+    """Todas as páginas do layout (D8.5) — o ``fundo_path`` explícito vale
+    só na 1ª (D8.2: as demais trazem a arte da própria página)."""
+    return [TarefaPagina(layout, i, dados,
+                         str(fundo_path) if fundo_path and i == 0 else None,
+                         dpi)
+            for i in range(len(layout.paginas))]
+
+
+def _compor(tarefa: TarefaPagina, fontes_dir: str) -> Image.Image:
+    from app.rendering.compositor import compor_pagina
+    return compor_pagina(tarefa.layout, tarefa.layout.paginas[tarefa.indice],
+                         tarefa.dados, fontes_dir=fontes_dir,
+                         fundo_path=tarefa.fundo_path, dpi=tarefa.dpi)
+
+
+def _sequencial(tarefas, fontes_dir, status_cb, inicio=0) -> Iterator[Image.Image]:
+    total = len(tarefas)
+    for k in range(inicio, total):
+        status_cb(f"Compondo página {k + 1}/{total}…")
+        yield _compor(tarefas[k], fontes_dir)
+
+
+def compor_em_ordem(tarefas: list[TarefaPagina],
+                    status_cb: Callable[[str], None] = _SEM_STATUS,
+                    processos: int | None = None,
+                    fontes_dir: str | Path | None = None) -> Iterator[Image.Image]:
+    """Compõe as ``tarefas`` e entrega as imagens NA ORDEM, assim que a
+    próxima fica pronta. No máximo ~2 páginas por processo em voo — quem
+    consome devagar (o gravador de PDF) não acumula o lote na RAM."""
+    if fontes_dir is None:
+        from app.core.paths import SystemRoot
+        fontes_dir = SystemRoot().fontes
+    fontes_dir = str(fontes_dir)
+    total = len(tarefas)
+    n = max_processos() if processos is None else max(1, int(processos))
+    n = min(n, total)
+    if n <= 1:
+        yield from _sequencial(tarefas, fontes_dir, status_cb)
+        return
+
+    import pickle
+    from concurrent.futures.process import BrokenProcessPool
+
+    entregues = 0
+    try:
+        pool = _pool(n)
+    except (OSError, ValueError, NotImplementedError):
+        yield from _sequencial(tarefas, fontes_dir, status_cb)
+        return
+    status_cb(f"Compondo {total} páginas em {n} processos…")
+    voando: deque = deque()
+    try:
+        proxima = 0
+        while entregues < total:
+            while proxima < total and len(voando) < 2 * n:
+                voando.append(pool.submit(_compor, tarefas[proxima],
+                                          fontes_dir))
+                proxima += 1
+            img = voando.popleft().result()
+            entregues += 1
+            status_cb(f"Compondo página {entregues}/{total}…")
+            yield img
+            del img                    # a entregue não espera a próxima
+    except (BrokenProcessPool, pickle.PicklingError, AttributeError,
+            TypeError) as exc:
+        # processo que morreu (memória, antivírus) ou dado que não vai por
+        # pickle (objeto local, lambda — AttributeError/TypeError): o resto
+        # sai em sequência, aqui — o export não cai por causa do paralelo
+        if isinstance(exc, BrokenProcessPool):
+            _descartar_pool(pool)
+        for f in voando:
+            f.cancel()
+        voando.clear()
+        yield from _sequencial(tarefas, fontes_dir, status_cb, entregues)
+    finally:
+        # o pool fica para o próximo export; só o que ESTE pediu e não
+        # levou (consumidor que parou no meio) é cancelado
+        for f in voando:
+            f.cancel()
+
+
+# --- o pool compartilhado ------------------------------------------------------
+
+_pool_trava = threading.Lock()
+_pool_vivo = None                       # (processos, ProcessPoolExecutor)
+
+
+def _pool(n: int):
+    """O ``ProcessPoolExecutor`` do processo, criado na 1ª vez que é
+    pedido e REAPROVEITADO: subir os interpretadores "spawn" e importar
+    o compositor em cada um custava mais que compor as poucas páginas de
+    um ``paginas_compostas`` — e era a cada chamada, na thread da tela.
+    Teto diferente (config mudou) troca o pool; o de antes termina o que
+    já tem em voo."""
+    global _pool_vivo
+    with _pool_trava:
+        if _pool_vivo is not None and _pool_vivo[0] == n:
+            return _pool_vivo[1]
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(
+            max_workers=n, mp_context=multiprocessing.get_context("spawn"))
+        if _pool_vivo is not None:
+            _pool_vivo[1].shutdown(wait=False)
+        _pool_vivo = (n, pool)
+        return pool
+
+
+def _descartar_pool(pool) -> None:
+    """Pool quebrado sai de cena; o próximo export sobe outro."""
+    global _pool_vivo
+    with _pool_trava:
+        if _pool_vivo is not None and _pool_vivo[1] is pool:
+            _pool_vivo = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def encerrar_pool() -> None:
+    """Desliga o pool compartilhado (saída do programa; testes)."""
+    global _pool_vivo
+    with _pool_trava:
+        vivo, _pool_vivo = _pool_vivo, None
+    if vivo is not None:
+        vivo[1].shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(encerrar_pool)
+
+
+def compor_paginas(layout: LayoutDef, dados,
+                   fundo_path: str | Path | None = None,
+                   status_cb: Callable[[str], None] = _SEM_STATUS,
+                   processos: int | None = None,
+                   dpi: int | None = None) -> list[Image.Image]:
+    """Todas as páginas do layout compostas (lista na ordem)."""
+    return list(compor_em_ordem(tarefas_do_layout(layout, dados, fundo_path, dpi),
+                                status_cb, processos))
@@ -0,0 +1,174 @@
+"""
+Registro de fontes — uma FreeTypeFont por (arquivo, px, motor), por processo
+============================================================================
+O compositor, o ajuste de texto (``text_fit``) e os selos pediam a mesma fonte
+ao disco a cada medida: a busca binária do ``ajustar_texto`` abria o mesmo TTF
+uma dúzia de vezes por região, e a escada do nome (``nome_fit``) repetia tudo
+na mesma célula. Aqui a fonte é aberta UMA vez e reaproveitada (LRU limitado).
+
+* a chave é ``(caminho resolvido, px, motor de layout)``;
+* a cadeia de fallback (I2: pedida → ``Roboto-Regular.ttf`` ao lado → embutida
+  do Pillow) é resolvida UMA vez por caminho pedido. A resolução é revalidada
+  pelo mtime da PASTA — fonte importada depois (portabilidade, seletor) entra
+  sem reiniciar o app;
+* ``metricas(fonte)`` memoriza o ``getmetrics()`` (ascendente, descendente);
+* ``estatisticas()`` conta acertos/faltas — a prova de que o cache trabalha
+  numa página de 16 células ou num lote de 200 etiquetas.
+
+As fontes são SÓ LEITURA para quem as recebe (o Pillow não as muta ao medir
+ou desenhar); ninguém deve trocar atributos de uma fonte devolvida daqui.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import ImageFont
+
+MAX_FONTES = 512
+"""Fontes vivas no registro. Uma página do Jornal usa ~6 arquivos × os px
+que a busca binária visita (~10 por região); 512 cobre a página inteira e
+o lote de etiquetas sem reabrir nada."""
+
+_RESERVA = "Roboto-Regular.ttf"
+
+_trava = threading.RLock()
+_fontes: OrderedDict[tuple, ImageFont.FreeTypeFont] = OrderedDict()
+_resolucoes: dict[tuple[str, int], str | None] = {}
+_metricas: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_contadores = {"acertos": 0, "faltas": 0,
+               "metricas_acertos": 0, "metricas_faltas": 0}
+_geracao = 0
+
+
+def _motor(layout_engine) -> int:
+    """``None`` = o padrão do Pillow (Raqm quando instalado) — resolvido
+    aqui para que a chave não dependa de quem pediu."""
+    if layout_engine is not None:
+        return int(layout_engine)
+    return int(ImageFont.Layout.RAQM if ImageFont.core.HAVE_RAQM
+               else ImageFont.Layout.BASIC)
+
+
+def _mtime_pasta(pasta: Path) -> int:
+    try:
+        return pasta.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _do_registro(chave: tuple, fabricar):
+    """LRU: devolve a fonte de ``chave`` ou a fabrica (fora da trava — abrir
+    TTF é I/O) e guarda."""
+    with _trava:
+        fonte = _fontes.get(chave)
+        if fonte is not None:
+            _fontes.move_to_end(chave)
+            _contadores["acertos"] += 1
+            return fonte
+        _contadores["faltas"] += 1
+    fonte = fabricar()
+    with _trava:
+        _fontes[chave] = fonte
+        while len(_fontes) > MAX_FONTES:
+            _fontes.popitem(last=False)
+    return fonte
+
+
+def _abrir(caminho: str, px: int, motor: int):
+    """Devolve a fonte do registro (abre do disco só na falta)."""
+    return _do_registro(
+        (caminho, px, motor),
+        lambda: ImageFont.truetype(caminho, px, layout_engine=motor))
+
+
+def _resolver(pedido: Path, px: int, motor: int) -> str | None:
+    """O arquivo que de fato carrega para ``pedido`` (ou None = embutida).
+
+    Resolvido 1× por (caminho, mtime da pasta); um arquivo que existe mas
+    não abre (TTF corrompido) também cai na reserva — como sempre foi."""
+    chave = (str(pedido), _mtime_pasta(pedido.parent))
+    with _trava:
+        if chave in _resolucoes:
+            return _resolucoes[chave]
+    escolhido: str | None = None
+    for candidato in (pedido, pedido.parent / _RESERVA):
+        if not candidato.is_file():
+            continue
+        try:
+            _abrir(str(candidato), px, motor)
+        except OSError:
+            continue
+        escolhido = str(candidato)
+        break
+    with _trava:
+        _resolucoes[chave] = escolhido
+    return escolhido
+
+
+def carregar(caminho: str | Path, px: int, layout_engine=None):
+    """A fonte ``caminho`` em ``px`` pixels, com a cadeia de fallback I2
+    (pedida → Roboto ao lado → embutida do Pillow). Nunca levanta."""
+    px = max(1, int(px))
+    motor = _motor(layout_engine)
+    resolvido = _resolver(Path(caminho), px, motor)
+    if resolvido is not None:
+        try:
+            return _abrir(resolvido, px, motor)
+        except OSError:
+            esquecer()                  # o arquivo sumiu/estragou desde a resolução
+    return embutida(px)
+
+
+def identidade(caminho: str | Path) -> tuple[str | None, int]:
+    """O arquivo que ``carregar`` usaria para ``caminho`` (None = a
+    embutida) + a geração do registro — a chave de quem cacheia
+    resultados que DEPENDEM da fonte (o ajuste de texto)."""
+    return _resolver(Path(caminho), 12, _motor(None)), _geracao
+
+
+def embutida(px: int | None = None):
+    """A fonte embutida do Pillow (último degrau do I2), também cacheada."""
+    return _do_registro(
+        ("<embutida>", px, 0),
+        lambda: ImageFont.load_default(px) if px else ImageFont.load_default())
+
+
+def metricas(fonte) -> tuple[int, int]:
+    """``fonte.getmetrics()`` memorizado por objeto de fonte."""
+    with _trava:
+        m = _metricas.get(fonte)
+        if m is not None:
+            _contadores["metricas_acertos"] += 1
+            return m
+        _contadores["metricas_faltas"] += 1
+    m = tuple(fonte.getmetrics())
+    with _trava:
+        _metricas[fonte] = m
+    return m
+
+
+def estatisticas() -> dict[str, int]:
+    """Acertos/faltas do registro (e das métricas) e o total de fontes vivas."""
+    with _trava:
+        return {**_contadores, "fontes": len(_fontes)}
+
+
+def zerar_estatisticas() -> None:
+    with _trava:
+        for k in _contadores:
+            _contadores[k] = 0
+
+
+def esquecer() -> None:
+    """Esvazia o registro (fontes, resoluções e métricas). Para quem troca
+    um arquivo de fonte NO LUGAR (mesmo nome) — o mtime da pasta não muda."""
+    global _geracao
+    with _trava:
+        _geracao += 1
+        _fontes.clear()
+        _resolucoes.clear()
+        _metricas.clear()
@@ -21,7 +21,9 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+from app.rendering import registro_fontes
 
 
 class Canto(str, Enum):
@@ -39,10 +41,7 @@ class Selo:
 
 
 def _fonte(fonte_path, tam):
-    try:
-        return ImageFont.truetype(str(fonte_path), max(6, tam))
-    except Exception:
-        return ImageFont.load_default()
+    return registro_fontes.carregar(fonte_path, max(6, tam))
 
 
 def _badge_mais18(tam: int, fonte_path) -> Image.Image:
@@ -5,16 +5,28 @@ Regra da doc: o tamanho da fonte **só REDUZ, nunca aumenta** até o texto caber
 Quebra de linha automática, com hífen (pyphen, pt-BR), respeitando a largura.
 
 A busca é pelo MAIOR tamanho (<= teto) que cabe na caixa em largura e altura.
+Cada sonda da busca é decidida pelo modelo de avanços (``modelo_glifos``)
+quando ele tem certeza, e pelo FreeType quando não tem.
+
+Miniatura (``decisoes_no_dpi``): composta em poucos dpi, mas o corpo e as
+quebras de linha são os que o dpi REAL decidiria — no dpi pequeno o
+hinting arredonda outro tanto e a miniatura mentiria sobre a página.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 import pyphen
 from PIL import ImageFont
 
+from app.rendering import modelo_glifos, registro_fontes
 from app.rendering.units import pt_para_px
 
 _DIC = pyphen.Pyphen(lang="pt_BR")
@@ -174,6 +186,57 @@ def piso_do_celular(largura_pagina_mm: float) -> float:
     return max(6.0, piso)
 
 
+MAX_AJUSTES = 8192
+"""Vereditos guardados no cache do ajuste. Uma página do Jornal pede
+~40 regiões × os degraus da escada do nome (~10 medidas cada); 8192
+cobre o lote inteiro de etiquetas e várias páginas sem recalcular."""
+
+_trava_ajustes = threading.Lock()
+_ajustes: OrderedDict[tuple, TextoAjustado] = OrderedDict()
+_contadores_ajuste = {"acertos": 0, "faltas": 0,
+                      "sondas_modelo": 0, "sondas_glifo": 0,
+                      "sondas_freetype": 0}
+
+
+def _contar_sonda(tipo: str) -> None:
+    with _trava_ajustes:
+        _contadores_ajuste[tipo] += 1
+
+
+_dpi_das_decisoes: ContextVar[int | None] = ContextVar(
+    "dpi_das_decisoes", default=None)
+
+
+@contextmanager
+def decisoes_no_dpi(dpi: int):
+    """No bloco, todo ajuste pedido em OUTRO dpi (a miniatura) é decidido
+    no ``dpi`` real e só desenhado na escala pedida (``na_escala``)."""
+    ficha = _dpi_das_decisoes.set(int(dpi))
+    try:
+        yield
+    finally:
+        _dpi_das_decisoes.reset(ficha)
+
+
+def dpi_das_decisoes(dpi: int) -> int:
+    """O dpi em que o ajuste se decide: o real dentro de
+    ``decisoes_no_dpi``; fora dele, o próprio ``dpi``."""
+    return _dpi_das_decisoes.get() or int(dpi)
+
+
+def na_escala(aj: TextoAjustado, fonte_path: str | Path, dpi_aj: int,
+              dpi: int) -> TextoAjustado:
+    """O veredito ``aj`` (decidido em ``dpi_aj``) desenhado em ``dpi``:
+    o MESMO corpo e as MESMAS linhas. A entrelinha escala para baixo — o
+    bloco nunca fica mais alto que a caixa que o coube no dpi real."""
+    if int(dpi_aj) == int(dpi):
+        return aj
+    px = max(1, round(pt_para_px(aj.tamanho_pt, dpi)))
+    fonte = registro_fontes.carregar(str(fonte_path), px)
+    alt_linha = max(1, math.floor(aj.altura_linha_px * dpi / dpi_aj))
+    return TextoAjustado(fonte, list(aj.linhas), aj.tamanho_pt, alt_linha)
+
+
 def ajustar_texto(
     texto: str,
     fonte_path: str | Path,
@@ -190,34 +253,117 @@ def ajustar_texto(
 
     F13-BIS/T5: ``sem_hifen`` faz da hifenização coisa proibida — a
     palavra fica inteira e quem cede é o CORPO (busca binária); se nem
-    no mínimo couber, as reticências do R-045 seguram (nunca o hífen)."""
+    no mínimo couber, as reticências do R-045 seguram (nunca o hífen).
+
+    O veredito é MEMORIZADO pelo conteúdo (texto, arquivo de fonte que de
+    fato carrega, caixa, faixa de corpo, dpi, hífen, átomos): a escada do
+    nome (``nome_fit``), o desenho do compositor e o pré-voo da revisora
+    pedem a mesma medida várias vezes por célula — só a primeira mede.
+    Quem recebe ganha uma CÓPIA (``linhas`` próprias; pode cortar).
+
+    Dentro de ``decisoes_no_dpi`` (miniatura), a caixa é levada ao dpi
+    real, o ajuste se decide LÁ (e reaproveita o veredito do export) e
+    volta na escala pedida."""
+    real = _dpi_das_decisoes.get()
+    if real and real != int(dpi):
+        k = real / dpi
+        aj = ajustar_texto(texto, fonte_path, larg_px * k, alt_px * k,
+                           tamanho_max_pt, real, tamanho_min_pt, entrelinha,
+                           sem_hifen, atomos)
+        return na_escala(aj, fonte_path, real, dpi)
+    chave = (texto, registro_fontes.identidade(fonte_path), float(larg_px),
+             float(alt_px), float(tamanho_max_pt), int(dpi),
+             float(tamanho_min_pt), float(entrelinha), bool(sem_hifen),
+             frozenset(atomos))
+    with _trava_ajustes:
+        pronto = _ajustes.get(chave)
+        if pronto is not None:
+            _ajustes.move_to_end(chave)
+            _contadores_ajuste["acertos"] += 1
+            return replace(pronto, linhas=list(pronto.linhas))
+        _contadores_ajuste["faltas"] += 1
+    aj = _ajustar_texto_medindo(texto, fonte_path, larg_px, alt_px,
+                                tamanho_max_pt, dpi, tamanho_min_pt,
+                                entrelinha, sem_hifen, atomos)
+    with _trava_ajustes:
+        _ajustes[chave] = replace(aj, linhas=list(aj.linhas))
+        while len(_ajustes) > MAX_AJUSTES:
+            _ajustes.popitem(last=False)
+    return aj
+
+
+def estatisticas_ajuste() -> dict[str, int]:
+    """Acertos/faltas do cache do ajuste, o total de vereditos guardados e
+    quantas sondas da busca o modelo de avanços decidiu sem FreeType."""
+    with _trava_ajustes:
+        return {**_contadores_ajuste, "ajustes": len(_ajustes)}
+
+
+def esquecer_ajustes() -> None:
+    """Esvazia o cache do ajuste (os contadores seguem — são da sessão)."""
+    with _trava_ajustes:
+        _ajustes.clear()
+
+
+def _ajustar_texto_medindo(
+    texto: str,
+    fonte_path: str | Path,
+    larg_px: float,
+    alt_px: float,
+    tamanho_max_pt: float,
+    dpi: int,
+    tamanho_min_pt: float,
+    entrelinha: float,
+    sem_hifen: bool,
+    atomos: frozenset[str] | set[str],
+) -> TextoAjustado:
+    """A medida de verdade do ``ajustar_texto`` (sem cache)."""
     fonte_path = str(fonte_path)
     # F13-NONUS: piso acima do teto seria desenhar ACIMA do teto no
     # ramo do truncamento — o teto manda
     tamanho_min_pt = min(tamanho_min_pt, tamanho_max_pt)
 
     def _fonte(px: int):
-        """Fonte com fallback (I2): pedida → Roboto ao lado → embutida do Pillow."""
-        try:
-            return ImageFont.truetype(fonte_path, px)
-        except OSError:
-            from pathlib import Path
-            roboto = Path(fonte_path).parent / "Roboto-Regular.ttf"
-            if roboto.exists():
-                return ImageFont.truetype(str(roboto), px)
-            return ImageFont.load_default(px)
+        """Fonte com fallback (I2): pedida → Roboto ao lado → embutida do
+        Pillow — do registro do processo (a busca abria o TTF a cada passo)."""
+        return registro_fontes.carregar(fonte_path, px)
+
+    def _na_altura(fonte, linhas, pt) -> TextoAjustado | None:
+        asc, desc = registro_fontes.metricas(fonte)
+        alt_linha = round((asc + desc) * entrelinha)
+        if alt_linha * len(linhas) <= alt_px:
+            return TextoAjustado(fonte, linhas, pt, alt_linha)
+        return None
+
+    # o modelo de avanços (fontTools, 1× por arquivo) decide as sondas
+    # LONGE do limite sem tocar o FreeType; perto dele, mede de verdade
+    # (glifo a glifo, ou a linha inteira se a fonte tem kerning) — a
+    # resposta de cada sonda é a mesma, então a busca também é
+    modelo = modelo_glifos.modelo_para(fonte_path)
 
     def tentar(pt: float) -> TextoAjustado | None:
         px = max(1, round(pt_para_px(pt, dpi)))
+        if modelo is not None:
+            est = modelo.na_medida(px, (larg_px, larg_px + 0.5))
+            linhas = _quebrar_linhas(texto, est, larg_px, sem_hifen, atomos)
+            largo = any(est.getlength(ln) > larg_px + 0.5 for ln in linhas)
+            if est.decidido():
+                _contar_sonda("sondas_modelo")
+                return None if largo else _na_altura(_fonte(px), linhas, pt)
+            if modelo.aditivo:
+                _contar_sonda("sondas_glifo")
+                fonte = _fonte(px)
+                med = modelo.exata(fonte, px)
+                linhas = _quebrar_linhas(texto, med, larg_px, sem_hifen, atomos)
+                if any(med.getlength(ln) > larg_px + 0.5 for ln in linhas):
+                    return None
+                return _na_altura(fonte, linhas, pt)
+        _contar_sonda("sondas_freetype")
         fonte = _fonte(px)
         linhas = _quebrar_linhas(texto, fonte, larg_px, sem_hifen, atomos)
         if any(fonte.getlength(ln) > larg_px + 0.5 for ln in linhas):
             return None
-        asc, desc = fonte.getmetrics()
-        alt_linha = round((asc + desc) * entrelinha)
-        if alt_linha * len(linhas) <= alt_px:
-            return TextoAjustado(fonte, linhas, pt, alt_linha)
-        return None
+        return _na_altura(fonte, linhas, pt)
 
     # Se já cabe no teto, usa o teto (nunca aumenta além dele).
     no_teto = tentar(tamanho_max_pt)
@@ -252,7 +398,7 @@ def ajustar_texto(
     # legível: ou a caixa cresce, ou o dono aceita o corte) e o
     # arquiteto decide qual das duas leis cede.
     linhas = _quebrar_linhas(texto, fonte, larg_px, sem_hifen, atomos)
-    asc, desc = fonte.getmetrics()
+    asc, desc = registro_fontes.metricas(fonte)
     alt_linha = round((asc + desc) * entrelinha)
     linhas = _truncar_com_reticencias(linhas, fonte, larg_px, alt_linha, alt_px)
     return TextoAjustado(fonte, linhas, tamanho_min_pt, alt_linha)
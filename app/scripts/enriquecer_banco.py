@@ -16,14 +16,49 @@ Uso::
 
 from __future__ import annotations
 
+from contextlib import closing
+
 from app.ai.client import ClienteOpenAICompat
 from app.ai.enriquecimento import enriquecer
 from app.core.database import Database
 from app.core.repositories import ProdutoRepositorio
 
 
-def enriquecer_banco(motor=None, *, log=print) -> dict:
-    """Enriquece e persiste os nomes de todos os produtos. Devolve um resumo."""
+# a cada quantos produtos aplicados o lote grava (Ctrl+C perde no máximo isto)
+LOTE_GRAVACAO = 50
+
+
+def _enriquecer_conforme_termina(nomes: dict[int, str], motor, em_voo: int):
+    """Gera ``(id, ProdutoEnriquecido | exceção)`` na ordem em que os
+    pedidos TERMINAM, com ``em_voo`` juntos no motor. O banco fica fora das
+    threads: quem grava é o laço que consome."""
+    import queue
+    import threading
+
+    from app.ai.fila import FilaConcorrente
+    caixa: queue.Queue = queue.Queue()
+    fila = FilaConcorrente(
+        lambda nome: enriquecer(nome, motor), em_voo=em_voo,
+        ao_terminar=lambda chave, enr: caixa.put((int(chave), enr)),
+        ao_falhar=lambda chave, exc: caixa.put((int(chave), exc)))
+    fila.adicionar(((str(pid), nome) for pid, nome in nomes.items()),
+                   bloquear=False)
+    fila.fechar()
+    rodando = threading.Thread(target=fila.rodar, daemon=True)
+    rodando.start()
+    try:
+        for _ in range(len(nomes)):
+            yield caixa.get()
+    finally:
+        fila.cancelar()          # interrompido: os que esperam não saem
+        rodando.join()
+
+
+def enriquecer_banco(motor=None, *, log=print, em_voo: int | None = None) -> dict:
+    """Enriquece e persiste os nomes de todos os produtos. Devolve um resumo.
+
+    ``em_voo``: pedidos simultâneos ao motor (padrão: as conexões do pool,
+    ``ConfigIA.conexoes``)."""
     from app.core.modo import exigir_escrita
     exigir_escrita()                     # R-131: reescreve o acervo inteiro
     motor = motor or ClienteOpenAICompat()
@@ -37,37 +72,47 @@ def enriquecer_banco(motor=None, *, log=print) -> dict:
         with db.Session() as session:
             repo = ProdutoRepositorio(session)
             produtos = repo.listar(limit=10_000)
-            for i, p in enumerate(produtos, 1):
-                try:
-                    enr = enriquecer(p.nome_bruto, motor)
-                except Exception as exc:
-                    erros += 1
-                    log(f"[{i:>3}/{len(produtos)}] ERRO {type(exc).__name__}: {p.nome_bruto[:40]}")
-                    continue
-                # RG-20 (regra dura): a IA descartou palavra do bruto — o
-                # lote NÃO aplica o nome novo (o humano revisa; contado)
-                if enr.tokens_perdidos:
-                    revisar += 1
-                    log(f"[{i:>3}/{len(produtos)}] REVISAR (perdeu "
-                        f"{', '.join(enr.tokens_perdidos)}): {p.nome_bruto[:40]}")
-                    continue
-                antes = p.nome_sanitizado   # antes do editar (que muta o ORM)
-                # F13/E5 (CC-01): a categoria calculada era JOGADA FORA
-                # quando o nome já estava certo — o `if` do nome governava
-                # o dict inteiro. Agora a categoria aplica SEMPRE que há
-                # palpite e o humano não mandou (independente do nome).
-                if (p.categoria_origem != "humano" and enr.categoria
-                        and (p.categoria is None
-                             or p.categoria_origem != "humano")):
-                    repo.editar(p.id, categoria=enr.categoria,
-                                categoria_origem="ia")
-                if enr.nome_sanitizado != antes or enr.mais18 != bool(p.selo_mais18):
-                    repo.editar(p.id, nome_sanitizado=enr.nome_sanitizado,
-                                selo_mais18=enr.mais18)
-                    atualizados += 1
-                    log(f"[{i:>3}/{len(produtos)}] {antes[:34]:<34} → {enr.nome_sanitizado[:40]}")
-                else:
-                    iguais += 1
+            vagas = em_voo or getattr(getattr(motor, "config", None),
+                                      "conexoes", 1)
+            por_id = {p.id: p for p in produtos}
+            # o resultado é aplicado (e logado) assim que chega — e gravado a
+            # cada ``LOTE_GRAVACAO``: acervo grande não fica mudo, e uma
+            # interrupção não perde o que já foi feito
+            with closing(_enriquecer_conforme_termina(
+                    {p.id: p.nome_bruto for p in produtos}, motor,
+                    vagas)) as prontos:
+                for i, (pid, enr) in enumerate(prontos, 1):
+                    p = por_id[pid]
+                    if i % LOTE_GRAVACAO == 0:
+                        session.commit()
+                    if isinstance(enr, Exception):
+                        erros += 1
+                        log(f"[{i:>3}/{len(produtos)}] ERRO {type(enr).__name__}: {p.nome_bruto[:40]}")
+                        continue
+                    # RG-20 (regra dura): a IA descartou palavra do bruto — o
+                    # lote NÃO aplica o nome novo (o humano revisa; contado)
+                    if enr.tokens_perdidos:
+                        revisar += 1
+                        log(f"[{i:>3}/{len(produtos)}] REVISAR (perdeu "
+                            f"{', '.join(enr.tokens_perdidos)}): {p.nome_bruto[:40]}")
+                        continue
+                    antes = p.nome_sanitizado   # antes do editar (que muta o ORM)
+                    # F13/E5 (CC-01): a categoria calculada era JOGADA FORA
+                    # quando o nome já estava certo — o `if` do nome governava
+                    # o dict inteiro. Agora a categoria aplica SEMPRE que há
+                    # palpite e o humano não mandou (independente do nome).
+                    if (p.categoria_origem != "humano" and enr.categoria
+                            and (p.categoria is None
+                                 or p.categoria_origem != "humano")):
+                        repo.editar(p.id, categoria=enr.categoria,
+                                    categoria_origem="ia")
+                    if enr.nome_sanitizado != antes or enr.mais18 != bool(p.selo_mais18):
+                        repo.editar(p.id, nome_sanitizado=enr.nome_sanitizado,
+                                    selo_mais18=enr.mais18)
+                        atualizados += 1
+                        log(f"[{i:>3}/{len(produtos)}] {antes[:34]:<34} → {enr.nome_sanitizado[:40]}")
+                    else:
+                        iguais += 1
             session.commit()
     finally:
         db.engine.dispose()
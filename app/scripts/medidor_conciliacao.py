@@ -0,0 +1,134 @@
+"""Medidor do FUZZY da conciliação — laço puro × matriz × blocos.
+
+Monta um acervo sintético (tipos × marcas × pesos, com irmãos de chave)
+de 5.000 e de 50.000 produtos num banco temporário, concilia a MESMA
+tabela de fornecedor (300 linhas) pelos três caminhos do ``Conciliador``
+e reporta o tempo de cada um e se os semáforos batem linha a linha com o
+laço (a régua: TÊM de bater — a matriz é só outro jeito de fazer a mesma
+conta; o bloco por token só deixa de pontuar quem não tinha chance).
+
+Uso:
+    python -m app.scripts.medidor_conciliacao            # 5k e 50k
+    python -m app.scripts.medidor_conciliacao 20000      # tamanhos à escolha
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+LINHAS_TABELA = 300
+
+_TIPOS = ["Arroz Branco", "Arroz Parboilizado", "Feijao Carioca",
+          "Feijao Preto", "Oleo de Soja", "Cafe Torrado e Moido", "Acucar Cristal",
+          "Sabao em Po", "Detergente Liquido", "Amaciante", "Margarina",
+          "Leite Condensado", "Creme de Leite", "Biscoito Recheado",
+          "Macarrao Espaguete", "Molho de Tomate", "Achocolatado em Po",
+          "Refrigerante", "Agua Sanitaria", "Papel Higienico"]
+_SABORES = ["", "Chocolate", "Morango", "Tradicional", "Limao", "Lavanda",
+            "Integral", "Light", "Zero", "Coco"]
+_PESOS = ["200 g", "400 g", "500 g", "1 kg", "2 kg", "5 kg", "350 ml",
+          "900 ml", "1 L", "2 L"]
+
+
+def _nomes(n: int, rnd: random.Random) -> list[str]:
+    marcas = [f"Marca{chr(65 + i % 26)}{i // 26}" for i in range(max(8, n // 60))]
+    vistos: set[str] = set()
+    nomes: list[str] = []
+    while len(nomes) < n:
+        nome = " ".join(p for p in (rnd.choice(_TIPOS), rnd.choice(marcas),
+                                    rnd.choice(_SABORES), rnd.choice(_PESOS)) if p)
+        if nome not in vistos:
+            vistos.add(nome)
+            nomes.append(nome)
+    return nomes
+
+
+def _tabela(nomes: list[str], rnd: random.Random) -> list[str]:
+    """A tabela do fornecedor: linhas do acervo ESCRITAS do jeito da loja
+    (caixa alta, abreviação, peso colado) + produtos que não existem."""
+    linhas = []
+    for _ in range(LINHAS_TABELA):
+        if rnd.random() < 0.15:
+            linhas.append(f"PRODUTO NOVO {rnd.randint(1, 999)} UN")
+            continue
+        nome = rnd.choice(nomes).upper().replace(" G", "G").replace(" KG", "KG")
+        if rnd.random() < 0.5:
+            nome = nome.replace("DETERGENTE", "DETERG").replace(
+                "REFRIGERANTE", "REFRI").replace("BISCOITO", "BISC")
+        linhas.append(nome)
+    return linhas
+
+
+def _semear(session, nomes: list[str]) -> None:
+    from app.core.models import Produto
+    from app.core.sanitize import sanitizar
+    session.add_all(Produto(nome_bruto=n, nome_sanitizado=sanitizar(n).nome_sanitizado)
+                    for n in nomes)
+    session.commit()
+
+
+def medir(n: int) -> dict:
+    from app.ai.conciliacao import Conciliador
+    from app.core.database import Database
+    from app.core.paths import SystemRoot
+
+    rnd = random.Random(n)
+    nomes = _nomes(n, rnd)
+    tabela = _tabela(nomes, rnd)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(SystemRoot(Path(tmp) / "raiz")).init()
+        try:
+            with db.Session() as s:
+                _semear(s, nomes)
+                conc = Conciliador(s)
+                conc.BLOCO_MINIMO_CORPUS = n + 1    # a matriz sem blocos
+                conc._corpus()                      # o corpus não entra na conta
+                t0 = time.perf_counter()
+                matriz = conc.conciliar_lote(tabela)
+                t_matriz = time.perf_counter() - t0
+
+                conc = Conciliador(s)
+                conc.BLOCO_MINIMO_CORPUS = 0
+                conc._indice_blocos(conc._matriz_fuzzy())   # idem, o índice
+                t0 = time.perf_counter()
+                blocos = conc.conciliar_lote(tabela)
+                t_blocos = time.perf_counter() - t0
+
+                laco = Conciliador(s)
+                laco._matriz_fuzzy = lambda: None   # o caminho puro de antes
+                laco._corpus()
+                t0 = time.perf_counter()
+                puro = [laco.conciliar(linha) for linha in tabela]
+                t_laco = time.perf_counter() - t0
+        finally:
+            db.engine.dispose()
+    def _iguais(vs):
+        return sum(a.semaforo == b.semaforo and a.produto == b.produto
+                   for a, b in zip(vs, puro))
+    return {"produtos": n, "laco_s": t_laco, "matriz_s": t_matriz,
+            "blocos_s": t_blocos, "iguais": _iguais(matriz),
+            "iguais_blocos": _iguais(blocos), "linhas": len(tabela)}
+
+
+def main() -> int:
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    tamanhos = [int(a) for a in sys.argv[1:]] or [5_000, 50_000]
+    print(f"{'produtos':>9} {'laço (s)':>9} {'matriz (s)':>10} "
+          f"{'blocos (s)':>10}  semáforos iguais (matriz | blocos)")
+    ok = True
+    for n in tamanhos:
+        r = medir(n)
+        ok &= r["iguais"] == r["linhas"]
+        print(f"{r['produtos']:>9} {r['laco_s']:>9.2f} {r['matriz_s']:>10.2f} "
+              f"{r['blocos_s']:>10.2f}  {r['iguais']}/{r['linhas']} | "
+              f"{r['iguais_blocos']}/{r['linhas']}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
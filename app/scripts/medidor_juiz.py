@@ -0,0 +1,120 @@
+"""Medidor do JUIZ da conciliação — um pedido por linha × em lote.
+
+Monta um acervo sintético onde TODAS as linhas da tabela caem no amarelo
+(o juiz é chamado para cada uma), concilia a MESMA tabela com
+``lote_juiz = 1`` (o caminho de antes) e com o lote, e reporta o tempo de
+parede do juiz e se os semáforos batem linha a linha.
+
+O motor é um fake com custo de servidor de verdade: cada pedido paga o
+PREFIXO (processar instrução + formato) e cada pergunta o seu trecho; uma
+fração das respostas do lote vem torta, para o refazer avulso entrar na
+conta.
+
+Uso:
+    python -m app.scripts.medidor_juiz               # 50 linhas, lote 10
+    python -m app.scripts.medidor_juiz 50 5 10 25    # linhas, lotes à escolha
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PREFIXO_S = 0.08          # por pedido: o prompt fixo
+POR_PERGUNTA_S = 0.01     # por pergunta dentro do pedido
+TORTA_A_CADA = 7          # no lote, 1 resposta em N volta com índice inválido
+
+
+class _JuizComLatencia:
+    """Fake do motor só para o juiz: responde "é o candidato 0" com a
+    latência do modelo de custo acima (avulso e em lote)."""
+
+    def __init__(self):
+        self.pedidos = 0
+        self._trava = threading.Lock()
+
+    def disponivel(self) -> bool:
+        return True
+
+    def chat(self, mensagens, **_kw) -> str:
+        with self._trava:
+            self.pedidos += 1
+        pergunta = json.loads(mensagens[-1]["content"])
+        if isinstance(pergunta, dict):                       # avulso
+            time.sleep(PREFIXO_S + POR_PERGUNTA_S)
+            return json.dumps({"indice": 0, "confianca": 0.9})
+        time.sleep(PREFIXO_S + POR_PERGUNTA_S * len(pergunta))
+        return json.dumps([
+            {"item": p["item"], "confianca": 0.9,
+             "indice": 99 if (p["item"] + 1) % TORTA_A_CADA == 0 else 0}
+            for p in pergunta])
+
+
+def medir(linhas: int = 50, lote: int = 10) -> dict:
+    from app.ai.conciliacao import Conciliador
+    from app.core.database import Database
+    from app.core.paths import SystemRoot
+    from app.core.repositories import ProdutoRepositorio
+
+    marcas = [f"MARCA{chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{i // 676 or ''}"
+              for i in range(linhas)]
+    tabela = [f"REFRI {m} 1,5 L" for m in marcas]
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(SystemRoot(Path(tmp) / "raiz")).init()
+        try:
+            with db.Session() as s:
+                repo = ProdutoRepositorio(s)
+                for m in marcas:
+                    repo.importar(f"REFRIGERANTE {m} 1,5 LT")
+                s.commit()
+                medidas = {}
+                for tam in (1, lote):
+                    motor = _JuizComLatencia()
+                    conc = Conciliador(s, motor=motor)
+                    conc.lote_juiz = tam
+                    pre = conc.pre_vereditos_lote(tabela)  # o fuzzy fora da conta
+                    perguntas = [(n, [c.produto.nome_sanitizado
+                                      for c in v.candidatos])
+                                 for n, (v, pede) in zip(tabela, pre) if pede]
+                    t0 = time.perf_counter()
+                    respostas = conc.perguntar_ao_juiz_em_lote(perguntas)
+                    t = time.perf_counter() - t0
+                    vereditos = [conc.julgar(v, r) for (v, _p), r
+                                 in zip(pre, respostas)]
+                    medidas[tam] = (t, motor.pedidos, vereditos, len(perguntas))
+        finally:
+            db.engine.dispose()
+    t_um, ped_um, avulsos, ambiguos = medidas[1]
+    t_lote, ped_lote, em_lote, _ = medidas[lote]
+    iguais = sum(a.semaforo == b.semaforo and a.produto == b.produto
+                 for a, b in zip(avulsos, em_lote))
+    return {"linhas": linhas, "ambiguos": ambiguos, "lote": lote,
+            "avulso_s": t_um, "lote_s": t_lote, "pedidos_avulso": ped_um,
+            "pedidos_lote": ped_lote, "iguais": iguais}
+
+
+def main() -> int:
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = [int(a) for a in sys.argv[1:]]
+    linhas = args[0] if args else 50
+    lotes = args[1:] or [10]
+    print(f"{'linhas':>6} {'lote':>5} {'avulso (s)':>10} {'lote (s)':>9} "
+          f"{'ganho':>6} {'pedidos':>9}  semáforos iguais")
+    ok = True
+    for lote in lotes:
+        r = medir(linhas, lote)
+        ok &= r["iguais"] == r["linhas"]
+        print(f"{r['linhas']:>6} {r['lote']:>5} {r['avulso_s']:>10.2f} "
+              f"{r['lote_s']:>9.2f} {r['avulso_s'] / r['lote_s']:>5.1f}x "
+              f"{r['pedidos_avulso']:>4}→{r['pedidos_lote']:<4}  "
+              f"{r['iguais']}/{r['linhas']}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""Medidor do CUSTO FIXO por chamada ao motor de IA — pool × cliente novo.
+
+Sobe um servidor de mentira compatível-OpenAI (``/models`` e
+``/chat/completions``, resposta instantânea) em 127.0.0.1 e enriquece o MESMO
+lote de 200 nomes duas vezes com o ``enriquecer`` de verdade:
+
+* **sem pool**: o jeito de antes — um ``httpx.Client`` novo (conexão TCP nova)
+  por POST e a sonda ``GET /models`` antes de cada item;
+* **com pool**: o ``ClienteOpenAICompat`` de hoje — um cliente keep-alive por
+  motor e a sonda de vida valendo por ``VIDA_TTL_S``.
+
+Como o servidor responde na hora, o tempo medido É o custo fixo da conversa
+HTTP (o que sobra para a inferência de verdade no LM Studio). Reporta o tempo
+por item, os pedidos que chegaram ao servidor e as conexões que ele aceitou.
+
+Uso:
+    python -m app.scripts.medidor_motor_ia            # 200 itens
+    python -m app.scripts.medidor_motor_ia 1000       # tamanho à escolha
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ITENS = 200
+
+_RESPOSTA = json.dumps({"nome_sanitizado": "Arroz Branco Camil 5kg",
+                        "tipo": "Arroz", "marca": "Camil",
+                        "categoria": "Mercearia", "confianca": 0.9})
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"             # keep-alive de verdade
+    contagem = {"pedidos": 0, "sondas": 0, "conexoes": 0}
+
+    def setup(self):
+        super().setup()
+        # cabeçalho e corpo saem em dois writes: sem NODELAY, o Nagle +
+        # ACK atrasado somariam ~40 ms de mentira a cada resposta
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.contagem["conexoes"] += 1
+
+    def log_message(self, *_a):               # silêncio no terminal
+        pass
+
+    def _json(self, corpo: dict) -> None:
+        dados = json.dumps(corpo).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        self.contagem["sondas"] += 1
+        self._json({"data": [{"id": "stub"}]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.contagem["pedidos"] += 1
+        self._json({"choices": [{"message": {"content": _RESPOSTA}}]})
+
+
+def _motor_de_antes(config):
+    """O cliente de antes do pool: conexão nova por POST e sonda por item."""
+    from app.ai.client import ClienteOpenAICompat
+
+    class _SemPool(ClienteOpenAICompat):
+        VIDA_TTL_S = MORTE_TTL_S = 0.0
+
+        def _post(self, rota, payload):
+            try:
+                return super()._post(rota, payload)
+            finally:
+                self.fechar()
+
+        def disponivel(self):
+            try:
+                return super().disponivel()
+            finally:
+                self.fechar()
+
+    return _SemPool(config)
+
+
+def medir(n: int) -> dict:
+    from app.ai.client import ClienteOpenAICompat, ConfigIA
+    from app.ai.enriquecimento import enriquecer
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    config = ConfigIA(base_url=f"http://127.0.0.1:{servidor.server_port}/v1")
+    nomes = [f"ARROZ BRANCO CAMIL {i} 5KG" for i in range(n)]
+    saida = {"itens": n}
+    try:
+        for rotulo, motor in (("sem_pool", _motor_de_antes(config)),
+                              ("com_pool", ClienteOpenAICompat(config))):
+            _Stub.contagem.update(pedidos=0, sondas=0, conexoes=0)
+            t0 = time.perf_counter()
+            for nome in nomes:
+                enriquecer(nome, motor)
+            saida[rotulo] = dict(_Stub.contagem,
+                                 s=time.perf_counter() - t0)
+            motor.fechar()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    return saida
+
+
+def main() -> int:
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else ITENS
+    r = medir(n)
+    print(f"{n} itens enriquecidos contra o servidor de mentira")
+    print(f"{'':>9} {'total (s)':>9} {'ms/item':>8} {'POSTs':>6} "
+          f"{'sondas':>6} {'conexões':>8}")
+    for rotulo in ("sem_pool", "com_pool"):
+        m = r[rotulo]
+        print(f"{rotulo:>9} {m['s']:>9.2f} {1000 * m['s'] / n:>8.2f} "
+              f"{m['pedidos']:>6} {m['sondas']:>6} {m['conexoes']:>8}")
+    return 0 if r["com_pool"]["pedidos"] == n else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,8 +5,11 @@ Tudo roda com o MotorIAFake — valida o ENCANAMENTO (entra texto -> sai estrutu
 não a qualidade da IA.
 """
 
+import json
 from decimal import Decimal
 
+import pytest
+
 from app.ai.client import ClienteOpenAICompat, ConfigIA
 from app.ai.enriquecimento import _extrair_json, enriquecer
 from app.ai.fake import MotorIAFake
@@ -71,3 +74,283 @@ def test_extrair_json_lida_com_cercas():
 def test_cliente_sem_servidor_fica_indisponivel():
     cli = ClienteOpenAICompat(ConfigIA(base_url="http://127.0.0.1:59999/v1"))
     assert cli.disponivel() is False
+
+
+def _cliente_com_servidor(monkeypatch, responder, lote=3):
+    """Cliente real falando com um servidor de mentira (MockTransport)."""
+    import httpx
+    pedidos = []
+
+    def _handler(req):
+        pedidos.append(json.loads(req.content)["input"])
+        return responder(pedidos[-1])
+
+    cli = ClienteOpenAICompat(ConfigIA(lote_embeddings=lote))
+    monkeypatch.setattr(cli, "_client", lambda: httpx.Client(
+        base_url=cli.config.base_url, transport=httpx.MockTransport(_handler)))
+    return cli, pedidos
+
+
+def test_embeddings_em_lotes_na_ordem_do_index(monkeypatch):
+    import httpx
+
+    def _servidor(entrada):
+        itens = [{"index": i, "embedding": [float(len(t))]}
+                 for i, t in enumerate(entrada)]
+        return httpx.Response(200, json={"data": itens[::-1]})   # fora de ordem
+    cli, pedidos = _cliente_com_servidor(monkeypatch, _servidor)
+    textos = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff", "g"]
+    assert cli.embeddings(textos) == [[1.0], [2.0], [3.0], [4.0], [5.0],
+                                      [6.0], [1.0]]
+    assert pedidos == [["a", "bb", "ccc"], ["dddd", "eeeee", "ffffff"], "g"]
+
+
+def test_embeddings_servidor_sem_lista_cai_para_um_por_vez(monkeypatch):
+    import httpx
+
+    def _servidor(entrada):
+        if isinstance(entrada, list):
+            return httpx.Response(400, json={"error": "input must be a string"})
+        return httpx.Response(200, json={"data": [
+            {"index": 0, "embedding": [float(len(entrada))]}]})
+    cli, pedidos = _cliente_com_servidor(monkeypatch, _servidor)
+    assert cli.embeddings(["a", "bb", "ccc", "dddd"]) == \
+        [[1.0], [2.0], [3.0], [4.0]]
+    # a recusa custa um pedido só: o cliente lembra
+    assert pedidos == [["a", "bb", "ccc"], "a", "bb", "ccc", "dddd"]
+
+
+def test_embeddings_servidor_fora_do_ar_e_indisponivel(monkeypatch):
+    import httpx
+
+    from app.ai.client import IAIndisponivel, IARecusou
+    cli, _ = _cliente_com_servidor(
+        monkeypatch, lambda entrada: httpx.Response(503))
+    with pytest.raises(IAIndisponivel) as exc:
+        cli.embeddings(["a", "b"])
+    assert not isinstance(exc.value, IARecusou)
+
+
+@pytest.mark.parametrize("status", [401, 404])
+def test_embeddings_erro_de_configuracao_nao_vira_um_por_vez(monkeypatch, status):
+    import httpx
+
+    from app.ai.client import IAIndisponivel, IARecusou
+    cli, pedidos = _cliente_com_servidor(monkeypatch, lambda entrada: (
+        httpx.Response(status, json={"error": "model 'x' not found"})))
+    with pytest.raises(IAIndisponivel) as exc:
+        cli.embeddings(["a", "b"])
+    assert not isinstance(exc.value, IARecusou)
+    assert "model 'x' not found" in str(exc.value)    # o que o servidor disse
+    assert pedidos == [["a", "b"]]
+    assert not cli._embeddings_um_a_um                 # a lista segue valendo
+
+
+# --- pool keep-alive e sonda de vida com TTL ---------------------------------
+
+@pytest.mark.lm_real
+def test_sonda_de_vida_em_cache_cai_no_erro_de_conexao():
+    import httpx
+
+    from app.ai.client import IAIndisponivel
+    cli = ClienteOpenAICompat(ConfigIA())
+    assert cli._client() is cli._client()          # UM cliente por motor
+    cli.fechar()
+    sondas, fora = [], []
+
+    def _handler(req):
+        if req.method == "GET":
+            sondas.append(req.url.path)
+            return httpx.Response(200, json={"data": []})
+        if fora:
+            raise httpx.ConnectError("recusada", request=req)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "{}"}}]})
+    cli._http = httpx.Client(base_url=cli.config.base_url,
+                             transport=httpx.MockTransport(_handler))
+    assert cli.disponivel() and cli.disponivel() and cli.disponivel()
+    assert len(sondas) == 1                        # era um GET por chamada
+    fora.append(True)
+    with pytest.raises(IAIndisponivel):
+        cli.chat([{"role": "user", "content": "oi"}])
+    assert cli.disponivel() and len(sondas) == 2   # o erro derrubou o cache
+    fora.clear()
+    cli._vida = None
+    assert cli.chat([{"role": "user", "content": "oi"}]) == "{}"
+    assert cli.disponivel() and len(sondas) == 2   # resposta é prova de vida
+    cli.fechar()
+    assert cli._http is None
+
+
+def test_motor_compartilhado_por_config():
+    from app.ai.client import motor_compartilhado
+    a = motor_compartilhado(ConfigIA(base_url="http://127.0.0.1:1/v1"))
+    assert motor_compartilhado(ConfigIA(base_url="http://127.0.0.1:1/v1")) is a
+    assert motor_compartilhado(ConfigIA(base_url="http://127.0.0.1:2/v1")) is not a
+
+
+# --- cache das respostas: o mesmo pedido não volta ao modelo -----------------
+
+def _cliente_com_cache(tmp_path, **kw):
+    import httpx
+
+    from app.ai.cache_respostas import CacheRespostas
+    posts = []
+
+    def _handler(req):
+        corpo = json.loads(req.content)
+        posts.append(corpo)
+        return httpx.Response(200, json={"choices": [{"message": {
+            "content": f"resposta {len(posts)}"}}]})
+    cache = CacheRespostas(tmp_path / "respostas_ia.db", **kw)
+    cli = ClienteOpenAICompat(ConfigIA(), cache=cache)
+    cli._http = httpx.Client(base_url=cli.config.base_url,
+                             transport=httpx.MockTransport(_handler))
+    return cli, posts
+
+
+def test_cache_de_respostas_por_conteudo_e_por_ponto(tmp_path):
+    from app.ai.cache_respostas import (CacheRespostas, estatisticas,
+                                        ponto_de_chamada, zerar_estatisticas)
+    zerar_estatisticas()
+    cli, posts = _cliente_com_cache(tmp_path)
+    msgs = [{"role": "user", "content": "FEIJAO REI 1KG"}]
+    with ponto_de_chamada("juiz"):
+        assert cli.chat(msgs) == "resposta 1"
+        assert cli.chat(msgs) == "resposta 1"             # não foi ao modelo
+        assert cli.chat(msgs, temperatura=0.7) == "resposta 2"
+    assert len(posts) == 2
+    # a imagem entra na chave pelos BYTES, não pelo nome do arquivo
+    foto = tmp_path / "pagina.png"
+    foto.write_bytes(b"\x89PNG um")
+    with ponto_de_chamada("revisora"):
+        assert cli.visao(foto, "leia") == "resposta 3"
+        assert cli.visao(foto, "leia") == "resposta 3"
+        foto.write_bytes(b"\x89PNG outro")
+        assert cli.visao(foto, "leia") == "resposta 4"
+    # fora do cache: sempre ao modelo — e o rótulo de dentro não religa
+    with ponto_de_chamada("dica", cache=False), ponto_de_chamada("dica"):
+        assert cli.chat(msgs) == "resposta 5"
+    est = estatisticas()
+    assert (est["juiz"]["acertos"], est["juiz"]["faltas"]) == (1, 2)
+    assert est["revisora"]["taxa"] == pytest.approx(1 / 3)
+    assert est["dica"]["fora"] == 1 and est["dica"]["acertos"] == 0
+    # reabrir o app: o arquivo responde
+    cli.cache.fechar()
+    cli.cache = CacheRespostas(tmp_path / "respostas_ia.db")
+    assert cli.chat(msgs) == "resposta 1" and len(posts) == 5
+
+
+def test_cache_de_respostas_respeita_teto_e_validade(tmp_path):
+    cli, posts = _cliente_com_cache(tmp_path, max_bytes=25)
+    um = [{"role": "user", "content": "um"}]
+    dois = [{"role": "user", "content": "dois"}]
+    cli.chat(um)
+    cli.chat(dois)                   # 2 × 10 bytes: cabem os dois
+    cli.chat(um)                     # o "um" é o usado mais recente
+    cli.chat([{"role": "user", "content": "tres"}])   # despeja o "dois"
+    cli.chat(um)
+    cli.chat(dois)
+    assert [p["messages"][0]["content"] for p in posts] == \
+        ["um", "dois", "tres", "dois"]
+    velho, posts = _cliente_com_cache(tmp_path / "v", validade_s=0.0)
+    velho.chat(um)
+    velho.chat(um)                   # vencida: pergunta de novo
+    assert len(posts) == 2
+
+
+def _servidor_de_slots(slots: int, espera_s: float):
+    """Stub compatível-OpenAI com ``slots`` paralelos: cada POST leva
+    ``espera_s``; conta o pico de pedidos ao mesmo tempo."""
+    import threading
+    import time
+
+    import httpx
+
+    from app.ai.client import ClienteOpenAICompat, ConfigIA
+    vagas = threading.Semaphore(slots)
+    trava = threading.Lock()
+    placar = {"agora": 0, "pico": 0}
+
+    def _handler(req):
+        with vagas:
+            with trava:
+                placar["agora"] += 1
+                placar["pico"] = max(placar["pico"], placar["agora"])
+            time.sleep(espera_s)
+            with trava:
+                placar["agora"] -= 1
+        return httpx.Response(200, json={"choices": [{"message": {
+            "content": json.dumps({"nome_sanitizado": "Arroz Camil 5kg",
+                                   "categoria": "Mercearia"})}}]})
+    cli = ClienteOpenAICompat(ConfigIA())
+    cli._http = httpx.Client(base_url=cli.config.base_url,
+                             transport=httpx.MockTransport(_handler))
+    cli.disponivel = lambda: True
+    return cli, placar
+
+
+def test_fila_concorrente_escala_com_os_slots_do_motor():
+    import time
+
+    from app.ai.fila import FilaConcorrente
+    nomes = [f"ARROZ CAMIL {i} 5KG" for i in range(16)]
+    tempos = {}
+    for em_voo in (1, 4):
+        cli, placar = _servidor_de_slots(4, 0.1)
+        fila = FilaConcorrente(lambda n: enriquecer(n, cli), em_voo=em_voo)
+        t0 = time.perf_counter()
+        saida = fila.mapear(nomes)
+        tempos[em_voo] = time.perf_counter() - t0
+        assert placar["pico"] == em_voo
+        assert all(e.nome_sanitizado == "Arroz Camil 5kg" for e in saida)
+    assert tempos[4] < tempos[1] / 2          # 4 slots: ~4× a vazão
+
+
+def test_fila_concorrente_ordem_por_item_superacao_e_contrapressao():
+    import threading
+
+    from app.ai.fila import FilaConcorrente
+    eventos: list[tuple[str, str, object]] = []
+    trava = threading.Lock()
+    solta = threading.Event()
+
+    def _fn(valor):
+        if valor == "a-velho":
+            solta.wait(5)
+        return valor.upper()
+
+    def _anota(tipo):
+        def _f(chave, *resto):
+            with trava:
+                eventos.append((tipo, chave, resto[0] if resto else None))
+        return _f
+    fila = FilaConcorrente(_fn, em_voo=2, teto_pendentes=2,
+                           ao_comecar=_anota("comecou"),
+                           ao_terminar=_anota("pronto"))
+    fila.adicionar([("a", "a-velho")])
+    rodando = threading.Thread(target=fila.rodar)
+    rodando.start()
+    while "a" not in fila.em_curso():
+        threading.Event().wait(0.005)
+    fila.adicionar([("a", "a-novo")])          # supera o 'a' em voo
+    fila.adicionar([("b", "b"), ("c", "c")])
+    solta.set()
+    fila.fechar()
+    rodando.join(5)
+    prontos = {c: r for t, c, r in eventos if t == "pronto"}
+    assert prontos == {"a": "A-NOVO", "b": "B", "c": "C"}   # o velho sumiu
+    for chave in "bc":                  # começou → pronto, nessa ordem
+        tipos = [t for t, c, _r in eventos if c == chave]
+        assert tipos == ["comecou", "pronto"]
+    # contrapressão: com a fila cheia, quem submete espera um slot pegar
+    cheia = FilaConcorrente(str.upper, teto_pendentes=1)
+    submete = threading.Thread(
+        target=cheia.adicionar, args=([("x", "x"), ("y", "y")],))
+    submete.start()
+    submete.join(0.2)
+    assert submete.is_alive() and cheia.pendentes() == ["x"]
+    cheia.fechar()
+    cheia.rodar()
+    submete.join(5)
+    assert not submete.is_alive()
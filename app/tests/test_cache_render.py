@@ -0,0 +1,430 @@
+"""Caches da composição — fonte, ajuste de texto, fotos e arte de fundo.
+
+Cada cache é provado por dois lados: TRABALHA (os contadores sobem e o
+disco/FreeType não é reaberto) e NÃO MENTE (mudou a entrada, o resultado
+muda; o desenho sai idêntico ao de sem cache).
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from PIL import ImageFont
+
+from app.rendering import registro_fontes
+from app.rendering.compositor import fonte_segura
+from app.rendering.text_fit import ajustar_texto
+
+# as fontes da SEMENTE (viajam no git) — o teste mede FreeType de verdade,
+# nunca a embutida do Pillow
+FONTES = Path(__file__).resolve().parents[1] / "assets" / "semente" / "fontes"
+ROBOTO = FONTES / "Roboto-Regular.ttf"
+
+# com libraqm o Pillow mede pelo shaping (kerning, ligaduras): o modelo de
+# avanços se desliga (``modelo_glifos.modelo_para`` → None)
+SEM_MODELO_COM_RAQM = pytest.mark.skipif(
+    ImageFont.core.HAVE_RAQM, reason="libraqm presente: o modelo de glifos fica desligado")
+
+
+# --- registro de fontes (uma FreeTypeFont por arquivo × px) --------------------------
+
+
+def test_registro_reaproveita_a_mesma_fonte():
+    registro_fontes.esquecer()
+    registro_fontes.zerar_estatisticas()
+    a = fonte_segura(FONTES, "Roboto-Regular.ttf", 40)
+    b = registro_fontes.carregar(ROBOTO, 40)
+    assert a is b
+    assert registro_fontes.carregar(ROBOTO, 41) is not a
+    est = registro_fontes.estatisticas()
+    assert est["acertos"] >= 1 and est["faltas"] == 2
+
+
+def test_metricas_memorizadas_batem_com_o_pillow():
+    f = registro_fontes.carregar(ROBOTO, 33)
+    registro_fontes.zerar_estatisticas()
+    assert registro_fontes.metricas(f) == f.getmetrics()
+    assert registro_fontes.metricas(f) == f.getmetrics()
+    est = registro_fontes.estatisticas()
+    assert est["metricas_faltas"] == 1 and est["metricas_acertos"] == 1
+
+
+def test_ajustar_texto_nao_reabre_o_ttf_na_busca():
+    registro_fontes.esquecer()
+    ajustar_texto("Refrigerante Kitubaina Sabor Guaraná Garrafa 1,5L",
+                  ROBOTO, larg_px=300, alt_px=120, tamanho_max_pt=40, dpi=300)
+    registro_fontes.zerar_estatisticas()
+    ajustar_texto("Refrigerante Kitubaina Sabor Guaraná Garrafa 1,5L",
+                  ROBOTO, larg_px=300, alt_px=120, tamanho_max_pt=40, dpi=300)
+    assert registro_fontes.estatisticas()["faltas"] == 0
+
+
+def test_fallback_resolvido_e_revalidado_quando_a_fonte_chega(tmp_path):
+    """I2: sem a pedida, cai na Roboto ao lado; a fonte importada DEPOIS
+    (portabilidade) entra sem reiniciar — a pasta mudou de mtime."""
+    shutil.copy(ROBOTO, tmp_path / "Roboto-Regular.ttf")
+    reserva = fonte_segura(tmp_path, "Quicksand-Bold.ttf", 30)
+    assert reserva is registro_fontes.carregar(tmp_path / "Roboto-Regular.ttf", 30)
+    shutil.copy(FONTES / "Quicksand-Bold.ttf", tmp_path / "Quicksand-Bold.ttf")
+    import os
+    st = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    nova = fonte_segura(tmp_path, "Quicksand-Bold.ttf", 30)
+    assert nova is not reserva
+    assert "Quicksand" in nova.getname()[0]
+
+
+def test_pasta_sem_fonte_nenhuma_usa_a_embutida(tmp_path):
+    f = fonte_segura(tmp_path, "NaoExiste.ttf", 24)
+    assert f is registro_fontes.embutida(24)
+
+
+# --- cache do ajuste de texto (o veredito por conteúdo) ------------------------------
+
+
+def _pagina_de_nome(fonte="Roboto-Regular.ttf"):
+    from app.rendering.model import LayoutDef, Pagina, Regiao, Retangulo, Slot, TipoRegiao
+    reg = Regiao(TipoRegiao.NOME, Retangulo(5, 5, 40, 20), fonte=fonte,
+                 tamanho_max_pt=30)
+    lay = LayoutDef(60, 40, dpi=150, paginas=[Pagina([Slot("c", [reg])])])
+    return lay
+
+
+def test_ajuste_repetido_nao_mede_de_novo():
+    from app.rendering import text_fit
+    text_fit.esquecer_ajustes()
+    antes = text_fit.estatisticas_ajuste()
+    a = ajustar_texto("Achocolatado em Pó Nescau Lata 400g", ROBOTO,
+                      larg_px=260, alt_px=90, tamanho_max_pt=36, dpi=300)
+    b = ajustar_texto("Achocolatado em Pó Nescau Lata 400g", ROBOTO,
+                      larg_px=260, alt_px=90, tamanho_max_pt=36, dpi=300)
+    depois = text_fit.estatisticas_ajuste()
+    assert depois["faltas"] - antes["faltas"] == 1
+    assert depois["acertos"] - antes["acertos"] == 1
+    assert (a.linhas, a.tamanho_pt, a.altura_linha_px) == \
+        (b.linhas, b.tamanho_pt, b.altura_linha_px)
+
+
+def test_ajuste_devolve_copia_que_o_chamador_pode_cortar():
+    """O compositor CORTA ``aj.linhas`` no clamp do A1 — o veredito
+    guardado não pode sair envenenado."""
+    args = ("Palavra Outra Mais Texto Aqui Para Quebrar", ROBOTO, 400, 2000, 30, 300)
+    a = ajustar_texto(*args)
+    n = len(a.linhas)
+    a.linhas = a.linhas[:1]
+    a.linhas.append("lixo")
+    assert len(ajustar_texto(*args).linhas) == n
+    assert "lixo" not in ajustar_texto(*args).linhas
+
+
+def test_ajuste_chave_distingue_hifen_e_atomos():
+    base = ("CERVEJA ITAIPAVA", ROBOTO, 120, 200, 24.0, 100)
+    com = ajustar_texto(*base)
+    sem = ajustar_texto(*base, sem_hifen=True)
+    assert any("-" in ln for ln in com.linhas)
+    assert not any("-" in ln for ln in sem.linhas)
+    atomo = ajustar_texto(*base, atomos=frozenset({"itaipava"}))
+    assert not any("-" in ln for ln in atomo.linhas)
+
+
+def test_recompor_pagina_igual_nao_refaz_o_ajuste(tmp_path):
+    from app.rendering import text_fit
+    from app.rendering.compositor import DadosProduto, compor_pagina
+    shutil.copy(ROBOTO, tmp_path / "Roboto-Regular.ttf")
+    lay = _pagina_de_nome()
+    dados = DadosProduto("Biscoito Recheado Trakinas Morango 126g")
+    img1 = compor_pagina(lay, lay.paginas[0], dados, fontes_dir=tmp_path)
+    antes = text_fit.estatisticas_ajuste()
+    img2 = compor_pagina(lay, lay.paginas[0], dados, fontes_dir=tmp_path)
+    depois = text_fit.estatisticas_ajuste()
+    assert depois["faltas"] == antes["faltas"]
+    assert depois["acertos"] > antes["acertos"]
+    assert img1.tobytes() == img2.tobytes()
+
+
+# --- modelo de avanços: a busca sem FreeType dá o MESMO veredito -----------------------
+
+
+_NOMES = [
+    "Achocolatado em Pó Nescau Lata 400g",
+    "Refrigerante Kitubaina Sabor Guaraná Garrafa 1,5L",
+    "CERVEJA ITAIPAVA Lata 350ml",
+    "Detergente Líquido Ypê Neutro 500ml",
+    "Azeite Extra Virgem Gallo",
+    "Biscoito Recheado Trakinas Morango 126g",
+]
+
+
+def test_modelo_de_avancos_reproduz_a_busca_do_freetype(monkeypatch):
+    from app.rendering import modelo_glifos, text_fit
+    casos = []
+    for i, nome in enumerate(_NOMES):
+        for fonte in ("Roboto-Regular.ttf", "Quicksand-Bold.ttf",
+                      "Quicksand-Regular.otf"):
+            for larg, alt, dpi in ((180, 60, 100), (420, 160, 300),
+                                   (90, 300, 150)):
+                casos.append((nome, FONTES / fonte, larg, alt, 30 + i, dpi,
+                              6.0, 1.12, i % 2 == 0, frozenset({"itaipava"})))
+    rapido = [text_fit._ajustar_texto_medindo(*c) for c in casos]
+    monkeypatch.setattr(modelo_glifos, "modelo_para", lambda _p: None)
+    lento = [text_fit._ajustar_texto_medindo(*c) for c in casos]
+    for a, b in zip(rapido, lento):
+        assert a.linhas == b.linhas
+        assert a.tamanho_pt == b.tamanho_pt
+        assert a.altura_linha_px == b.altura_linha_px
+        assert a.fonte.size == b.fonte.size
+
+
+@SEM_MODELO_COM_RAQM
+def test_modelo_decide_sondas_longe_do_limite():
+    from app.rendering import modelo_glifos, text_fit
+    assert modelo_glifos.modelo_para(ROBOTO) is not None
+    antes = text_fit.estatisticas_ajuste()
+    text_fit._ajustar_texto_medindo(_NOMES[1], ROBOTO, 300, 120, 40, 300,
+                                    6.0, 1.12, False, frozenset())
+    depois = text_fit.estatisticas_ajuste()
+    assert depois["sondas_modelo"] > antes["sondas_modelo"]
+    assert depois["sondas_freetype"] == antes["sondas_freetype"]
+
+
+@SEM_MODELO_COM_RAQM
+def test_modelo_estimado_respeita_a_folga_medida():
+    """A folga declarada por glifo cobre o hinting real (a prova da
+    certeza do modelo)."""
+    from PIL import ImageFont
+
+    from app.rendering import modelo_glifos
+    modelo = modelo_glifos.modelo_para(ROBOTO)
+    for px in (9, 23, 57, 140, 311):
+        f = ImageFont.truetype(str(ROBOTO), px, layout_engine=ImageFont.Layout.BASIC)
+        est = modelo.na_medida(px, ())
+        for nome in _NOMES:
+            folga = len(nome) * modelo_glifos.FOLGA_POR_GLIFO_PX
+            assert abs(est.getlength(nome) - f.getlength(nome)) <= folga
+            assert modelo.exata(f, px).getlength(nome) == f.getlength(nome)
+
+
+# --- fotos decodificadas (LRU por bytes) ----------------------------------------------
+
+
+def _foto(caminho, cor=(200, 30, 30, 255), lado=120):
+    from PIL import Image
+    im = Image.new("RGBA", (lado, lado), (0, 0, 0, 0))
+    im.paste(Image.new("RGBA", (lado // 2, lado), cor), (lado // 4, 0))
+    im.save(caminho)
+    return caminho
+
+
+def _pagina_de_foto():
+    from app.rendering.model import LayoutDef, Pagina, Regiao, Retangulo, Slot, TipoRegiao
+    reg = Regiao(TipoRegiao.IMAGEM, Retangulo(5, 5, 50, 30))
+    return LayoutDef(60, 40, dpi=150, paginas=[Pagina([Slot("c", [reg])])])
+
+
+def test_recompor_pagina_nao_decodifica_a_foto_de_novo(tmp_path, monkeypatch):
+    from app.rendering import cache_imagens
+    from app.rendering.compositor import DadosProduto, ImagemSlot, compor_pagina
+    monkeypatch.setitem(cache_imagens._cache_config, "mb", 32)
+    cache_imagens.esquecer()
+    foto = _foto(tmp_path / "p.png")
+    lay = _pagina_de_foto()
+    dados = DadosProduto("X", imagens=[ImagemSlot(str(foto), flip_h=True,
+                                                  rotacao=15)])
+    img1 = compor_pagina(lay, lay.paginas[0], dados)
+    antes = cache_imagens.estatisticas()
+    img2 = compor_pagina(lay, lay.paginas[0], dados)
+    depois = cache_imagens.estatisticas()
+    assert depois["foto_faltas"] == antes["foto_faltas"]
+    assert depois["foto_acertos"] > antes["foto_acertos"]
+    assert img1.tobytes() == img2.tobytes()
+    # o giro/espelho entram na chave: outra transform, outra entrada
+    dados.imagens[0].rotacao = 0
+    compor_pagina(lay, lay.paginas[0], dados)
+    assert cache_imagens.estatisticas()["foto_faltas"] == depois["foto_faltas"] + 1
+
+
+def test_foto_trocada_no_acervo_entra_sem_esquecer(tmp_path, monkeypatch):
+    import os
+
+    from app.rendering import cache_imagens
+    monkeypatch.setitem(cache_imagens._cache_config, "mb", 32)
+    foto = _foto(tmp_path / "p.png")
+    a = cache_imagens.foto(foto)
+    assert cache_imagens.foto(foto) is a
+    _foto(foto, cor=(10, 200, 10, 255))
+    st = os.stat(foto)
+    os.utime(foto, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    b = cache_imagens.foto(foto)
+    assert b is not a
+    assert b.getpixel((60, 60)) == (10, 200, 10, 255)
+    assert cache_imagens.foto(tmp_path / "sumiu.png") is None
+
+
+def test_orcamento_em_bytes_descarta_a_menos_usada(tmp_path, monkeypatch):
+    from app.rendering import cache_imagens
+    monkeypatch.setitem(cache_imagens._cache_config, "mb", 1)
+    cache_imagens.esquecer()
+    # 400×400 RGBA = 640 KB: duas não cabem em 1 MB
+    a = _foto(tmp_path / "a.png", lado=400)
+    b = _foto(tmp_path / "b.png", lado=400)
+    cache_imagens.foto(a)
+    cache_imagens.foto(b)
+    est = cache_imagens.estatisticas()
+    assert est["itens"] == 1 and est["bytes"] == 400 * 400 * 4
+    antes = est["foto_faltas"]
+    cache_imagens.foto(b)
+    assert cache_imagens.estatisticas()["foto_faltas"] == antes
+    cache_imagens.foto(a)
+    assert cache_imagens.estatisticas()["foto_faltas"] == antes + 1
+
+
+def test_perfil_maquina_fraca_baixa_o_orcamento(tmp_path, monkeypatch):
+    from app.core.database import Database
+    from app.core.manutencao import ativar_perfil_maquina_fraca
+    from app.core.paths import SystemRoot
+    from app.rendering import cache_imagens
+    monkeypatch.setenv("AUTOTABLOIDE_ROOT", str(tmp_path / "raiz"))
+    root = SystemRoot(tmp_path / "raiz").criar_estrutura()
+    Database(root).init().engine.dispose()
+    try:
+        ativar_perfil_maquina_fraca(True, root.raiz)
+        assert cache_imagens.orcamento_bytes() == \
+            cache_imagens.ORCAMENTO_MAQUINA_FRACA_MB * 1024 * 1024
+        ativar_perfil_maquina_fraca(False, root.raiz)
+        assert cache_imagens.orcamento_bytes() == \
+            cache_imagens.ORCAMENTO_PADRAO_MB * 1024 * 1024
+    finally:
+        cache_imagens._cache_config.clear()
+
+
+# --- arte de fundo + camada (a BASE pronta, entregue em cópia) ----------------------
+
+
+def test_fundo_e_camada_preparados_uma_vez(tmp_path, monkeypatch):
+    from PIL import Image
+
+    from app.rendering import cache_imagens
+    from app.rendering.compositor import DadosProduto, compor_pagina
+    monkeypatch.setitem(cache_imagens._cache_config, "mb", 32)
+    cache_imagens.esquecer()
+    Image.new("RGB", (700, 500), (240, 200, 10)).save(tmp_path / "fundo.png")
+    sobre = Image.new("RGBA", (350, 250), (0, 0, 0, 0))
+    sobre.paste((200, 0, 0, 255), (0, 0, 100, 100))
+    sobre.save(tmp_path / "camada.png")
+    lay = _pagina_de_nome()
+    pag = lay.paginas[0]
+    pag.arquivo_fundo = str(tmp_path / "fundo.png")
+    pag.arquivo_camada = str(tmp_path / "camada.png")
+    dados = DadosProduto("")
+    img1 = compor_pagina(lay, pag, dados, fontes_dir=FONTES)
+    antes = cache_imagens.estatisticas()
+    img2 = compor_pagina(lay, pag, dados, fontes_dir=FONTES)
+    depois = cache_imagens.estatisticas()
+    assert depois["fundo_faltas"] == antes["fundo_faltas"]
+    assert depois["fundo_acertos"] == antes["fundo_acertos"] + 1
+    assert img1.tobytes() == img2.tobytes()
+    assert img1.getpixel((2, 2)) == (200, 0, 0)          # a camada entrou
+    assert img1.getpixel((img1.width - 2, img1.height - 2)) == (240, 200, 10)
+    # outro dpi é outro tamanho: outra entrada
+    compor_pagina(lay, pag, dados, fontes_dir=FONTES, dpi=96)
+    assert cache_imagens.estatisticas()["fundo_faltas"] == depois["fundo_faltas"] + 1
+
+
+def test_fundo_volta_em_copia(tmp_path, monkeypatch):
+    from PIL import Image
+
+    from app.rendering import cache_imagens
+    monkeypatch.setitem(cache_imagens._cache_config, "mb", 32)
+    Image.new("RGB", (80, 60), (10, 20, 30)).save(tmp_path / "f.png")
+    a, tem = cache_imagens.fundo(tmp_path / "f.png", 40, 30)
+    assert not tem and a.size == (40, 30)
+    a.paste((255, 255, 255), (0, 0, 40, 30))            # a composição pinta
+    b, _ = cache_imagens.fundo(tmp_path / "f.png", 40, 30)
+    assert b.getpixel((0, 0)) == (10, 20, 30)
+    c, tem = cache_imagens.fundo(tmp_path / "f.png", 40, 30,
+                                 tmp_path / "camada_sumiu.png")
+    assert not tem and c.tobytes() == b.tobytes()
+
+
+# --- composição incremental (a prévia recompõe só a célula suja) ---------------------
+
+
+def _grade_4x4(tmp_path):
+    from decimal import Decimal
+
+    from app.rendering.compositor import DadosProduto
+    from app.rendering.model import LayoutDef, Pagina, Regiao, Retangulo, Slot, TipoRegiao
+    cores = [(200, 30, 30, 255), (30, 160, 40, 255), (40, 40, 200, 255)]
+    slots, dados = [], {}
+    for i in range(16):
+        x, y = 5 + (i % 4) * 50, 5 + (i // 4) * 70
+        slots.append(Slot(f"s{i}", [
+            Regiao(TipoRegiao.IMAGEM, Retangulo(x, y, 45, 35)),
+            Regiao(TipoRegiao.NOME, Retangulo(x, y + 36, 45, 14),
+                   fonte="Roboto-Regular.ttf", tamanho_max_pt=16),
+            Regiao(TipoRegiao.PRECO, Retangulo(x + 20, y + 51, 25, 14)),
+        ]))
+        foto = _foto(tmp_path / f"p{i % 3}.png", cor=cores[i % 3])
+        dados[f"s{i}"] = DadosProduto(
+            _NOMES[i % len(_NOMES)], preco_por=Decimal(f"{i + 1}.99"),
+            imagem_path=str(foto),
+            categoria="Bebidas" if i < 8 else "Mercearia")
+    pag = Pagina(slots)
+    return LayoutDef(210, 290, dpi=96, paginas=[pag]), pag, dados
+
+
+def test_incremental_redesenha_so_a_celula_editada(tmp_path):
+    from app.rendering.compositor import ComposicaoIncremental, compor_pagina
+    lay, pag, dados = _grade_4x4(tmp_path)
+    inc = ComposicaoIncremental()
+    assert inc.compor(lay, pag, dados, FONTES).tobytes() == \
+        compor_pagina(lay, pag, dados, FONTES).tobytes()
+    assert inc.estatisticas["celulas_desenhadas"] == 16
+
+    # o dono empurra o preço de UMA célula e troca o nome de outra
+    pag.slots[5].regioes[2].rect.x_mm -= 4
+    dados["s10"].nome = "Leite Condensado Moça 395g"
+    img = inc.compor(lay, pag, dados, FONTES)
+    assert inc.estatisticas["celulas_desenhadas"] == 18
+    assert inc.estatisticas["celulas_reaproveitadas"] == 14
+    assert img.tobytes() == compor_pagina(lay, pag, dados, FONTES).tobytes()
+    assert inc.estatisticas["bases"] == 1
+
+
+def test_incremental_invalida_o_que_atravessa_celulas(tmp_path, monkeypatch):
+    """Seções, mediana dos heróis e átomos de marca são da PÁGINA: mudou,
+    a base recompõe — e a imagem segue idêntica à composição inteira."""
+    from app.rendering import secoes
+    from app.rendering.compositor import ComposicaoIncremental, compor_pagina
+    monkeypatch.setattr(secoes, "config_secoes", lambda raiz=None: ("#1E5AA8", 0.6))
+    monkeypatch.setattr(secoes, "estilo_secoes", lambda raiz=None: ("CONTORNO", False))
+    lay, pag, dados = _grade_4x4(tmp_path)
+    pag.secoes_ligadas = True
+    inc = ComposicaoIncremental()
+    inc.compor(lay, pag, dados, FONTES)
+
+    passos = [
+        lambda: setattr(dados["s3"], "categoria", "Mercearia"),     # seção
+        lambda: setattr(pag.slots[0].regioes[0].rect, "larg_mm", 90),  # herói
+        lambda: setattr(dados["s7"], "marcas_nome", ("Itaipava",)),   # átomo
+    ]
+    for passo in passos:
+        bases = inc.estatisticas["bases"]
+        passo()
+        img = inc.compor(lay, pag, dados, FONTES)
+        assert inc.estatisticas["bases"] == bases + 1
+        assert img.tobytes() == compor_pagina(lay, pag, dados, FONTES).tobytes()
+
+
+def test_incremental_celula_vizinha_sobreposta_redesenha(tmp_path):
+    """A célula cuja área cruza a de uma redesenhada ANTES dela não pode
+    colar o retalho velho (a mistura depende do que está embaixo)."""
+    from app.rendering.compositor import ComposicaoIncremental, compor_pagina
+    lay, pag, dados = _grade_4x4(tmp_path)
+    inc = ComposicaoIncremental()
+    inc.compor(lay, pag, dados, FONTES)
+    # o preço da célula 0 invade a célula 1
+    pag.slots[0].regioes[2].rect.x_mm += 20
+    img = inc.compor(lay, pag, dados, FONTES)
+    assert img.tobytes() == compor_pagina(lay, pag, dados, FONTES).tobytes()
+    assert inc.estatisticas["celulas_desenhadas"] >= 18
@@ -0,0 +1,158 @@
+"""Chaves de conciliação GRAVADAS (``app/core/chaves_conciliacao.py``): o
+lote lê a chave pronta do banco em vez de refazer o acervo inteiro."""
+
+import pytest
+from sqlalchemy import select
+
+from app.ai.conciliacao import Conciliador, Semaforo
+from app.core import chaves_conciliacao
+from app.core.database import Database
+from app.core.models import Produto, ProdutoAlias
+from app.core.paths import SystemRoot
+from app.core.repositories import ConfigRepositorio, ProdutoRepositorio
+
+
+@pytest.fixture
+def db(tmp_path):
+    banco = Database(SystemRoot(tmp_path / "raiz")).init()
+    yield banco
+    banco.engine.dispose()
+
+
+def _semear(db):
+    with db.Session() as s:
+        repo = ProdutoRepositorio(s)
+        for nome in ["FAROFA DE MACAXEIRA YOKI 500G", "CAFE PILAO 500G",
+                     "ARROZ TIO JOAO 5KG", "SABAO PO OMO 1KG"]:
+            repo.importar(nome)
+        repo.aprender_alias(repo.buscar_por_nome_bruto("CAFE PILAO 500G").id,
+                            "CAFÉ PILÃO TRAD. 500 GR")
+        s.commit()
+
+
+def _contar_chaves(monkeypatch):
+    """Conta as chaves CALCULADAS (na conciliação e na sincronização)."""
+    feitas = []
+    original = chaves_conciliacao.chave_do_nome
+
+    def _espiao(nome, sinonimos):
+        feitas.append(nome)
+        return original(nome, sinonimos)
+    monkeypatch.setattr(chaves_conciliacao, "chave_do_nome", _espiao)
+    monkeypatch.setattr("app.ai.conciliacao.chave_do_nome", _espiao)
+    return feitas
+
+
+def test_repositorio_grava_a_chave_e_o_lote_so_le(db, monkeypatch):
+    _semear(db)
+    with db.Session() as s:
+        assert all(s.execute(select(Produto.chave_conciliacao)).scalars())
+        assert all(s.execute(select(ProdutoAlias.chave_conciliacao)).scalars())
+        # o sinônimo regional já vai canonizado na chave gravada
+        farofa = ProdutoRepositorio(s).buscar_por_nome_bruto(
+            "FAROFA DE MACAXEIRA YOKI 500G")
+        assert farofa.chave_conciliacao == "farofa de mandioca yoki"
+    with db.Session() as s:
+        Conciliador(s)._usar_chaves_gravadas()     # 1ª vez: grava a versão
+    feitas = _contar_chaves(monkeypatch)
+    with db.Session() as s:
+        v = Conciliador(s).conciliar("CAFE PILAO TRADICIONAL 500G")
+    assert v.semaforo in (Semaforo.VERDE, Semaforo.AMARELO)
+    assert v.produto.nome_bruto == "CAFE PILAO 500G"
+    # só a chave da LINHA foi calculada — nada do acervo (nomes + aliases)
+    assert set(feitas) == {"Café Pilao Tradicional 500g"}
+
+
+def test_nome_editado_refaz_so_aquela_chave(db, monkeypatch):
+    _semear(db)
+    with db.Session() as s:
+        Conciliador(s)._usar_chaves_gravadas()
+        repo = ProdutoRepositorio(s)
+        arroz = repo.buscar_por_nome_bruto("ARROZ TIO JOAO 5KG")
+        repo.editar(arroz.id, nome_sanitizado="Arroz Parboilizado Tio João 5kg")
+        assert arroz.chave_conciliacao == "arroz parboilizado tio joao"
+        # outro caminho do ORM (reformatação, pacote): a chave velha zera
+        omo = repo.buscar_por_nome_bruto("SABAO PO OMO 1KG")
+        omo.nome_sanitizado = "Lava-Roupas em Pó Omo 1kg"
+        s.commit()
+        assert omo.chave_conciliacao is None
+    feitas = _contar_chaves(monkeypatch)
+    with db.Session() as s:
+        Conciliador(s)._corpus()
+        assert feitas == ["Lava-Roupas em Pó Omo 1kg"]
+        assert s.execute(select(Produto.chave_conciliacao).where(
+            Produto.nome_bruto == "SABAO PO OMO 1KG")).scalar() == \
+            "lava roupas em po omo"
+
+
+def test_regra_nova_refaz_tudo_uma_vez(db, monkeypatch):
+    _semear(db)
+    with db.Session() as s:
+        Conciliador(s)._usar_chaves_gravadas()
+        # o dono ensina um sinônimo: a versão das chaves muda
+        ConfigRepositorio(s).set("sinonimos.regionais", [["cafe", "cafezinho"]])
+        s.commit()
+    feitas = _contar_chaves(monkeypatch)
+    with db.Session() as s:
+        Conciliador(s)._corpus()
+    assert len(feitas) == 4 + 5              # 4 produtos + 5 aliases, 1 vez
+    feitas.clear()
+    with db.Session() as s:
+        Conciliador(s)._corpus()
+    assert feitas == []
+    monkeypatch.setattr(chaves_conciliacao, "VERSAO_RECEITA", 99)
+    with db.Session() as s:
+        Conciliador(s)._corpus()
+    assert len(feitas) == 9
+
+
+def test_planilha_do_acervo_grava_a_chave(tmp_path):
+    from app.core.excel_acervo import (analisar_planilha,
+                                       aplicar_importacao_planilha)
+    openpyxl = pytest.importorskip("openpyxl")
+    raiz = SystemRoot(tmp_path / "raiz")
+    Database(raiz).init().engine.dispose()
+    wb = openpyxl.Workbook()
+    wb.active.append(["Nome", "Marca", "Preço"])
+    wb.active.append(["Macarrão Espaguete Renata 500g", "Renata", "4,99"])
+    arq = tmp_path / "acervo.xlsx"
+    wb.save(arq)
+    aplicar_importacao_planilha(analisar_planilha(arq, raiz=raiz), {}, raiz=raiz)
+    db = Database(raiz).init()
+    try:
+        with db.Session() as s:
+            assert s.execute(select(Produto.chave_conciliacao)).scalars().all() \
+                == ["macarrao espaguete renata"]
+    finally:
+        db.engine.dispose()
+
+
+def test_sincronizar_nao_mexe_na_sessao_de_quem_chama(db, monkeypatch):
+    import time
+    _semear(db)
+    with db.Session() as s:
+        Conciliador(s)._usar_chaves_gravadas()
+        ConfigRepositorio(s).set("sinonimos.regionais", [["cafe", "cafezinho"]])
+        s.commit()
+    with db.Session() as s:
+        cafe = ProdutoRepositorio(s).buscar_por_nome_bruto("CAFE PILAO 500G")
+        assert Conciliador(s)._usar_chaves_gravadas()     # refez tudo
+        # nada expirado: a chave nova chegou ao objeto já carregado
+        assert "chave_conciliacao" in cafe.__dict__
+        assert cafe.chave_conciliacao == s.execute(
+            select(Produto.chave_conciliacao)
+            .where(Produto.id == cafe.id)).scalar()
+    with db.Session() as s:
+        Conciliador(s)._usar_chaves_gravadas()
+        # o chamador com escrita aberta: não é commitada nem esperada
+        omo = ProdutoRepositorio(s).buscar_por_nome_bruto("SABAO PO OMO 1KG")
+        omo.nome_sanitizado = "Lava-Roupas em Pó Omo 1kg"
+        s.flush()
+        monkeypatch.setattr(chaves_conciliacao, "VERSAO_RECEITA", 99)
+        t0 = time.perf_counter()
+        assert not Conciliador(s)._usar_chaves_gravadas()
+        assert time.perf_counter() - t0 < 1
+        s.rollback()
+    with db.Session() as s:
+        assert ProdutoRepositorio(s).buscar_por_nome_bruto(
+            "SABAO PO OMO 1KG").nome_sanitizado != "Lava-Roupas em Pó Omo 1kg"
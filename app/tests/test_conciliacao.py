@@ -116,3 +116,251 @@ def test_embeddings_promovem_typo_para_amarelo(session):
     v = Conciliador(session, embedder=_EmbedderStub()).conciliar("NUTELA 350G")
     assert v.semaforo == Semaforo.AMARELO
     assert v.produto.nome_sanitizado.startswith("Nutella")
+
+
+# --- fuzzy em matriz (cdist) == laço puro -----------------------------------
+
+_MARCAS = ["Nestle", "Ype", "Omo", "Camil", "Tio Joao", "Liza", "Pilao", "Qualy"]
+_TIPOS = ["Arroz Branco", "Feijao Carioca", "Oleo de Soja", "Cafe Torrado",
+          "Sabao em Po", "Detergente Liquido", "Margarina", "Leite Condensado"]
+_PESOS = ["500 g", "1 kg", "5 kg", "900 ml", "1,5 L"]
+
+
+def _acervo_sintetico(session):
+    repo = ProdutoRepositorio(session)
+    for i, tipo in enumerate(_TIPOS):
+        for j, marca in enumerate(_MARCAS):
+            # irmãos de chave (só o peso muda) entram juntos de propósito
+            for peso in _PESOS[(i + j) % 3:(i + j) % 3 + 2]:
+                repo.importar(f"{tipo} {marca} {peso}")
+    p = repo.importar("Achocolatado Nescau 400 g")
+    repo.aprender_alias(p.produto.id, "ACHOC NESCAU LT 400G")
+    session.commit()
+
+
+_LINHAS = ["ARROZ BRANCO CAMIL 5KG", "FEIJAO CARIOCA TIO JOAO 1 KG",
+           "OLEO SOJA LIZA 900ML", "CAFE PILAO 500G", "SABAO PO OMO 1KG",
+           "ACHOC NESCAU 400G", "DETERG YPE 500 ML", "MARGARINA QUALY 500G",
+           "PILHA DURACELL AA", "LEITE COND NESTLE 395G", "arroz", ""]
+
+
+def _sem_matriz(monkeypatch):
+    monkeypatch.setattr(Conciliador, "_matriz_fuzzy", lambda self: None)
+
+
+@pytest.mark.parametrize("embedder", [None, _EmbedderStub()])
+def test_fuzzy_em_matriz_igual_ao_laco(session, monkeypatch, embedder):
+    _acervo_sintetico(session)
+    conc = Conciliador(session, embedder=embedder)
+    conc.LOTE_FUZZY = 5                      # força mais de uma passada
+    em_matriz = conc._candidatos_lote(_LINHAS)
+    vereditos = Conciliador(session, embedder=embedder).conciliar_lote(_LINHAS)
+    _sem_matriz(monkeypatch)
+    laco = Conciliador(session, embedder=embedder)
+    for linha, cands, v in zip(_LINHAS, em_matriz, vereditos):
+        ref = laco._candidatos(linha)
+        # mesmos produtos, na mesma ordem, com o MESMO score (bit a bit)
+        assert [(c.produto.id, c.score) for c in cands] == \
+               [(c.produto.id, c.score) for c in ref]
+        avulso = laco.conciliar(linha)
+        assert (v.semaforo, v.via, v.produto) == \
+               (avulso.semaforo, avulso.via, avulso.produto)
+
+
+def test_conciliar_lote_pula_o_fuzzy_do_exato(session, monkeypatch):
+    _semear(session)
+    conc = Conciliador(session)
+    pedidos = []
+    original = conc._candidatos_lote
+    monkeypatch.setattr(conc, "_candidatos_lote",
+                        lambda nomes: pedidos.append(nomes) or original(nomes))
+    vs = conc.conciliar_lote(["BOMBRIL 45 g", "REFRI KITUBAINA 1,5 L",
+                              "REFRI KITUBAINA 1,5 L"])
+    assert [v.semaforo for v in vs] == [Semaforo.VERDE, Semaforo.AMARELO,
+                                        Semaforo.AMARELO]
+    assert pedidos == [["REFRI KITUBAINA 1,5 L"]]       # 1 passada, sem o exato
+    assert vs[1].candidatos is not vs[2].candidatos
+
+
+# --- blocos por token: só os produtos que dividem algo raro com a linha -----
+
+@pytest.mark.parametrize("embedder", [None, _EmbedderStub()])
+def test_bloco_por_token_mantem_o_semaforo(session, monkeypatch, embedder):
+    _acervo_sintetico(session)
+    cheio = Conciliador(session, embedder=embedder).conciliar_lote(_LINHAS)
+    conc = Conciliador(session, embedder=embedder)
+    conc.BLOCO_MINIMO_CORPUS = 0              # o acervo de teste é pequeno
+    conc.BLOCO_TETO_TOKEN = 20
+    blocos, varridas = [], []
+    no_bloco, vetoriais = conc._topo_no_bloco, conc._topos_vetoriais
+    monkeypatch.setattr(conc, "_topo_no_bloco", lambda q, cols, m, sem: (
+        blocos.append((q, len(cols))) or no_bloco(q, cols, m, sem)))
+    monkeypatch.setattr(conc, "_topos_vetoriais", lambda qs, m, cs: (
+        varridas.extend(qs) or vetoriais(qs, m, cs)))
+    em_bloco = conc.conciliar_lote(_LINHAS)
+    assert [(v.semaforo, v.produto) for v in em_bloco] == \
+           [(v.semaforo, v.produto) for v in cheio]
+    total = len(conc._matriz_fuzzy().pids)
+    assert dict(blocos)["achoc nescau"] < total // 4
+    # nada raro em comum (ou nada que chegue ao amarelo): varre tudo
+    assert "pilha duracell aa" in varridas
+    assert "arroz branco camil" not in varridas
+
+
+def test_tokens_do_bloco(session):
+    conc = Conciliador(session)
+    assert conc._tokens_bloco("refri kitubaina", "REFRI KITUBAINA 1,5 L") == \
+        {"t:refri", "w:refr", "t:kitubaina", "w:kitu", "m:kitubaina",
+         "p:1500ml"}
+    # o prefixo junta a abreviação e o erro de digitação com o cadastro
+    assert "w:refr" in conc._tokens_bloco("refrigerante", "Refrigerante")
+    assert "w:nute" in conc._tokens_bloco("nutela", "NUTELA")
+
+
+def test_bloco_por_token_vem_do_arquivo_ao_lado_do_banco(session, monkeypatch):
+    import numpy as np
+    _acervo_sintetico(session)
+
+    def _em_bloco():
+        conc = Conciliador(session)
+        conc.BLOCO_MINIMO_CORPUS = 0
+        conc.BLOCO_TETO_TOKEN = 20
+        montou = []
+        monta = conc._postagens_do_corpus
+        monkeypatch.setattr(conc, "_postagens_do_corpus",
+                            lambda: montou.append(1) or monta())
+        vs = [(v.semaforo, v.produto) for v in conc.conciliar_lote(_LINHAS)]
+        return conc, vs, bool(montou)
+
+    _c, ref, montou = _em_bloco()
+    assert montou                                   # 1ª vez: do corpus
+    conc, vs, montou = _em_bloco()
+    assert not montou and vs == ref                 # depois: do arquivo
+    assert isinstance(conc._blocos_cache[0].pids, np.memmap)
+    # mexer no acervo muda o carimbo: o arquivo é refeito
+    repo = ProdutoRepositorio(session)
+    repo.importar("ACHOCOLATADO NESCAU ZERO 200 g")
+    session.commit()
+    _c, _vs, montou = _em_bloco()
+    assert montou
+    _c, _vs, montou = _em_bloco()
+    assert not montou
+
+
+# --- embeddings da tabela em lote: poucos POSTs, o mesmo semáforo ------------
+
+@pytest.mark.parametrize("aceita_lista", [True, False])
+def test_vetores_da_tabela_em_lote(session, aceita_lista):
+    _acervo_sintetico(session)
+    avulso = Conciliador(session, embedder=MotorIAFake())
+    ref = [avulso.conciliar(linha) for linha in _LINHAS]
+    fake = MotorIAFake(lote_embeddings=4,
+                       aceita_lista_embeddings=aceita_lista)
+    conc = Conciliador(session, embedder=fake)
+    conc._indice()                      # o índice do acervo não entra na conta
+    fake.pedidos_embeddings.clear()
+    vs = conc.conciliar_lote(_LINHAS + _LINHAS[:3])
+    assert [(v.semaforo, v.produto) for v in vs[:len(_LINHAS)]] == \
+           [(v.semaforo, v.produto) for v in ref]
+    assert not conc.avisos
+    # 15 linhas, 12 chaves distintas (as 3 repetidas vão uma vez só)
+    if aceita_lista:
+        assert fake.pedidos_embeddings == [4, 4, 4]       # era 1 POST/linha
+    else:
+        # a lista recusada custa UM pedido; depois, um texto por POST
+        assert fake.pedidos_embeddings == [4] + [1] * 12
+
+
+# --- N+1: os produtos do lote em poucas consultas ``IN`` ---------------------
+
+def _selects_do_lote(session, linhas):
+    from sqlalchemy import event
+
+    session.expunge_all()                     # nada no mapa de identidade
+    selects = []
+    motor = session.get_bind()
+
+    def contar(_conn, _cur, sql, *_a):
+        if sql.lstrip().upper().startswith("SELECT"):
+            selects.append(sql)
+
+    event.listen(motor, "before_cursor_execute", contar)
+    try:
+        vs = Conciliador(session).conciliar_lote(linhas)
+        # o que a Mesa lê de cada veredito já veio carregado
+        for v in vs:
+            for c in v.candidatos:
+                _ = (c.produto.categoria, list(c.produto.aliases))
+    finally:
+        event.remove(motor, "before_cursor_execute", contar)
+    return vs, len(selects)
+
+
+def test_lote_de_300_linhas_em_poucos_selects(session):
+    _acervo_sintetico(session)
+    # exato, alias, alias com marcador, fuzzy e novo
+    linhas = (["Arroz Branco Camil 500 g", "ACHOC NESCAU LT 400G",
+               "• ACHOC NESCAU LT 400G"] + _LINHAS) * 22
+    linhas = (linhas + [f"PRODUTO NOVO {i}" for i in range(300)])[:300]
+    # o 1º lote ainda grava as chaves de conciliação; os dois medidos, não
+    _selects_do_lote(session, linhas[:1])
+    _vs, n30 = _selects_do_lote(session, linhas[:30])
+    vs, n300 = _selects_do_lote(session, linhas)
+    assert vs[0].via == "exato" and vs[1].via == vs[2].via == "exato"
+    assert vs[2].produto is vs[1].produto
+    assert any(v.via == "fuzzy" for v in vs)
+    assert n300 <= 25                         # era 1+ por candidato
+    assert n300 == n30                        # o custo não cresce com o lote
+
+
+def test_juiz_em_lote_mesmo_semaforo_e_refaz_so_a_torta(monkeypatch):
+    """Juiz em lote: os semáforos do avulso, um pedido por ``lote_juiz``
+    perguntas, e só a resposta torta (índice fora da lista) é refeita
+    sozinha — 12 linhas em lotes de 10 = 2 pedidos + 1 refeito."""
+    from app.scripts import medidor_juiz
+    monkeypatch.setattr(medidor_juiz, "PREFIXO_S", 0.0)
+    monkeypatch.setattr(medidor_juiz, "POR_PERGUNTA_S", 0.0)
+    r = medidor_juiz.medir(linhas=12, lote=10)
+    assert r["ambiguos"] == 12 and r["iguais"] == 12
+    assert r["pedidos_avulso"] == 12
+    assert r["pedidos_lote"] == 3
+
+
+def test_juiz_em_lote_recusado_cai_para_o_avulso(session):
+    """4xx no pedido em lote (ex.: passou da janela de contexto) não deixa o
+    bloco inteiro sem veredito: cada pergunta vai sozinha."""
+    from app.ai.client import IARecusou
+
+    class _RecusaLote(MotorIAFake):
+        def chat(self, mensagens, **kw):
+            if '"item"' in mensagens[-1]["content"]:
+                self.chamadas.append("LOTE")
+                raise IARecusou("HTTP 400: prompt maior que o contexto")
+            return super().chat(mensagens, **kw)
+    fake = _RecusaLote(respostas_chat={
+        "ARROZ": '{"indice": 0, "confianca": 0.9}',
+        "FEIJAO": '{"indice": null, "confianca": 0.8}'})
+    conc = Conciliador(session, motor=fake)
+    respostas = conc.perguntar_ao_juiz_em_lote([
+        ("ARROZ TIO 5KG", ["Arroz Tio 5kg"]),
+        ("FEIJAO REI 1KG", ["Feijão Rei 2kg", "Feijão Rei 1kg"]),
+        ("ARROZ CAMIL 1KG", ["Arroz Camil 1kg"])])
+    assert respostas == [{"indice": 0, "confianca": 0.9},
+                         {"indice": None, "confianca": 0.8},
+                         {"indice": 0, "confianca": 0.9}]
+    assert fake.chamadas[0] == "LOTE" and len(fake.chamadas) == 4
+
+
+def test_lote_do_juiz_vem_da_config_ia(session):
+    import json
+
+    from app.ai.client import ConfigIA
+    fake = MotorIAFake(respostas_chat={'"item"': json.dumps(
+        [{"item": i, "indice": 0, "confianca": 0.9} for i in range(3)])})
+    assert Conciliador(session, motor=fake).lote_juiz == ConfigIA.lote_juiz
+    fake.config = ConfigIA(lote_juiz=3)
+    conc = Conciliador(session, motor=fake)
+    assert conc.lote_juiz == 3
+    conc.perguntar_ao_juiz_em_lote(
+        [(f"ARROZ {i}", [f"Arroz {i}"]) for i in range(6)])
+    assert len(fake.chamadas) == 2                # 6 perguntas, 3 por pedido
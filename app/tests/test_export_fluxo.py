@@ -0,0 +1,177 @@
+"""PDF multipágina em fluxo (``export.GravadorPdf``): cada página entra,
+vai para o disco e é solta — o lote inteiro nunca fica na memória."""
+
+import gc
+import weakref
+
+import pytest
+from PIL import Image, ImageChops
+from pypdf import PdfReader
+
+
+def _paginas(n, vivas: list):
+    """Gera ``n`` páginas guardando um weakref de cada (para contar quantas
+    ainda estão vivas quando a próxima é pedida)."""
+    for i in range(n):
+        gc.collect()
+        vivas.append(sum(1 for r in _paginas.refs if r() is not None))
+        im = Image.new("RGB", (240, 320), (30 * i, 120, 200 - 20 * i))
+        _paginas.refs.append(weakref.ref(im))
+        yield im
+        del im                          # o gerador não segura a anterior
+
+
+def test_fluxo_igual_ao_save_all_do_pillow(tmp_path):
+    from app.rendering.export import exportar_pdf_multipagina
+    imgs = [Image.new("RGB", (240, 320), (30 * i, 120, 90)) for i in range(4)]
+    imgs[0].save(tmp_path / "pillow.pdf", "PDF", resolution=120.0,
+                 save_all=True, append_images=imgs[1:])
+    pdf = exportar_pdf_multipagina(iter(imgs), tmp_path / "fluxo.pdf", 120)
+    ref, nosso = PdfReader(tmp_path / "pillow.pdf"), PdfReader(pdf)
+    assert len(nosso.pages) == 4
+    for a, b in zip(ref.pages, nosso.pages):
+        assert b.mediabox == a.mediabox          # 240 px / 120 dpi = 144 pt
+        assert b.images[0].data == a.images[0].data
+    assert nosso.metadata["/Title"] == "fluxo"
+
+
+def test_so_uma_pagina_viva_por_vez(tmp_path):
+    from app.rendering.export import exportar_pdf_fluxo
+    _paginas.refs = []
+    vivas: list[int] = []
+    msgs: list[str] = []
+    pdf = exportar_pdf_fluxo(_paginas(6, vivas), tmp_path / "lote.pdf", 100,
+                             msgs.append, 6)
+    assert len(PdfReader(pdf).pages) == 6
+    # quando a página k é pedida, a k-1 já foi gravada e solta
+    assert vivas == [0] * 6
+    assert msgs == [f"Gravando página {k}/6…" for k in range(1, 7)]
+
+
+def test_falha_no_meio_nao_deixa_pdf_quebrado(tmp_path):
+    from app.rendering.export import exportar_pdf_fluxo
+    destino = tmp_path / "saida.pdf"
+    destino.write_bytes(b"o export anterior")
+
+    def _quebra():
+        yield Image.new("RGB", (50, 50), "white")
+        raise RuntimeError("composição caiu")
+
+    with pytest.raises(RuntimeError):
+        exportar_pdf_fluxo(_quebra(), destino, 72)
+    assert destino.read_bytes() == b"o export anterior"
+    assert [p.name for p in tmp_path.iterdir()] == ["saida.pdf"]
+
+    with pytest.raises(ValueError, match="nenhuma página"):
+        exportar_pdf_fluxo(iter(()), tmp_path / "vazio.pdf", 72)
+    assert not (tmp_path / "vazio.pdf").exists()
+    assert not (tmp_path / "vazio.pdf.parcial").exists()
+
+
+def test_etiquetas_por_folha_bate_com_a_imposicao():
+    from app.rendering.imposicao import etiquetas_por_folha, impor_etiquetas
+    from app.rendering.units import mm_para_px
+    dpi = 96
+    ew, eh = round(mm_para_px(100, dpi)), round(mm_para_px(70, dpi))
+    assert etiquetas_por_folha((ew, eh), dpi) == 8       # 2 × 4 no A4
+    etiq = [Image.new("RGB", (ew, eh), "white")] * 9
+    assert len(impor_etiquetas(etiq, dpi)) == 2
+    with pytest.raises(ValueError, match="não cabe"):
+        etiquetas_por_folha((ew * 3, eh), dpi)
+
+
+# --- fundo único: a arte 1× no PDF, cada página só com os retalhos ------------
+
+def _rasterizar(pagina, dpi):
+    """Monta a página do PDF no dpi de impressão: cada ``Do`` cola o seu
+    XObject JPEG onde a matriz ``cm`` manda (origem do PDF embaixo)."""
+    import io
+
+    from pypdf.generic import ContentStream
+    xobj = pagina["/Resources"]["/XObject"]
+    k = dpi / 72
+    alt_pt = float(pagina.mediabox.height)
+    saida = Image.new("RGB", (round(float(pagina.mediabox.width) * k),
+                              round(alt_pt * k)))
+    cm = clip = None
+    for operandos, op in ContentStream(pagina.get_contents(), pagina.pdf).operations:
+        if op == b"q":
+            clip = None
+        elif op == b"re":
+            x, y, w, h = (float(v) * k for v in operandos)
+            clip = (round(x), round(alt_pt * k - y - h),
+                    round(x + w), round(alt_pt * k - y))
+        elif op == b"cm":
+            cm = [float(v) for v in operandos]
+        elif op == b"Do":
+            im = Image.open(io.BytesIO(xobj[operandos[0]].get_object()._data))
+            x0 = round(cm[4] * k)
+            y0 = round((alt_pt - cm[5] - cm[3]) * k)
+            if clip is None:
+                saida.paste(im, (x0, y0))
+            else:
+                saida.paste(im.crop((clip[0] - x0, clip[1] - y0,
+                                     clip[2] - x0, clip[3] - y0)), clip[:2])
+    return saida
+
+
+def _lote_de_cartazes(tmp_path, n):
+    from decimal import Decimal
+
+    from PIL import ImageFilter
+
+    from app.rendering.compositor import DadosProduto, compor_pagina
+    from app.rendering.model import (LayoutDef, Pagina, Regiao, Retangulo,
+                                     Slot, TipoRegiao)
+    arte = tmp_path / "arte.png"
+    ruido = Image.effect_noise((620, 874), 40).filter(ImageFilter.GaussianBlur(2))
+    Image.merge("RGB", (ruido, ruido.transpose(Image.FLIP_LEFT_RIGHT),
+                        ruido.transpose(Image.FLIP_TOP_BOTTOM))).save(arte)
+    slot = Slot("c", [
+        Regiao(TipoRegiao.NOME, Retangulo(10, 120, 128, 30),
+               fonte="Roboto-Regular.ttf", tamanho_max_pt=40),
+        Regiao(TipoRegiao.PRECO, Retangulo(30, 155, 90, 40)),
+    ])
+    lay = LayoutDef(148, 210, dpi=106, paginas=[Pagina([slot], arquivo_fundo=str(arte))])
+
+    def _paginas():
+        for i in range(n):
+            yield compor_pagina(lay, lay.paginas[0], DadosProduto(
+                f"Produto {i} Lata 350ml", preco_por=Decimal(f"{i + 1}.99")))
+    return lay, _paginas
+
+
+def test_fundo_unico_menor_e_igual_no_dpi_de_impressao(tmp_path):
+    from app.rendering.compositor import fundo_da_pagina
+    from app.rendering.export import exportar_pdf_fluxo
+    lay, paginas = _lote_de_cartazes(tmp_path, 8)
+    cheio = exportar_pdf_fluxo(paginas(), tmp_path / "cheio.pdf", lay.dpi)
+    unico = exportar_pdf_fluxo(paginas(), tmp_path / "unico.pdf", lay.dpi,
+                               fundo=fundo_da_pagina(lay, lay.paginas[0]))
+    # ~2× nesta arte (a medida de verdade depende do peso da arte)
+    assert unico.stat().st_size * 3 < cheio.stat().st_size * 2
+    a, b = PdfReader(cheio), PdfReader(unico)
+    assert len(b.pages) == 8
+    # a arte é UM objeto, citado por todas as páginas
+    fundos = {p["/Resources"]["/XObject"].raw_get("/fundo").idnum for p in b.pages}
+    assert len(fundos) == 1
+    for pa, pb in zip(a.pages, b.pages):
+        assert pb.mediabox == pa.mediabox
+        dif = ImageChops.difference(_rasterizar(pa, lay.dpi),
+                                    _rasterizar(pb, lay.dpi))
+        # as margens de 1 MCU (mostrada) + 1 MCU (só no JPEG) deixam o
+        # croma de cada borda com os vizinhos da página inteira
+        assert dif.getbbox() is None
+
+
+def test_fundo_unico_pagina_diferente_sai_inteira(tmp_path):
+    from app.rendering.export import GravadorPdf
+    arte = Image.new("RGB", (200, 300), (200, 40, 40))
+    with GravadorPdf(tmp_path / "misto.pdf", 100) as pdf:
+        pdf.definir_fundo(arte)
+        pdf.adicionar(arte.copy())                        # igual: 0 retalhos
+        pdf.adicionar(Image.new("RGB", (300, 200), "white"))  # outro tamanho
+        pdf.adicionar(Image.new("RGB", (200, 300), "white"))  # tudo mudou
+    nomes = [sorted(p["/Resources"]["/XObject"]) for p in
+             PdfReader(tmp_path / "misto.pdf").pages]
+    assert nomes == [["/fundo"], ["/image"], ["/image"]]
@@ -0,0 +1,122 @@
+"""Export paralelo (``rendering.paralelo``): as páginas compostas em vários
+processos saem NA ORDEM e byte a byte iguais ao caminho sequencial."""
+
+from decimal import Decimal
+
+from PIL import Image
+
+
+def _jornal(tmp_path, n_paginas=3):
+    from app.rendering.compositor import DadosProduto
+    from app.rendering.model import LayoutDef, Pagina, Regiao, Retangulo, Slot, TipoRegiao
+    paginas, dados = [], {}
+    for p in range(n_paginas):
+        arte = tmp_path / f"arte{p}.png"
+        Image.new("RGB", (300, 400), (250, 220 - 40 * p, 40 * p)).save(arte)
+        slots = []
+        for c in range(4):
+            sid = f"p{p}c{c}"
+            x, y = 5 + (c % 2) * 50, 5 + (c // 2) * 60
+            slots.append(Slot(sid, [
+                Regiao(TipoRegiao.NOME, Retangulo(x, y + 30, 45, 14),
+                       fonte="Roboto-Regular.ttf", tamanho_max_pt=16),
+                Regiao(TipoRegiao.PRECO, Retangulo(x + 20, y + 45, 25, 12)),
+            ]))
+            dados[sid] = DadosProduto(f"Produto {p}.{c} Lata 350ml",
+                                      preco_por=Decimal(f"{p + c + 1}.49"))
+        paginas.append(Pagina(slots, arquivo_fundo=str(arte)))
+    return LayoutDef(110, 130, dpi=100, paginas=paginas), dados
+
+
+def test_paralelo_igual_ao_sequencial_e_na_ordem(tmp_path):
+    from app.rendering.compositor import compor_pagina
+    from app.rendering.paralelo import compor_paginas
+    lay, dados = _jornal(tmp_path)
+    msgs: list[str] = []
+    par = compor_paginas(lay, dados, status_cb=msgs.append, processos=2)
+    seq = [compor_pagina(lay, pag, dados) for pag in lay.paginas]
+    assert [im.tobytes() for im in par] == [im.tobytes() for im in seq]
+    assert msgs[0] == "Compondo 3 páginas em 2 processos…"
+    assert "Compondo página 3/3…" in msgs            # progresso por página
+
+
+def test_pool_compartilhado_entre_exports(tmp_path, monkeypatch):
+    import concurrent.futures
+
+    from app.rendering import paralelo
+    paralelo.encerrar_pool()
+    criados = []
+    real = concurrent.futures.ProcessPoolExecutor
+
+    def _contando(*a, **k):
+        criados.append(1)
+        return real(*a, **k)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _contando)
+    lay, dados = _jornal(tmp_path, 2)
+    try:
+        for _ in range(3):
+            assert len(paralelo.compor_paginas(lay, dados, processos=2)) == 2
+        assert criados == [1]                     # sobe uma vez só
+    finally:
+        paralelo.encerrar_pool()
+
+
+def test_dado_sem_pickle_cai_para_o_sequencial(tmp_path):
+    from app.rendering import paralelo
+    from app.rendering.compositor import compor_pagina
+    lay, dados = _jornal(tmp_path, 2)
+
+    class _Local(dict):                           # classe local: sem pickle
+        pass
+
+    local = _Local(dados)
+    try:
+        imgs = paralelo.compor_paginas(lay, local, processos=2)
+    finally:
+        paralelo.encerrar_pool()
+    assert [im.tobytes() for im in imgs] == \
+           [compor_pagina(lay, pag, dados).tobytes() for pag in lay.paginas]
+
+
+def test_um_processo_compoe_aqui_sem_pool(tmp_path, monkeypatch):
+    import concurrent.futures
+
+    from app.rendering import paralelo
+
+    def _proibido(*_a, **_k):
+        raise AssertionError("com teto 1 não sobe processo")
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _proibido)
+    lay, dados = _jornal(tmp_path, 2)
+    msgs: list[str] = []
+    imgs = paralelo.compor_paginas(lay, dados, status_cb=msgs.append,
+                                   processos=1)
+    assert len(imgs) == 2
+    assert msgs == ["Compondo página 1/2…", "Compondo página 2/2…"]
+
+
+def test_fundo_explicito_so_na_primeira_pagina(tmp_path):
+    from app.rendering.paralelo import tarefas_do_layout
+    lay, dados = _jornal(tmp_path)
+    t = tarefas_do_layout(lay, dados, tmp_path / "legado.png")
+    assert t[0].fundo_path == str(tmp_path / "legado.png")
+    assert [x.fundo_path for x in t[1:]] == [None, None]
+
+
+def test_perfil_maquina_fraca_exporta_em_um_processo(tmp_path, monkeypatch):
+    from app.core.database import Database
+    from app.core.manutencao import ativar_perfil_maquina_fraca
+    from app.core.paths import SystemRoot
+    from app.rendering import cache_imagens
+    from app.rendering.paralelo import max_processos
+    monkeypatch.setenv("AUTOTABLOIDE_ROOT", str(tmp_path / "raiz"))
+    root = SystemRoot(tmp_path / "raiz").criar_estrutura()
+    Database(root).init().engine.dispose()
+    try:
+        ativar_perfil_maquina_fraca(True, root.raiz)
+        assert max_processos(root.raiz) == 1
+        ativar_perfil_maquina_fraca(False, root.raiz)
+        assert max_processos(root.raiz) >= 1
+    finally:
+        cache_imagens._cache_config.clear()
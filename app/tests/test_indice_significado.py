@@ -0,0 +1,106 @@
+"""Índice de significado (``app/ai/indice_significado.py``): a matriz do
+acervo mapeada do disco e o IVF do acervo grande."""
+
+import numpy as np
+import pytest
+
+from app.ai import indice_significado
+from app.ai.conciliacao import Conciliador
+from app.core.database import Database
+from app.core.paths import SystemRoot
+from app.core.repositories import ProdutoRepositorio
+
+
+@pytest.fixture
+def db(tmp_path):
+    banco = Database(SystemRoot(tmp_path / "raiz")).init()
+    yield banco
+    banco.engine.dispose()
+
+
+class _EmbedderContador:
+    config = None
+
+    def __init__(self):
+        self.textos = 0
+
+    def embeddings(self, textos):
+        self.textos += len(textos)
+        return [[float(len(t) % 5 + 1), float(t.count("a")), 1.0]
+                for t in textos]
+
+
+def _semear(db):
+    with db.Session() as s:
+        repo = ProdutoRepositorio(s)
+        for nome in ["CAFE PILAO 500G", "ARROZ TIO JOAO 5KG",
+                     "SABAO PO OMO 1KG", "FAROFA YOKI 500G"]:
+            repo.importar(nome)
+        s.commit()
+
+
+def _aglomerados(n=3000, grupos=60, dim=32, semente=7):
+    rng = np.random.default_rng(semente)
+    centros = rng.normal(size=(grupos, dim))
+    vetores = centros[rng.integers(0, grupos, n)] \
+        + 0.05 * rng.normal(size=(n, dim))
+    return rng, vetores.astype(np.float32)
+
+
+def test_ivf_acha_os_mesmos_vizinhos_da_forca_bruta():
+    rng, vetores = _aglomerados()
+    ids = np.arange(len(vetores)) + 100
+    bruto = indice_significado.montar(ids, vetores, ivf=False)
+    ivf = indice_significado.montar(ids, vetores, ivf=True)
+    assert ivf.ivf is not None and bruto.ivf is None
+    for linha in rng.choice(len(vetores), 25, replace=False):
+        q = vetores[linha] + 0.01
+        assert set(ivf.vizinhos(q, 10)) == set(bruto.vizinhos(q, 10))
+        # a força bruta é o ranking do cosseno inteiro
+        cos = bruto.cossenos(q)
+        assert set(bruto.vizinhos(q, 10)) == set(np.argsort(-cos)[:10])
+
+
+def test_arquivo_mapeado_volta_igual(tmp_path):
+    _rng, vetores = _aglomerados(n=500)
+    indice = indice_significado.montar(np.arange(500), vetores, ivf=True)
+    carimbo = {"modelo": "m", "produtos": 500}
+    assert indice_significado.gravar(tmp_path, carimbo, indice)
+    lido = indice_significado.carregar(tmp_path, carimbo)
+    assert isinstance(lido.matriz, np.memmap)           # sem cópia
+    assert np.array_equal(lido.matriz, indice.matriz)
+    assert np.array_equal(lido.ivf.listas, indice.ivf.listas)
+    assert np.array_equal(lido.vizinhos(vetores[3], 5),
+                          indice.vizinhos(vetores[3], 5))
+    # carimbo diferente (outro modelo, acervo mexido): o arquivo não vale
+    assert indice_significado.carregar(tmp_path, dict(carimbo, modelo="x")) is None
+    assert indice_significado.carregar(None, carimbo) is None
+
+
+def test_conciliador_abre_o_indice_do_arquivo(db):
+    _semear(db)
+    with db.Session() as s:
+        e1 = _EmbedderContador()
+        ref = Conciliador(s, embedder=e1).conciliar("CAFE PILAO TRAD 500G")
+        assert e1.textos == 5                   # o acervo (4) + a consulta
+
+        e2 = _EmbedderContador()
+        conc = Conciliador(s, embedder=e2)
+        indice = conc._indice()
+        assert isinstance(indice.matriz, np.memmap)
+        v = conc.conciliar("CAFE PILAO TRAD 500G")
+        assert e2.textos == 1                   # SÓ a consulta
+        assert [(c.produto.id, c.score) for c in v.candidatos] == \
+               [(c.produto.id, c.score) for c in ref.candidatos]
+
+        # editar um produto muda o carimbo: o arquivo é refeito do banco
+        repo = ProdutoRepositorio(s)
+        pid = repo.buscar_por_nome_bruto("FAROFA YOKI 500G").id
+        repo.editar(pid, nome_sanitizado="Farofa temperada Yoki 500g")
+        s.commit()
+        e3 = _EmbedderContador()
+        Conciliador(s, embedder=e3).conciliar("CAFE PILAO TRAD 500G")
+        assert e3.textos == 2                   # o editado + a consulta
+        e4 = _EmbedderContador()
+        Conciliador(s, embedder=e4).conciliar("CAFE PILAO TRAD 500G")
+        assert e4.textos == 1
@@ -0,0 +1,72 @@
+"""Miniatura no dpi dela (``compositor.compor_miniatura``): composta
+pequena, mas com o corpo e as quebras de linha que o dpi real decide."""
+
+from decimal import Decimal
+
+from PIL import Image
+
+
+def _cartaz(tmp_path, dpi=200):
+    from app.rendering.model import LayoutDef, Pagina, Regiao, Retangulo, Slot, TipoRegiao
+    arte = tmp_path / "arte.png"
+    Image.new("RGB", (400, 560), (240, 200, 60)).save(arte)
+    slot = Slot("c", [
+        Regiao(TipoRegiao.NOME, Retangulo(10, 110, 128, 34),
+               fonte="Roboto-Regular.ttf", tamanho_max_pt=44, tamanho_min_pt=9),
+        Regiao(TipoRegiao.PRECO, Retangulo(30, 150, 90, 40)),
+    ])
+    return LayoutDef(148, 210, dpi=dpi,
+                     paginas=[Pagina([slot], arquivo_fundo=str(arte))])
+
+
+def test_miniatura_decide_o_texto_no_dpi_real(tmp_path):
+    from app.rendering import compositor
+    from app.rendering.compositor import DadosProduto, compor_miniatura, compor_pagina
+    lay = _cartaz(tmp_path)
+    d = DadosProduto("Biscoito Recheado Sabor Chocolate Trakinas Pacote 126g",
+                     preco_por=Decimal("3.49"))
+    cheia = compor_pagina(lay, lay.paginas[0], d)
+    mini = compor_miniatura(lay, lay.paginas[0], d, 140)
+    assert max(mini.size) <= 140 and max(mini.size) >= 139
+    uid = lay.paginas[0].slots[0].regioes[0].uid
+    real, pequeno = cheia._texto_desenhado[uid], mini._texto_desenhado[uid]
+    assert pequeno["linhas"] == real["linhas"]
+    assert pequeno["pt"] == real["pt"]
+    # e o bloco nunca passa da caixa na escala pequena
+    assert pequeno["altura_px"] <= pequeno["rect_alt_px"]
+    # compor no dpi pequeno SEM as decisões do real dá outro corpo
+    ingenua = compor_pagina(lay, lay.paginas[0], d,
+                            dpi=compositor.dpi_da_miniatura(lay, 140))
+    assert ingenua._texto_desenhado[uid]["pt"] != real["pt"]
+
+
+def test_miniatura_compoe_no_dpi_pequeno(tmp_path, monkeypatch):
+    from app.rendering import compositor
+    lay = _cartaz(tmp_path, dpi=300)
+    pedidos = []
+    original = compositor.compor_pagina
+
+    def _espiao(*a, **kw):
+        pedidos.append(kw.get("dpi"))
+        return original(*a, **kw)
+
+    monkeypatch.setattr(compositor, "compor_pagina", _espiao)
+    compositor.compor_miniatura(lay, lay.paginas[0],
+                                compositor.DadosProduto("Arroz 5kg"), 360)
+    # 360 px no lado de 210 mm ≈ 44 dpi — não os 300 do layout
+    assert pedidos == [compositor.dpi_da_miniatura(lay, 360)] == [44]
+
+
+def test_ajuste_na_miniatura_e_o_do_dpi_real():
+    from app.core.paths import SystemRoot
+    from app.rendering.text_fit import ajustar_texto, decisoes_no_dpi
+    fonte = SystemRoot().fontes / "Roboto-Regular.ttf"
+    texto = "Sabão em Pó Omo Lavagem Perfeita Embalagem Econômica 1,6kg"
+    real = ajustar_texto(texto, fonte, 1000, 260, 40, 300)
+    with decisoes_no_dpi(300):
+        no_real = ajustar_texto(texto, fonte, 1000, 260, 40, 300)
+        pequeno = ajustar_texto(texto, fonte, 1000 * 30 / 300, 260 * 30 / 300,
+                                40, 30)
+    assert no_real.linhas == real.linhas and no_real.tamanho_pt == real.tamanho_pt
+    assert pequeno.linhas == real.linhas and pequeno.tamanho_pt == real.tamanho_pt
+    assert pequeno.altura_linha_px * len(pequeno.linhas) <= 26
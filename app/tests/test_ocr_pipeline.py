@@ -76,3 +76,267 @@ def test_fluxo_completo(session, imagem):
     assert azeite.veredito.semaforo == Semaforo.VERMELHO
     assert azeite.enriquecido is not None
     assert {c.marca for c in azeite.enriquecido.componentes} == {"Carbonell", "Gallo"}
+
+
+def _tabela_listrada(caminho, n_linhas: int, passo: int = 60) -> None:
+    """Foto alta de mentira: a linha i é uma tarja listrada cuja cor
+    vermelha É o índice — o fake "lê" a faixa pela cor."""
+    import numpy as np
+    px = np.full((passo * n_linhas + 80, 900, 3), 255, dtype=np.uint8)
+    for i in range(n_linhas):
+        y = 40 + i * passo
+        px[y:y + 30, 40:860:2] = (i, 0, 0)
+    Image.fromarray(px).save(caminho)
+
+
+def _leitor_de_tarjas(caminho, prompt):
+    """O fake do OCR em faixas: devolve as tarjas INTEIRAS do recorte."""
+    import json
+
+    import numpy as np
+    px = np.asarray(Image.open(caminho).convert("RGB"))
+    tinta = (px[:, :, 1] == 0) & (px[:, :, 2] == 0)
+    vistas: dict[int, int] = {}
+    for y in range(px.shape[0]):
+        for r in set(px[y, tinta[y], 0].tolist()):
+            vistas[r] = vistas.get(r, 0) + 1
+    linhas = [{"descricao": f"PRODUTO {r}", "preco": f"{r},99"}
+              for r in sorted(vistas) if vistas[r] == 30]
+    # o rodapé (a validade) não está na 1ª faixa
+    validade = None if "(1 de " in prompt else "até 27/07"
+    return json.dumps({"linhas": linhas, "validade_oferta": validade})
+
+
+def test_ler_tabela_em_faixas_costura_sem_repetir(tmp_path):
+    from app.ai import ocr
+    from app.ai.fake import MotorIAFake
+    foto = tmp_path / "alta.png"
+    _tabela_listrada(foto, 200)
+    motor = MotorIAFake(visao_por_imagem=_leitor_de_tarjas)
+    fases: list[str] = []
+    tabela = ler_tabela(foto, motor, em_voo=4, status_cb=fases.append)
+    n_faixas = len(motor.chamadas)
+    assert n_faixas > 4 and f"{n_faixas} faixas" in fases[1]
+    assert all(c.startswith("Esta imagem é UMA FAIXA") for c in motor.chamadas)
+    # a MESMA forma do tiro único: todas as linhas, em ordem, sem a
+    # sobreposição duplicada e sem buraco na emenda
+    assert [ln.descricao for ln in tabela.linhas] == \
+        [f"PRODUTO {i}" for i in range(200)]
+    assert tabela.validade_oferta == "até 27/07"
+    # foto baixa continua num pedido só
+    assert ocr._cortes_da_tabela(Image.new("RGB", (900, 1600))) == [(0, 1600)]
+
+
+def test_ocr_em_fluxo_entrega_a_linha_antes_do_fim(tmp_path):
+    """SSE de verdade (servidor local): a 1ª linha chega ao conciliador
+    enquanto o servidor SEGURA o resto da resposta."""
+    import json
+    import socket
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    from app.ai.client import ClienteOpenAICompat, ConfigIA
+    viu_primeira = threading.Event()
+    placar: dict = {}
+    resposta = json.dumps({"validade_oferta": "até 27/07", "linhas": [
+        {"descricao": "BOMBRIL 45 g", "preco": "2,66"},
+        {"descricao": "CAFE PILAO 500G", "preco": "18,90"}]})
+    corte = resposta.index("}") + 1           # o fim da 1ª linha
+
+    class _SSE(BaseHTTPRequestHandler):
+        def log_message(self, *_a):
+            pass
+
+        def _evento(self, texto):
+            corpo = {"choices": [{"delta": {"content": texto}}]}
+            self.wfile.write(f"data: {json.dumps(corpo)}\n\n".encode())
+
+        def do_POST(self):
+            pedido = json.loads(self.rfile.read(
+                int(self.headers["Content-Length"])))
+            placar["stream"] = pedido.get("stream")
+            self.connection.setsockopt(socket.IPPROTO_TCP,
+                                       socket.TCP_NODELAY, 1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for i in range(0, corte, 7):
+                self._evento(resposta[i:min(i + 7, corte)])
+            placar["antes_do_fim"] = viu_primeira.wait(5)
+            self._evento(resposta[corte:])
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _SSE)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        cli = ClienteOpenAICompat(ConfigIA(
+            base_url=f"http://127.0.0.1:{servidor.server_port}/v1"))
+        cli.disponivel = lambda: True
+        foto = tmp_path / "tabela.png"
+        Image.new("RGB", (1200, 1600), "white").save(foto)
+        lidas = []
+
+        def _ao_ler(linha):
+            lidas.append(linha.descricao)
+            viu_primeira.set()
+        tabela = ler_tabela(foto, cli, ao_ler_linha=_ao_ler)
+        cli.fechar()
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+    assert placar == {"stream": True, "antes_do_fim": True}
+    assert lidas == ["BOMBRIL 45 g", "CAFE PILAO 500G"]
+    assert [ln.descricao for ln in tabela.linhas] == lidas
+    assert tabela.validade_oferta == "até 27/07"
+
+
+class _MotorLento:
+    """Fake com latência de rede em cada ``chat`` (juiz e enriquecimento)."""
+
+    def __init__(self, motor, atraso: float):
+        self._motor, self._atraso = motor, atraso
+
+    def __getattr__(self, nome):
+        return getattr(self._motor, nome)
+
+    def chat(self, mensagens, **kw):
+        import time
+        time.sleep(self._atraso)
+        return self._motor.chat(mensagens, **kw)
+
+
+def test_processar_tabela_em_esteira_mesmo_resultado_e_mais_rapido(session, imagem):
+    """Juiz e enriquecimento em estágios paralelos: a MESMA saída do
+    processamento em série, cada linha avisada ao ficar pronta, e o lote
+    longe da soma das latências."""
+    import json
+    import time
+
+    from app.ai.enriquecimento import enriquecer
+    from app.ai.fake import MotorIAFake
+    marcas = ["KITUBAINA", "TUBAINA", "SUKITA", "GUARANA", "SODA", "FANTA",
+              "DOLLY", "CONVENCAO"]
+    repo = ProdutoRepositorio(session)
+    for m in marcas:
+        repo.importar(f"REFRIGERANTE {m} 1,5 LT")
+    repo.importar("BOMBRIL 45 g")
+    session.commit()
+    linhas = [{"descricao": "BOMBRIL 45 g", "preco": "2,66"}] + [
+        {"descricao": f"REFRI {m} 1,5 L", "preco": "7,99"} for m in marcas]
+    motor = _MotorLento(MotorIAFake(
+        respostas_visao={"tabela de ofertas": json.dumps(
+            {"validade_oferta": "até 27/07", "linhas": linhas})},
+        respostas_chat={
+            '"item"': json.dumps([{"item": i, "indice": None, "confianca": 0.9}
+                                  for i in range(len(marcas))]),
+            '"candidatos"': '{"indice": null, "confianca": 0.9}'}),
+        atraso=0.1)
+
+    inicio = time.perf_counter()
+    em_serie = Conciliador(session, motor=motor).conciliar_lote(
+        [ln["descricao"] for ln in linhas])
+    enr_serie = {v.entrada: enriquecer(v.entrada, motor) for v in em_serie
+                 if v.semaforo == Semaforo.VERMELHO}
+    t_serie = time.perf_counter() - inicio
+
+    avisos: list[tuple[float, str]] = []
+    inicio = time.perf_counter()
+    imp = processar_tabela(
+        imagem, motor, Conciliador(session, motor=motor), em_voo=4,
+        ao_resultado=lambda r: avisos.append(
+            (time.perf_counter() - inicio, r.linha.descricao)))
+    t_esteira = time.perf_counter() - inicio
+
+    assert len(enr_serie) == len(marcas)       # juiz disse "novo" a todos
+    assert [(r.veredito.semaforo, r.veredito.produto, r.veredito.via,
+             r.veredito.motivo) for r in imp.linhas] == \
+        [(v.semaforo, v.produto, v.via, v.motivo) for v in em_serie]
+    assert {r.linha.descricao: r.enriquecido.nome_sanitizado
+            for r in imp.linhas if r.enriquecido} == \
+        {d: e.nome_sanitizado for d, e in enr_serie.items()}
+    assert sorted(d for _t, d in avisos) == sorted(ln["descricao"] for ln in linhas)
+    assert avisos[0][1] == "BOMBRIL 45 g" and avisos[0][0] < t_esteira / 2
+    assert t_esteira < t_serie / 2
+
+
+def test_processar_tabela_fuzzy_em_lotes_do_fluxo(session, imagem):
+    """As linhas do fluxo vão ao exato/fuzzy em LOTE (um POST de embedding
+    por lote, não por linha) — e o fluxo parado solta o lote que já tem,
+    sem esperar o fim da leitura."""
+    import json
+    import time
+
+    from app.ai.fake import MotorIAFake
+    ProdutoRepositorio(session).importar("BOMBRIL 45 g")
+    session.commit()
+    linhas = [{"descricao": f"PRODUTO NOVO {i} UN", "preco": "1,00"}
+              for i in range(12)]
+    resposta = json.dumps({"validade_oferta": None, "linhas": linhas})
+    conc = Conciliador(session)
+    lotes: list[int] = []
+    original = conc.pre_vereditos_lote
+    conc.pre_vereditos_lote = lambda nomes: (lotes.append(len(nomes)),
+                                             original(nomes))[1]
+    motor = MotorIAFake(respostas_visao={"tabela de ofertas": resposta})
+    imp = processar_tabela(imagem, motor, conc)
+    assert [r.linha.descricao for r in imp.linhas] == \
+        [ln["descricao"] for ln in linhas]
+    assert sum(lotes) == 12 and len(lotes) < 12 and max(lotes) > 1
+
+    marcos: dict[str, float] = {}
+
+    class _FluxoQuePara(MotorIAFake):
+        def visao_em_fluxo(self, imagem, prompt, **_kw):
+            texto = self.visao(imagem, prompt)
+            corte = texto.index("}") + 1       # a 1ª linha inteira
+            yield texto[:corte]
+            time.sleep(0.6)                    # o modelo "pensa"
+            marcos["fim"] = time.perf_counter()
+            yield texto[corte:]
+    lotes.clear()
+    processar_tabela(
+        imagem, _FluxoQuePara(respostas_visao={"tabela de ofertas": resposta}),
+        conc, ao_resultado=lambda r: marcos.setdefault(
+            r.linha.descricao, time.perf_counter()))
+    assert marcos["PRODUTO NOVO 0 UN"] < marcos["fim"]
+    assert lotes[0] == 1 and sum(lotes) == 12
+
+
+def test_processar_tabela_juiz_nao_espera_o_lote_encher(session, imagem):
+    """Com o juiz parado, o ambíguo vai a ele na hora (lote parcial): 3
+    linhas amarelas têm veredito ANTES de a leitura terminar — o lote de
+    ``lote_juiz`` só enche enquanto o juiz está ocupado."""
+    import json
+    import time
+
+    from app.ai.fake import MotorIAFake
+    marcas = ["KITUBAINA", "SUKITA", "GUARANA"]
+    repo = ProdutoRepositorio(session)
+    for m in marcas:
+        repo.importar(f"REFRIGERANTE {m} 1,5 LT")
+    session.commit()
+    linhas = [{"descricao": f"REFRI {m} 1,5 L", "preco": "7,99"}
+              for m in marcas]
+    resposta = json.dumps({"validade_oferta": None, "linhas": linhas})
+    marcos: dict[str, float] = {}
+
+    class _FluxoQuePara(MotorIAFake):
+        def visao_em_fluxo(self, imagem, prompt, **_kw):
+            texto = self.visao(imagem, prompt)
+            fim_das_linhas = texto.index("]")
+            yield texto[:fim_das_linhas]       # as 3 linhas inteiras
+            time.sleep(0.8)                    # o modelo ainda escreve
+            marcos["fim"] = time.perf_counter()
+            yield texto[fim_das_linhas:]
+    motor = _FluxoQuePara(
+        respostas_visao={"tabela de ofertas": resposta},
+        respostas_chat={'"item"': json.dumps(
+            [{"item": i, "indice": 0, "confianca": 0.9} for i in range(3)]),
+            '"candidatos"': '{"indice": 0, "confianca": 0.9}'})
+    conc = Conciliador(session, motor=motor)
+    assert conc.lote_juiz > 3
+    imp = processar_tabela(imagem, motor, conc, ao_resultado=lambda r:
+                           marcos.setdefault(r.linha.descricao,
+                                             time.perf_counter()))
+    assert all(r.veredito.via == "juiz" for r in imp.linhas)
+    assert all(marcos[ln["descricao"]] < marcos["fim"] for ln in linhas)
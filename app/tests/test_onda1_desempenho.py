@@ -201,9 +201,9 @@ def test_ocr_fases_de_status_e_cache_roundtrip(raiz_tmp, tmp_path):
     assert de_novo.validade_oferta == tabela.validade_oferta
     # modelo diferente invalida (trocou o modelo → relê)
     assert ocr.cache_consultar(foto, "outro-modelo") is None
-    # I3: o JSON do cache NÃO guarda caminho de máquina
-    bruto = ocr._cache_path().read_text(encoding="utf-8")
-    assert str(tmp_path) not in bruto
+    # I3: o cache NÃO guarda caminho de máquina
+    bruto = ocr._cache_path().read_bytes()
+    assert str(tmp_path).encode("utf-8") not in bruto
     # leitura vazia NUNCA envenena o cache
     ocr.cache_guardar(foto, "qwen-visao", ocr.TabelaOCR())
     assert ocr.cache_consultar(foto, "qwen-visao") is not None
@@ -274,6 +274,156 @@ def test_cache_ocr_limpar_e_aviso_no_resultado(raiz_tmp, tmp_path,
         foto, ConfigIA.da_config().modelo_visao) is None
 
 
+def test_limpar_cache_ocr_forca_nova_leitura_da_ia(raiz_tmp, tmp_path,
+                                                   monkeypatch):
+    """O OCR não passa pelo cache de respostas (tem o seu, só de leituras
+    válidas) e o "Limpar cache do OCR" esquece também o que o de respostas
+    guardava dele: a importação seguinte relê com a IA de verdade."""
+    import httpx
+
+    from app.ai import ocr
+    from app.ai.cache_respostas import NOME_ARQUIVO, CacheRespostas
+    from app.ai.client import ClienteOpenAICompat, ConfigIA
+    from app.core.paths import SystemRoot
+    leituras = []
+
+    def _handler(req):
+        leituras.append(json.loads(req.content))
+        return httpx.Response(200, json={"choices": [{"message": {
+            "content": _RESPOSTA_OCR}}]})
+    cache = CacheRespostas(SystemRoot().banco / NOME_ARQUIVO)
+    cache.gravar("leitura-velha", _RESPOSTA_OCR, "ocr")   # de antes do fix
+    cache.gravar("juiz-velho", '{"indice": 0}', "juiz")
+    cli = ClienteOpenAICompat(ConfigIA(), cache=cache)
+    cli._http = httpx.Client(base_url=cli.config.base_url,
+                             transport=httpx.MockTransport(_handler))
+    cli.disponivel = lambda: True
+    monkeypatch.setattr(servico, "_motor_se_disponivel", lambda: cli)
+    foto = _foto(tmp_path)
+
+    servico.importar_ofertas(foto, lambda _m: None)
+    assert len(leituras) == 1
+    assert "reaproveitado" in servico.importar_ofertas(
+        foto, lambda _m: None).aviso                  # o cache do OCR
+    assert len(leituras) == 1
+    assert cache.obter("leitura-velha") is not None
+
+    assert ocr.cache_limpar() == 1
+    assert cache.obter("leitura-velha") is None       # a do OCR foi junto
+    assert cache.obter("juiz-velho") is not None      # o resto fica
+    assert servico.importar_ofertas(foto, lambda _m: None).aviso is None
+    assert len(leituras) == 2                         # releu com a IA
+    cli.fechar()
+    cache.fechar()
+
+
+def test_importar_ofertas_enche_a_previa_durante_o_ocr(raiz_tmp, tmp_path,
+                                                      monkeypatch):
+    """OCR em fluxo: cada linha lida sai na hora (com semáforo de prévia) e
+    o status conta as linhas — o resultado final é o de sempre."""
+    motor = MotorIAFake(respostas_visao={"tabela de ofertas": _RESPOSTA_OCR})
+    monkeypatch.setattr(servico, "_motor_se_disponivel", lambda: motor)
+    fases: list[str] = []
+    previas: list[ItemMesa] = []
+    resultado = servico.importar_ofertas(_foto(tmp_path), fases.append,
+                                         linha_cb=previas.append)
+    assert [it.descricao for it in previas] == \
+        ["CAFE PILAO 500G", "ACUCAR UNIAO 1KG"]
+    assert all(it.semaforo == "VERMELHO" for it in previas)   # banco vazio
+    assert any("2 produtos lidos até agora" in f for f in fases)
+    assert [it.descricao for it in resultado.itens] == \
+        [it.descricao for it in previas]
+
+
+def test_mesa_enche_a_previa_da_estante_durante_o_ocr(raiz_tmp, tmp_path,
+                                                    monkeypatch):
+    """O fio inteiro na tela: o importar da Mesa passa ``linha_cb`` ao
+    serviço, o worker publica cada linha pelo sinal ``parcial`` e a prévia
+    da estante já tem as linhas QUANDO a conferência chega — e some nela."""
+    from PySide6.QtWidgets import QFileDialog
+
+    from app.qt.telas.mesa import MesaTela
+    _app()
+    motor = MotorIAFake(respostas_visao={"tabela de ofertas": _RESPOSTA_OCR})
+    monkeypatch.setattr(servico, "_motor_se_disponivel", lambda: motor)
+    foto = _foto(tmp_path)
+    monkeypatch.setattr(QFileDialog, "getOpenFileNames",
+                        lambda *_a, **_k: ([str(foto)], ""))
+    m = MesaTela()
+    na_conferencia: list[list[str]] = []
+
+    def _conciliar(resultado):
+        na_conferencia.append(m._previa_leitura.descricoes())
+        m._fim_da_previa()
+    monkeypatch.setattr(m, "_conciliar", _conciliar)
+    try:
+        m._importar()
+        prazo = time.monotonic() + 10
+        while not na_conferencia and time.monotonic() < prazo:
+            QApplication.processEvents()
+            time.sleep(0.01)
+        assert na_conferencia == [["CAFE PILAO 500G", "ACUCAR UNIAO 1KG"]]
+        assert m._previa_leitura.count() == 0
+        assert m._previa_leitura.isHidden()
+    finally:
+        m._trabalhos.encerrar()
+        m.close()
+
+
+def test_cache_ocr_sqlite_atalho_lru_e_json_antigo(raiz_tmp, tmp_path,
+                                                  monkeypatch):
+    """O cache de leituras no SQLite: a foto intocada não é hasheada de
+    novo (tamanho + mtime batem), o teto despeja a usada há mais tempo e o
+    ``ocr_cache.json`` antigo é importado na primeira abertura."""
+    import json
+
+    from app.ai import ocr
+    tabela = ocr.TabelaOCR(linhas=[ocr.LinhaOferta("ARROZ", "5,00")])
+    fotos = []
+    for i in range(3):
+        f = tmp_path / f"f{i}.png"
+        f.write_bytes(b"foto " + str(i).encode())
+        fotos.append(f)
+        ocr.cache_guardar(f, "m", tabela)
+    hashes: list[str] = []
+    real = ocr._hash_arquivo
+    monkeypatch.setattr(ocr, "_hash_arquivo",
+                        lambda c: hashes.append(c) or real(c))
+    assert ocr.cache_consultar(fotos[0], "m") is not None
+    assert hashes == []                          # o atalho respondeu
+    fotos[0].write_bytes(b"foto 0 retocada")
+    assert ocr.cache_consultar(fotos[0], "m") is None
+    assert len(hashes) == 1                      # mudou: hash de verdade
+
+    # o teto vem da Config (``ocr.cache_max``; sem a chave, ``CACHE_MAX``)
+    assert ocr.cache_max() == ocr.CACHE_MAX
+    from app.core.database import Database
+    from app.core.repositories import ConfigRepositorio
+    db = Database().init()
+    try:
+        with db.Session() as s:
+            ConfigRepositorio(s).set(ocr.CHAVE_CACHE_MAX, 2)
+            s.commit()
+    finally:
+        db.engine.dispose()
+    assert ocr.cache_max() == 2
+    ocr.cache_consultar(fotos[1], "m")           # f1 usada; f2 é a velha
+    ocr.cache_guardar(fotos[0], "m", tabela)
+    assert ocr.cache_consultar(fotos[2], "m") is None
+    assert ocr.cache_consultar(fotos[1], "m") is not None
+
+    # atualização: o JSON da versão 1 vira linhas do banco
+    ocr.cache_limpar()
+    ocr._cache_path().unlink()
+    antigo = ocr._cache_path().with_name("ocr_cache.json")
+    antigo.write_text(json.dumps({"versao": 1, "entradas": {
+        real(fotos[2]): {"linhas": [["FEIJAO", "7,00"]], "modelo": "m",
+                         "prompt": ocr._versao_prompt()}}}), encoding="utf-8")
+    de_volta = ocr.cache_consultar(fotos[2], "m")
+    assert [ln.descricao for ln in de_volta.linhas] == ["FEIJAO"]
+    assert not antigo.exists()
+
+
 def test_fonte_sumida_nao_estoura(raiz_tmp, tmp_path, monkeypatch):
     from app.qt import fontes
 
@@ -116,6 +116,60 @@ def test_lote_nao_aplica_nome_com_perda(raiz_tmp):
     db.engine.dispose()
 
 
+def test_lote_aplica_e_loga_conforme_termina_e_grava_aos_pedacos(raiz_tmp,
+                                                                monkeypatch):
+    """O passe de lote não enriquece o acervo inteiro calado: cada produto
+    é logado (e aplicado) assim que a IA responde, e o que já foi aplicado
+    fica gravado mesmo se o passe for interrompido no meio."""
+    import threading
+
+    from app.core.database import Database
+    from app.core.repositories import ProdutoRepositorio
+    from app.scripts import enriquecer_banco as lote
+
+    nomes = {"CERVEJA SKOL 350ML": "Cerveja Skol 350ml",
+             "VINHO PERGOLA 1L": "Vinho Pergola 1L",
+             "VODKA ORLOFF 1L": "Vodka Orloff 1L"}
+    db = Database().init()
+    with db.Session() as s:
+        for bruto in nomes:
+            ProdutoRepositorio(s).importar(bruto)
+        s.commit()
+    db.engine.dispose()
+
+    logou = threading.Event()
+    placar = {"chamadas": 0, "log_antes_do_fim": []}
+
+    class _Motor(MotorIAFake):
+        def chat(self, mensagens, **kw):
+            placar["chamadas"] += 1
+            if placar["chamadas"] > 1:     # o 1º já tem de estar no log
+                placar["log_antes_do_fim"].append(logou.wait(5))
+            return super().chat(mensagens, **kw)
+
+    def _log(linha):
+        if linha.startswith("["):
+            logou.set()
+            if "Vinho" in linha:
+                raise KeyboardInterrupt     # o dono aperta Ctrl+C
+    monkeypatch.setattr(lote, "LOTE_GRAVACAO", 1)
+    # o selo +18 é o que muda (o nome sanitizado já era o mesmo)
+    motor = _Motor(respostas_chat={
+        b: f'{{"nome_sanitizado": "{n}", "mais18": true}}'
+        for b, n in nomes.items()})
+    with pytest.raises(KeyboardInterrupt):
+        lote.enriquecer_banco(motor, log=_log, em_voo=1)
+    assert placar["log_antes_do_fim"] and all(placar["log_antes_do_fim"])
+
+    db = Database().init()
+    with db.Session() as s:
+        com_selo = {p.nome_bruto for p in ProdutoRepositorio(s).listar()
+                    if p.selo_mais18}
+    db.engine.dispose()
+    # o que terminou ANTES do Vinho ficou no banco; o Vinho, não
+    assert com_selo and "VINHO PERGOLA 1L" not in com_selo
+
+
 # --- RG-23: categoria nasce com o produto ----------------------------------------------
 
 
@@ -76,3 +76,63 @@ def test_config_siglas_override(session):
     ConfigRepositorio(session).set("sanitizacao.siglas", ["ABC"])
     regras = regras_de_config(session)
     assert "ABC" in regras.siglas
+
+
+def test_alias_com_marcador_casa_pela_coluna_limpa(session):
+    from datetime import datetime
+
+    from app.core.models import ProdutoAlias
+
+    repo = ProdutoRepositorio(session)
+    velho = repo.importar("FIGADO BOVINO 100 g").produto
+    # alias herdado do OCR antigo, gravado com o marcador (por fora do repo)
+    session.add(ProdutoAlias(produto_id=velho.id, alias_raw="• FIGADO BOV 100G"))
+    session.commit()
+    assert repo.buscar_por_alias("▶ FIGADO BOV 100G").id == velho.id
+    assert repo.buscar_por_alias("FIGADO BOV 100G").id == velho.id
+    assert repo.buscar_por_alias("FIGADO BOV 200G") is None
+    # produto na lixeira não volta pelo alias limpo
+    velho.excluido_em = datetime.now()
+    session.commit()
+    assert repo.buscar_por_alias("FIGADO BOV 100G") is None
+
+
+def test_migracao_preenche_alias_limpo(tmp_path):
+    import sqlite3
+
+    raiz = SystemRoot(tmp_path / "raiz")
+    db = Database(raiz).init()
+    with db.Session() as s:
+        repo = ProdutoRepositorio(s)
+        pid = repo.importar("BOMBRIL 45 g").produto.id
+        repo.aprender_alias(pid, "BOMBRIL LA ACO 45G")
+        s.commit()
+    db.engine.dispose()
+    # fabrica um banco v4: sem a coluna nem o índice do alias limpo
+    con = sqlite3.connect(raiz.caminho_banco)
+    try:
+        con.execute("DROP INDEX IF EXISTS ix_produto_aliases_alias_limpo")
+        con.execute("ALTER TABLE produto_aliases DROP COLUMN alias_limpo")
+        con.execute("INSERT INTO produto_aliases (alias_raw, produto_id, "
+                    "confianca, overrides_json, usos) "
+                    "VALUES ('> BOMBRIL PCT 45G', ?, 1, '{}', 0)", (pid,))
+        con.execute("PRAGMA user_version = 4")
+        con.commit()
+    finally:
+        con.close()
+
+    db = Database(raiz).init()
+    try:
+        with db.engine.connect() as conn:
+            assert dict(conn.exec_driver_sql(
+                "SELECT alias_raw, alias_limpo FROM produto_aliases").all()) == {
+                "BOMBRIL 45 g": "BOMBRIL 45 g",
+                "BOMBRIL LA ACO 45G": "BOMBRIL LA ACO 45G",
+                "> BOMBRIL PCT 45G": "BOMBRIL PCT 45G"}
+            idx = {r[1] for r in conn.exec_driver_sql(
+                "PRAGMA index_list('produto_aliases')")}
+            assert "ix_produto_aliases_alias_limpo" in idx
+        with db.Session() as s:
+            assert ProdutoRepositorio(s).buscar_por_alias("BOMBRIL PCT 45G").id == pid
+    finally:
+        db.engine.dispose()
@@ -16,7 +16,7 @@ Testes L1 — todos vermelhos no código antigo.
 
 import pytest
 
-from app.core.database import Database
+from app.core.database import VERSAO_SCHEMA, Database
 from app.core.paths import SystemRoot
 from app.core.repositories import ProdutoRepositorio
 
@@ -60,7 +60,7 @@ def test_migracao_v2_para_v3(raiz):
                 "SELECT name FROM sqlite_master WHERE type='table'")}
             assert "familias_produto" in tabelas
             uv = conn.exec_driver_sql("PRAGMA user_version").scalar()
-            assert uv == 3
+            assert uv == VERSAO_SCHEMA
     finally:
         db.engine.dispose()
     from pathlib import Path
@@ -74,4 +74,8 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    # o export paralelo (``rendering.paralelo``) sobe processos "spawn":
+    # no executável congelado o filho precisa parar aqui, não abrir o app
+    import multiprocessing
+    multiprocessing.freeze_support()
     raise SystemExit(main())